@@ -1,6 +1,6 @@
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from jose import JWTError, jwt
+from jose import JWTError
 from pydantic import ValidationError
 from datetime import datetime
 from typing import Optional
@@ -8,23 +8,30 @@ from sqlalchemy.orm import Session
 from app.db.session import get_db
 from app.core.config import settings
 from app.core.auth import requires_auth
+from app.core.token_cache import token_cache
 from app.models.user import User
 from app.schemas.token import TokenPayload
+from app.services.password_service import password_service
+from app.services.principal_cache import Principal, principal_cache
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl=f"{settings.API_V1_STR}/auth/login")
 oauth2_scheme_optional = OAuth2PasswordBearer(tokenUrl=f"{settings.API_V1_STR}/auth/login", auto_error=False)
 
-async def get_current_user(
-    db: Session = Depends(get_db),
-    token: str = Depends(oauth2_scheme)
-) -> User:
+def _decode_token(token: str) -> TokenPayload:
     """
-    获取当前用户
+    解析并校验访问令牌，验证通过的令牌在有效期内缓存
+
+    Args:
+        token: 访问令牌
+
+    Returns:
+        令牌载荷
+
+    Raises:
+        HTTPException: 令牌过期、无效或缺少用户ID
     """
     try:
-        payload = jwt.decode(
-            token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM]
-        )
+        payload = token_cache.decode(token)
         token_data = TokenPayload(**payload)
         
         if token_data.exp < datetime.timestamp(datetime.now()):
@@ -34,15 +41,49 @@ async def get_current_user(
                 headers={"WWW-Authenticate": "Bearer"},
             )
     except (JWTError, ValidationError):
+        token_data = None
+        
+    if token_data is None or token_data.sub is None:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="无法验证凭证",
             headers={"WWW-Authenticate": "Bearer"},
         )
+    return token_data
+
+async def get_current_principal(
+    db: Session = Depends(get_db),
+    token: str = Depends(oauth2_scheme)
+) -> Principal:
+    """
+    获取当前用户快照（ID、状态、是否管理员）
+
+    快照按用户ID缓存，命中时不查询数据库。只用到用户ID或权限的接口使用此依赖。
+    """
+    token_data = _decode_token(token)
+    principal = principal_cache.get(db, token_data.sub)
+    
+    if not principal:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="用户不存在"
+        )
         
-    user = db.query(User).filter(User.id == token_data.sub).first()
+    return principal
+
+async def get_current_user(
+    db: Session = Depends(get_db),
+    principal: Principal = Depends(get_current_principal)
+) -> User:
+    """
+    获取当前用户
+
+    加载完整的用户对象，仅用于需要积分等可变字段的接口
+    """
+    user = db.query(User).filter(User.id == principal.id).first()
     
     if not user:
+        principal_cache.invalidate(principal.id)
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="用户不存在"
@@ -51,7 +92,7 @@ async def get_current_user(
     return user
 
 @requires_auth
-async def get_current_active_superuser(current_user: User = Depends(get_current_user)) -> User:
+async def get_current_active_superuser(current_user: Principal = Depends(get_current_principal)) -> Principal:
     """获取当前活跃的超级管理员用户"""
     if not current_user.is_superuser:
         raise HTTPException(
@@ -60,32 +101,54 @@ async def get_current_active_superuser(current_user: User = Depends(get_current_
         )
     return current_user
 
-async def get_optional_current_user(
+async def get_optional_principal(
     db: Session = Depends(get_db),
     token: str = Depends(oauth2_scheme_optional)
-) -> Optional[User]:
+) -> Optional[Principal]:
     """
-    获取可选的当前用户
+    获取可选的当前用户快照
     
-    与get_current_user的区别是，如果没有提供token或token无效，不会抛出异常，而是返回None
+    与get_current_principal的区别是，如果没有提供token或token无效，不会抛出异常，而是返回None
     """
     if not token:
         return None
         
     try:
-        payload = jwt.decode(
-            token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM]
-        )
-        token_data = TokenPayload(**payload)
-        
-        if token_data.exp < datetime.timestamp(datetime.now()):
-            return None
-    except (JWTError, ValidationError):
+        token_data = _decode_token(token)
+    except HTTPException:
         return None
         
-    user = db.query(User).filter(User.id == token_data.sub).first()
+    principal = principal_cache.get(db, token_data.sub)
     
-    if not user or not user.is_active:
+    if not principal or not principal.is_active:
         return None
         
-    return user
\ No newline at end of file
+    return principal
+
+async def authenticate_user(db: Session, username: str, password: str) -> Optional[User]:
+    """
+    验证用户名和密码
+
+    bcrypt计算在密码哈希线程池中执行，不阻塞事件循环；密码哈希的成本参数已调整时顺带升级哈希。
+
+    Args:
+        db: 数据库会话
+        username: 用户名
+        password: 明文密码
+
+    Returns:
+        验证通过的用户，用户不存在或密码错误时为None
+    """
+    user = db.query(User).filter(User.username == username).first()
+    if not user:
+        return None
+        
+    valid, new_hash = await password_service.verify_and_update(password, user.hashed_password)
+    if not valid:
+        return None
+        
+    if new_hash:
+        user.hashed_password = new_hash
+        db.commit()
+        
+    return user
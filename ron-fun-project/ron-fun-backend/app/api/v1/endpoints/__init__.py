@@ -1,16 +1,2 @@
-# API端点包 
-__all__ = ["auth", "users", "products", "lottery", "points", "applications", "banners", "files", "home", "admin"] 
-
-from app.api.v1.endpoints import (
-    auth,
-    users,
-    products,
-    lottery,
-    points,
-    applications,
-    banners,
-    files,
-    home,
-    admin,
-    health
-) 
\ No newline at end of file
+# API端点包（子模块按需导入，避免加载未挂载的端点）
+__all__ = ["auth", "products", "lottery", "applications", "banners", "files", "home", "admin", "health", "metrics"]
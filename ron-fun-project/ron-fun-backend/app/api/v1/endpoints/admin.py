@@ -1,20 +1,41 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query, Path, Request
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Path, Request, UploadFile, File
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
-from sqlalchemy import func, desc, and_, or_
+from sqlalchemy import desc, and_, or_
 from typing import List, Optional
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
 import json
 
 from app.api.deps import get_db, get_current_active_superuser
+from app.db.session import get_read_db
+from app.middleware.response import ApiJSONResponse
+from app.services.principal_cache import Principal, principal_cache
 from app.models.user import User
-from app.models.product import Product, ProductCategory, Order, OrderItem
+from app.models.product import Product, ProductCategory, Order, OrderItem, OrderEvent
 from app.models.application import Application, ApplicationClick
 from app.models.banner import Banner, BannerClick
 from app.schemas.user import UserResponse, UserUpdate, UserCreate
-from app.schemas.product import ProductResponse, ProductCreate, ProductUpdate, OrderResponse
+from app.schemas.product import (
+    ProductResponse, ProductCreate, ProductUpdate, OrderResponse,
+    OrderEventCreate, OrderEventResponse, ProductImportResult
+)
 from app.schemas.application import ApplicationResponse, ApplicationCreate, ApplicationUpdate, ApplicationClickResponse
 from app.schemas.banner import BannerResponse, BannerCreate, BannerUpdate, BannerClickResponse
 from app.schemas.common import PaginatedResponse, DateRangeParams
+from app.schemas.experiment import (
+    BannerExperimentCreate, BannerExperimentResponse, BannerExperimentStatusUpdate, BannerExperimentStats
+)
+from app.services.product_cache import product_listing_cache
+from app.services.product_bulk_service import product_bulk_service
+from app.services.banner_schedule import banner_schedule
+from app.services.home_feed_cache import home_feed_cache
+from app.services.order_service import order_service
+from app.services.banner_service import BannerService
+from app.services.application_service import ApplicationService
+from app.services.click_stats_service import click_stats_service, ENTITY_BANNER, ENTITY_APPLICATION
+from app.services.experiment_service import experiment_service
+from app.models.experiment import BannerExperiment
 
 router = APIRouter()
 
@@ -22,7 +43,7 @@ router = APIRouter()
 @router.get("/users", response_model=PaginatedResponse[UserResponse])
 async def get_users(
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_superuser),
+    current_user: Principal = Depends(get_current_active_superuser),
     skip: int = Query(0, ge=0),
     limit: int = Query(10, ge=1, le=100),
     search: Optional[str] = None,
@@ -50,18 +71,19 @@ async def get_users(
     # 分页查询
     users = query.order_by(User.created_at.desc()).offset(skip).limit(limit).all()
     
-    return {
-        "items": users,
+    # 直接返回响应：Pydantic模型由orjson编码，跳过 jsonable_encoder 逐字段转换
+    return ApiJSONResponse({
+        "items": [UserResponse.from_orm(user) for user in users],
         "total": total,
         "page": skip // limit + 1,
         "size": limit
-    }
+    })
 
 @router.get("/users/{user_id}", response_model=UserResponse)
 async def get_user(
     user_id: int = Path(..., gt=0),
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_superuser)
+    current_user: Principal = Depends(get_current_active_superuser)
 ):
     """获取用户详情"""
     user = db.query(User).filter(User.id == user_id).first()
@@ -77,7 +99,7 @@ async def update_user(
     user_update: UserUpdate,
     user_id: int = Path(..., gt=0),
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_superuser)
+    current_user: Principal = Depends(get_current_active_superuser)
 ):
     """更新用户信息"""
     user = db.query(User).filter(User.id == user_id).first()
@@ -92,6 +114,7 @@ async def update_user(
     
     db.commit()
     db.refresh(user)
+    principal_cache.invalidate(user.id)
     return user
 
 @router.put("/users/{user_id}/points", response_model=UserResponse)
@@ -100,7 +123,7 @@ async def adjust_user_points(
     points: int = Query(..., description="积分调整数量，正数为增加，负数为减少"),
     reason: str = Query(..., description="积分调整原因"),
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_superuser)
+    current_user: Principal = Depends(get_current_active_superuser)
 ):
     """调整用户积分"""
     user = db.query(User).filter(User.id == user_id).first()
@@ -139,7 +162,7 @@ async def adjust_user_points(
 @router.get("/products", response_model=PaginatedResponse[ProductResponse])
 async def get_products(
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_superuser),
+    current_user: Principal = Depends(get_current_active_superuser),
     skip: int = Query(0, ge=0),
     limit: int = Query(10, ge=1, le=100),
     search: Optional[str] = None,
@@ -172,11 +195,37 @@ async def get_products(
         "size": limit
     }
 
+@router.post("/products/import", response_model=ProductImportResult)
+async def import_products(
+    file: UploadFile = File(...),
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_active_superuser)
+):
+    """批量导入商品（CSV/XLSX），带id列的行更新已有商品"""
+    # 大文件解析和写入较慢，放到线程池中执行，避免阻塞事件循环
+    return await run_in_threadpool(
+        product_bulk_service.import_products, db, file.file, file.filename
+    )
+
+@router.get("/products/export")
+async def export_products(
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_active_superuser),
+    category_id: Optional[int] = None
+):
+    """流式导出商品CSV"""
+    filename = f"products_{datetime.now().strftime('%Y%m%d%H%M%S')}.csv"
+    return StreamingResponse(
+        product_bulk_service.export_csv(db, category_id),
+        media_type="text/csv; charset=utf-8",
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
 @router.get("/products/{product_id}", response_model=ProductResponse)
 async def get_product(
     product_id: int = Path(..., gt=0),
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_superuser)
+    current_user: Principal = Depends(get_current_active_superuser)
 ):
     """获取商品详情"""
     product = db.query(Product).filter(Product.id == product_id).first()
@@ -191,7 +240,7 @@ async def get_product(
 async def create_product(
     product_create: ProductCreate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_superuser)
+    current_user: Principal = Depends(get_current_active_superuser)
 ):
     """创建商品"""
     # 检查分类是否存在
@@ -206,6 +255,7 @@ async def create_product(
     db.add(product)
     db.commit()
     db.refresh(product)
+    product_listing_cache.invalidate(product.id, product_listing_cache.facets_of(product))
     return product
 
 @router.put("/products/{product_id}", response_model=ProductResponse)
@@ -213,7 +263,7 @@ async def update_product(
     product_update: ProductUpdate,
     product_id: int = Path(..., gt=0),
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_superuser)
+    current_user: Principal = Depends(get_current_active_superuser)
 ):
     """更新商品"""
     product = db.query(Product).filter(Product.id == product_id).first()
@@ -232,45 +282,32 @@ async def update_product(
                 detail="分类不存在"
             )
     
+    old_facets = product_listing_cache.facets_of(product)
     for field, value in product_update.dict(exclude_unset=True).items():
         setattr(product, field, value)
     
     db.commit()
     db.refresh(product)
+    product_listing_cache.invalidate(
+        product.id, old_facets | product_listing_cache.facets_of(product)
+    )
     return product
 
 @router.get("/orders", response_model=PaginatedResponse[OrderResponse])
 async def get_orders(
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_superuser),
+    current_user: Principal = Depends(get_current_active_superuser),
     skip: int = Query(0, ge=0),
     limit: int = Query(10, ge=1, le=100),
     user_id: Optional[int] = None,
-    status: Optional[str] = None,
+    status: Optional[int] = None,
     start_date: Optional[datetime] = None,
     end_date: Optional[datetime] = None
 ):
     """获取订单列表"""
-    query = db.query(Order)
-    
-    # 应用过滤条件
-    if user_id:
-        query = query.filter(Order.user_id == user_id)
-    
-    if status:
-        query = query.filter(Order.status == status)
-    
-    if start_date:
-        query = query.filter(Order.created_at >= start_date)
-    
-    if end_date:
-        query = query.filter(Order.created_at <= end_date)
-    
-    # 获取总数
-    total = query.count()
-    
-    # 分页查询
-    orders = query.order_by(Order.created_at.desc()).offset(skip).limit(limit).all()
+    orders, total = order_service.get_orders(
+        db, skip, limit, user_id, status, start_date, end_date
+    )
     
     return {
         "items": orders,
@@ -279,11 +316,46 @@ async def get_orders(
         "size": limit
     }
 
+@router.post(
+    "/orders/{order_id}/events",
+    response_model=OrderEventResponse,
+    status_code=status.HTTP_202_ACCEPTED
+)
+async def create_order_event(
+    event_in: OrderEventCreate,
+    order_id: int = Path(..., gt=0),
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_active_superuser)
+):
+    """提交订单状态变更（确认、发货、更新物流、完成、取消），由后台工作线程异步处理"""
+    order = db.query(Order).filter(Order.id == order_id).first()
+    if not order:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="订单不存在"
+        )
+    
+    payload = event_in.dict(exclude={"event_type"}, exclude_none=True)
+    # 事件记录操作人昵称，需要完整的用户对象
+    operator = db.query(User).filter(User.id == current_user.id).first()
+    return order_service.enqueue_event(db, order, event_in.event_type, payload, operator)
+
+@router.get("/orders/{order_id}/events", response_model=List[OrderEventResponse])
+async def get_order_events(
+    order_id: int = Path(..., gt=0),
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_active_superuser)
+):
+    """获取订单事件处理记录"""
+    return db.query(OrderEvent).filter(
+        OrderEvent.order_id == order_id
+    ).order_by(OrderEvent.id.desc()).all()
+
 # ------------------- 应用管理 -------------------
 @router.get("/applications", response_model=PaginatedResponse[ApplicationResponse])
 async def get_applications(
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_superuser),
+    current_user: Principal = Depends(get_current_active_superuser),
     skip: int = Query(0, ge=0),
     limit: int = Query(10, ge=1, le=100),
     search: Optional[str] = None,
@@ -316,7 +388,7 @@ async def get_applications(
 async def get_application(
     application_id: int = Path(..., gt=0),
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_superuser)
+    current_user: Principal = Depends(get_current_active_superuser)
 ):
     """获取应用详情"""
     application = db.query(Application).filter(Application.id == application_id).first()
@@ -331,13 +403,14 @@ async def get_application(
 async def create_application(
     application_create: ApplicationCreate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_superuser)
+    current_user: Principal = Depends(get_current_active_superuser)
 ):
     """创建应用"""
     application = Application(**application_create.dict())
     db.add(application)
     db.commit()
     db.refresh(application)
+    home_feed_cache.invalidate()
     return application
 
 @router.put("/applications/{application_id}", response_model=ApplicationResponse)
@@ -345,7 +418,7 @@ async def update_application(
     application_update: ApplicationUpdate,
     application_id: int = Path(..., gt=0),
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_superuser)
+    current_user: Principal = Depends(get_current_active_superuser)
 ):
     """更新应用"""
     application = db.query(Application).filter(Application.id == application_id).first()
@@ -360,13 +433,14 @@ async def update_application(
     
     db.commit()
     db.refresh(application)
+    home_feed_cache.invalidate()
     return application
 
 @router.get("/applications/{application_id}/clicks", response_model=PaginatedResponse[ApplicationClickResponse])
 async def get_application_clicks(
     application_id: int = Path(..., gt=0),
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_superuser),
+    db: Session = Depends(get_read_db),
+    current_user: Principal = Depends(get_current_active_superuser),
     skip: int = Query(0, ge=0),
     limit: int = Query(10, ge=1, le=100),
     start_date: Optional[datetime] = None,
@@ -403,50 +477,36 @@ async def get_application_clicks(
         "size": limit
     }
 
+@router.get("/applications/{application_id}/uv", response_model=dict)
+async def get_application_unique_visitors(
+    application_id: int = Path(..., gt=0),
+    db: Session = Depends(get_read_db),
+    current_user: Principal = Depends(get_current_active_superuser),
+    start_date: Optional[date] = Query(None, description="开始日期，默认最近7天"),
+    end_date: Optional[date] = Query(None, description="结束日期，默认今天")
+):
+    """获取应用独立访客数（HyperLogLog估算，误差约1%）"""
+    end_date = end_date or date.today()
+    start_date = start_date or end_date - timedelta(days=6)
+    return click_stats_service.get_unique_visitors(
+        db, ENTITY_APPLICATION, application_id, start_date, end_date
+    )
+
 @router.get("/applications/statistics", response_model=List[dict])
 async def get_application_statistics(
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_superuser),
+    db: Session = Depends(get_read_db),
+    current_user: Principal = Depends(get_current_active_superuser),
     days: int = Query(7, ge=1, le=30),
 ):
     """获取应用点击统计数据（按应用和日期分组）"""
-    # 计算日期范围
-    end_date = datetime.now()
-    start_date = end_date - timedelta(days=days)
-    
-    # 查询每个应用每天的点击次数
-    result = db.query(
-        ApplicationClick.application_id,
-        func.date(ApplicationClick.created_at).label("date"),
-        func.count().label("count")
-    ).filter(
-        ApplicationClick.created_at.between(start_date, end_date)
-    ).group_by(
-        ApplicationClick.application_id,
-        func.date(ApplicationClick.created_at)
-    ).all()
-    
-    # 查询所有应用信息以获取名称
-    applications = {app.id: app.name for app in db.query(Application.id, Application.name).all()}
-    
-    # 构建响应数据
-    statistics = [
-        {
-            "application_id": item.application_id,
-            "application_name": applications.get(item.application_id, "未知应用"),
-            "date": item.date.strftime("%Y-%m-%d"),
-            "count": item.count
-        }
-        for item in result
-    ]
-    
-    return statistics
+    # 读取点击日汇总表
+    return ApplicationService.get_application_statistics(db, days)
 
 # ------------------- Banner管理 -------------------
 @router.get("/banners", response_model=PaginatedResponse[BannerResponse])
 async def get_banners(
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_superuser),
+    current_user: Principal = Depends(get_current_active_superuser),
     skip: int = Query(0, ge=0),
     limit: int = Query(10, ge=1, le=100),
     search: Optional[str] = None,
@@ -483,7 +543,7 @@ async def get_banners(
 async def get_banner(
     banner_id: int = Path(..., gt=0),
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_superuser)
+    current_user: Principal = Depends(get_current_active_superuser)
 ):
     """获取Banner详情"""
     banner = db.query(Banner).filter(Banner.id == banner_id).first()
@@ -498,13 +558,15 @@ async def get_banner(
 async def create_banner(
     banner_create: BannerCreate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_superuser)
+    current_user: Principal = Depends(get_current_active_superuser)
 ):
     """创建Banner"""
     banner = Banner(**banner_create.dict())
     db.add(banner)
     db.commit()
     db.refresh(banner)
+    banner_schedule.invalidate()
+    home_feed_cache.invalidate()
     return banner
 
 @router.put("/banners/{banner_id}", response_model=BannerResponse)
@@ -512,7 +574,7 @@ async def update_banner(
     banner_update: BannerUpdate,
     banner_id: int = Path(..., gt=0),
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_superuser)
+    current_user: Principal = Depends(get_current_active_superuser)
 ):
     """更新Banner"""
     banner = db.query(Banner).filter(Banner.id == banner_id).first()
@@ -527,13 +589,15 @@ async def update_banner(
     
     db.commit()
     db.refresh(banner)
+    banner_schedule.invalidate()
+    home_feed_cache.invalidate()
     return banner
 
 @router.get("/banners/{banner_id}/clicks", response_model=PaginatedResponse[BannerClickResponse])
 async def get_banner_clicks(
     banner_id: int = Path(..., gt=0),
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_superuser),
+    db: Session = Depends(get_read_db),
+    current_user: Principal = Depends(get_current_active_superuser),
     skip: int = Query(0, ge=0),
     limit: int = Query(10, ge=1, le=100),
     start_date: Optional[datetime] = None,
@@ -572,39 +636,69 @@ async def get_banner_clicks(
 
 @router.get("/banners/statistics", response_model=List[dict])
 async def get_banner_statistics(
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_superuser),
+    db: Session = Depends(get_read_db),
+    current_user: Principal = Depends(get_current_active_superuser),
     days: int = Query(7, ge=1, le=30),
 ):
     """获取Banner点击统计数据（按Banner和日期分组）"""
-    # 计算日期范围
-    end_date = datetime.now()
-    start_date = end_date - timedelta(days=days)
-    
-    # 查询每个Banner每天的点击次数
-    result = db.query(
-        BannerClick.banner_id,
-        func.date(BannerClick.created_at).label("date"),
-        func.count().label("count")
-    ).filter(
-        BannerClick.created_at.between(start_date, end_date)
-    ).group_by(
-        BannerClick.banner_id,
-        func.date(BannerClick.created_at)
-    ).all()
-    
-    # 查询所有Banner信息以获取标题
-    banners = {banner.id: banner.title for banner in db.query(Banner.id, Banner.title).all()}
-    
-    # 构建响应数据
-    statistics = [
-        {
-            "banner_id": item.banner_id,
-            "banner_title": banners.get(item.banner_id, "未知Banner"),
-            "date": item.date.strftime("%Y-%m-%d"),
-            "count": item.count
-        }
-        for item in result
-    ]
-    
-    return statistics 
\ No newline at end of file
+    # 读取点击日汇总表
+    return BannerService.get_banner_statistics(db, days)
+
+@router.get("/banners/{banner_id}/uv", response_model=dict)
+async def get_banner_unique_visitors(
+    banner_id: int = Path(..., gt=0),
+    db: Session = Depends(get_read_db),
+    current_user: Principal = Depends(get_current_active_superuser),
+    start_date: Optional[date] = Query(None, description="开始日期，默认最近7天"),
+    end_date: Optional[date] = Query(None, description="结束日期，默认今天")
+):
+    """获取Banner独立访客数（HyperLogLog估算，误差约1%）"""
+    end_date = end_date or date.today()
+    start_date = start_date or end_date - timedelta(days=6)
+    return click_stats_service.get_unique_visitors(
+        db, ENTITY_BANNER, banner_id, start_date, end_date
+    )
+
+# ------------------- Banner实验 -------------------
+@router.get("/banner-experiments", response_model=List[BannerExperimentResponse])
+async def get_banner_experiments(
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_active_superuser),
+    position: Optional[str] = None,
+    status: Optional[str] = None
+):
+    """获取Banner实验列表"""
+    query = db.query(BannerExperiment).filter(BannerExperiment.is_deleted == False)
+    if position:
+        query = query.filter(BannerExperiment.position == position)
+    if status:
+        query = query.filter(BannerExperiment.status == status)
+    return query.order_by(BannerExperiment.id.desc()).all()
+
+@router.post("/banner-experiments", response_model=BannerExperimentResponse)
+async def create_banner_experiment(
+    experiment_create: BannerExperimentCreate,
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_active_superuser)
+):
+    """创建Banner实验（草稿状态，第一个变体为对照组）"""
+    return experiment_service.create_experiment(db, experiment_create)
+
+@router.put("/banner-experiments/{experiment_id}/status", response_model=BannerExperimentResponse)
+async def update_banner_experiment_status(
+    status_update: BannerExperimentStatusUpdate,
+    experiment_id: int = Path(..., gt=0),
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_active_superuser)
+):
+    """开始或停止Banner实验"""
+    return experiment_service.update_status(db, experiment_id, status_update.status)
+
+@router.get("/banner-experiments/{experiment_id}/stats", response_model=BannerExperimentStats)
+async def get_banner_experiment_stats(
+    experiment_id: int = Path(..., gt=0),
+    db: Session = Depends(get_read_db),
+    current_user: Principal = Depends(get_current_active_superuser)
+):
+    """获取Banner实验统计（各变体点击率及相对对照组的显著性）"""
+    return experiment_service.get_stats(db, experiment_id)
@@ -3,12 +3,14 @@ from sqlalchemy.orm import Session
 from typing import List, Optional
 from datetime import datetime
 
-from app.api.deps import get_db, get_current_active_superuser, get_current_user, get_optional_current_user
-from app.models.user import User
+from app.api.deps import get_db, get_current_active_superuser, get_optional_principal
+from app.services.principal_cache import Principal
 from app.models.application import Application
 from app.schemas.application import ApplicationResponse, ApplicationCreate, ApplicationUpdate
 from app.schemas.common import ApiResponse
 from app.services.application_service import ApplicationService
+from app.services.home_feed_cache import home_feed_cache
+from app.services.click_buffer import click_buffer, ENTITY_APPLICATION
 
 router = APIRouter()
 
@@ -47,13 +49,14 @@ async def get_application(
 async def create_application(
     application_create: ApplicationCreate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_superuser)
+    current_user: Principal = Depends(get_current_active_superuser)
 ):
     """创建应用（仅管理员）"""
     application = Application(**application_create.dict())
     db.add(application)
     db.commit()
     db.refresh(application)
+    home_feed_cache.invalidate()
     return application
 
 @router.put("/{application_id}", response_model=ApplicationResponse)
@@ -61,7 +64,7 @@ async def update_application(
     application_update: ApplicationUpdate,
     application_id: int = Path(..., gt=0),
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_superuser)
+    current_user: Principal = Depends(get_current_active_superuser)
 ):
     """更新应用（仅管理员）"""
     application = db.query(Application).filter(Application.id == application_id).first()
@@ -76,13 +79,14 @@ async def update_application(
     
     db.commit()
     db.refresh(application)
+    home_feed_cache.invalidate()
     return application
 
 @router.delete("/{application_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_application(
     application_id: int = Path(..., gt=0),
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_superuser)
+    current_user: Principal = Depends(get_current_active_superuser)
 ):
     """删除应用（仅管理员）"""
     application = db.query(Application).filter(Application.id == application_id).first()
@@ -97,6 +101,7 @@ async def delete_application(
     application.deleted_at = datetime.now()
     
     db.commit()
+    home_feed_cache.invalidate()
     
     return None
 
@@ -107,7 +112,8 @@ async def record_application_view(
 ):
     """记录应用被浏览"""
     try:
-        ApplicationService.record_application_view(db, application_id)
+        # 浏览计数写入缓冲区，由后台线程批量写库
+        click_buffer.record_view(ENTITY_APPLICATION, application_id)
         return {"code": 200, "message": "success", "data": None}
     except HTTPException as e:
         return {"code": e.status_code, "message": e.detail, "data": None}
@@ -119,7 +125,7 @@ async def record_application_click(
     request: Request,
     application_id: int = Path(..., gt=0),
     db: Session = Depends(get_db),
-    current_user: Optional[User] = Depends(get_optional_current_user)
+    current_user: Optional[Principal] = Depends(get_optional_principal)
 ):
     """记录应用被点击"""
     try:
@@ -128,25 +134,13 @@ async def record_application_click(
         ip_address = request.client.host if hasattr(request.client, "host") else None
         user_agent = request.headers.get("user-agent")
         
-        # 根据User-Agent判断设备类型（简化版）
-        device_type = "unknown"
-        if user_agent:
-            user_agent_lower = user_agent.lower()
-            if "mobile" in user_agent_lower or "android" in user_agent_lower or "iphone" in user_agent_lower:
-                device_type = "mobile"
-            elif "tablet" in user_agent_lower or "ipad" in user_agent_lower:
-                device_type = "tablet"
-            else:
-                device_type = "desktop"
-        
-        # 记录点击
-        ApplicationService.record_application_click(
-            db, 
-            application_id, 
+        # 记录点击（写入缓冲区，由后台线程批量写库）
+        click_buffer.record_click(
+            ENTITY_APPLICATION,
+            application_id,
             user_id=user_id, 
             ip_address=ip_address, 
-            user_agent=user_agent, 
-            device_type=device_type
+            user_agent=user_agent
         )
         
         return {"code": 200, "message": "success", "data": None}
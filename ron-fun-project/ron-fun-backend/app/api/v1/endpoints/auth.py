@@ -5,11 +5,12 @@ from sqlalchemy.orm import Session
 
 from app.api.deps import authenticate_user, get_current_user
 from app.core.config import settings
-from app.core.security import create_access_token, get_password_hash
+from app.core.security import create_access_token
 from app.db.session import get_db
 from app.models.user import User
 from app.schemas.token import Token
 from app.schemas.user import UserCreate, UserResponse
+from app.services.password_service import password_service
 
 router = APIRouter()
 
@@ -31,7 +32,7 @@ async def login_for_access_token(
     Raises:
         HTTPException: 如果认证失败
     """
-    user = authenticate_user(db, form_data.username, form_data.password)
+    user = await authenticate_user(db, form_data.username, form_data.password)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -96,7 +97,7 @@ async def register_user(
         username=user_in.username,
         email=user_in.email,
         phone=user_in.phone,
-        hashed_password=get_password_hash(user_in.password),
+        hashed_password=await password_service.hash(user_in.password),
         nickname=user_in.nickname,
         avatar=user_in.avatar,
         bio=user_in.bio
@@ -3,12 +3,16 @@ from sqlalchemy.orm import Session
 from typing import List, Optional
 from datetime import datetime
 
-from app.api.deps import get_db, get_current_active_superuser, get_current_user, get_optional_current_user
-from app.models.user import User
+from app.api.deps import get_db, get_current_active_superuser, get_optional_principal
+from app.services.principal_cache import Principal
 from app.models.banner import Banner
 from app.schemas.banner import BannerResponse, BannerCreate, BannerUpdate
 from app.schemas.common import ApiResponse
 from app.services.banner_service import BannerService
+from app.services.banner_schedule import banner_schedule
+from app.services.home_feed_cache import home_feed_cache
+from app.services.click_buffer import click_buffer, ENTITY_BANNER
+from app.services.experiment_service import experiment_service
 
 router = APIRouter()
 
@@ -47,13 +51,15 @@ async def get_banner(
 async def create_banner(
     banner_create: BannerCreate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_superuser)
+    current_user: Principal = Depends(get_current_active_superuser)
 ):
     """创建Banner（仅管理员）"""
     banner = Banner(**banner_create.dict())
     db.add(banner)
     db.commit()
     db.refresh(banner)
+    banner_schedule.invalidate()
+    home_feed_cache.invalidate()
     return banner
 
 @router.put("/{banner_id}", response_model=BannerResponse)
@@ -61,7 +67,7 @@ async def update_banner(
     banner_update: BannerUpdate,
     banner_id: int = Path(..., gt=0),
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_superuser)
+    current_user: Principal = Depends(get_current_active_superuser)
 ):
     """更新Banner（仅管理员）"""
     banner = db.query(Banner).filter(Banner.id == banner_id).first()
@@ -76,13 +82,15 @@ async def update_banner(
     
     db.commit()
     db.refresh(banner)
+    banner_schedule.invalidate()
+    home_feed_cache.invalidate()
     return banner
 
 @router.delete("/{banner_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_banner(
     banner_id: int = Path(..., gt=0),
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_superuser)
+    current_user: Principal = Depends(get_current_active_superuser)
 ):
     """删除Banner（仅管理员）"""
     banner = db.query(Banner).filter(Banner.id == banner_id).first()
@@ -97,6 +105,8 @@ async def delete_banner(
     banner.deleted_at = datetime.now()
     
     db.commit()
+    banner_schedule.invalidate()
+    home_feed_cache.invalidate()
     
     return None
 
@@ -107,7 +117,8 @@ async def record_banner_view(
 ):
     """记录Banner被浏览"""
     try:
-        BannerService.record_banner_view(db, banner_id)
+        # 浏览计数写入缓冲区，由后台线程批量写库
+        click_buffer.record_view(ENTITY_BANNER, banner_id)
         return {"code": 200, "message": "success", "data": None}
     except HTTPException as e:
         return {"code": e.status_code, "message": e.detail, "data": None}
@@ -119,7 +130,7 @@ async def record_banner_click(
     request: Request,
     banner_id: int = Path(..., gt=0),
     db: Session = Depends(get_db),
-    current_user: Optional[User] = Depends(get_optional_current_user)
+    current_user: Optional[Principal] = Depends(get_optional_principal)
 ):
     """记录Banner被点击"""
     try:
@@ -128,26 +139,15 @@ async def record_banner_click(
         ip_address = request.client.host if hasattr(request.client, "host") else None
         user_agent = request.headers.get("user-agent")
         
-        # 根据User-Agent判断设备类型（简化版）
-        device_type = "unknown"
-        if user_agent:
-            user_agent_lower = user_agent.lower()
-            if "mobile" in user_agent_lower or "android" in user_agent_lower or "iphone" in user_agent_lower:
-                device_type = "mobile"
-            elif "tablet" in user_agent_lower or "ipad" in user_agent_lower:
-                device_type = "tablet"
-            else:
-                device_type = "desktop"
-        
-        # 记录点击
-        BannerService.record_banner_click(
-            db, 
-            banner_id, 
+        # 记录点击（写入缓冲区，由后台线程批量写库）
+        click_buffer.record_click(
+            ENTITY_BANNER,
+            banner_id,
             user_id=user_id, 
             ip_address=ip_address, 
-            user_agent=user_agent, 
-            device_type=device_type
+            user_agent=user_agent
         )
+        experiment_service.record_click(db, banner_id, user_id)
         
         return {"code": 200, "message": "success", "data": None}
     except HTTPException as e:
@@ -3,8 +3,8 @@ from fastapi import APIRouter, Depends, UploadFile, File, HTTPException, status
 from fastapi.responses import FileResponse
 from typing import List
 
-from app.api.deps import get_current_user, get_current_active_superuser
-from app.models.user import User
+from app.api.deps import get_current_active_superuser, get_current_principal
+from app.services.principal_cache import Principal
 from app.services.file_storage import file_storage_service
 from app.core.config import settings
 
@@ -13,7 +13,7 @@ router = APIRouter()
 @router.post("/upload/image", summary="上传图片")
 async def upload_image(
     file: UploadFile = File(...),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_principal)
 ):
     """
     上传图片文件
@@ -31,7 +31,7 @@ async def upload_image(
 @router.post("/upload/document", summary="上传文档")
 async def upload_document(
     file: UploadFile = File(...),
-    current_user: User = Depends(get_current_active_superuser)
+    current_user: Principal = Depends(get_current_active_superuser)
 ):
     """
     上传文档文件(仅限管理员)
@@ -49,7 +49,7 @@ async def upload_document(
 @router.delete("/{file_path:path}", summary="删除文件")
 async def delete_file(
     file_path: str,
-    current_user: User = Depends(get_current_active_superuser)
+    current_user: Principal = Depends(get_current_active_superuser)
 ):
     """
     删除文件(仅限管理员)
@@ -1,16 +1,20 @@
-from fastapi import APIRouter, Depends, Request
+from fastapi import APIRouter, Depends, Request, Response, status
+from sqlalchemy import func, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.db.session import get_db
+from app.core.token_cache import token_cache
+from app.db.pool_metrics import pool_metrics
+from app.db.session import get_async_db
 from app.models.application import Application
 from app.models.user import User
 from app.models.product import Product
+from app.services.cache_warmup import cache_warmup
 
 router = APIRouter()
 
 
 @router.get("/")
-async def health_check(request: Request, db: AsyncSession = Depends(get_db)):
+async def health_check(request: Request, db: AsyncSession = Depends(get_async_db)):
     """
     健康检查端点，返回应用程序状态和基本统计信息
     """
@@ -20,19 +24,22 @@ async def health_check(request: Request, db: AsyncSession = Depends(get_db)):
     
     try:
         # 获取基本统计数据
-        user_count = await db.execute(User.count())
+        user_count = await db.execute(select(func.count()).select_from(User))
         stats["user_count"] = user_count.scalar() or 0
         
-        product_count = await db.execute(Product.count())
+        product_count = await db.execute(select(func.count()).select_from(Product))
         stats["product_count"] = product_count.scalar() or 0
         
-        app_count = await db.execute(Application.count())
+        app_count = await db.execute(select(func.count()).select_from(Application))
         stats["application_count"] = app_count.scalar() or 0
         
     except Exception as e:
         db_status = False
         stats["error"] = str(e)
     
+    # 令牌验证缓存命中率
+    stats["token_cache_hit_ratio"] = round(token_cache.hit_ratio, 4)
+    
     # 构建响应
     return {
         "status": "healthy" if db_status else "unhealthy",
@@ -47,4 +54,28 @@ async def ping():
     """
     简单的ping检查，用于负载均衡器健康检查
     """
-    return {"ping": "pong"} 
\ No newline at end of file
+    return {"ping": "pong"}
+
+
+@router.get("/ready")
+async def readiness(response: Response):
+    """
+    就绪检查，启动预热完成后才返回200，用于负载均衡器判断是否转发流量
+    """
+    if not cache_warmup.ready:
+        response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+        return {"ready": False}
+    
+    return {
+        "ready": True,
+        "warmup_seconds": round(cache_warmup.duration, 3) if cache_warmup.duration is not None else None,
+        "warmup_failed": cache_warmup.failed
+    }
+
+
+@router.get("/pool")
+async def pool_status():
+    """
+    数据库连接池状态：已借出/溢出连接数、获取连接等待耗时分布、超时次数
+    """
+    return pool_metrics.snapshot()
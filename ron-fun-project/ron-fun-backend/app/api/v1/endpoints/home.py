@@ -1,10 +1,11 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query, Request
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request, Response
 from typing import List, Optional
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from app.db.session import get_db
-from app.api.deps import get_current_user, get_current_active_superuser, get_optional_current_user
-from app.models.user import User
+from app.db.session import get_db, get_async_read_db
+from app.api.deps import get_current_active_superuser, get_optional_principal
+from app.services.principal_cache import Principal
 from app.models.banner import Banner
 from app.models.application import Application
 from app.schemas.home import (
@@ -12,21 +13,34 @@ from app.schemas.home import (
     BannerCreate, BannerUpdate, ApplicationCreate, ApplicationUpdate
 )
 from app.services.home_service import home_service
+from app.services.banner_schedule import banner_schedule
+from app.services.home_feed_cache import home_feed_cache, etag_matches
+from app.services.app_recommendation_service import app_recommendation_service
+from app.services.experiment_service import experiment_service
+from app.services.click_buffer import click_buffer, ENTITY_BANNER, ENTITY_APPLICATION
 from app.core.config import settings
+from app.middleware.response import api_envelope_body
 
 router = APIRouter()
 
 # 首页数据接口
 @router.get("", response_model=HomeDataResponse, summary="获取首页数据")
 async def get_home_data(
+    request: Request,
     position: str = "home",
     db: Session = Depends(get_db),
-    current_user: Optional[User] = Depends(get_optional_current_user)
+    current_user: Optional[Principal] = Depends(get_optional_principal)
 ):
     """
     获取首页数据，包括Banner和应用列表
     
+    首页数据直接使用缓存中已序列化的响应体；登录用户有离线计算的个性化结果时，
+    按偏好重新拼接应用顺序，否则保持全局排序。有进行中的Banner实验时，
+    每个实验只展示用户所在变体的Banner，并记录变体曝光。
+    客户端携带的 If-None-Match 与当前ETag一致时返回304。
+    
     Args:
+        request: 请求对象
         position: 展示位置，默认首页
         db: 数据库会话
         current_user: 当前用户（可选）
@@ -34,17 +48,24 @@ async def get_home_data(
     Returns:
         首页数据
     """
-    # 获取Banner列表
-    banners = home_service.get_banners(db, position)
+    feed = home_feed_cache.get(db, position)
+    body, etag = feed.body, feed.etag
+    user_id = current_user.id if current_user else None
+    
+    application_ids = app_recommendation_service.rank(user_id, feed.application_ids)
+    banner_ids, variant_ids = experiment_service.select_banners(db, position, feed.banner_ids, user_id)
+    experiment_service.record_impressions(variant_ids)
     
-    # 获取应用列表
-    applications = home_service.get_applications(db, position)
+    if tuple(application_ids) != feed.application_ids or tuple(banner_ids) != feed.banner_ids:
+        body, etag = feed.render(application_ids, banner_ids)
     
-    # 组装响应数据
-    return {
-        "banners": banners,
-        "applications": applications
-    }
+    headers = {"ETag": etag, "Cache-Control": "no-cache", "Vary": "Authorization"}
+    
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    
+    # 缓存的响应体已是JSON，直接拼接统一响应格式
+    return Response(content=api_envelope_body(body), media_type="application/json", headers=headers)
 
 # Banner相关接口
 @router.get("/banners", response_model=List[BannerResponse], summary="获取Banner列表")
@@ -53,7 +74,7 @@ async def get_banners(
     skip: int = 0,
     limit: int = 10,
     db: Session = Depends(get_db),
-    current_user: Optional[User] = Depends(get_optional_current_user),
+    current_user: Optional[Principal] = Depends(get_optional_principal),
     device_type: str = Query("mobile", description="设备类型: mobile, desktop"),
     request: Request = None
 ):
@@ -72,19 +93,27 @@ async def get_banners(
     Returns:
         Banner列表
     """
-    banner_service = BannerService(db)
-    # 记录Banner展示
-    banners = banner_service.get_active_banners(device_type, position)
-    if request:
-        for banner in banners:
-            banner_service.record_banner_view(banner.id, request)
+    banners = home_service.get_banners(db, position, skip, limit)
+    
+    # 进行中的Banner实验只展示用户所在变体
+    user_id = current_user.id if current_user else None
+    banner_ids, variant_ids = experiment_service.select_banners(
+        db, position, [banner.id for banner in banners], user_id
+    )
+    experiment_service.record_impressions(variant_ids)
+    shown = set(banner_ids)
+    banners = [banner for banner in banners if banner.id in shown]
+    
+    # 记录Banner展示（批量写库）
+    for banner in banners:
+        click_buffer.record_view(ENTITY_BANNER, banner.id)
     return banners
 
 @router.get("/banners/{banner_id}", response_model=BannerResponse, summary="获取Banner详情")
 async def get_banner(
     banner_id: int,
-    db: Session = Depends(get_db),
-    current_user: Optional[User] = Depends(get_optional_current_user)
+    db: AsyncSession = Depends(get_async_read_db),
+    current_user: Optional[Principal] = Depends(get_optional_principal)
 ):
     """
     获取Banner详情
@@ -97,10 +126,9 @@ async def get_banner(
     Returns:
         Banner详情
     """
-    banner = home_service.get_banner(db, banner_id)
-    # 增加浏览次数
-    banner.view_count += 1
-    db.commit()
+    banner = await home_service.get_banner_async(db, banner_id)
+    # 增加浏览次数（批量写库）
+    click_buffer.record_view(ENTITY_BANNER, banner_id)
     
     return banner
 
@@ -109,7 +137,7 @@ async def record_banner_click(
     banner_id: int,
     request: Request,
     db: Session = Depends(get_db),
-    current_user: Optional[User] = Depends(get_optional_current_user)
+    current_user: Optional[Principal] = Depends(get_optional_principal)
 ):
     """
     记录Banner点击
@@ -130,7 +158,7 @@ async def record_banner_click(
 async def create_banner(
     banner_in: BannerCreate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_superuser)
+    current_user: Principal = Depends(get_current_active_superuser)
 ):
     """
     创建Banner（仅限管理员）
@@ -148,6 +176,8 @@ async def create_banner(
     db.add(banner)
     db.commit()
     db.refresh(banner)
+    banner_schedule.invalidate()
+    home_feed_cache.invalidate()
     
     return banner
 
@@ -156,7 +186,7 @@ async def update_banner(
     banner_id: int,
     banner_in: BannerUpdate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_superuser)
+    current_user: Principal = Depends(get_current_active_superuser)
 ):
     """
     更新Banner（仅限管理员）
@@ -180,6 +210,8 @@ async def update_banner(
     
     db.commit()
     db.refresh(banner)
+    banner_schedule.invalidate()
+    home_feed_cache.invalidate()
     
     return banner
 
@@ -187,7 +219,7 @@ async def update_banner(
 async def delete_banner(
     banner_id: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_superuser)
+    current_user: Principal = Depends(get_current_active_superuser)
 ):
     """
     删除Banner（仅限管理员）
@@ -206,6 +238,8 @@ async def delete_banner(
     # 软删除
     banner.is_deleted = True
     db.commit()
+    banner_schedule.invalidate()
+    home_feed_cache.invalidate()
     
     return {"message": "Banner已删除"}
 
@@ -215,8 +249,8 @@ async def get_applications(
     position: str = "home",
     skip: int = 0,
     limit: int = 10,
-    db: Session = Depends(get_db),
-    current_user: Optional[User] = Depends(get_optional_current_user)
+    db: AsyncSession = Depends(get_async_read_db),
+    current_user: Optional[Principal] = Depends(get_optional_principal)
 ):
     """
     获取应用列表
@@ -231,14 +265,14 @@ async def get_applications(
     Returns:
         应用列表
     """
-    applications = home_service.get_applications(db, position, skip, limit)
+    applications = await home_service.get_applications_async(db, position, skip, limit)
     return applications
 
 @router.get("/applications/{app_id}", response_model=ApplicationResponse, summary="获取应用详情")
 async def get_application(
     app_id: int,
-    db: Session = Depends(get_db),
-    current_user: Optional[User] = Depends(get_optional_current_user)
+    db: AsyncSession = Depends(get_async_read_db),
+    current_user: Optional[Principal] = Depends(get_optional_principal)
 ):
     """
     获取应用详情
@@ -251,10 +285,9 @@ async def get_application(
     Returns:
         应用详情
     """
-    application = home_service.get_application(db, app_id)
-    # 增加浏览次数
-    application.view_count += 1
-    db.commit()
+    application = await home_service.get_application_async(db, app_id)
+    # 增加浏览次数（批量写库）
+    click_buffer.record_view(ENTITY_APPLICATION, app_id)
     
     return application
 
@@ -263,7 +296,7 @@ async def record_application_click(
     app_id: int,
     request: Request,
     db: Session = Depends(get_db),
-    current_user: Optional[User] = Depends(get_optional_current_user)
+    current_user: Optional[Principal] = Depends(get_optional_principal)
 ):
     """
     记录应用点击
@@ -284,7 +317,7 @@ async def record_application_click(
 async def create_application(
     app_in: ApplicationCreate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_superuser)
+    current_user: Principal = Depends(get_current_active_superuser)
 ):
     """
     创建应用（仅限管理员）
@@ -302,6 +335,7 @@ async def create_application(
     db.add(application)
     db.commit()
     db.refresh(application)
+    home_feed_cache.invalidate()
     
     return application
 
@@ -310,7 +344,7 @@ async def update_application(
     app_id: int,
     app_in: ApplicationUpdate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_superuser)
+    current_user: Principal = Depends(get_current_active_superuser)
 ):
     """
     更新应用（仅限管理员）
@@ -334,6 +368,7 @@ async def update_application(
     
     db.commit()
     db.refresh(application)
+    home_feed_cache.invalidate()
     
     return application
 
@@ -341,7 +376,7 @@ async def update_application(
 async def delete_application(
     app_id: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_superuser)
+    current_user: Principal = Depends(get_current_active_superuser)
 ):
     """
     删除应用（仅限管理员）
@@ -360,6 +395,7 @@ async def delete_application(
     # 软删除
     application.is_deleted = True
     db.commit()
+    home_feed_cache.invalidate()
     
     return {"message": "应用已删除"}
 
@@ -1,9 +1,11 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Query, Request
 from typing import List, Optional
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from app.db.session import get_db
-from app.api.deps import get_current_user, get_current_active_superuser
+from app.db.session import get_db, get_async_db, get_async_read_db
+from app.api.deps import get_current_user, get_current_active_superuser, get_current_principal
+from app.services.principal_cache import Principal
 from app.models.user import User
 from app.models.lottery import LotteryActivity, LotteryType, LotteryRecord, LotteryPrize
 from app.schemas.lottery import (
@@ -21,7 +23,7 @@ router = APIRouter()
 async def create_lottery_type(
     lottery_type_in: LotteryTypeCreate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_superuser)
+    current_user: Principal = Depends(get_current_active_superuser)
 ):
     """
     创建抽奖类型（仅限管理员）
@@ -55,7 +57,7 @@ async def get_lottery_types(
     skip: int = 0,
     limit: int = 10,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_principal)
 ):
     """
     获取抽奖类型列表
@@ -76,7 +78,7 @@ async def get_lottery_types(
 async def get_lottery_type(
     type_id: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_principal)
 ):
     """
     获取抽奖类型详情
@@ -107,7 +109,7 @@ async def update_lottery_type(
     type_id: int,
     lottery_type_in: LotteryTypeUpdate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_superuser)
+    current_user: Principal = Depends(get_current_active_superuser)
 ):
     """
     更新抽奖类型（仅限管理员）
@@ -146,7 +148,7 @@ async def update_lottery_type(
 async def delete_lottery_type(
     type_id: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_superuser)
+    current_user: Principal = Depends(get_current_active_superuser)
 ):
     """
     删除抽奖类型（仅限管理员）
@@ -193,7 +195,7 @@ async def delete_lottery_type(
 async def create_lottery_activity(
     activity_in: LotteryActivityCreate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_superuser)
+    current_user: Principal = Depends(get_current_active_superuser)
 ):
     """
     创建抽奖活动（仅限管理员）
@@ -223,6 +225,7 @@ async def create_lottery_activity(
     db.add(activity)
     db.commit()
     db.refresh(activity)
+    lottery_service.invalidate_activities()
     
     return activity
 
@@ -231,8 +234,9 @@ async def get_lottery_activities(
     skip: int = 0,
     limit: int = 10,
     active_only: bool = False,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    # 查询结果写入进程内共享缓存，读主库避免失效后重新缓存从库的旧数据
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_principal)
 ):
     """
     获取抽奖活动列表
@@ -247,14 +251,14 @@ async def get_lottery_activities(
     Returns:
         抽奖活动列表
     """
-    activities = lottery_service.get_activities(db, skip, limit, active_only)
+    activities = await lottery_service.get_activities_async(db, skip, limit, active_only)
     return activities
 
 @router.get("/activities/{activity_id}", response_model=LotteryActivityResponse, summary="获取抽奖活动详情")
 async def get_lottery_activity(
     activity_id: int,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_read_db),
+    current_user: Principal = Depends(get_current_principal)
 ):
     """
     获取抽奖活动详情
@@ -267,7 +271,7 @@ async def get_lottery_activity(
     Returns:
         抽奖活动详情
     """
-    activity = lottery_service.get_activity(db, activity_id)
+    activity = await lottery_service.get_activity_async(db, activity_id)
     return activity
 
 @router.put("/activities/{activity_id}", response_model=LotteryActivityResponse, summary="更新抽奖活动")
@@ -275,7 +279,7 @@ async def update_lottery_activity(
     activity_id: int,
     activity_in: LotteryActivityUpdate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_superuser)
+    current_user: Principal = Depends(get_current_active_superuser)
 ):
     """
     更新抽奖活动（仅限管理员）
@@ -298,6 +302,7 @@ async def update_lottery_activity(
     
     db.commit()
     db.refresh(activity)
+    lottery_service.invalidate_activities()
     
     return activity
 
@@ -305,7 +310,7 @@ async def update_lottery_activity(
 async def delete_lottery_activity(
     activity_id: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_superuser)
+    current_user: Principal = Depends(get_current_active_superuser)
 ):
     """
     删除抽奖活动（仅限管理员）
@@ -330,11 +335,13 @@ async def delete_lottery_activity(
         # 如果有记录，则只禁用活动而不删除
         activity.is_active = False
         db.commit()
+        lottery_service.invalidate_activities()
         return {"message": "抽奖活动已禁用（存在抽奖记录，无法彻底删除）"}
     
     # 否则软删除
     activity.is_deleted = True
     db.commit()
+    lottery_service.invalidate_activities()
     
     return {"message": "抽奖活动已删除"}
 
@@ -385,8 +392,8 @@ async def get_lottery_records(
     activity_id: Optional[int] = None,
     skip: int = 0,
     limit: int = 10,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_read_db),
+    current_user: Principal = Depends(get_current_principal)
 ):
     """
     获取抽奖记录
@@ -402,18 +409,11 @@ async def get_lottery_records(
         抽奖记录列表
     """
     if activity_id:
-        # 如果是管理员，可以查看活动的所有记录
-        if current_user.is_superuser:
-            records = lottery_service.get_activity_records(db, activity_id, skip, limit)
-        else:
-            # 否则只能查看自己在该活动中的记录
-            records = db.query(LotteryRecord).filter(
-                LotteryRecord.activity_id == activity_id,
-                LotteryRecord.user_id == current_user.id,
-                LotteryRecord.is_deleted == False
-            ).order_by(LotteryRecord.created_at.desc()).offset(skip).limit(limit).all()
+        # 如果是管理员，可以查看活动的所有记录；否则只能查看自己在该活动中的记录
+        user_id = None if current_user.is_superuser else current_user.id
+        records = await lottery_service.get_records_async(db, user_id, activity_id, skip, limit)
     else:
         # 获取用户的所有记录
-        records = lottery_service.get_user_records(db, current_user.id, skip, limit)
+        records = await lottery_service.get_records_async(db, current_user.id, None, skip, limit)
     
     return records 
\ No newline at end of file
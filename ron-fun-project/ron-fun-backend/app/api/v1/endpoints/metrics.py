@@ -0,0 +1,78 @@
+from typing import List
+
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from app.core.cache import cache_stats
+from app.core.metrics import format_histogram, format_labels
+from app.core.request_metrics import request_metrics
+from app.db.pool_metrics import pool_metrics
+
+router = APIRouter()
+
+# Prometheus文本格式的Content-Type
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def render_metrics() -> str:
+    """
+    生成Prometheus文本格式的指标：接口耗时和SQL统计、按状态码的请求数、缓存命中率、数据库连接池状态
+
+    Returns:
+        指标文本
+    """
+    lines: List[str] = []
+    snapshot = request_metrics.snapshot()
+
+    for name, field, help_text in (
+        ("http_request_duration_seconds", "latency", "接口处理耗时（秒）"),
+        ("http_request_db_queries", "db_queries", "每个请求执行的SQL条数"),
+        ("http_request_db_seconds", "db_seconds", "每个请求的SQL总耗时（秒）"),
+    ):
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} histogram")
+        for (method, route), histograms in sorted(snapshot["routes"].items()):
+            lines.extend(format_histogram(name, {"method": method, "route": route}, histograms[field]))
+
+    lines.append("# HELP http_requests_total 按状态码统计的请求数")
+    lines.append("# TYPE http_requests_total counter")
+    for (method, route, status_code), count in sorted(snapshot["responses"].items()):
+        labels = format_labels({"method": method, "route": route, "status": status_code})
+        lines.append(f"http_requests_total{labels} {count}")
+
+    caches = cache_stats()
+    for name, field, metric_type in (
+        ("cache_hits_total", "hits", "counter"),
+        ("cache_misses_total", "misses", "counter"),
+        ("cache_hit_ratio", "hit_ratio", "gauge"),
+        ("cache_entries", "entries", "gauge"),
+    ):
+        lines.append(f"# TYPE {name} {metric_type}")
+        for cache_name, stats in caches.items():
+            lines.append(f"{name}{format_labels({'cache': cache_name})} {stats[field]}")
+
+    pools = pool_metrics.snapshot()
+    for name, field, metric_type in (
+        ("db_pool_checked_out", "checked_out", "gauge"),
+        ("db_pool_overflow", "overflow", "gauge"),
+        ("db_pool_timeouts_total", "timeouts", "counter"),
+        ("db_pool_slow_checkouts_total", "slow_checkouts", "counter"),
+    ):
+        lines.append(f"# TYPE {name} {metric_type}")
+        for pool_name, stats in sorted(pools.items()):
+            if stats[field] is not None:
+                lines.append(f"{name}{format_labels({'pool': pool_name})} {stats[field]}")
+
+    lines.append("# TYPE db_pool_checkout_wait_seconds histogram")
+    for pool_name, stats in sorted(pools.items()):
+        lines.extend(format_histogram("db_pool_checkout_wait_seconds", {"pool": pool_name}, stats["checkout_wait_seconds"]))
+
+    return "\n".join(lines) + "\n"
+
+
+@router.get("", response_class=PlainTextResponse, include_in_schema=False)
+async def metrics():
+    """
+    Prometheus指标接口
+    """
+    return PlainTextResponse(render_metrics(), media_type=PROMETHEUS_CONTENT_TYPE)
@@ -1,17 +1,21 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Query, Request
-from typing import List, Optional
+from typing import List, Optional, Union
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from app.db.session import get_db
-from app.api.deps import get_current_user, get_current_active_superuser
+from app.db.session import get_db, get_async_db, get_async_read_db
+from app.api.deps import get_current_user, get_current_active_superuser, get_current_principal
+from app.services.principal_cache import Principal
 from app.models.user import User
 from app.models.product import Product, ProductCategory, Order, Address
 from app.schemas.product import (
-    ProductCategoryResponse, ProductResponse, OrderResponse, AddressResponse,
+    ProductCategoryResponse, ProductResponse, ProductBatchResponse, OrderResponse, AddressResponse,
     ProductCreate, ProductUpdate, ProductCategoryCreate, ProductCategoryUpdate,
-    OrderCreate, AddressCreate, AddressUpdate
+    OrderCreate, OrderCancelRequest, OrderEventResponse, AddressCreate, AddressUpdate
 )
 from app.services.product_service import product_service
+from app.services.product_cache import product_listing_cache
+from app.services.order_service import order_service
 
 router = APIRouter()
 
@@ -20,8 +24,8 @@ router = APIRouter()
 async def get_categories(
     skip: int = 0,
     limit: int = 10,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_read_db),
+    current_user: Principal = Depends(get_current_principal)
 ):
     """
     获取商品分类列表
@@ -35,14 +39,14 @@ async def get_categories(
     Returns:
         分类列表
     """
-    categories = product_service.get_categories(db, skip, limit)
+    categories = await product_service.get_categories_async(db, skip, limit)
     return categories
 
 @router.post("/categories", response_model=ProductCategoryResponse, summary="创建商品分类")
 async def create_category(
     category_in: ProductCategoryCreate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_superuser)
+    current_user: Principal = Depends(get_current_active_superuser)
 ):
     """
     创建商品分类（仅限管理员）
@@ -68,7 +72,7 @@ async def update_category(
     category_id: int,
     category_in: ProductCategoryUpdate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_superuser)
+    current_user: Principal = Depends(get_current_active_superuser)
 ):
     """
     更新商品分类（仅限管理员）
@@ -101,6 +105,7 @@ async def update_category(
     
     db.commit()
     db.refresh(category)
+    product_listing_cache.invalidate_category(category.id)
     
     return category
 
@@ -108,7 +113,7 @@ async def update_category(
 async def delete_category(
     category_id: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_superuser)
+    current_user: Principal = Depends(get_current_active_superuser)
 ):
     """
     删除商品分类（仅限管理员）
@@ -152,7 +157,11 @@ async def delete_category(
     return {"message": "分类已删除"}
 
 # 商品相关接口
-@router.get("", response_model=List[ProductResponse], summary="获取商品列表")
+@router.get(
+    "",
+    response_model=Union[ProductBatchResponse, List[ProductResponse]],
+    summary="获取商品列表"
+)
 async def get_products(
     skip: int = 0,
     limit: int = 10,
@@ -161,12 +170,17 @@ async def get_products(
     is_hot: Optional[bool] = None,
     is_new: Optional[bool] = None,
     keyword: Optional[str] = None,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    ids: Optional[str] = Query(None, description="逗号分隔的商品ID，传入时按ID批量获取并忽略其他筛选条件"),
+    # 查询结果写入进程内共享缓存，读主库避免失效后重新缓存从库的旧数据
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_principal)
 ):
     """
     获取商品列表
     
+    传入ids时批量获取商品（替代逐个调用商品详情接口），返回顺序与ids一致，
+    不存在或已下架的ID在missing_ids中返回。
+    
     Args:
         skip: 跳过记录数
         limit: 返回记录数
@@ -175,13 +189,26 @@ async def get_products(
         is_hot: 是否热门
         is_new: 是否新品
         keyword: 搜索关键词
+        ids: 逗号分隔的商品ID
         db: 数据库会话
         current_user: 当前用户
         
     Returns:
-        商品列表
+        商品列表，批量获取时为ProductBatchResponse
     """
-    products = product_service.get_products(
+    if ids is not None:
+        try:
+            product_ids = [int(product_id) for product_id in ids.split(",") if product_id.strip()]
+        except ValueError:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="商品ID格式错误"
+            )
+        
+        items, missing_ids = await product_service.get_products_by_ids_async(db, product_ids)
+        return {"items": items, "missing_ids": missing_ids}
+    
+    products = await product_service.get_products_async(
         db, skip, limit, category_id, is_recommended, is_hot, is_new, keyword
     )
     return products
@@ -189,8 +216,8 @@ async def get_products(
 @router.get("/{product_id}", response_model=ProductResponse, summary="获取商品详情")
 async def get_product(
     product_id: int,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_read_db),
+    current_user: Principal = Depends(get_current_principal)
 ):
     """
     获取商品详情
@@ -203,14 +230,14 @@ async def get_product(
     Returns:
         商品详情
     """
-    product = product_service.get_product(db, product_id)
+    product = await product_service.get_product_async(db, product_id)
     return product
 
 @router.post("", response_model=ProductResponse, summary="创建商品")
 async def create_product(
     product_in: ProductCreate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_superuser)
+    current_user: Principal = Depends(get_current_active_superuser)
 ):
     """
     创建商品（仅限管理员）
@@ -241,6 +268,7 @@ async def create_product(
     db.add(product)
     db.commit()
     db.refresh(product)
+    product_listing_cache.invalidate(product.id, product_listing_cache.facets_of(product))
     
     return product
 
@@ -249,7 +277,7 @@ async def update_product(
     product_id: int,
     product_in: ProductUpdate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_superuser)
+    current_user: Principal = Depends(get_current_active_superuser)
 ):
     """
     更新商品（仅限管理员）
@@ -288,6 +316,9 @@ async def update_product(
                 detail="分类不存在"
             )
     
+    # 记录修改前所属的列表维度
+    old_facets = product_listing_cache.facets_of(product)
+    
     # 更新字段
     update_data = product_in.dict(exclude_unset=True)
     for field, value in update_data.items():
@@ -295,6 +326,9 @@ async def update_product(
     
     db.commit()
     db.refresh(product)
+    product_listing_cache.invalidate(
+        product.id, old_facets | product_listing_cache.facets_of(product)
+    )
     
     return product
 
@@ -302,7 +336,7 @@ async def update_product(
 async def delete_product(
     product_id: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_superuser)
+    current_user: Principal = Depends(get_current_active_superuser)
 ):
     """
     删除商品（仅限管理员）
@@ -339,11 +373,13 @@ async def delete_product(
         # 如果有订单，仅修改状态
         product.status = 0  # 下架
         db.commit()
+        product_listing_cache.invalidate(product.id, product_listing_cache.facets_of(product))
         return {"message": "商品已下架（存在订单，无法彻底删除）"}
     
     # 软删除
     product.is_deleted = True
     db.commit()
+    product_listing_cache.invalidate(product.id, product_listing_cache.facets_of(product))
     
     return {"message": "商品已删除"}
 
@@ -388,7 +424,7 @@ async def get_orders(
     skip: int = 0,
     limit: int = 10,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_principal)
 ):
     """
     获取用户订单列表
@@ -410,7 +446,7 @@ async def get_orders(
 async def get_order(
     order_id: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_principal)
 ):
     """
     获取订单详情
@@ -423,26 +459,45 @@ async def get_order(
     Returns:
         订单详情
     """
-    # 查找订单
-    order = db.query(Order).filter(
-        Order.id == order_id,
-        Order.user_id == current_user.id,
-        Order.is_deleted == False
-    ).first()
+    return order_service.get_user_order(db, current_user.id, order_id)
+
+@router.post(
+    "/orders/{order_id}/cancel",
+    response_model=OrderEventResponse,
+    status_code=status.HTTP_202_ACCEPTED,
+    summary="取消订单"
+)
+async def cancel_order(
+    order_id: int,
+    cancel_in: OrderCancelRequest,
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_principal)
+):
+    """
+    取消订单
     
-    if not order:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="订单不存在"
-        )
+    只写入取消事件，退还积分和恢复库存由后台工作线程异步完成
     
-    return order
+    Args:
+        order_id: 订单ID
+        cancel_in: 取消请求
+        db: 数据库会话
+        current_user: 当前用户
+        
+    Returns:
+        订单事件
+    """
+    order = order_service.get_user_order(db, current_user.id, order_id)
+    
+    return order_service.enqueue_event(
+        db, order, "cancel", {"cancel_reason": cancel_in.cancel_reason}
+    )
 
 # 地址相关接口
 @router.get("/addresses", response_model=List[AddressResponse], summary="获取用户地址列表")
 async def get_addresses(
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_principal)
 ):
     """
     获取用户地址列表
@@ -468,7 +523,7 @@ async def get_addresses(
 async def create_address(
     address_in: AddressCreate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_principal)
 ):
     """
     创建地址
@@ -502,7 +557,7 @@ async def update_address(
     address_id: int,
     address_in: AddressUpdate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_principal)
 ):
     """
     更新地址
@@ -552,7 +607,7 @@ async def update_address(
 async def delete_address(
     address_id: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_principal)
 ):
     """
     删除地址
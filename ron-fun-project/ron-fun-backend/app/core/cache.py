@@ -0,0 +1,150 @@
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Iterable, List, Optional, Tuple
+
+# 缓存未命中标记
+MISSING = object()
+
+# 已创建的缓存（按名称，同名缓存以最后创建的为准），用于指标统计
+_registry: "weakref.WeakValueDictionary[str, TTLCache]" = weakref.WeakValueDictionary()
+
+
+class TTLCache:
+    """
+    进程内有界LRU缓存，支持按条目过期
+
+    用于缓存热点只读数据（商品、首页数据等），写操作时由调用方显式失效。
+    """
+
+    def __init__(self, name: str, maxsize: int = 1024, ttl: Optional[float] = None):
+        """
+        初始化缓存
+
+        Args:
+            name: 缓存名称，用于统计展示
+            maxsize: 最大条目数，超出时淘汰最久未使用的条目
+            ttl: 默认过期秒数，None表示不过期
+        """
+        self.name = name
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data: OrderedDict[Hashable, Tuple[Any, Optional[float]]] = OrderedDict()
+        self._lock = threading.Lock()
+        _registry[name] = self
+
+    def get(self, key: Hashable, default: Any = MISSING) -> Any:
+        """
+        获取缓存值
+
+        Args:
+            key: 缓存键
+            default: 未命中时返回的值
+
+        Returns:
+            缓存值或default
+        """
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                value, expires_at = entry
+                if expires_at is None or expires_at > time.monotonic():
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._data[key]
+            self.misses += 1
+            return default
+
+    def get_many(self, keys: Iterable[Hashable]) -> Dict[Hashable, Any]:
+        """
+        批量获取缓存值
+
+        Args:
+            keys: 缓存键列表
+
+        Returns:
+            命中的键值字典，未命中的键不包含在内
+        """
+        result = {}
+        for key in keys:
+            value = self.get(key)
+            if value is not MISSING:
+                result[key] = value
+        return result
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        """
+        写入缓存
+
+        Args:
+            key: 缓存键
+            value: 缓存值
+            ttl: 过期秒数，默认使用缓存的ttl
+        """
+        ttl = self.ttl if ttl is None else ttl
+        expires_at = time.monotonic() + ttl if ttl is not None else None
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key: Hashable) -> None:
+        """
+        删除缓存条目
+
+        Args:
+            key: 缓存键
+        """
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        """
+        清空缓存
+        """
+        with self._lock:
+            self._data.clear()
+
+    def keys(self) -> List[Hashable]:
+        """
+        获取当前所有缓存键（包括可能已过期的条目）
+
+        Returns:
+            缓存键列表
+        """
+        with self._lock:
+            return list(self._data.keys())
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    @property
+    def hit_ratio(self) -> float:
+        """
+        缓存命中率
+        """
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+def cache_stats() -> Dict[str, Dict[str, Any]]:
+    """
+    获取所有缓存的命中统计
+
+    Returns:
+        缓存名称 -> 命中数、未命中数、命中率、条目数
+    """
+    return {
+        name: {
+            "hits": cache.hits,
+            "misses": cache.misses,
+            "hit_ratio": cache.hit_ratio,
+            "entries": len(cache),
+        }
+        for name, cache in sorted(_registry.items())
+    }
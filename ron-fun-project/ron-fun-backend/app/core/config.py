@@ -1,4 +1,4 @@
-from typing import List, Union, Optional, Any
+from typing import Dict, List, Union, Optional, Any
 from pydantic import AnyHttpUrl, validator, DirectoryPath
 from pydantic_settings import BaseSettings
 import os
@@ -47,13 +47,31 @@ class Settings(BaseSettings):
         
         return f"mysql+pymysql://{username}:{password}@{host}:{port}/{db}"
 
+    # 数据库连接池设置（每个进程的同步、异步引擎各一个连接池，总连接数需小于数据库 max_connections / 进程数）
+    DB_POOL_SIZE: int = 10  # 连接池常驻连接数
+    DB_MAX_OVERFLOW: int = 10  # 连接池满时允许额外创建的连接数
+    DB_POOL_TIMEOUT: float = 10.0  # 连接池耗尽时获取连接的最长等待秒数，超时抛出异常
+    DB_POOL_RECYCLE: int = 1800  # 连接最长使用秒数，需小于MySQL的wait_timeout
+    DB_POOL_SLOW_CHECKOUT_SECONDS: float = 0.5  # 排队等待空闲连接超过该秒数时输出警告日志（不含新建连接和pre_ping）
+
+    # 读写分离设置
+    REPLICA_DATABASE_URI: Optional[str] = None  # 从库连接串，未配置时只读接口也使用主库
+    READ_YOUR_WRITES_SECONDS: float = 5.0  # 客户端写入后该秒数内其只读请求仍走主库（通过短期Cookie携带写入时间，多进程共享），需大于主从复制延迟
+
     # 安全设置
     SECRET_KEY: str
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60 * 24 * 7  # 7天
+    PASSWORD_BCRYPT_ROUNDS: int = 12  # bcrypt成本参数，调整后旧密码哈希在用户下次登录时自动升级
+    PASSWORD_HASH_WORKERS: int = 2  # 密码哈希计算线程数
+    PASSWORD_HASH_MAX_PENDING: int = 64  # 最多排队的密码哈希计算数，超出时登录/注册返回503
     
     # 日志设置
     LOG_LEVEL: str = "INFO"
+    LOG_QUEUE_SIZE: int = 10000  # 后台日志队列容量，队列满时丢弃日志而不阻塞请求
+    REQUEST_LOG_SAMPLE_RATE: float = 1.0  # 成功请求的日志采样率，错误和慢请求始终记录
+    REQUEST_LOG_ROUTE_SAMPLE_RATES: Dict[str, float] = {}  # 按路由设置采样率，如 {"/api/v1/health/ping": 0.01}
+    REQUEST_LOG_SLOW_SECONDS: float = 1.0  # 处理时间超过该秒数的请求始终记录
     
     # 文件上传设置
     UPLOAD_DIR: DirectoryPath = os.path.join(os.getcwd(), "uploads")
@@ -72,6 +90,52 @@ class Settings(BaseSettings):
     S3_BUCKET_NAME: Optional[str] = None
     S3_REGION: Optional[str] = None
     
+    # 订单事件处理设置
+    ORDER_WORKER_ENABLED: bool = True  # 是否在应用进程内启动订单事件工作线程
+    ORDER_WORKER_COUNT: int = 2  # 工作线程数，按订单ID取模分区，保证同一订单的事件顺序处理
+    ORDER_WORKER_BATCH_SIZE: int = 50  # 每批认领的事件数
+    ORDER_WORKER_POLL_INTERVAL: float = 1.0  # 无事件时的轮询间隔（秒）
+    ORDER_EVENT_MAX_ATTEMPTS: int = 3  # 事件最大重试次数
+    ORDER_EVENT_LEASE_SECONDS: int = 300  # 处理中事件的租约，超时未完成视为工作线程崩溃，重新认领
+    
+    # 点击统计设置
+    CLICK_FLUSH_INTERVAL_MS: int = 500  # 点击/浏览计数批量写库的间隔（毫秒），也是崩溃时最多丢失的时间窗口
+    CLICK_FLUSH_MAX_EVENTS: int = 1000  # 缓冲区累计多少个事件时立即写库
+    CLICK_BUFFER_MAX_PENDING: int = 100000  # 数据库不可用时每种对象最多保留的待写点击明细数
+    CLICK_ROLLUP_INTERVAL: int = 60  # 点击日汇总表的刷新间隔（秒），统计接口的数据延迟不超过该值
+    CLICK_UV_MAX_DAYS: int = 366  # 独立访客查询的最大日期范围（天）
+    
+    # 缓存设置
+    PRODUCT_CACHE_TTL: int = 300  # 商品列表/详情缓存过期秒数，作为失效遗漏时的兜底
+    PRODUCT_CACHE_MAXSIZE: int = 10000  # 商品详情缓存最大条目数
+    PRODUCT_BATCH_MAX_IDS: int = 200  # 批量获取商品时单次最多ID数
+    HOME_FEED_CACHE_TTL: int = 60  # 首页数据缓存最长秒数，Banner定时上下线会提前过期
+    BANNER_SCHEDULE_RELOAD_INTERVAL: int = 60  # Banner排期索引定期重新加载的间隔（秒），用于同步其他进程的修改
+    BANNER_EXPERIMENT_CACHE_TTL: int = 60  # 进行中的Banner实验缓存秒数，其他进程修改实验状态后最迟该时间生效
+    LOTTERY_ACTIVITY_CACHE_TTL: int = 30  # 进行中抽奖活动列表缓存秒数，活动开始/结束时提前过期
+    PRINCIPAL_CACHE_TTL: int = 30  # 已认证用户（ID、状态、是否管理员）缓存秒数，其他进程禁用用户后最迟该时间生效
+    TOKEN_CACHE_MAXSIZE: int = 10000  # 已验证访问令牌缓存最大条目数，缓存在令牌过期时失效
+    
+    # 启动预热设置
+    CACHE_WARMUP_ENABLED: bool = True  # 启动时是否预热首页、商品列表和抽奖活动缓存
+    CACHE_WARMUP_CONCURRENCY: int = 4  # 预热时同时执行的查询数，多个进程同时启动时避免压垮数据库
+    CACHE_WARMUP_TIMEOUT: float = 30.0  # 预热超时秒数，超时后直接标记就绪
+
+    # 商品批量导入导出设置
+    PRODUCT_IMPORT_CHUNK_SIZE: int = 500  # 导入时每批校验和写入的行数
+    PRODUCT_IMPORT_MAX_ERRORS: int = 100  # 导入结果中最多返回的错误行数
+    PRODUCT_EXPORT_BATCH_SIZE: int = 1000  # 导出时服务端游标每次拉取的行数
+    
+    # 点击明细导出设置（离线分析用，不再直接查询线上库）
+    CLICK_EXPORT_DIR: str = os.path.join(os.getcwd(), "exports", "clicks")  # 导出根目录，按对象类型和日期分区
+    CLICK_EXPORT_CHUNK_SIZE: int = 50000  # 每批按主键顺序读取的行数，每批写完记录一次检查点
+    CLICK_EXPORT_LAG_SECONDS: int = 300  # 只导出点击时间早于该秒数之前的行，需大于点击缓冲刷新间隔（含失败重试）与写库事务耗时之和
+    
+    # 首页应用个性化排序设置
+    APP_RECOMMENDATION_DAYS: int = 90  # 计算用户偏好时使用最近多少天的应用点击
+    APP_RECOMMENDATION_TOP_N: int = 20  # 每个用户保存的推荐应用数
+    APP_RECOMMENDATION_RELOAD_INTERVAL: int = 300  # 接口进程检查离线结果是否更新的间隔（秒）
+    
     class Config:
         case_sensitive = True
         env_file = ".env"
@@ -0,0 +1,123 @@
+import logging
+import logging.handlers
+import queue
+import sys
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+import orjson
+
+from app.core.config import settings
+
+# LogRecord 自带的属性，其余属性视为结构化字段（通过 extra 传入）
+_RECORD_ATTRIBUTES = frozenset(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    结构化日志格式：每条日志输出一行JSON，extra 传入的字段原样输出
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry: Dict[str, Any] = {
+            "time": datetime.fromtimestamp(record.created).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRIBUTES:
+                entry[key] = value
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        return orjson.dumps(entry, default=str).decode()
+
+
+class LazyQueueHandler(logging.handlers.QueueHandler):
+    """
+    只把日志记录放入队列的处理器
+
+    标准 QueueHandler 在入队前就格式化消息，这里把格式化留给后台线程，
+    请求线程只负责创建记录和入队。队列满时丢弃日志并计数，不阻塞请求。
+    """
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class AsyncLogSink:
+    """
+    后台日志输出
+
+    根日志器只挂一个 LazyQueueHandler，格式化和写输出由 QueueListener 后台线程完成。
+    """
+
+    def __init__(self, level: str = "INFO", maxsize: int = 10000):
+        """
+        初始化日志输出
+
+        Args:
+            level: 日志级别
+            maxsize: 日志队列容量
+        """
+        self.level = level
+        self.maxsize = maxsize
+        self.handler: Optional[LazyQueueHandler] = None
+        self.listener: Optional[logging.handlers.QueueListener] = None
+
+    def start(self, *handlers: logging.Handler) -> None:
+        """
+        替换根日志器的处理器并启动后台线程
+
+        Args:
+            handlers: 实际输出日志的处理器，默认输出JSON到标准输出
+        """
+        if self.listener is not None:
+            return
+
+        if not handlers:
+            stream_handler = logging.StreamHandler(sys.stdout)
+            stream_handler.setFormatter(JsonFormatter())
+            handlers = (stream_handler,)
+
+        self.handler = LazyQueueHandler(queue.Queue(self.maxsize))
+        self.listener = logging.handlers.QueueListener(self.handler.queue, *handlers, respect_handler_level=True)
+
+        root = logging.getLogger()
+        for handler in root.handlers[:]:
+            root.removeHandler(handler)
+        root.addHandler(self.handler)
+        root.setLevel(self.level)
+        self.listener.start()
+
+    def stop(self) -> None:
+        """
+        停止后台线程，输出队列中剩余的日志
+        """
+        if self.listener is None:
+            return
+
+        self.listener.stop()
+        logging.getLogger().removeHandler(self.handler)
+        self.listener = None
+
+    @property
+    def dropped(self) -> int:
+        """
+        队列满时丢弃的日志条数
+        """
+        return self.handler.dropped if self.handler is not None else 0
+
+
+# 创建日志输出实例
+log_sink = AsyncLogSink(level=settings.LOG_LEVEL, maxsize=settings.LOG_QUEUE_SIZE)
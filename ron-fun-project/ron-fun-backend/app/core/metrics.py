@@ -0,0 +1,183 @@
+import bisect
+import math
+import threading
+from typing import Any, Dict, List, Mapping, Sequence
+
+# 默认耗时分桶（秒）
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class Histogram:
+    """
+    线程安全的分桶直方图
+
+    按上界分桶累计观测值的个数，并记录总数、总和和最大值，用于统计耗时分布。
+    """
+
+    def __init__(self, name: str, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        """
+        初始化直方图
+
+        Args:
+            name: 指标名称
+            buckets: 分桶上界（升序），超过最大上界的观测值计入 +Inf 桶
+        """
+        self.name = name
+        self.buckets = tuple(sorted(buckets))
+        self._counts = [0] * (len(self.buckets) + 1)
+        self._sum = 0.0
+        self._count = 0
+        self._max = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        """
+        记录一个观测值
+
+        Args:
+            value: 观测值
+        """
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self._counts[index] += 1
+            self._sum += value
+            self._count += 1
+            if value > self._max:
+                self._max = value
+
+    @property
+    def count(self) -> int:
+        """
+        观测值个数
+        """
+        return self._count
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        获取当前统计
+
+        Returns:
+            包含累计分桶计数（上界 -> 不超过该上界的个数）、总数、总和和最大值的字典
+        """
+        with self._lock:
+            counts = list(self._counts)
+            total, count, maximum = self._sum, self._count, self._max
+
+        cumulative = 0
+        buckets = {}
+        for bound, bucket_count in zip(self.buckets, counts):
+            cumulative += bucket_count
+            buckets[str(bound)] = cumulative
+        buckets["+Inf"] = count
+
+        return {
+            "buckets": buckets,
+            "count": count,
+            "sum": total,
+            "max": maximum,
+        }
+
+    def reset(self) -> None:
+        """
+        清空统计
+        """
+        with self._lock:
+            self._counts = [0] * (len(self.buckets) + 1)
+            self._sum = 0.0
+            self._count = 0
+            self._max = 0.0
+
+
+class LogHistogram(Histogram):
+    """
+    对数分桶直方图（无锁）
+
+    分桶上界为 min_value * 2^(i / buckets_per_doubling)，各桶相对误差相同，
+    观测值的桶下标由对数直接算出，不需要二分查找。
+    observe 不加锁，只能在单个线程中调用（请求指标在事件循环线程中记录）。
+    """
+
+    def __init__(
+        self,
+        name: str,
+        min_value: float = 0.0001,
+        max_value: float = 100.0,
+        buckets_per_doubling: int = 2
+    ):
+        """
+        初始化直方图
+
+        Args:
+            name: 指标名称
+            min_value: 第一个分桶上界
+            max_value: 最大分桶上界（不小于该值），超过的观测值计入 +Inf 桶
+            buckets_per_doubling: 每翻一倍划分的桶数，越大精度越高
+        """
+        self.min_value = min_value
+        self.buckets_per_doubling = buckets_per_doubling
+        size = math.ceil(math.log2(max_value / min_value) * buckets_per_doubling) + 1
+        super().__init__(name, buckets=[
+            float(f"{min_value * 2 ** (i / buckets_per_doubling):.4g}") for i in range(size)
+        ])
+        self._overflow = len(self.buckets)
+        self._offset = math.log2(min_value) * buckets_per_doubling
+
+    def observe(self, value: float) -> None:
+        """
+        记录一个观测值
+
+        Args:
+            value: 观测值
+        """
+        if value <= self.min_value:
+            index = 0
+        else:
+            index = math.ceil(math.log2(value) * self.buckets_per_doubling - self._offset)
+            if index > self._overflow:
+                index = self._overflow
+        self._counts[index] += 1
+        self._sum += value
+        self._count += 1
+        if value > self._max:
+            self._max = value
+
+
+def format_labels(labels: Mapping[str, Any]) -> str:
+    """
+    格式化Prometheus标签
+
+    Args:
+        labels: 标签字典
+
+    Returns:
+        形如 {method="GET",route="/api"} 的字符串，无标签时为空字符串
+    """
+    if not labels:
+        return ""
+    items = (f'{key}="{_escape_label_value(value)}"' for key, value in labels.items())
+    return "{" + ",".join(items) + "}"
+
+
+def _escape_label_value(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def format_histogram(name: str, labels: Mapping[str, Any], snapshot: Dict[str, Any]) -> List[str]:
+    """
+    把直方图统计格式化为Prometheus文本格式的行
+
+    Args:
+        name: 指标名称
+        labels: 标签
+        snapshot: Histogram.snapshot() 的结果
+
+    Returns:
+        _bucket、_sum、_count 行
+    """
+    lines = [
+        f"{name}_bucket{format_labels({**labels, 'le': bound})} {count}"
+        for bound, count in snapshot["buckets"].items()
+    ]
+    lines.append(f"{name}_sum{format_labels(labels)} {snapshot['sum']}")
+    lines.append(f"{name}_count{format_labels(labels)} {snapshot['count']}")
+    return lines
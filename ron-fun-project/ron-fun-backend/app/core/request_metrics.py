@@ -0,0 +1,125 @@
+import time
+from contextvars import ContextVar
+from typing import Any, Dict, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.core.metrics import LogHistogram
+
+
+class RequestStats:
+    """
+    单个请求的数据库查询统计
+    """
+
+    __slots__ = ("db_queries", "db_seconds")
+
+    def __init__(self):
+        self.db_queries = 0
+        self.db_seconds = 0.0
+
+
+# 当前请求的统计，同步接口在线程池中执行时上下文随之复制，仍指向同一对象
+current_request_stats: ContextVar[Optional[RequestStats]] = ContextVar("current_request_stats", default=None)
+
+
+class RouteMetrics:
+    """
+    单个路由的请求耗时、每请求数据库查询次数和查询耗时分布
+    """
+
+    __slots__ = ("latency", "db_queries", "db_seconds")
+
+    def __init__(self):
+        self.latency = LogHistogram("http_request_duration_seconds")
+        self.db_queries = LogHistogram("http_request_db_queries", min_value=1, max_value=1024, buckets_per_doubling=1)
+        self.db_seconds = LogHistogram("http_request_db_seconds")
+
+
+class RequestMetrics:
+    """
+    请求指标
+
+    按 (请求方法, 路由模板) 记录耗时直方图，按状态码计数。
+    observe 只在事件循环线程中调用，统计不加锁；未匹配到路由的请求统一记为 unmatched，避免路径基数膨胀。
+    """
+
+    def __init__(self):
+        self.routes: Dict[Tuple[str, str], RouteMetrics] = {}
+        self.responses: Dict[Tuple[str, str, int], int] = {}
+
+    def observe(self, method: str, route: str, status_code: int, seconds: float, stats: RequestStats) -> None:
+        """
+        记录一次请求
+
+        Args:
+            method: 请求方法
+            route: 路由模板
+            status_code: 响应状态码
+            seconds: 处理耗时
+            stats: 请求的数据库查询统计
+        """
+        key = (method, route)
+        metrics = self.routes.get(key)
+        if metrics is None:
+            metrics = self.routes[key] = RouteMetrics()
+        metrics.latency.observe(seconds)
+        metrics.db_queries.observe(stats.db_queries)
+        metrics.db_seconds.observe(stats.db_seconds)
+
+        response_key = (method, route, status_code)
+        self.responses[response_key] = self.responses.get(response_key, 0) + 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        获取当前统计
+
+        Returns:
+            routes: (方法, 路由) -> 各直方图统计；responses: (方法, 路由, 状态码) -> 请求数
+        """
+        return {
+            "routes": {
+                key: {
+                    "latency": metrics.latency.snapshot(),
+                    "db_queries": metrics.db_queries.snapshot(),
+                    "db_seconds": metrics.db_seconds.snapshot(),
+                }
+                for key, metrics in list(self.routes.items())
+            },
+            "responses": dict(self.responses),
+        }
+
+    def reset(self) -> None:
+        """
+        清空统计
+        """
+        self.routes = {}
+        self.responses = {}
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None and current_request_stats.get() is not None:
+        context._request_query_started = time.perf_counter()
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = current_request_stats.get()
+    if stats is not None:
+        stats.db_queries += 1
+        started = getattr(context, "_request_query_started", None)
+        if started is not None:
+            stats.db_seconds += time.perf_counter() - started
+
+def track_queries(engine: Engine) -> None:
+    """
+    统计引擎在请求中执行的SQL次数和耗时（异步引擎传入 async_engine.sync_engine）
+
+    Args:
+        engine: 数据库引擎
+    """
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+# 创建指标实例
+request_metrics = RequestMetrics()
@@ -6,8 +6,10 @@ from passlib.context import CryptContext
 
 from app.core.config import settings
 
-# 密码哈希上下文
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# 密码哈希上下文（调整bcrypt成本后，旧哈希在用户登录时自动升级）
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=settings.PASSWORD_BCRYPT_ROUNDS)
+
+# 以下同步函数会阻塞调用线程上百毫秒，接口中应使用 app.services.password_service
 
 # 验证密码
 def verify_password(plain_password: str, hashed_password: str) -> bool:
@@ -0,0 +1,79 @@
+import hashlib
+import time
+from types import MappingProxyType
+from typing import Any, List, Mapping
+
+from jose import jwt
+
+from app.core.cache import TTLCache, MISSING
+from app.core.config import settings
+
+
+class VerifiedTokenCache:
+    """
+    已验证令牌缓存
+
+    同一个访问令牌在有效期内会被反复使用，每次请求都重新解析并校验HMAC签名开销较大。
+    验证通过的令牌按其SHA-256摘要缓存载荷，缓存条目在令牌的exp时刻过期，
+    因此缓存不会延长令牌的有效期；验证失败的令牌不缓存。
+    """
+
+    def __init__(self, secret_key: str, algorithms: List[str], maxsize: int = 10000):
+        """
+        初始化缓存
+
+        Args:
+            secret_key: 签名密钥
+            algorithms: 允许的签名算法
+            maxsize: 最大缓存令牌数，超出时淘汰最久未使用的令牌
+        """
+        self.secret_key = secret_key
+        self.algorithms = algorithms
+        self.cache = TTLCache("verified_tokens", maxsize=maxsize)
+
+    def decode(self, token: str) -> Mapping[str, Any]:
+        """
+        解析并验证令牌（带缓存）
+
+        Args:
+            token: 访问令牌
+
+        Returns:
+            令牌载荷（只读）
+
+        Raises:
+            JWTError: 令牌无效或已过期
+        """
+        key = hashlib.sha256(token.encode("utf-8")).digest()
+        claims = self.cache.get(key)
+        if claims is not MISSING:
+            return claims
+
+        claims = MappingProxyType(jwt.decode(token, self.secret_key, algorithms=self.algorithms))
+        exp = claims.get("exp")
+        if isinstance(exp, (int, float)):
+            ttl = exp - time.time()
+            if ttl > 0:
+                self.cache.set(key, claims, ttl=ttl)
+        return claims
+
+    @property
+    def hit_ratio(self) -> float:
+        """
+        缓存命中率
+        """
+        return self.cache.hit_ratio
+
+    def clear(self) -> None:
+        """
+        清空缓存
+        """
+        self.cache.clear()
+
+
+# 创建缓存实例
+token_cache = VerifiedTokenCache(
+    settings.SECRET_KEY,
+    algorithms=[settings.ALGORITHM],
+    maxsize=settings.TOKEN_CACHE_MAXSIZE
+)
@@ -0,0 +1,126 @@
+import re
+from functools import lru_cache
+from typing import NamedTuple, Optional
+
+# 缓存的User-Agent条数，线上常见UA远少于该值
+USER_AGENT_CACHE_SIZE = 4096
+
+# 参与缓存的User-Agent最大长度，超长部分不影响识别结果，截断以限制缓存占用
+MAX_USER_AGENT_LENGTH = 512
+
+# App内置WebView标识，按顺序匹配（企业微信的UA同时包含MicroMessenger，需排在微信前面）
+IN_APP_MARKERS = (
+    ("wxwork", "wxwork"),
+    ("miniprogram", "wechat_miniprogram"),
+    ("micromessenger", "wechat"),
+    ("alipayclient", "alipay"),
+    ("dingtalk", "dingtalk"),
+    ("lark/", "feishu"),
+    ("aweme", "douyin"),
+    ("weibo", "weibo"),
+    ("newsarticle", "toutiao"),
+    (" qq/", "qq"),
+)
+
+# 浏览器标识，按顺序匹配（Chrome系UA都带Safari，Edge/Opera的UA都带Chrome）
+BROWSER_MARKERS = (
+    ("edg/", "edge"),
+    ("edga/", "edge"),
+    ("edgios/", "edge"),
+    ("opr/", "opera"),
+    ("ucbrowser", "uc"),
+    ("qqbrowser", "qq_browser"),
+    ("firefox/", "firefox"),
+    ("fxios/", "firefox"),
+    ("crios/", "chrome"),
+    ("chrome/", "chrome"),
+    ("safari/", "safari"),
+)
+
+_BOT_PATTERN = re.compile(r"bot|spider|crawler|curl|python-requests")
+_ANDROID_PHONE_PATTERN = re.compile(r"android.*mobile")
+
+
+class UserAgentInfo(NamedTuple):
+    device_type: str
+    os: str
+    browser: str
+    in_app: Optional[str]
+
+
+UNKNOWN = UserAgentInfo(device_type="unknown", os="unknown", browser="unknown", in_app=None)
+
+
+def parse_user_agent(user_agent: Optional[str]) -> UserAgentInfo:
+    """
+    解析User-Agent（结果按原始字符串缓存）
+
+    Args:
+        user_agent: 请求头中的User-Agent
+
+    Returns:
+        设备类型（mobile/tablet/desktop/bot/unknown）、操作系统、浏览器和App内置WebView
+    """
+    if not user_agent:
+        return UNKNOWN
+    return _parse_cached(user_agent[:MAX_USER_AGENT_LENGTH])
+
+
+def get_device_type(user_agent: Optional[str]) -> str:
+    """
+    根据User-Agent判断设备类型
+
+    Args:
+        user_agent: 请求头中的User-Agent
+
+    Returns:
+        设备类型：mobile, tablet, desktop, bot, unknown
+    """
+    return parse_user_agent(user_agent).device_type
+
+
+def _classify(user_agent: str) -> UserAgentInfo:
+    """
+    解析User-Agent（不缓存）
+
+    Args:
+        user_agent: User-Agent
+
+    Returns:
+        解析结果
+    """
+    ua = user_agent.lower()
+
+    if "harmonyos" in ua or "openharmony" in ua:
+        os_name = "harmonyos"
+    elif "iphone" in ua or "ipad" in ua or "ipod" in ua:
+        os_name = "ios"
+    elif "android" in ua:
+        os_name = "android"
+    elif "windows" in ua:
+        os_name = "windows"
+    elif "macintosh" in ua or "mac os x" in ua:
+        os_name = "macos"
+    elif "linux" in ua:
+        os_name = "linux"
+    else:
+        os_name = "unknown"
+
+    if _BOT_PATTERN.search(ua):
+        device_type = "bot"
+    elif "ipad" in ua or "tablet" in ua or (os_name == "android" and not _ANDROID_PHONE_PATTERN.search(ua)):
+        device_type = "tablet"
+    elif "mobile" in ua or "iphone" in ua or "ipod" in ua or os_name in ("android", "harmonyos"):
+        device_type = "mobile"
+    elif os_name in ("windows", "macos", "linux"):
+        device_type = "desktop"
+    else:
+        device_type = "unknown"
+
+    in_app = next((name for marker, name in IN_APP_MARKERS if marker in ua), None)
+    browser = next((name for marker, name in BROWSER_MARKERS if marker in ua), "unknown")
+
+    return UserAgentInfo(device_type=device_type, os=os_name, browser=browser, in_app=in_app)
+
+
+_parse_cached = lru_cache(maxsize=USER_AGENT_CACHE_SIZE)(_classify)
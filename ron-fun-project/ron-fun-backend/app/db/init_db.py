@@ -4,7 +4,7 @@ from sqlalchemy.orm import Session
 from app.db.session import Base, engine
 from app.core.config import settings
 from app.models import User, VIP
-from app.services.auth import get_password_hash
+from app.core.security import get_password_hash
 
 logger = logging.getLogger(__name__)
 
@@ -0,0 +1,160 @@
+import logging
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from sqlalchemy import exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool, Pool, QueuePool
+
+from app.core.config import settings
+from app.core.metrics import Histogram
+
+logger = logging.getLogger(__name__)
+
+
+class PoolStats:
+    """
+    单个连接池的统计：排队等待空闲连接的耗时分布、超时次数和慢获取次数
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.wait_time = Histogram(f"db_pool_{name}_checkout_wait_seconds")
+        self.timeouts = 0
+        self.slow_checkouts = 0
+        self.pool: Optional[Pool] = None
+
+
+class PoolMetrics:
+    """
+    连接池指标
+
+    连接池按 logging_name 登记（引擎 dispose 重建连接池后仍使用同一名称），
+    每次获取连接记录排队等待耗时（不含新建连接和 pre_ping 的网络往返），
+    超过阈值时输出警告日志，便于发现连接池耗尽。
+    """
+
+    def __init__(self, slow_threshold: float = 0.5):
+        """
+        初始化指标
+
+        Args:
+            slow_threshold: 获取连接等待超过该秒数时输出警告日志
+        """
+        self.slow_threshold = slow_threshold
+        self._stats: Dict[str, PoolStats] = {}
+        self._lock = threading.Lock()
+
+    def get_stats(self, name: str) -> PoolStats:
+        """
+        获取（不存在时创建）连接池统计
+
+        Args:
+            name: 连接池名称
+
+        Returns:
+            连接池统计
+        """
+        with self._lock:
+            stats = self._stats.get(name)
+            if stats is None:
+                stats = self._stats[name] = PoolStats(name)
+            return stats
+
+    def observe_checkout(self, pool: Pool, seconds: float, timed_out: bool = False) -> None:
+        """
+        记录一次获取连接
+
+        Args:
+            pool: 连接池
+            seconds: 等待秒数
+            timed_out: 是否等待超时
+        """
+        stats = self.get_stats(pool.logging_name or "default")
+        stats.pool = pool
+        stats.wait_time.observe(seconds)
+        if timed_out:
+            stats.timeouts += 1
+        if seconds >= self.slow_threshold:
+            stats.slow_checkouts += 1
+            logger.warning(
+                f"数据库连接池 {stats.name} 获取连接等待 {seconds:.3f} 秒"
+                f"{'后超时' if timed_out else ''}"
+                f"（已借出 {pool.checkedout()}，溢出 {pool.overflow()}）"
+            )
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """
+        获取所有连接池的当前状态和统计
+
+        Returns:
+            连接池名称 -> 指标字典
+        """
+        with self._lock:
+            items = list(self._stats.values())
+
+        result = {}
+        for stats in items:
+            pool = stats.pool
+            result[stats.name] = {
+                "size": pool.size() if pool is not None else None,
+                "checked_out": pool.checkedout() if pool is not None else None,
+                "checked_in": pool.checkedin() if pool is not None else None,
+                "overflow": pool.overflow() if pool is not None else None,
+                "timeouts": stats.timeouts,
+                "slow_checkouts": stats.slow_checkouts,
+                "checkout_wait_seconds": stats.wait_time.snapshot(),
+            }
+        return result
+
+    def register(self, pool: Pool) -> None:
+        """
+        登记连接池，未获取过连接时也能在指标中看到
+
+        Args:
+            pool: 连接池
+        """
+        self.get_stats(pool.logging_name or "default").pool = pool
+
+
+# 创建指标实例
+pool_metrics = PoolMetrics(slow_threshold=settings.DB_POOL_SLOW_CHECKOUT_SECONDS)
+
+
+class _InstrumentedPoolMixin:
+    """
+    记录获取连接排队等待耗时的连接池
+
+    只统计 _do_get（从队列取空闲连接，或在容量内新建连接）并扣除新建连接的耗时；
+    pre_ping 在 _do_get 返回后执行，不计入。等待耗时只反映连接池是否饱和，不受网络延迟影响。
+    """
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            record = super()._do_get()
+        except exc.TimeoutError:
+            pool_metrics.observe_checkout(self, time.perf_counter() - started, timed_out=True)
+            raise
+        connect_seconds = record.__dict__.pop("_connect_seconds", 0.0)
+        pool_metrics.observe_checkout(self, max(time.perf_counter() - started - connect_seconds, 0.0))
+        return record
+
+    def _create_connection(self):
+        started = time.perf_counter()
+        record = super()._create_connection()
+        # 新建连接的耗时由 _do_get 扣除
+        record._connect_seconds = time.perf_counter() - started
+        return record
+
+
+class InstrumentedQueuePool(_InstrumentedPoolMixin, QueuePool):
+    """
+    带指标的同步连接池
+    """
+
+
+class InstrumentedAsyncQueuePool(_InstrumentedPoolMixin, AsyncAdaptedQueuePool):
+    """
+    带指标的异步连接池
+    """
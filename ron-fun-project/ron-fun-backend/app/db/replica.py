@@ -0,0 +1,77 @@
+import logging
+import math
+import time
+from typing import Optional
+
+from starlette.requests import Request
+from starlette.responses import Response
+
+logger = logging.getLogger(__name__)
+
+# 记录客户端最近一次写入时间的Cookie
+LAST_WRITE_COOKIE = "last_write_at"
+
+
+class ReplicaRouter:
+    """
+    读写分离路由
+
+    标记为只读的接口使用从库会话。客户端提交写操作后的一小段时间内（READ_YOUR_WRITES_SECONDS），
+    其只读请求仍然走主库，保证能读到自己刚写入的数据，不受主从复制延迟影响。
+    未配置从库时所有请求都走主库。
+
+    写入时间通过短期Cookie由客户端携带，而不是记在进程内存里：
+    多个工作进程部署时，写请求和随后的读请求可能落在不同进程，进程内记录无法共享。
+    Cookie只影响读主库还是从库，伪造最多让该客户端多读主库，不影响数据正确性。
+    """
+
+    def __init__(self, enabled: bool = False, sticky_seconds: float = 5.0, cookie_name: str = LAST_WRITE_COOKIE):
+        """
+        初始化路由
+
+        Args:
+            enabled: 是否配置了从库
+            sticky_seconds: 写入后只读请求继续走主库的秒数
+            cookie_name: 记录最近写入时间的Cookie名
+        """
+        self.enabled = enabled
+        self.sticky_seconds = sticky_seconds
+        self.cookie_name = cookie_name
+
+    def mark_write(self, response: Optional[Response]) -> None:
+        """
+        在响应中写入本次提交的时间
+
+        Args:
+            response: 当前请求的响应对象，非请求上下文为None
+        """
+        if response is None or not self.enabled:
+            return
+        response.set_cookie(
+            self.cookie_name,
+            f"{time.time():.3f}",
+            max_age=max(math.ceil(self.sticky_seconds), 1),
+            httponly=True,
+            samesite="lax"
+        )
+
+    def use_replica(self, request: Optional[Request]) -> bool:
+        """
+        只读请求是否使用从库
+
+        Args:
+            request: 请求对象，非请求上下文为None
+
+        Returns:
+            是否使用从库
+        """
+        if not self.enabled:
+            return False
+        if request is None:
+            return True
+
+        try:
+            last_write_at = float(request.cookies.get(self.cookie_name, ""))
+        except ValueError:
+            return True
+        return time.time() - last_write_at >= self.sticky_seconds
@@ -1,27 +1,163 @@
-from sqlalchemy import create_engine
+from fastapi import Request, Response
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 
 from app.core.config import settings
+from app.core.request_metrics import track_queries
+from app.db.pool_metrics import InstrumentedAsyncQueuePool, InstrumentedQueuePool, pool_metrics
+from app.db.replica import ReplicaRouter
+
+# 连接池参数（同步和异步引擎各自一个连接池，每个进程最多 2 × (pool_size + max_overflow) 个连接）
+POOL_OPTIONS = dict(
+    pool_size=settings.DB_POOL_SIZE,
+    max_overflow=settings.DB_MAX_OVERFLOW,
+    pool_timeout=settings.DB_POOL_TIMEOUT,
+    pool_recycle=settings.DB_POOL_RECYCLE,
+)
+
+def _connect_args(uri: str) -> dict:
+    """
+    SQLite连接允许跨线程使用
+    """
+    return {"check_same_thread": False} if uri and uri.startswith("sqlite") else {}
 
 # 创建SQLAlchemy引擎
 engine = create_engine(
     settings.SQLALCHEMY_DATABASE_URI,
     echo=False,  # 是否打印SQL语句
     pool_pre_ping=True,  # 连接池预检查连接
-    connect_args={"check_same_thread": False} if settings.SQLALCHEMY_DATABASE_URI and settings.SQLALCHEMY_DATABASE_URI.startswith("sqlite") else {}
+    poolclass=InstrumentedQueuePool,
+    pool_logging_name="primary",
+    connect_args=_connect_args(settings.SQLALCHEMY_DATABASE_URI),
+    **POOL_OPTIONS
 )
+pool_metrics.register(engine.pool)
+track_queries(engine)
 
 # 创建会话类
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# 同步驱动对应的异步驱动：MySQL使用aiomysql，SQLite（开发环境）使用aiosqlite
+ASYNC_DRIVERS = {
+    "mysql": "mysql+aiomysql",
+    "mysql+pymysql": "mysql+aiomysql",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+def get_async_database_uri(uri: str) -> str:
+    """
+    把同步数据库连接串转换为对应异步驱动的连接串
+    
+    Args:
+        uri: 同步连接串
+        
+    Returns:
+        异步连接串
+    """
+    scheme, separator, rest = uri.partition("://")
+    return ASYNC_DRIVERS.get(scheme, scheme) + separator + rest
+
+# 创建异步引擎，数据库I/O期间不阻塞事件循环
+async_engine = create_async_engine(
+    get_async_database_uri(settings.SQLALCHEMY_DATABASE_URI),
+    echo=False,
+    pool_pre_ping=True,
+    poolclass=InstrumentedAsyncQueuePool,
+    pool_logging_name="primary_async",
+    **POOL_OPTIONS
+)
+pool_metrics.register(async_engine.sync_engine.pool)
+track_queries(async_engine.sync_engine)
+
+# 创建异步会话类（提交后不过期对象，避免访问属性时触发隐式I/O）
+AsyncSessionLocal = async_sessionmaker(async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+
+# 从库（未配置时只读接口也使用主库）
+if settings.REPLICA_DATABASE_URI:
+    replica_engine = create_engine(
+        settings.REPLICA_DATABASE_URI,
+        echo=False,
+        pool_pre_ping=True,
+        poolclass=InstrumentedQueuePool,
+        pool_logging_name="replica",
+        connect_args=_connect_args(settings.REPLICA_DATABASE_URI),
+        **POOL_OPTIONS
+    )
+    pool_metrics.register(replica_engine.pool)
+    track_queries(replica_engine)
+    async_replica_engine = create_async_engine(
+        get_async_database_uri(settings.REPLICA_DATABASE_URI),
+        echo=False,
+        pool_pre_ping=True,
+        poolclass=InstrumentedAsyncQueuePool,
+        pool_logging_name="replica_async",
+        **POOL_OPTIONS
+    )
+    pool_metrics.register(async_replica_engine.sync_engine.pool)
+    track_queries(async_replica_engine.sync_engine)
+    ReplicaSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=replica_engine)
+    AsyncReplicaSessionLocal = async_sessionmaker(
+        async_replica_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+    )
+else:
+    replica_engine = async_replica_engine = None
+    ReplicaSessionLocal = SessionLocal
+    AsyncReplicaSessionLocal = AsyncSessionLocal
+
+# 读写分离路由：客户端写入后的短时间内只读请求仍走主库
+replica_router = ReplicaRouter(
+    enabled=bool(settings.REPLICA_DATABASE_URI),
+    sticky_seconds=settings.READ_YOUR_WRITES_SECONDS
+)
+
+@event.listens_for(SessionLocal, "after_flush")
+def _flag_flush_writes(session, flush_context):
+    session.info["has_writes"] = True
+
+@event.listens_for(SessionLocal, "do_orm_execute")
+def _flag_statement_writes(orm_execute_state):
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        orm_execute_state.session.info["has_writes"] = True
+
+@event.listens_for(SessionLocal, "after_commit")
+def _mark_recent_writer(session):
+    # 提交时（响应返回前）在响应Cookie中记录写入时间，之后该客户端的只读请求在粘滞期内走主库
+    if session.info.pop("has_writes", False):
+        replica_router.mark_write(session.info.get("response"))
+
 # 创建基类模型
 Base = declarative_base()
 
-# 依赖项，提供数据库会话
-def get_db():
-    db = SessionLocal()
+# 依赖项，提供数据库会话（主库）
+def get_db(response: Response = None):
+    db = SessionLocal(info={"response": response})
     try:
         yield db
     finally:
-        db.close() 
\ No newline at end of file
+        db.close()
+
+# 依赖项，提供异步数据库会话（主库）
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+def _use_replica(request: Request) -> bool:
+    """
+    只读请求是否使用从库
+    """
+    return replica_router.enabled and replica_router.use_replica(request)
+
+# 依赖项，只读接口使用：提供从库会话（当前客户端刚写入过时为主库会话）
+def get_read_db(request: Request = None):
+    db = (ReplicaSessionLocal if _use_replica(request) else SessionLocal)()
+    try:
+        yield db
+    finally:
+        db.close()
+
+# 依赖项，只读接口使用：提供异步从库会话（当前客户端刚写入过时为主库会话）
+async def get_async_read_db(request: Request = None):
+    async with (AsyncReplicaSessionLocal if _use_replica(request) else AsyncSessionLocal)() as db:
+        yield db
@@ -1,22 +1,86 @@
+import asyncio
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 from fastapi.staticfiles import StaticFiles
 
 from app.core.config import settings
+from app.core.logging_setup import log_sink
+from app.db.session import async_engine
+from app.middleware.logger import LoggerMiddleware
+from app.middleware.metrics import MetricsMiddleware
+from app.middleware.response import ApiJSONResponse, add_api_exception_handlers
+from app.services.order_worker import order_worker_pool
+from app.services.click_buffer import click_buffer
+from app.services.app_recommendation_service import app_recommendation_service
+from app.services.cache_warmup import cache_warmup
+from app.services.password_service import password_service
+from app.api.v1.endpoints import health, metrics
 import os
 
 # 创建必要的目录
 os.makedirs(settings.UPLOAD_DIR, exist_ok=True)
 os.makedirs("app/static", exist_ok=True)  # 创建静态文件目录
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # 日志由后台线程格式化和输出
+    log_sink.start()
+    
+    # 启动订单事件工作线程
+    if settings.ORDER_WORKER_ENABLED:
+        order_worker_pool.start()
+    
+    # 启动点击统计批量写库线程
+    click_buffer.start()
+    
+    # 后台加载离线推荐结果，首页请求只读内存
+    app_recommendation_service.start()
+    
+    # 后台预热热点缓存，完成前 /health/ready 返回503
+    warmup_task = None
+    if settings.CACHE_WARMUP_ENABLED:
+        warmup_task = asyncio.create_task(cache_warmup.run(
+            concurrency=settings.CACHE_WARMUP_CONCURRENCY,
+            timeout=settings.CACHE_WARMUP_TIMEOUT
+        ))
+    else:
+        cache_warmup.ready = True
+    
+    yield
+    
+    if warmup_task is not None and not warmup_task.done():
+        warmup_task.cancel()
+    order_worker_pool.stop()
+    app_recommendation_service.stop()
+    # 停止时写入缓冲区中剩余的点击数据
+    click_buffer.stop()
+    password_service.shutdown()
+    await async_engine.dispose()
+    log_sink.stop()
+
 app = FastAPI(
     title=settings.PROJECT_NAME,
     description=settings.PROJECT_DESCRIPTION,
     version=settings.PROJECT_VERSION,
+    lifespan=lifespan,
+    # 全局使用orjson序列化并在序列化时生成统一响应格式
+    default_response_class=ApiJSONResponse,
     # 添加root_path配置，支持子路径访问
     root_path="/ron-fun" if os.getenv("ENABLE_ROOT_PATH", "false").lower() == "true" else "",
 )
 
+# HTTP异常和参数校验错误同样返回统一响应格式
+add_api_exception_handlers(app)
+
+# 请求日志（按路由采样，错误和慢请求始终记录），响应头返回X-Request-ID
+app.add_middleware(LoggerMiddleware)
+
+# 请求指标：按路由的耗时分布、状态码计数、每请求SQL次数和耗时，由 /metrics 输出
+app.add_middleware(MetricsMiddleware)
+
 # 设置CORS
 if settings.BACKEND_CORS_ORIGINS:
     app.add_middleware(
@@ -27,11 +91,23 @@ if settings.BACKEND_CORS_ORIGINS:
         allow_headers=["*"],
     )
 
+# 健康检查路由单独挂载，提供负载均衡器使用的就绪探针；探针响应体不使用统一响应格式
+app.include_router(
+    health.router,
+    prefix=f"{settings.API_V1_STR}/health",
+    tags=["健康检查"],
+    default_response_class=ORJSONResponse,
+)
+
+# Prometheus指标
+app.include_router(metrics.router, prefix="/metrics", tags=["监控指标"])
+
 # 挂载静态文件目录
 app.mount("/uploads", StaticFiles(directory=settings.UPLOAD_DIR), name="uploads")
 app.mount("/static", StaticFiles(directory="app/static"), name="static")
 
-@app.get("/")
+# 非API路由不使用统一响应格式
+@app.get("/", response_class=ORJSONResponse)
 async def root():
     return {"message": f"欢迎访问 {settings.PROJECT_NAME} 演示版本"}
 
@@ -1,12 +1,14 @@
 # 中间件包 
-from app.middleware.response import ResponseMiddleware
+from app.middleware.response import ApiJSONResponse, add_api_exception_handlers, api_envelope_body
 from app.middleware.logger import LoggerMiddleware
 from app.middleware.exception import ExceptionMiddleware
 from app.middleware.validation import ValidationMiddleware
 
 __all__ = [
-    "ResponseMiddleware",
+    "ApiJSONResponse",
+    "add_api_exception_handlers",
+    "api_envelope_body",
     "LoggerMiddleware",
     "ExceptionMiddleware",
     "ValidationMiddleware",
-] 
\ No newline at end of file
+]
\ No newline at end of file
@@ -1,85 +1,118 @@
-import jwt
-from fastapi import Request, Response, HTTPException, status
+import time
+from jose import ExpiredSignatureError, JWTError
+from fastapi import status
 from fastapi.responses import JSONResponse
-from starlette.middleware.base import BaseHTTPMiddleware
-from typing import List, Optional, Set, Tuple, Union
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Receive, Scope, Send
+from typing import Set, Tuple, Union
 
-from app.core.config import settings
+from app.core.cache import MISSING
+from app.core.token_cache import token_cache
 from app.db.session import SessionLocal
-from app.models.user import User
+from app.services.principal_cache import Principal, principal_cache
 from app.schemas.common import ApiResponse
 
 
-class AuthenticationMiddleware(BaseHTTPMiddleware):
+class AuthenticationMiddleware:
+    """
+    认证中间件
+
+    纯ASGI实现：认证通过后把用户快照写入请求状态（request.state.user / request.state.user_id），
+    认证失败直接返回401，不经过后续处理。
+    """
+
     # 不需要认证的路径
     PUBLIC_PATHS: Set[str] = {
-        "/docs", 
-        "/redoc", 
+        "/docs",
+        "/redoc",
         "/openapi.json",
-        "/api/v1/auth/login", 
+        "/api/v1/auth/login",
         "/api/v1/auth/register"
     }
-    
+
     # 路径前缀匹配
     PUBLIC_PATH_PREFIXES: Tuple[str, ...] = (
         "/static/",
     )
-    
-    async def dispatch(
-        self, request: Request, call_next
-    ) -> Union[Response, JSONResponse]:
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
         # 检查是否需要认证
-        path = request.url.path
-        
+        path = scope["path"]
+
         # 公开路径不需要认证
-        if path in self.PUBLIC_PATHS or any(path.startswith(prefix) for prefix in self.PUBLIC_PATH_PREFIXES):
-            return await call_next(request)
-        
+        if path in self.PUBLIC_PATHS or path.startswith(self.PUBLIC_PATH_PREFIXES):
+            await self.app(scope, receive, send)
+            return
+
+        result = self._authenticate(Headers(scope=scope).get("Authorization"))
+        if isinstance(result, str):
+            await self._create_unauthorized_response(result)(scope, receive, send)
+            return
+
+        # 将用户信息添加到请求状态
+        state = scope.setdefault("state", {})
+        state["user"] = result
+        state["user_id"] = result.id
+
+        # 继续处理请求
+        await self.app(scope, receive, send)
+
+    def _authenticate(self, token: str) -> Union[Principal, str]:
+        """
+        验证令牌并获取用户快照
+
+        Args:
+            token: Authorization请求头
+
+        Returns:
+            认证通过时为用户快照，失败时为错误消息
+        """
         # 验证令牌
-        token = request.headers.get("Authorization")
         if not token:
-            return self._create_unauthorized_response("缺少认证令牌")
-        
+            return "缺少认证令牌"
+
         # 移除Bearer前缀
         if token.startswith("Bearer "):
             token = token[7:]
-        
+
         try:
             # 解析令牌
-            payload = jwt.decode(
-                token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM]
-            )
+            payload = token_cache.decode(token)
             user_id = payload.get("sub")
             if not user_id:
-                return self._create_unauthorized_response("无效的认证令牌")
-            
-            # 验证用户是否存在
-            db = SessionLocal()
-            try:
-                user = db.query(User).filter(User.id == user_id).first()
-                if not user:
-                    return self._create_unauthorized_response("用户不存在")
-                
-                # 检查用户状态
-                if not user.is_active:
-                    return self._create_unauthorized_response("用户已被禁用")
-                
-                # 将用户信息添加到请求状态
-                request.state.user = user
-                request.state.user_id = user.id
-                
-                # 继续处理请求
-                return await call_next(request)
-            finally:
-                db.close()
-                
-        except jwt.ExpiredSignatureError:
-            return self._create_unauthorized_response("认证令牌已过期")
-        except jwt.InvalidTokenError:
-            return self._create_unauthorized_response("无效的认证令牌")
+                return "无效的认证令牌"
+
+            # 验证用户是否存在（优先使用缓存，未命中时才打开数据库会话）
+            principal = principal_cache.get_cached(user_id)
+            if principal is MISSING:
+                db = SessionLocal()
+                try:
+                    principal = principal_cache.get(db, user_id)
+                finally:
+                    db.close()
+            if not principal:
+                return "用户不存在"
+
+            # 检查用户状态
+            if not principal.is_active:
+                return "用户已被禁用"
+
+            return principal
+
+        except ExpiredSignatureError:
+            return "认证令牌已过期"
+        except JWTError:
+            return "无效的认证令牌"
         except Exception as e:
-            return self._create_unauthorized_response(f"认证失败: {str(e)}")
-    
+            return f"认证失败: {str(e)}"
+
     def _create_unauthorized_response(self, message: str) -> JSONResponse:
         """创建未授权响应"""
         return JSONResponse(
@@ -87,7 +120,7 @@ class AuthenticationMiddleware(BaseHTTPMiddleware):
                 code=status.HTTP_401_UNAUTHORIZED,
                 message=message,
                 data=None,
-                timestamp=int(__import__("time").time())
+                timestamp=int(time.time())
             ).dict(),
             status_code=status.HTTP_401_UNAUTHORIZED
-        ) 
\ No newline at end of file
+        )
@@ -1,24 +1,56 @@
 import logging
 import traceback
-from fastapi import Request, status
+from fastapi import status
 from fastapi.responses import JSONResponse
-from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 from pydantic import ValidationError
 from sqlalchemy.exc import SQLAlchemyError
-from app.schemas.response import ApiResponse
+from app.schemas.common import ApiResponse
 
 # 配置日志
 logger = logging.getLogger("exception")
 
-class ExceptionMiddleware(BaseHTTPMiddleware):
+class ExceptionMiddleware:
     """
     异常处理中间件，集中处理应用程序中的异常
+
+    纯ASGI实现。响应头已经发出后无法再返回错误响应，此时直接抛出异常。
     """
-    
-    async def dispatch(self, request: Request, call_next):
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        response_started = False
+
+        async def send_tracking(message: Message):
+            nonlocal response_started
+            if message["type"] == "http.response.start":
+                response_started = True
+            await send(message)
+
         try:
-            return await call_next(request)
-        except ValidationError as e:
+            await self.app(scope, receive, send_tracking)
+        except Exception as e:
+            if response_started:
+                raise
+            await self._handle(e)(scope, receive, send)
+
+    def _handle(self, e: Exception) -> JSONResponse:
+        """
+        根据异常类型生成错误响应
+
+        Args:
+            e: 异常
+
+        Returns:
+            统一格式的错误响应
+        """
+        if isinstance(e, ValidationError):
             # 处理Pydantic验证错误
             logger.warning(f"ValidationError: {str(e)}")
             return JSONResponse(
@@ -29,7 +61,7 @@ class ExceptionMiddleware(BaseHTTPMiddleware):
                     data=e.errors()
                 ).dict()
             )
-        except SQLAlchemyError as e:
+        if isinstance(e, SQLAlchemyError):
             # 处理数据库错误
             logger.error(f"DatabaseError: {str(e)}")
             return JSONResponse(
@@ -40,19 +72,19 @@ class ExceptionMiddleware(BaseHTTPMiddleware):
                     data=None
                 ).dict()
             )
-        except Exception as e:
-            # 处理其他未预期的异常
-            error_detail = str(e)
-            stack_trace = traceback.format_exc()
-            
-            # 记录错误详情和堆栈跟踪
-            logger.error(f"Unhandled Exception: {error_detail}\n{stack_trace}")
-            
-            return JSONResponse(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                content=ApiResponse(
-                    code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                    message="服务器内部错误",
-                    data=None
-                ).dict()
-            ) 
\ No newline at end of file
+
+        # 处理其他未预期的异常
+        error_detail = str(e)
+        stack_trace = traceback.format_exc()
+
+        # 记录错误详情和堆栈跟踪
+        logger.error(f"Unhandled Exception: {error_detail}\n{stack_trace}")
+
+        return JSONResponse(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            content=ApiResponse(
+                code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                message="服务器内部错误",
+                data=None
+            ).dict()
+        )
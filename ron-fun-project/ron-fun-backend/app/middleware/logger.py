@@ -1,61 +1,117 @@
+import os
+import random
 import time
-import uuid
 import logging
-from fastapi import Request, Response
-from starlette.middleware.base import BaseHTTPMiddleware
-
-# 配置日志
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-)
+from typing import Dict, Optional
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+
 logger = logging.getLogger("api")
 
-class LoggerMiddleware(BaseHTTPMiddleware):
+class LoggerMiddleware:
     """
-    请求日志中间件，记录请求和响应的详细信息
+    请求日志中间件，每个请求结束时记录一条结构化日志
+
+    纯ASGI实现：只在发送响应头时追加请求ID和处理时间，不缓冲、不包装响应体。
+    日志字段通过 extra 传入，由后台日志线程格式化（见 app.core.logging_setup）。
+    成功请求按路由采样；错误（状态码>=400或抛出异常）和慢请求始终记录。
+    请求头带有 X-Request-ID 时沿用该ID，否则生成新的ID。
     """
-    
-    async def dispatch(self, request: Request, call_next):
-        # 生成请求ID
-        request_id = str(uuid.uuid4())
-        
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        sample_rate: Optional[float] = None,
+        route_sample_rates: Optional[Dict[str, float]] = None,
+        slow_seconds: Optional[float] = None,
+    ):
+        """
+        初始化日志中间件
+
+        Args:
+            app: ASGI应用
+            sample_rate: 成功请求的默认采样率（0~1）
+            route_sample_rates: 路由（路径模板，如 /api/v1/products/{product_id}）对应的采样率
+            slow_seconds: 处理时间超过该秒数的请求始终记录
+        """
+        self.app = app
+        self.sample_rate = settings.REQUEST_LOG_SAMPLE_RATE if sample_rate is None else sample_rate
+        self.route_sample_rates = (
+            settings.REQUEST_LOG_ROUTE_SAMPLE_RATES if route_sample_rates is None else route_sample_rates
+        )
+        self.slow_seconds = settings.REQUEST_LOG_SLOW_SECONDS if slow_seconds is None else slow_seconds
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        # 沿用上游传入的请求ID，否则生成新的ID
+        request_id = Headers(scope=scope).get("x-request-id") or os.urandom(8).hex()
+        scope.setdefault("state", {})["request_id"] = request_id
+
         # 记录请求开始时间
-        start_time = time.time()
-        
-        # 获取请求信息
-        method = request.method
-        url = str(request.url)
-        client_host = request.client.host if request.client else "unknown"
-        
-        # 记录请求信息
-        logger.info(f"Request started: [ID: {request_id}] {method} {url} from {client_host}")
-        
+        start_time = time.perf_counter()
+        status_code = 500
+
+        async def send_with_headers(message: Message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                # 在响应头中添加请求ID和处理时间
+                headers = MutableHeaders(scope=message)
+                headers["X-Request-ID"] = request_id
+                headers["X-Process-Time"] = str(time.perf_counter() - start_time)
+            await send(message)
+
         # 处理请求
         try:
-            response = await call_next(request)
-            
-            # 计算处理时间
-            process_time = time.time() - start_time
-            
-            # 记录响应信息
-            status_code = response.status_code
-            logger.info(
-                f"Request completed: [ID: {request_id}] {method} {url} "
-                f"- Status: {status_code} - Duration: {process_time:.4f}s"
-            )
-            
-            # 在响应头中添加请求ID和处理时间
-            response.headers["X-Request-ID"] = request_id
-            response.headers["X-Process-Time"] = str(process_time)
-            
-            return response
-            
-        except Exception as e:
-            # 处理请求过程中发生的异常
-            process_time = time.time() - start_time
-            logger.error(
-                f"Request failed: [ID: {request_id}] {method} {url} "
-                f"- Error: {str(e)} - Duration: {process_time:.4f}s"
-            )
-            raise  # 重新抛出异常，让后续的异常处理中间件处理 
\ No newline at end of file
+            await self.app(scope, receive, send_with_headers)
+        except Exception:
+            self._log(scope, request_id, 500, time.perf_counter() - start_time, exc_info=True)
+            raise  # 重新抛出异常，让后续的异常处理中间件处理
+
+        self._log(scope, request_id, status_code, time.perf_counter() - start_time)
+
+    def _route(self, scope: Scope) -> str:
+        """
+        请求匹配的路由模板，未匹配到路由时为请求路径
+        """
+        route = scope.get("route")
+        return getattr(route, "path_format", None) or scope["path"]
+
+    def _log(self, scope: Scope, request_id: str, status_code: int, duration: float, exc_info: bool = False):
+        """
+        记录请求日志：错误和慢请求始终记录，其余按路由采样
+        """
+        route = self._route(scope)
+        if exc_info or status_code >= 500:
+            level = logging.ERROR
+        elif status_code >= 400 or duration >= self.slow_seconds:
+            level = logging.WARNING
+        else:
+            level = logging.INFO
+            rate = self.route_sample_rates.get(route, self.sample_rate)
+            if rate < 1.0 and random.random() >= rate:
+                return
+
+        if not logger.isEnabledFor(level):
+            return
+
+        client = scope.get("client")
+        logger.log(
+            level,
+            "request",
+            exc_info=exc_info,
+            extra={
+                "request_id": request_id,
+                "method": scope["method"],
+                "path": scope["path"],
+                "route": route,
+                "status": status_code,
+                "duration_ms": round(duration * 1000, 3),
+                "client": client[0] if client else None,
+            },
+        )
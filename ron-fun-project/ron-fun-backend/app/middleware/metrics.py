@@ -0,0 +1,41 @@
+import time
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.request_metrics import RequestStats, current_request_stats, request_metrics
+
+
+class MetricsMiddleware:
+    """
+    请求指标中间件
+
+    纯ASGI实现：记录每个请求的路由、状态码、耗时，以及请求中执行的SQL次数和耗时，
+    汇总到 request_metrics，由 /metrics 接口输出。
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats()
+        token = current_request_stats.set(stats)
+        start_time = time.perf_counter()
+        status_code = 500
+
+        async def send_tracking(message: Message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_tracking)
+        finally:
+            duration = time.perf_counter() - start_time
+            current_request_stats.reset(token)
+            # 按路由模板统计，未匹配到路由的请求统一记为 unmatched
+            route = getattr(scope.get("route"), "path_format", None) or "unmatched"
+            request_metrics.observe(scope["method"], route, status_code, duration, stats)
@@ -1,60 +1,135 @@
 import time
-from fastapi import Request, Response
+from typing import Any, Dict, Mapping, Optional
+
+import orjson
+from fastapi import Request, status
+from fastapi.encoders import jsonable_encoder
+from fastapi.exception_handlers import http_exception_handler, request_validation_exception_handler
+from fastapi.exceptions import RequestValidationError
 from fastapi.responses import JSONResponse
-from starlette.middleware.base import BaseHTTPMiddleware
-from typing import Any, Dict, Optional, Union
-
-from app.schemas.common import ApiResponse
-
-
-class ResponseMiddleware(BaseHTTPMiddleware):
-    async def dispatch(
-        self, request: Request, call_next
-    ) -> Union[Response, JSONResponse]:
-        try:
-            response = await call_next(request)
-            
-            # 如果是API路由并且是JSON响应，则统一包装格式
-            if (
-                request.url.path.startswith("/api/")
-                and response.status_code < 500
-                and response.headers.get("content-type") == "application/json"
-            ):
-                response_body = b""
-                async for chunk in response.body_iterator:
-                    response_body += chunk
-                
-                # 解析响应体
-                body = response_body.decode()
-                import json
-                data = json.loads(body)
-                
-                # 构造统一响应格式
-                wrapped_response = ApiResponse(
-                    code=0 if 200 <= response.status_code < 400 else response.status_code,
-                    message="success" if 200 <= response.status_code < 400 else data.get("detail", "error"),
-                    data=data if 200 <= response.status_code < 400 else None,
-                    timestamp=int(time.time())
-                )
-                
-                return JSONResponse(
-                    content=wrapped_response.dict(),
-                    status_code=200 if 200 <= response.status_code < 400 else response.status_code,
-                    headers=dict(response.headers)
-                )
-            
-            return response
-            
-        except Exception as e:
-            # 异常处理
-            wrapped_response = ApiResponse(
-                code=500,
-                message=str(e),
-                data=None,
-                timestamp=int(time.time())
-            )
-            
-            return JSONResponse(
-                content=wrapped_response.dict(),
-                status_code=500
-            ) 
\ No newline at end of file
+from pydantic import BaseModel
+from starlette.background import BackgroundTask
+from starlette.exceptions import HTTPException as StarletteHTTPException
+
+# 使用统一响应格式的路径前缀
+API_PATH_PREFIX = "/api/"
+
+# 不能带响应体的状态码
+NO_BODY_STATUS_CODES = (204, 304)
+
+
+def api_envelope(content: Any, status_code: int) -> Dict[str, Any]:
+    """
+    构造统一响应格式（与 ApiResponse 字段一致）
+
+    Args:
+        content: 接口返回的数据，错误响应为包含 detail 的字典
+        status_code: 接口状态码
+
+    Returns:
+        统一格式的响应字典
+    """
+    if 200 <= status_code < 400:
+        return {"code": 0, "message": "success", "data": content, "timestamp": int(time.time())}
+
+    detail = content.get("detail") if isinstance(content, Mapping) else None
+    return {
+        "code": status_code,
+        "message": detail if isinstance(detail, str) else "error",
+        "data": None,
+        "timestamp": int(time.time()),
+    }
+
+
+def api_envelope_body(data: bytes) -> bytes:
+    """
+    把已序列化的JSON数据拼接成统一格式的成功响应体，无需重新解析和编码
+
+    Args:
+        data: 已序列化的JSON数据
+
+    Returns:
+        统一格式的响应体
+    """
+    return b'{"code":0,"message":"success","data":%s,"timestamp":%d}' % (data, int(time.time()))
+
+
+def _orjson_default(obj: Any) -> Any:
+    """
+    orjson 不能直接序列化的类型：Pydantic模型转为字典，其余（Decimal、set等）交给 jsonable_encoder
+    """
+    if isinstance(obj, BaseModel):
+        return obj.dict()
+    return jsonable_encoder(obj)
+
+
+class ApiJSONResponse(JSONResponse):
+    """
+    统一响应格式的JSON响应（orjson序列化）
+
+    序列化时直接把接口数据包装成 ApiResponse 格式，只编码一次，
+    取代原先在中间件中读取响应体、解析JSON、包装后再次编码的做法。
+    使用orjson编码，datetime、date、UUID、Enum原生支持，Pydantic模型直接传入时无需先转为字典。
+    成功响应的状态码统一为200，错误响应保留原状态码。
+
+    在 app/main.py 中配置为全局默认响应类:
+        app = FastAPI(default_response_class=ApiJSONResponse)
+        add_api_exception_handlers(app)
+    响应类不知道请求路径，非API路由和健康检查探针需显式指定 response_class=ORJSONResponse。
+    """
+
+    def __init__(
+        self,
+        content: Any,
+        status_code: int = 200,
+        headers: Optional[Mapping[str, str]] = None,
+        media_type: Optional[str] = None,
+        background: Optional[BackgroundTask] = None,
+    ) -> None:
+        if status_code < 200 or status_code in NO_BODY_STATUS_CODES:
+            # 204、304等状态码不能带响应体
+            content = None
+        else:
+            content = api_envelope(content, status_code)
+            status_code = status.HTTP_200_OK if 200 <= status_code < 400 else status_code
+        super().__init__(
+            content,
+            status_code=status_code,
+            headers=headers,
+            media_type=media_type,
+            background=background,
+        )
+
+    def render(self, content: Any) -> bytes:
+        if content is None:
+            return b""
+        return orjson.dumps(content, default=_orjson_default, option=orjson.OPT_NON_STR_KEYS)
+
+
+async def api_http_exception_handler(request: Request, exc: StarletteHTTPException):
+    """
+    HTTP异常处理：API路径返回统一格式的错误响应
+    """
+    if not request.url.path.startswith(API_PATH_PREFIX):
+        return await http_exception_handler(request, exc)
+    return ApiJSONResponse({"detail": exc.detail}, status_code=exc.status_code, headers=getattr(exc, "headers", None))
+
+
+async def api_validation_exception_handler(request: Request, exc: RequestValidationError):
+    """
+    请求参数校验失败处理：API路径返回统一格式的错误响应
+    """
+    if not request.url.path.startswith(API_PATH_PREFIX):
+        return await request_validation_exception_handler(request, exc)
+    return ApiJSONResponse({"detail": "参数验证失败"}, status_code=status.HTTP_422_UNPROCESSABLE_ENTITY)
+
+
+def add_api_exception_handlers(app) -> None:
+    """
+    注册统一格式的异常处理器，使错误响应与 ApiJSONResponse 格式一致
+
+    Args:
+        app: FastAPI应用实例
+    """
+    app.add_exception_handler(StarletteHTTPException, api_http_exception_handler)
+    app.add_exception_handler(RequestValidationError, api_validation_exception_handler)
@@ -1,104 +1,145 @@
-from fastapi import Request, Response, status
+from fastapi import status
 from fastapi.responses import JSONResponse
-from starlette.middleware.base import BaseHTTPMiddleware
-from typing import Dict, Any, Callable, Optional, Type
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from typing import Dict, Optional, Type
 from pydantic import BaseModel, ValidationError
 import logging
 import json
 
-from app.schemas.response import ApiResponse
+from app.schemas.common import ApiResponse
 
 # 配置日志
 logger = logging.getLogger("validation")
 
-class ValidationMiddleware(BaseHTTPMiddleware):
+class ValidationMiddleware:
     """
     参数验证中间件，提供集中的请求参数验证
+
+    纯ASGI实现：只有注册了验证模型的路径才读取请求体，读取后重新提供给后续处理。
     """
-    
-    def __init__(self, app, validators: Dict[str, Type[BaseModel]] = None):
+
+    def __init__(self, app: ASGIApp, validators: Dict[str, Type[BaseModel]] = None):
         """
         初始化验证中间件
-        
+
         Args:
             app: FastAPI应用实例
             validators: 路径对应的验证模型字典，格式为 {"/api/v1/path": ModelClass}
         """
-        super().__init__(app)
+        self.app = app
         self.validators = validators or {}
-    
-    async def dispatch(self, request: Request, call_next):
-        # 获取当前请求路径
-        path = request.url.path
-        
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or scope["method"] not in ("POST", "PUT", "PATCH"):
+            await self.app(scope, receive, send)
+            return
+
         # 检查是否需要验证该路径的请求
-        validator = self._get_validator(path)
-        
-        if validator and request.method in ["POST", "PUT", "PATCH"]:
+        validator = self._get_validator(scope["path"])
+        if validator is None:
+            await self.app(scope, receive, send)
+            return
+
+        # 获取请求体数据
+        body = await self._read_body(receive)
+        if body:
+            response = self._validate(scope, validator, body)
+            if response is not None:
+                await response(scope, receive, send)
+                return
+
+        # 继续处理请求，请求体已读取，重新提供给后续处理
+        body_sent = False
+
+        async def replay_receive() -> Message:
+            nonlocal body_sent
+            if not body_sent:
+                body_sent = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            return await receive()
+
+        await self.app(scope, replay_receive, send)
+
+    @staticmethod
+    async def _read_body(receive: Receive) -> bytes:
+        """
+        读取完整请求体
+        """
+        chunks = []
+        while True:
+            message = await receive()
+            if message["type"] != "http.request":
+                break
+            chunks.append(message.get("body", b""))
+            if not message.get("more_body", False):
+                break
+        return b"".join(chunks)
+
+    def _validate(self, scope: Scope, validator: Type[BaseModel], body: bytes) -> Optional[JSONResponse]:
+        """
+        验证请求体，通过时把验证后的数据附加到请求状态
+
+        Returns:
+            验证失败时的错误响应，通过时为None
+        """
+        try:
+            # 解析JSON数据
             try:
-                # 获取请求体数据
-                body = await request.body()
-                if body:
-                    # 解析JSON数据
-                    try:
-                        body_data = json.loads(body)
-                    except json.JSONDecodeError:
-                        return JSONResponse(
-                            status_code=status.HTTP_400_BAD_REQUEST,
-                            content=ApiResponse(
-                                code=status.HTTP_400_BAD_REQUEST,
-                                message="无效的JSON格式",
-                                data=None
-                            ).dict()
-                        )
-                    
-                    # 使用Pydantic模型验证数据
-                    try:
-                        validated_data = validator(**body_data)
-                        # 将验证后的数据重新附加到请求对象
-                        request.state.validated_data = validated_data
-                    except ValidationError as e:
-                        return JSONResponse(
-                            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
-                            content=ApiResponse(
-                                code=status.HTTP_422_UNPROCESSABLE_ENTITY,
-                                message="参数验证失败",
-                                data=e.errors()
-                            ).dict()
-                        )
-            
-            except Exception as e:
-                logger.error(f"Validation middleware error: {str(e)}")
+                body_data = json.loads(body)
+            except json.JSONDecodeError:
                 return JSONResponse(
-                    status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                    status_code=status.HTTP_400_BAD_REQUEST,
                     content=ApiResponse(
-                        code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                        message="参数验证过程中发生错误",
+                        code=status.HTTP_400_BAD_REQUEST,
+                        message="无效的JSON格式",
                         data=None
                     ).dict()
                 )
-        
-        # 继续处理请求
-        return await call_next(request)
-    
+
+            # 使用Pydantic模型验证数据
+            try:
+                validated_data = validator(**body_data)
+                # 将验证后的数据附加到请求状态（request.state.validated_data）
+                scope.setdefault("state", {})["validated_data"] = validated_data
+            except ValidationError as e:
+                return JSONResponse(
+                    status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                    content=ApiResponse(
+                        code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                        message="参数验证失败",
+                        data=e.errors()
+                    ).dict()
+                )
+        except Exception as e:
+            logger.error(f"Validation middleware error: {str(e)}")
+            return JSONResponse(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                content=ApiResponse(
+                    code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                    message="参数验证过程中发生错误",
+                    data=None
+                ).dict()
+            )
+        return None
+
     def _get_validator(self, path: str) -> Optional[Type[BaseModel]]:
         """
         根据路径获取对应的验证模型
-        
+
         Args:
             path: 请求路径
-            
+
         Returns:
             验证模型类或None
         """
         return self.validators.get(path)
-    
+
     def register_validator(self, path: str, validator: Type[BaseModel]):
         """
         注册路径对应的验证模型
-        
+
         Args:
             path: API路径
             validator: Pydantic验证模型类
         """
-        self.validators[path] = validator 
\ No newline at end of file
+        self.validators[path] = validator
@@ -1,7 +1,11 @@
 from app.models.user import User
 from app.models.product import Product
-from app.models.point import PointRecord
-from app.models.order import Order
-from app.models.application import Application
+from app.models.point import PointRecord, PointLog
+from app.models.product import Order
+from app.models.application import Application, ApplicationClick
+from app.models.lottery import LotteryType, LotteryActivity, LotteryRecord, LotteryPrize
 from app.models.banner import Banner, BannerClick
+from app.models.statistics import ClickDailyStat, ClickDailySketch
+from app.models.recommendation import ApplicationRecommendation
+from app.models.experiment import BannerExperiment, BannerExperimentVariant
 from app.models.vip import VIP 
\ No newline at end of file
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Text, JSON
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Text, JSON, Index
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from datetime import datetime
@@ -9,7 +9,6 @@ from app.models.base import Base as CustomBase
 class Application(Base, CustomBase):
     __tablename__ = "applications"
 
-    app_id = Column(Integer, primary_key=True, index=True)
     app_name = Column(String(100), nullable=False, index=True)
     app_introduction = Column(String(500), nullable=True)
     app_icon = Column(String(255), nullable=True)
@@ -41,6 +40,11 @@ class ApplicationClick(Base, CustomBase):
     """
     应用点击记录
     """
+    __table_args__ = (
+        # 按应用和时间范围汇总统计
+        Index("ix_application_clicks_app_created", "application_id", "created_at"),
+    )
+    
     # 关联应用
     application_id = Column(Integer, ForeignKey("applications.id"), nullable=False, comment="应用ID")
     application = relationship("Application", back_populates="clicks")
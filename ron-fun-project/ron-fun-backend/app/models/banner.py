@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Boolean, Text, JSON
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Boolean, Text, JSON, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from datetime import datetime
@@ -12,10 +12,10 @@ class Banner(Base, CustomBase):
     """
     __tablename__ = "banners"
 
-    banner_id = Column(Integer, primary_key=True, index=True)
-    banner_name = Column(String(100), nullable=False, index=True)
-    banner_image = Column(String(255), nullable=False)
-    banner_link = Column(String(255), nullable=False)
+    # 旧字段，新代码使用 title、image、link_url
+    banner_name = Column(String(100), nullable=True, index=True)
+    banner_image = Column(String(255), nullable=True)
+    banner_link = Column(String(255), nullable=True)
     banner_order = Column(Integer, nullable=False, default=0)  # 排序权重
     banner_introduction = Column(String(500), nullable=True)
     banner_expiration = Column(DateTime, nullable=True)  # Banner过期时间
@@ -55,9 +55,12 @@ class BannerClick(Base, CustomBase):
     Banner点击记录
     """
     __tablename__ = "banner_clicks"
+    __table_args__ = (
+        # 按Banner和时间范围汇总统计
+        Index("ix_banner_clicks_banner_created", "banner_id", "created_at"),
+    )
 
-    click_id = Column(Integer, primary_key=True, index=True)
-    banner_id = Column(Integer, ForeignKey("banners.banner_id"), nullable=False, index=True)
+    banner_id = Column(Integer, ForeignKey("banners.id"), nullable=False, index=True)
     click_user_id = Column(Integer, ForeignKey("users.id"), nullable=True, index=True)
     click_user_name = Column(String(50), nullable=True)
     click_time = Column(DateTime, server_default=func.now(), nullable=False, index=True)
@@ -0,0 +1,47 @@
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text
+from sqlalchemy.orm import relationship
+
+from app.db.session import Base
+from app.models.base import Base as CustomBase
+
+class BannerExperiment(Base, CustomBase):
+    """
+    Banner A/B实验
+
+    同一展示位置的若干Banner作为实验的变体，登录用户按 hash(实验ID, 用户ID) 固定分到其中一个变体，
+    只看到该变体的Banner。分组不写库，同一用户每次请求得到相同结果。
+    """
+    __tablename__ = "banner_experiments"
+
+    name = Column(String(100), nullable=False, comment="实验名称")
+    description = Column(Text, nullable=True, comment="实验说明")
+    position = Column(String(50), nullable=False, default="home", index=True, comment="展示位置")
+    status = Column(String(20), nullable=False, default="draft", comment="状态：draft草稿, running进行中, stopped已停止")
+    started_at = Column(DateTime, nullable=True, comment="开始时间")
+    stopped_at = Column(DateTime, nullable=True, comment="停止时间")
+
+    variants = relationship(
+        "BannerExperimentVariant",
+        back_populates="experiment",
+        order_by="BannerExperimentVariant.id"
+    )
+
+class BannerExperimentVariant(Base, CustomBase):
+    """
+    Banner实验变体
+
+    曝光和点击次数由点击统计缓冲区批量累加，统计接口直接读取这两个计数。
+    第一个变体（ID最小）作为对照组。
+    """
+    __tablename__ = "banner_experiment_variants"
+
+    experiment_id = Column(Integer, ForeignKey("banner_experiments.id"), nullable=False, index=True, comment="实验ID")
+    banner_id = Column(Integer, ForeignKey("banners.id"), nullable=False, index=True, comment="变体展示的Banner ID")
+    name = Column(String(50), nullable=False, comment="变体名称")
+    weight = Column(Integer, nullable=False, default=1, comment="流量权重")
+
+    # 统计
+    impressions = Column(Integer, nullable=False, default=0, comment="曝光次数")
+    clicks = Column(Integer, nullable=False, default=0, comment="点击次数")
+
+    experiment = relationship("BannerExperiment", back_populates="variants")
@@ -9,6 +9,8 @@ class LotteryType(Base, CustomBase):
     """
     抽奖类型模型（九宫格、大转盘等）
     """
+    __tablename__ = "lottery_types"
+    
     name = Column(String(50), nullable=False, comment="抽奖类型名称")
     code = Column(String(50), nullable=False, unique=True, comment="抽奖类型代码")
     description = Column(Text, nullable=True, comment="抽奖类型描述")
@@ -21,6 +23,8 @@ class LotteryActivity(Base, CustomBase):
     """
     抽奖活动模型
     """
+    __tablename__ = "lottery_activities"
+    
     title = Column(String(100), nullable=False, comment="活动标题")
     description = Column(Text, nullable=True, comment="活动描述")
     banner_image = Column(String(255), nullable=True, comment="活动横幅图片")
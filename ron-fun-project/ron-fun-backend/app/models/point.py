@@ -13,7 +13,7 @@ class PointRecord(Base):
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
     reason = Column(Integer, nullable=False, index=True)  # 1：抽奖消耗积分 2：抽奖增加积分 3：兑换商品 4：后台调整
     point_number = Column(Integer, nullable=False)  # 正数：增加 负数：减少
-    product_id = Column(Integer, ForeignKey("products.product_id"), nullable=True, index=True)
+    product_id = Column(Integer, ForeignKey("products.id"), nullable=True, index=True)
     exchange_time = Column(DateTime, server_default=func.now(), nullable=False, index=True)
     created_at = Column(DateTime, server_default=func.now(), nullable=False)
     updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now(), nullable=False)
@@ -12,10 +12,9 @@ class Product(Base, CustomBase):
     """
     __tablename__ = "products"
 
-    product_id = Column(Integer, primary_key=True, index=True)
     product_name = Column(String(100), nullable=False, index=True)
     product_introduction = Column(String(500), nullable=True)
-    product_price = Column(Integer, nullable=False)  # 积分价格
+    product_price = Column(Integer, nullable=True)  # 旧字段，积分价格以 points_price 为准
     product_stock = Column(Integer, nullable=False, default=0)
     product_ordering = Column(Integer, nullable=False, default=0)  # 排序权重
     product_is_on_sale = Column(Boolean, nullable=False, default=True)  # 是否上架
@@ -25,7 +24,7 @@ class Product(Base, CustomBase):
 
     # 关联关系
     point_records = relationship("PointRecord", back_populates="product")
-    orders = relationship("Order", back_populates="product")
+    orders = relationship("OrderItem", back_populates="product")
 
     # 分类
     category_id = Column(Integer, ForeignKey("product_categories.id"), nullable=True, comment="分类ID")
@@ -58,6 +57,8 @@ class ProductCategory(Base, CustomBase):
     """
     商品分类模型
     """
+    __tablename__ = "product_categories"
+    
     name = Column(String(50), nullable=False, comment="分类名称")
     description = Column(Text, nullable=True, comment="分类描述")
     icon = Column(String(255), nullable=True, comment="分类图标")
@@ -139,11 +140,43 @@ class OrderItem(Base, CustomBase):
     # 数量和总价
     quantity = Column(Integer, default=1, comment="数量")
     total_points = Column(Integer, nullable=False, comment="总积分")
+    
+    # 库存扣减（不限量商品下单时不扣减，取消时据此决定是否归还；旧数据为空）
+    stock_deducted = Column(Boolean, nullable=True, comment="下单时是否扣减了库存")
+
+class OrderEvent(Base, CustomBase):
+    """
+    订单事件模型（发件箱）
+    
+    请求处理时只写入事件，由后台工作线程批量执行状态流转、退款、恢复库存等操作
+    """
+    __tablename__ = "order_events"
+    
+    # 关联订单
+    order_id = Column(Integer, ForeignKey("orders.id"), nullable=False, index=True, comment="订单ID")
+    order = relationship("Order")
+    
+    # 事件信息
+    event_type = Column(String(50), nullable=False, comment="事件类型：confirm确认，ship发货，express更新物流，finish完成，cancel取消")
+    payload = Column(JSON, nullable=True, comment="事件参数，如快递信息、取消原因等")
+    
+    # 处理状态
+    status = Column(Integer, default=0, index=True, comment="处理状态：0待处理，1处理中，2已完成，-1失败")
+    attempts = Column(Integer, default=0, comment="已尝试次数")
+    locked_by = Column(String(64), nullable=True, comment="认领该事件的工作线程标识")
+    last_error = Column(String(255), nullable=True, comment="最近一次处理错误")
+    processed_at = Column(DateTime, nullable=True, comment="处理完成时间")
+    
+    # 操作人（管理员操作时）
+    operator_id = Column(Integer, nullable=True, comment="操作人ID")
+    operator_name = Column(String(50), nullable=True, comment="操作人姓名")
 
 class Address(Base, CustomBase):
     """
     收货地址模型
     """
+    __tablename__ = "addresses"
+    
     # 关联用户
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False, comment="用户ID")
     user = relationship("User", back_populates="addresses")
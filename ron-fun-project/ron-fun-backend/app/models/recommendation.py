@@ -0,0 +1,17 @@
+from sqlalchemy import Column, Integer, DateTime, LargeBinary
+
+from app.db.session import Base
+from app.models.base import Base as CustomBase
+
+class ApplicationRecommendation(Base, CustomBase):
+    """
+    用户的个性化应用排序（离线计算）
+
+    由 scripts/build_app_recommendations.py 根据应用点击的共现关系计算，
+    每个用户只保存得分最高的前N个应用ID，按小端uint32紧凑存储。
+    """
+    __tablename__ = "application_recommendations"
+
+    user_id = Column(Integer, nullable=False, unique=True, index=True, comment="用户ID")
+    application_ids = Column(LargeBinary, nullable=False, comment="按得分降序的应用ID（小端uint32数组）")
+    computed_at = Column(DateTime, nullable=False, index=True, comment="本批结果的计算时间")
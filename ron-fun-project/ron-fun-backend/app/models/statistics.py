@@ -0,0 +1,43 @@
+from sqlalchemy import Column, Integer, String, Date, Index, LargeBinary, UniqueConstraint
+
+from app.db.session import Base
+from app.models.base import Base as CustomBase
+
+class ClickDailyStat(Base, CustomBase):
+    """
+    点击统计日汇总（对象 × 日期 × 设备类型）
+
+    由点击统计写库线程增量刷新，历史数据可通过 scripts/backfill_click_stats.py 回填。
+    统计接口只读这张表，不再对原始点击表做 GROUP BY。
+    """
+    __tablename__ = "click_daily_stats"
+    __table_args__ = (
+        UniqueConstraint("entity_type", "entity_id", "date", "device_type", name="uq_click_daily_stats"),
+        Index("ix_click_daily_stats_type_date", "entity_type", "date"),
+    )
+
+    entity_type = Column(String(20), nullable=False, comment="对象类型：banner, application")
+    entity_id = Column(Integer, nullable=False, comment="对象ID")
+    date = Column(Date, nullable=False, comment="日期")
+    device_type = Column(String(50), nullable=False, default="unknown", comment="设备类型")
+
+    clicks = Column(Integer, nullable=False, default=0, comment="点击次数")
+    unique_users = Column(Integer, nullable=False, default=0, comment="点击的登录用户数")
+    unique_ips = Column(Integer, nullable=False, default=0, comment="点击的独立IP数")
+
+class ClickDailySketch(Base, CustomBase):
+    """
+    点击独立访客的HyperLogLog草图（对象 × 日期 × 类型）
+
+    每天一个草图，按日期范围合并后估算去重数，误差约1%。
+    """
+    __tablename__ = "click_daily_sketches"
+    __table_args__ = (
+        UniqueConstraint("entity_type", "entity_id", "date", "kind", name="uq_click_daily_sketches"),
+    )
+
+    entity_type = Column(String(20), nullable=False, comment="对象类型：banner, application")
+    entity_id = Column(Integer, nullable=False, comment="对象ID")
+    date = Column(Date, nullable=False, comment="日期")
+    kind = Column(String(20), nullable=False, comment="去重维度：user登录用户, ip独立IP, visitor访客（用户或IP）")
+    sketch = Column(LargeBinary, nullable=False, comment="序列化的HyperLogLog草图")
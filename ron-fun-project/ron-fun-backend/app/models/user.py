@@ -15,7 +15,7 @@ class User(Base, CustomBase):
     username = Column(String(50), unique=True, index=True, nullable=False, comment="用户名")
     email = Column(String(100), unique=True, index=True, nullable=False, comment="电子邮箱")
     phone = Column(String(20), unique=True, index=True, nullable=True, comment="手机号码")
-    password = Column(String(255), nullable=False)
+    password = Column(String(255), nullable=True)  # 旧字段，注册接口只写入 hashed_password
     phone_number = Column(String(20), unique=True, index=True, nullable=True)
     remaining_points = Column(Integer, default=0, nullable=False)
     total_points = Column(Integer, default=0, nullable=False)
@@ -1,4 +1,4 @@
 # 数据模式包
 from app.schemas.common import PaginationParams, PaginationData, ApiResponse
 from app.schemas.auth import Token, TokenPayload, UserLogin, UserCreate, UserUpdate, PasswordChange
-from app.schemas.user import User, UserBase, UserInDB, UserFilter 
\ No newline at end of file
+from app.schemas.user import UserBase, UserInDB, UserResponse, UserFilter
\ No newline at end of file
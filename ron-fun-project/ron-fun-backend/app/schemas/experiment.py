@@ -0,0 +1,68 @@
+from typing import List, Optional
+from datetime import datetime
+from pydantic import BaseModel, Field
+
+# 实验变体
+class BannerExperimentVariantCreate(BaseModel):
+    banner_id: int = Field(..., description="变体展示的Banner ID")
+    name: str = Field(..., description="变体名称")
+    weight: int = Field(1, ge=1, description="流量权重")
+
+class BannerExperimentVariantResponse(BaseModel):
+    id: int
+    banner_id: int
+    name: str
+    weight: int
+    impressions: int = 0
+    clicks: int = 0
+
+    class Config:
+        from_attributes = True
+
+# 创建实验请求（第一个变体为对照组）
+class BannerExperimentCreate(BaseModel):
+    name: str = Field(..., description="实验名称")
+    description: Optional[str] = Field(None, description="实验说明")
+    position: str = Field("home", description="展示位置")
+    variants: List[BannerExperimentVariantCreate] = Field(..., description="变体列表，第一个为对照组，至少2个")
+
+# 修改实验状态请求
+class BannerExperimentStatusUpdate(BaseModel):
+    status: str = Field(..., description="状态：running开始, stopped停止")
+
+# 实验响应
+class BannerExperimentResponse(BaseModel):
+    id: int
+    name: str
+    description: Optional[str] = None
+    position: str
+    status: str
+    started_at: Optional[datetime] = None
+    stopped_at: Optional[datetime] = None
+    created_at: datetime
+    variants: List[BannerExperimentVariantResponse] = []
+
+    class Config:
+        from_attributes = True
+
+# 变体统计
+class BannerVariantStats(BaseModel):
+    variant_id: int
+    name: str
+    banner_id: int
+    is_control: bool
+    impressions: int
+    clicks: int
+    ctr: float = Field(..., description="点击率")
+    lift: Optional[float] = Field(None, description="相对对照组的点击率提升")
+    z_score: Optional[float] = Field(None, description="与对照组比较的z值（双比例z检验）")
+    p_value: Optional[float] = Field(None, description="双侧p值")
+    significant: bool = Field(False, description="是否在显著性水平下显著")
+
+# 实验统计响应
+class BannerExperimentStats(BaseModel):
+    experiment_id: int
+    name: str
+    status: str
+    significance_level: float
+    variants: List[BannerVariantStats]
@@ -43,7 +43,7 @@ class BannerResponse(BannerBase):
     updated_at: datetime
     
     class Config:
-        orm_mode = True
+        from_attributes = True
 
 # 应用基础模型
 class ApplicationBase(BaseModel):
@@ -82,7 +82,7 @@ class ApplicationResponse(ApplicationBase):
     updated_at: datetime
     
     class Config:
-        orm_mode = True
+        from_attributes = True
 
 # 首页数据响应
 class HomeDataResponse(BaseModel):
@@ -40,7 +40,7 @@ class LotteryActivityResponse(LotteryActivityBase):
     prize_settings: Dict[str, Any]
     
     class Config:
-        orm_mode = True
+        from_attributes = True
 
 # 抽奖类型基础模型
 class LotteryTypeBase(BaseModel):
@@ -66,7 +66,7 @@ class LotteryTypeResponse(LotteryTypeBase):
     updated_at: datetime
     
     class Config:
-        orm_mode = True
+        from_attributes = True
 
 # 抽奖奖品基础模型
 class LotteryPrizeBase(BaseModel):
@@ -102,7 +102,7 @@ class LotteryPrizeResponse(LotteryPrizeBase):
     updated_at: datetime
     
     class Config:
-        orm_mode = True
+        from_attributes = True
 
 # 抽奖记录基础模型
 class LotteryRecordBase(BaseModel):
@@ -125,7 +125,7 @@ class LotteryRecordResponse(LotteryRecordBase):
     exchange_time: Optional[datetime] = None
     
     class Config:
-        orm_mode = True
+        from_attributes = True
 
 # 抽奖请求
 class LotteryDrawRequest(BaseModel):
@@ -27,7 +27,7 @@ class ProductCategoryResponse(ProductCategoryBase):
     updated_at: datetime
     
     class Config:
-        orm_mode = True
+        from_attributes = True
 
 # 商品基础模型
 class ProductBase(BaseModel):
@@ -80,7 +80,24 @@ class ProductResponse(ProductBase):
     updated_at: datetime
     
     class Config:
-        orm_mode = True
+        from_attributes = True
+
+# 批量获取商品响应
+class ProductBatchResponse(BaseModel):
+    items: List[ProductResponse] = Field(..., description="商品列表，顺序与请求的ID一致")
+    missing_ids: List[int] = Field([], description="不存在或已下架的商品ID")
+
+# 商品导入错误行
+class ProductImportError(BaseModel):
+    row: int = Field(..., description="行号（含表头，从1开始）")
+    error: str = Field(..., description="错误信息")
+
+# 商品批量导入结果
+class ProductImportResult(BaseModel):
+    created: int = Field(0, description="新增商品数")
+    updated: int = Field(0, description="更新商品数")
+    failed: int = Field(0, description="失败行数")
+    errors: List[ProductImportError] = Field([], description="错误行（最多返回PRODUCT_IMPORT_MAX_ERRORS条）")
 
 # 订单项基础模型
 class OrderItemBase(BaseModel):
@@ -98,7 +115,7 @@ class OrderItemResponse(BaseModel):
     total_points: int
     
     class Config:
-        orm_mode = True
+        from_attributes = True
 
 # 创建订单请求
 class OrderCreate(BaseModel):
@@ -125,7 +142,32 @@ class OrderResponse(BaseModel):
     items: List[OrderItemResponse]
     
     class Config:
-        orm_mode = True
+        from_attributes = True
+
+# 订单事件请求（管理后台）
+class OrderEventCreate(BaseModel):
+    event_type: str = Field(..., description="事件类型：confirm确认，ship发货，express更新物流，finish完成，cancel取消")
+    express_company: Optional[str] = Field(None, description="快递公司（发货、更新物流时必填）")
+    express_no: Optional[str] = Field(None, description="快递单号（发货、更新物流时必填）")
+    cancel_reason: Optional[str] = Field(None, description="取消原因")
+
+# 取消订单请求
+class OrderCancelRequest(BaseModel):
+    cancel_reason: Optional[str] = Field(None, description="取消原因")
+
+# 订单事件响应
+class OrderEventResponse(BaseModel):
+    id: int
+    order_id: int
+    event_type: str
+    status: int
+    attempts: int
+    last_error: Optional[str]
+    created_at: datetime
+    processed_at: Optional[datetime]
+    
+    class Config:
+        from_attributes = True
 
 # 地址基础模型
 class AddressBase(BaseModel):
@@ -160,4 +202,4 @@ class AddressResponse(AddressBase):
     updated_at: datetime
     
     class Config:
-        orm_mode = True 
\ No newline at end of file
+        from_attributes = True 
\ No newline at end of file
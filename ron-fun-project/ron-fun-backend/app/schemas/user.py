@@ -31,7 +31,7 @@ class UserInDB(UserBase):
     password: str
 
     class Config:
-        orm_mode = True
+        from_attributes = True
 
 # API响应中的用户信息（不包含密码）
 class UserResponse(UserBase):
@@ -44,7 +44,7 @@ class UserResponse(UserBase):
     points: int = 0
     
     class Config:
-        orm_mode = True
+        from_attributes = True
 
 # 用户分页查询参数
 class UserFilter(BaseModel):
@@ -0,0 +1,150 @@
+import logging
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+
+import numpy as np
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.application import Application, ApplicationClick
+from app.models.recommendation import ApplicationRecommendation
+
+logger = logging.getLogger(__name__)
+
+# 每批计算的用户数，限制稠密矩阵的内存占用（用户数 × 应用数 × 4字节）
+USER_BATCH_SIZE = 5000
+
+# 用户自己点击过的应用在得分中的权重（其余得分来自相似应用）
+SELF_WEIGHT = 1.0
+
+# 写入推荐结果时每批插入的行数
+INSERT_BATCH_SIZE = 1000
+
+
+def score_top_n(
+    user_index: np.ndarray,
+    app_index: np.ndarray,
+    counts: np.ndarray,
+    n_users: int,
+    n_apps: int,
+    top_n: int
+) -> Dict[int, np.ndarray]:
+    """
+    根据点击共现关系计算每个用户得分最高的应用
+
+    1. 用户对应用的偏好 W = log(1 + 点击次数)
+    2. 应用相似度 S 为点击用户集合的余弦相似度（共现次数 / sqrt(各自的点击用户数)）
+    3. 用户对应用的得分 = W·S + SELF_WEIGHT·W
+
+    Args:
+        user_index: 每条记录的用户下标
+        app_index: 每条记录的应用下标
+        counts: 每条记录的点击次数
+        n_users: 用户数
+        n_apps: 应用数
+        top_n: 每个用户保留的应用数
+
+    Returns:
+        用户下标 -> 应用下标数组（按得分降序，只包含得分大于0的应用）
+    """
+    order = np.argsort(user_index, kind="stable")
+    user_index, app_index = user_index[order], app_index[order]
+    weights = np.log1p(counts[order]).astype(np.float32)
+    batch_starts = np.searchsorted(user_index, np.arange(0, n_users, USER_BATCH_SIZE))
+    batch_ends = np.append(batch_starts[1:], len(user_index))
+
+    def batch_matrix(batch: int) -> np.ndarray:
+        start, end = batch_starts[batch], batch_ends[batch]
+        matrix = np.zeros((min(USER_BATCH_SIZE, n_users - batch * USER_BATCH_SIZE), n_apps), dtype=np.float32)
+        matrix[user_index[start:end] - batch * USER_BATCH_SIZE, app_index[start:end]] = weights[start:end]
+        return matrix
+
+    # 应用共现矩阵：同时点击过两个应用的用户数
+    cooccurrence = np.zeros((n_apps, n_apps), dtype=np.float32)
+    for batch in range(len(batch_starts)):
+        clicked = (batch_matrix(batch) > 0).astype(np.float32)
+        cooccurrence += clicked.T @ clicked
+
+    norms = np.sqrt(np.diag(cooccurrence))
+    norms[norms == 0] = 1
+    similarity = cooccurrence / np.outer(norms, norms)
+    np.fill_diagonal(similarity, 0)
+
+    top_n = min(top_n, n_apps)
+    result: Dict[int, np.ndarray] = {}
+    for batch in range(len(batch_starts)):
+        preference = batch_matrix(batch)
+        scores = preference @ similarity + SELF_WEIGHT * preference
+
+        top = np.argsort(-scores, axis=1, kind="stable")[:, :top_n]
+        top_scores = np.take_along_axis(scores, top, axis=1)
+        for row in range(scores.shape[0]):
+            result[batch * USER_BATCH_SIZE + row] = top[row][top_scores[row] > 0]
+
+    return result
+
+
+def build_recommendations(
+    db: Session,
+    days: Optional[int] = None,
+    top_n: Optional[int] = None,
+    now: Optional[datetime] = None
+) -> int:
+    """
+    离线计算所有用户的推荐应用并替换 application_recommendations 表
+
+    Args:
+        db: 数据库会话
+        days: 使用最近多少天的点击，默认 APP_RECOMMENDATION_DAYS
+        top_n: 每个用户保留的应用数，默认 APP_RECOMMENDATION_TOP_N
+        now: 计算时间
+
+    Returns:
+        写入的用户数
+    """
+    days = days or settings.APP_RECOMMENDATION_DAYS
+    top_n = top_n or settings.APP_RECOMMENDATION_TOP_N
+    now = now or datetime.now()
+
+    rows = db.query(
+        ApplicationClick.user_id,
+        ApplicationClick.application_id,
+        func.count(ApplicationClick.id)
+    ).join(
+        Application, Application.id == ApplicationClick.application_id
+    ).filter(
+        ApplicationClick.user_id != None,
+        ApplicationClick.created_at >= now - timedelta(days=days),
+        Application.is_deleted == False
+    ).group_by(
+        ApplicationClick.user_id,
+        ApplicationClick.application_id
+    ).all()
+
+    table = ApplicationRecommendation.__table__
+    db.execute(table.delete())
+
+    if rows:
+        data = np.array(rows, dtype=np.int64)
+        user_ids, user_index = np.unique(data[:, 0], return_inverse=True)
+        app_ids, app_index = np.unique(data[:, 1], return_inverse=True)
+
+        top = score_top_n(user_index, app_index, data[:, 2], len(user_ids), len(app_ids), top_n)
+
+        records = [
+            {
+                "user_id": int(user_ids[user]),
+                "application_ids": app_ids[apps].astype("<u4").tobytes(),
+                "computed_at": now,
+            }
+            for user, apps in top.items() if len(apps)
+        ]
+        for start in range(0, len(records), INSERT_BATCH_SIZE):
+            db.execute(table.insert(), records[start:start + INSERT_BATCH_SIZE])
+    else:
+        records = []
+
+    db.commit()
+    logger.info(f"应用推荐计算完成：{len(rows)} 条用户-应用点击，{len(records)} 个用户")
+    return len(records)
@@ -0,0 +1,190 @@
+import logging
+import struct
+import threading
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Sequence
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.models.recommendation import ApplicationRecommendation
+
+logger = logging.getLogger(__name__)
+
+
+def pack_ids(application_ids: Sequence[int]) -> bytes:
+    """
+    将应用ID列表打包为小端uint32数组
+
+    Args:
+        application_ids: 应用ID列表
+
+    Returns:
+        字节串
+    """
+    return struct.pack(f"<{len(application_ids)}I", *application_ids)
+
+
+def unpack_ids(data: bytes) -> List[int]:
+    """
+    解包 pack_ids() 的结果
+
+    Args:
+        data: 字节串
+
+    Returns:
+        应用ID列表
+    """
+    return list(struct.unpack(f"<{len(data) // 4}I", data))
+
+
+class AppRecommendationService:
+    """
+    首页应用个性化排序
+
+    离线任务（scripts/build_app_recommendations.py）把每个用户的推荐应用写入
+    application_recommendations 表，本服务把整张表以紧凑字节串的形式加载到进程内存，
+    请求时只做一次字典查找和列表重排，不访问数据库。后台线程每 reload_interval 秒
+    检查一次离线结果的计算时间，有新结果时在线程中加载并整体替换内存中的字典。
+    没有推荐结果的用户保持全局排序。
+    """
+
+    def __init__(self, session_factory: Callable[[], Session] = SessionLocal, reload_interval: float = 300):
+        """
+        初始化服务
+
+        Args:
+            session_factory: 数据库会话工厂（后台线程使用）
+            reload_interval: 检查离线结果是否更新的间隔（秒）
+        """
+        self.session_factory = session_factory
+        self.reload_interval = reload_interval
+        self._recommendations: Dict[int, bytes] = {}
+        self._computed_at: Optional[datetime] = None
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def rank(self, user_id: Optional[int], application_ids: Sequence[int]) -> List[int]:
+        """
+        按用户偏好重排应用
+
+        推荐列表中的应用按推荐顺序排在前面，其余应用保持原有顺序。
+
+        Args:
+            user_id: 用户ID，未登录为None
+            application_ids: 按全局排序的应用ID
+
+        Returns:
+            重排后的应用ID
+        """
+        if user_id is None:
+            return list(application_ids)
+
+        data = self._recommendations.get(user_id)
+        if not data:
+            return list(application_ids)
+
+        candidates = set(application_ids)
+        preferred = [app_id for app_id in unpack_ids(data) if app_id in candidates]
+        if not preferred:
+            return list(application_ids)
+
+        preferred_set = set(preferred)
+        return preferred + [app_id for app_id in application_ids if app_id not in preferred_set]
+
+    def get_recommendations(self, user_id: int) -> List[int]:
+        """
+        获取用户的推荐应用ID
+
+        Args:
+            user_id: 用户ID
+
+        Returns:
+            按得分降序的应用ID，没有结果返回空列表
+        """
+        return unpack_ids(self._recommendations.get(user_id, b""))
+
+    def reload(self, db: Optional[Session] = None) -> bool:
+        """
+        离线结果有更新时重新加载
+
+        Args:
+            db: 数据库会话，不传时使用 session_factory 创建
+
+        Returns:
+            是否加载了新结果
+        """
+        session = db if db is not None else self.session_factory()
+        try:
+            computed_at = session.query(func.max(ApplicationRecommendation.computed_at)).scalar()
+            if computed_at == self._computed_at:
+                return False
+            rows = session.query(
+                ApplicationRecommendation.user_id,
+                ApplicationRecommendation.application_ids
+            ).filter(
+                ApplicationRecommendation.is_deleted == False
+            ).all()
+        except Exception as e:
+            # 推荐结果只影响排序，加载失败时沿用旧结果，下个间隔再试
+            session.rollback()
+            logger.error(f"加载应用推荐结果失败: {e}")
+            return False
+        finally:
+            if db is None:
+                session.close()
+
+        # 先构建完整的新字典再替换引用，请求线程不加锁也只会读到完整的新结果或旧结果
+        self._recommendations = {row.user_id: row.application_ids for row in rows}
+        self._computed_at = computed_at
+        logger.info(f"已加载 {len(rows)} 个用户的应用推荐结果（计算时间 {computed_at}）")
+        return True
+
+    def invalidate(self) -> None:
+        """
+        离线结果写入后立即重新加载（同进程内调用）
+        """
+        self._computed_at = None
+        self._wakeup.set()
+
+    def start(self) -> None:
+        """
+        启动后台加载线程，启动后立即加载一次
+        """
+        if self._thread is not None:
+            return
+
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._run, name="app-recommendation-reload", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """
+        停止后台加载线程
+
+        Args:
+            timeout: 等待线程退出的秒数
+        """
+        self._stopped.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _run(self) -> None:
+        """
+        后台加载线程主循环
+        """
+        while not self._stopped.is_set():
+            self.reload()
+            self._wakeup.wait(self.reload_interval)
+            self._wakeup.clear()
+
+
+# 创建服务实例
+app_recommendation_service = AppRecommendationService(
+    reload_interval=settings.APP_RECOMMENDATION_RELOAD_INTERVAL
+)
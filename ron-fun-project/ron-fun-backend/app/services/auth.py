@@ -2,10 +2,11 @@ from datetime import datetime, timedelta
 from typing import Optional
 from sqlalchemy.orm import Session
 
-from app.core.security import verify_password, get_password_hash, create_access_token
+from app.core.security import verify_password, create_access_token
 from app.models.user import User
 from app.schemas.auth import UserCreate, UserUpdate
 from app.core.config import settings
+from app.services.password_service import password_service
 
 
 class AuthService:
@@ -17,7 +18,7 @@ class AuthService:
         user = self.db.query(User).filter(User.username == username).first()
         if not user:
             return None
-        if not verify_password(password, user.password):
+        if not await password_service.verify(password, user.password):
             return None
         return user
 
@@ -34,7 +35,7 @@ class AuthService:
         # 创建用户
         user = User(
             username=user_data.username,
-            password=get_password_hash(user_data.password),
+            password=await password_service.hash(user_data.password),
             phone_number=user_data.phone_number,
             remaining_points=0,
             total_points=0,
@@ -81,7 +82,7 @@ class AuthService:
         if not user:
             raise ValueError("用户不存在")
             
-        user.password = get_password_hash(new_password)
+        user.password = await password_service.hash(new_password)
         self.db.commit()
 
     # 创建访问令牌
@@ -0,0 +1,211 @@
+import logging
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List, NamedTuple, Optional
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.banner import Banner
+
+logger = logging.getLogger(__name__)
+
+# Banner在 end_time 当刻仍展示，之后的第一个时刻下线
+END_EPSILON = timedelta(microseconds=1)
+
+
+class ScheduleEntry(NamedTuple):
+    banner_id: int
+    sort_order: int
+    start_time: Optional[datetime]
+    end_time: Optional[datetime]
+
+    def is_active(self, now: datetime) -> bool:
+        """
+        判断Banner在某一时刻是否展示（start_time <= now <= end_time，为空表示不限）
+        """
+        return (self.start_time is None or self.start_time <= now) and (
+            self.end_time is None or now <= self.end_time
+        )
+
+
+class BannerSchedule:
+    """
+    Banner排期索引
+
+    一次性加载所有启用的Banner的展示时间段，按 position 预先计算当前展示的Banner ID列表
+    （按 sort_order 倒序），并记录下一个上线/下线的时间点。到达该时间点时由定时器重新计算；
+    读取时若发现已过边界也会立即重新计算，因此结果不依赖定时器是否准时。
+
+    Banner写入后调用 invalidate()，下次读取时重新加载；此外每 reload_interval 秒重新加载一次，
+    以同步其他进程的修改。
+    """
+
+    def __init__(self, reload_interval: float = 60.0):
+        """
+        初始化排期索引
+
+        Args:
+            reload_interval: 定期重新加载的间隔（秒）
+        """
+        self.reload_interval = reload_interval
+        self._lock = threading.RLock()
+        self._entries: Dict[str, List[ScheduleEntry]] = {}
+        self._active: Dict[str, List[int]] = {}
+        self._boundaries: Dict[str, Optional[datetime]] = {}
+        self._next_boundary: Optional[datetime] = None
+        self._computed_at: Optional[datetime] = None
+        self._loaded_at: Optional[float] = None
+        self._timer: Optional[threading.Timer] = None
+
+    def active_ids(self, db: Session, position: Optional[str] = None, now: Optional[datetime] = None) -> List[int]:
+        """
+        获取当前展示的Banner ID列表（按 sort_order 倒序）
+
+        Args:
+            db: 数据库会话（索引需要重新加载时使用）
+            position: 展示位置，None表示所有位置
+            now: 当前时间，默认 datetime.now()
+
+        Returns:
+            Banner ID列表
+        """
+        now = now or datetime.now()
+        with self._lock:
+            self._ensure_current(db, now)
+            if position is not None:
+                return list(self._active.get(position, ()))
+
+            entries = [
+                entry for position_entries in self._entries.values()
+                for entry in position_entries if entry.is_active(now)
+            ]
+            return [entry.banner_id for entry in sorted(entries, key=self._sort_key)]
+
+    def next_boundary(self, db: Session, position: str, now: Optional[datetime] = None) -> Optional[datetime]:
+        """
+        获取展示位置下一个Banner上线或下线的时间点
+
+        Args:
+            db: 数据库会话
+            position: 展示位置
+            now: 当前时间
+
+        Returns:
+            下一个边界时间，没有则返回None
+        """
+        now = now or datetime.now()
+        with self._lock:
+            self._ensure_current(db, now)
+            return self._boundaries.get(position)
+
+    def invalidate(self) -> None:
+        """
+        Banner写入后标记需要重新加载
+        """
+        with self._lock:
+            self._loaded_at = None
+
+    def load(self, db: Session, now: Optional[datetime] = None) -> None:
+        """
+        从数据库加载所有启用的Banner排期
+
+        Args:
+            db: 数据库会话
+            now: 当前时间
+        """
+        rows = db.query(
+            Banner.id, Banner.position, Banner.sort_order, Banner.start_time, Banner.end_time
+        ).filter(
+            Banner.is_deleted == False,
+            Banner.is_active == True
+        ).all()
+
+        entries: Dict[str, List[ScheduleEntry]] = {}
+        for row in rows:
+            entries.setdefault(row.position, []).append(
+                ScheduleEntry(row.id, row.sort_order or 0, row.start_time, row.end_time)
+            )
+        for position_entries in entries.values():
+            position_entries.sort(key=self._sort_key)
+
+        with self._lock:
+            self._entries = entries
+            self._loaded_at = time.monotonic()
+            self._advance(now or datetime.now())
+
+        logger.debug("Banner排期已加载，共 %s 个展示位置", len(entries))
+
+    def _ensure_current(self, db: Session, now: datetime) -> None:
+        """
+        需要时重新加载或推进到当前时间（调用方持有锁）
+        """
+        if self._loaded_at is None or time.monotonic() - self._loaded_at >= self.reload_interval:
+            self.load(db, now)
+        elif (
+            self._computed_at is None
+            or now < self._computed_at
+            or (self._next_boundary is not None and now >= self._next_boundary)
+        ):
+            self._advance(now)
+
+    def _advance(self, now: datetime) -> None:
+        """
+        计算某一时刻各位置的展示列表和下一个边界（调用方持有锁）
+
+        Args:
+            now: 时间点
+        """
+        active: Dict[str, List[int]] = {}
+        boundaries: Dict[str, Optional[datetime]] = {}
+
+        for position, entries in self._entries.items():
+            active[position] = [entry.banner_id for entry in entries if entry.is_active(now)]
+
+            upcoming = [entry.start_time for entry in entries if entry.start_time and entry.start_time > now]
+            upcoming += [entry.end_time + END_EPSILON for entry in entries if entry.end_time and entry.end_time >= now]
+            boundaries[position] = min(upcoming) if upcoming else None
+
+        self._active = active
+        self._boundaries = boundaries
+        self._computed_at = now
+        pending = [boundary for boundary in boundaries.values() if boundary is not None]
+        self._next_boundary = min(pending) if pending else None
+        self._schedule_timer(now)
+
+    def _schedule_timer(self, now: datetime) -> None:
+        """
+        在下一个边界时间点重新计算展示列表（调用方持有锁）
+
+        Args:
+            now: 当前时间
+        """
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        if self._next_boundary is None:
+            return
+
+        delay = min((self._next_boundary - now).total_seconds(), self.reload_interval)
+        self._timer = threading.Timer(max(delay, 0), self._on_timer)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def _on_timer(self) -> None:
+        """
+        定时器回调：推进到当前时间
+        """
+        with self._lock:
+            self._timer = None
+            if self._loaded_at is not None:
+                self._advance(datetime.now())
+
+    @staticmethod
+    def _sort_key(entry: ScheduleEntry):
+        return (-entry.sort_order, entry.banner_id)
+
+
+# 创建排期索引实例
+banner_schedule = BannerSchedule(reload_interval=settings.BANNER_SCHEDULE_RELOAD_INTERVAL)
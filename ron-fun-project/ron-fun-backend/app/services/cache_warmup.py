@@ -0,0 +1,146 @@
+import asyncio
+import logging
+import time
+from typing import Callable, List, Optional, Tuple
+
+from sqlalchemy import distinct
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from app.db.session import SessionLocal
+from app.models.application import Application
+from app.models.banner import Banner
+from app.models.product import ProductCategory
+from app.services.home_feed_cache import home_feed_cache
+from app.services.lottery_service import lottery_service
+from app.services.product_service import product_service
+
+logger = logging.getLogger(__name__)
+
+# 预热的商品列表第一页条数（与商品列表接口默认分页一致）
+PRODUCT_PAGE_SIZE = 10
+
+WarmupTask = Tuple[str, Callable[[Session], object]]
+
+
+class CacheWarmup:
+    """
+    启动时预热热点缓存
+
+    新进程启动后在后台依次加载首页数据（每个展示位置）、商品列表各维度的第一页和进行中的抽奖活动，
+    同时进行的任务数不超过 concurrency，避免多个进程同时启动时压垮数据库。
+    预热完成（或超时）前 /health/ready 返回503，负载均衡器不会把流量转发到冷进程。
+    """
+
+    def __init__(self, session_factory: Callable[[], Session] = SessionLocal):
+        """
+        初始化预热器
+
+        Args:
+            session_factory: 数据库会话工厂
+        """
+        self.session_factory = session_factory
+        self.ready = False
+        self.duration: Optional[float] = None
+        self.failed: List[str] = []
+
+    async def run(self, concurrency: int = 4, timeout: float = 30.0) -> None:
+        """
+        执行预热，完成或超时后标记就绪
+
+        Args:
+            concurrency: 最大并发任务数
+            timeout: 超时秒数，超时后未完成的缓存在首次请求时加载
+        """
+        started = time.monotonic()
+        try:
+            await asyncio.wait_for(self._run_tasks(concurrency), timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"缓存预热超过 {timeout} 秒未完成，剩余缓存将在首次请求时加载")
+        except Exception:
+            logger.exception("缓存预热失败")
+        finally:
+            self.duration = time.monotonic() - started
+            self.ready = True
+
+        logger.info(
+            f"缓存预热完成，耗时 {self.duration:.2f} 秒"
+            + (f"，失败任务: {', '.join(self.failed)}" if self.failed else "")
+        )
+
+    async def _run_tasks(self, concurrency: int) -> None:
+        """
+        发现并执行所有预热任务
+        """
+        tasks = await run_in_threadpool(self._with_session, self.discover_tasks)
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def run_task(name: str, task: Callable[[Session], object]) -> None:
+            async with semaphore:
+                try:
+                    await run_in_threadpool(self._with_session, task)
+                except Exception as e:
+                    self.failed.append(name)
+                    logger.warning(f"缓存预热任务 {name} 失败: {e}")
+
+        await asyncio.gather(*(run_task(name, task) for name, task in tasks))
+
+    def discover_tasks(self, db: Session) -> List[WarmupTask]:
+        """
+        根据数据库中的展示位置和商品分类生成预热任务
+
+        Args:
+            db: 数据库会话
+
+        Returns:
+            (任务名, 任务函数) 列表
+        """
+        positions = {
+            row[0] for row in db.query(distinct(Banner.position)).filter(
+                Banner.is_deleted == False,
+                Banner.is_active == True
+            )
+        } | {
+            row[0] for row in db.query(distinct(Application.position)).filter(
+                Application.is_deleted == False,
+                Application.is_active == True
+            )
+        }
+        positions.discard(None)
+
+        category_ids = [
+            row.id for row in db.query(ProductCategory.id).filter(
+                ProductCategory.is_deleted == False
+            )
+        ]
+
+        tasks: List[WarmupTask] = [
+            (f"home:{position}", lambda db, position=position: home_feed_cache.get(db, position))
+            for position in sorted(positions | {"home"})
+        ]
+        facets = [{}] + [{"category_id": category_id} for category_id in category_ids] + [
+            {"is_recommended": True}, {"is_hot": True}, {"is_new": True}
+        ]
+        tasks += [
+            (
+                "products:" + (",".join(f"{key}={value}" for key, value in facet.items()) or "all"),
+                lambda db, facet=facet: product_service.get_products(db, 0, PRODUCT_PAGE_SIZE, **facet)
+            )
+            for facet in facets
+        ]
+        tasks.append(("lottery:active", lottery_service.get_active_activities))
+        return tasks
+
+    def _with_session(self, task: Callable[[Session], object]) -> object:
+        """
+        在独立的数据库会话中执行任务
+        """
+        db = self.session_factory()
+        try:
+            return task(db)
+        finally:
+            db.close()
+
+
+# 创建预热器实例
+cache_warmup = CacheWarmup()
@@ -0,0 +1,434 @@
+import logging
+import threading
+import time
+from collections import defaultdict
+from datetime import date, datetime
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+from sqlalchemy import bindparam, func
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.user_agent import get_device_type
+from app.db.session import SessionLocal
+from app.models.experiment import BannerExperimentVariant
+# ENTITY_BANNER、ENTITY_APPLICATION 供记录点击的调用方从本模块一并导入
+from app.services.click_stats_service import (  # noqa: F401
+    click_stats_service,
+    ENTITY_BANNER,
+    ENTITY_APPLICATION,
+    ENTITY_MODELS,
+)
+
+logger = logging.getLogger(__name__)
+
+ENTITY_EXPERIMENT_VARIANT = "banner_variant"
+
+# 只累加计数、没有点击明细的对象类型 -> (模型, 浏览计数字段, 点击计数字段)
+COUNTER_MODELS = {
+    ENTITY_EXPERIMENT_VARIANT: (BannerExperimentVariant, "impressions", "clicks"),
+}
+
+CounterKey = Tuple[str, int]
+DirtyKey = Tuple[str, date]
+
+
+class ClickBuffer:
+    """
+    点击/浏览计数缓冲区
+
+    请求只把事件写入内存：浏览和点击次数按 (对象类型, ID) 合并为增量，点击明细暂存在列表中。
+    后台线程每隔 flush_interval 秒或累计 max_events 个事件时批量写库：
+    每种对象一条批量 UPDATE（count = count + 增量）和一条批量 INSERT，
+    热门Banner的计数行每批只更新一次，不再逐次点击争抢行锁。
+
+    进程崩溃时最多丢失一个刷新窗口（flush_interval 秒或 max_events 个事件）内的数据。
+
+    写入的点击会标记对应 (对象, 日期) 的日汇总为待刷新，每隔 rollup_interval 秒统一重新汇总一次。
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session] = SessionLocal,
+        flush_interval: float = 0.5,
+        max_events: int = 1000,
+        max_pending: int = 100000,
+        rollup_interval: float = 60.0
+    ):
+        """
+        初始化缓冲区
+
+        Args:
+            session_factory: 数据库会话工厂
+            flush_interval: 刷新间隔（秒）
+            max_events: 累计多少个事件时立即刷新
+            max_pending: 写库失败时最多保留的待写点击明细数，超出后丢弃最旧的明细
+            rollup_interval: 日汇总表的刷新间隔（秒）
+        """
+        self.session_factory = session_factory
+        self.flush_interval = flush_interval
+        self.max_events = max_events
+        self.max_pending = max_pending
+        self.rollup_interval = rollup_interval
+        self._counters: Dict[CounterKey, List[int]] = defaultdict(lambda: [0, 0])
+        self._clicks: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+        self._events = 0
+        self._dirty: Dict[DirtyKey, Set[int]] = defaultdict(set)
+        self._last_rollup = time.monotonic()
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def record_view(self, entity_type: str, entity_id: int) -> None:
+        """
+        记录一次浏览
+
+        Args:
+            entity_type: 对象类型（banner/application）
+            entity_id: 对象ID
+        """
+        with self._lock:
+            self._counters[(entity_type, entity_id)][0] += 1
+            self._add_event()
+
+    def record_click(
+        self,
+        entity_type: str,
+        entity_id: int,
+        user_id: Optional[int] = None,
+        ip_address: Optional[str] = None,
+        user_agent: Optional[str] = None,
+        device_type: Optional[str] = None
+    ) -> None:
+        """
+        记录一次点击
+
+        Args:
+            entity_type: 对象类型（banner/application）
+            entity_id: 对象ID
+            user_id: 用户ID，可选
+            ip_address: IP地址，可选
+            user_agent: 用户代理，可选
+            device_type: 设备类型，可选，默认根据User-Agent判断
+        """
+        now = datetime.now()
+        click = {
+            "entity_id": entity_id,
+            "user_id": user_id,
+            "ip_address": ip_address,
+            "user_agent": user_agent[:255] if user_agent else None,
+            "device_type": device_type or get_device_type(user_agent),
+            "created_at": now,
+            "updated_at": now,
+        }
+        with self._lock:
+            self._counters[(entity_type, entity_id)][1] += 1
+            self._clicks[entity_type].append(click)
+            self._add_event()
+
+    def record_counter(self, entity_type: str, entity_id: int, views: int = 0, clicks: int = 0) -> None:
+        """
+        只累加计数（用于没有点击明细的对象，如实验变体的曝光和点击）
+
+        Args:
+            entity_type: 对象类型（COUNTER_MODELS 中的类型）
+            entity_id: 对象ID
+            views: 浏览/曝光增量
+            clicks: 点击增量
+        """
+        with self._lock:
+            counts = self._counters[(entity_type, entity_id)]
+            counts[0] += views
+            counts[1] += clicks
+            self._add_event()
+
+    def _add_event(self) -> None:
+        """
+        累计事件数，达到阈值时唤醒刷新线程（调用方持有锁）
+        """
+        self._events += 1
+        if self._events >= self.max_events:
+            self._wakeup.set()
+
+    def flush(self) -> int:
+        """
+        把缓冲区中的数据写入数据库
+
+        Returns:
+            写入的事件数
+        """
+        with self._flush_lock:
+            with self._lock:
+                counters, self._counters = self._counters, defaultdict(lambda: [0, 0])
+                clicks, self._clicks = self._clicks, defaultdict(list)
+                events, self._events = self._events, 0
+                self._wakeup.clear()
+
+            if not counters:
+                return 0
+
+            db = None
+            try:
+                db = self.session_factory()
+                dirty = self._write(db, counters, clicks)
+                db.commit()
+            except Exception:
+                if db is not None:
+                    db.rollback()
+                logger.exception("点击统计写库失败，%s 个事件将在下次刷新时重试", events)
+                self._restore(counters, clicks, events)
+                return 0
+            finally:
+                if db is not None:
+                    db.close()
+
+            self._mark_dirty(dirty)
+            return events
+
+    def refresh_rollup(self) -> int:
+        """
+        重新汇总有新点击的 (对象, 日期) 日统计
+
+        Returns:
+            刷新的 (对象类型, 日期) 组数
+        """
+        with self._lock:
+            dirty, self._dirty = self._dirty, defaultdict(set)
+            self._last_rollup = time.monotonic()
+
+        if not dirty:
+            return 0
+
+        db = None
+        try:
+            db = self.session_factory()
+            for (entity_type, day), entity_ids in dirty.items():
+                click_stats_service.refresh_daily_stats(db, entity_type, day, entity_ids)
+            db.commit()
+        except Exception:
+            if db is not None:
+                db.rollback()
+            logger.exception("点击日汇总刷新失败，将在下次重试")
+            self._mark_dirty(dirty)
+            return 0
+        finally:
+            if db is not None:
+                db.close()
+
+        return len(dirty)
+
+    def _mark_dirty(self, dirty: Dict[DirtyKey, Set[int]]) -> None:
+        """
+        标记待刷新的日汇总
+
+        Args:
+            dirty: (对象类型, 日期) -> 对象ID集合
+        """
+        with self._lock:
+            for key, entity_ids in dirty.items():
+                self._dirty[key] |= entity_ids
+
+    def _write(
+        self,
+        db: Session,
+        counters: Dict[CounterKey, List[int]],
+        clicks: Dict[str, List[Dict[str, Any]]]
+    ) -> Dict[DirtyKey, Set[int]]:
+        """
+        在一个事务中写入计数增量和点击明细
+
+        Args:
+            db: 数据库会话
+            counters: (对象类型, ID) -> [浏览增量, 点击增量]
+            clicks: 对象类型 -> 点击明细列表
+
+        Returns:
+            有新点击的 (对象类型, 日期) -> 对象ID集合
+        """
+        dirty: Dict[DirtyKey, Set[int]] = defaultdict(set)
+        for entity_type, (model, click_model, foreign_key, user_key) in ENTITY_MODELS.items():
+            deltas = self._deltas(counters, entity_type)
+            if not deltas:
+                continue
+
+            existing = self._update_counters(db, entity_type, model, deltas, "view_count", "click_count")
+
+            rows = [
+                {
+                    foreign_key: click["entity_id"],
+                    user_key: click["user_id"],
+                    "ip_address": click["ip_address"],
+                    "user_agent": click["user_agent"],
+                    "device_type": click["device_type"],
+                    "created_at": click["created_at"],
+                    "updated_at": click["updated_at"],
+                    "is_deleted": False,
+                }
+                for click in clicks.get(entity_type, ())
+                if click["entity_id"] in existing
+            ]
+            if rows:
+                db.execute(click_model.__table__.insert(), rows)
+                for row in rows:
+                    dirty[(entity_type, row["created_at"].date())].add(row[foreign_key])
+
+                # 合并进每日独立访客草图
+                click_stats_service.add_to_sketches(db, entity_type, [
+                    (row[foreign_key], row["created_at"].date(), row[user_key], row["ip_address"])
+                    for row in rows
+                ])
+
+        for entity_type, (model, view_column, click_column) in COUNTER_MODELS.items():
+            deltas = self._deltas(counters, entity_type)
+            if deltas:
+                self._update_counters(db, entity_type, model, deltas, view_column, click_column)
+
+        return dirty
+
+    @staticmethod
+    def _deltas(counters: Dict[CounterKey, List[int]], entity_type: str) -> Dict[int, List[int]]:
+        """
+        取出某类对象的计数增量
+
+        Args:
+            counters: (对象类型, ID) -> [浏览增量, 点击增量]
+            entity_type: 对象类型
+
+        Returns:
+            ID -> [浏览增量, 点击增量]
+        """
+        return {
+            entity_id: counts for (kind, entity_id), counts in counters.items()
+            if kind == entity_type
+        }
+
+    @staticmethod
+    def _update_counters(
+        db: Session,
+        entity_type: str,
+        model: Any,
+        deltas: Dict[int, List[int]],
+        view_column: str,
+        click_column: str
+    ) -> Set[int]:
+        """
+        批量累加计数
+
+        Args:
+            db: 数据库会话
+            entity_type: 对象类型
+            model: 模型类
+            deltas: ID -> [浏览增量, 点击增量]
+            view_column: 浏览计数字段
+            click_column: 点击计数字段
+
+        Returns:
+            存在的对象ID集合
+        """
+        # 一次查询过滤掉不存在的对象，代替逐次点击的存在性检查
+        existing = {
+            row.id for row in db.query(model.id).filter(
+                model.id.in_(list(deltas)),
+                model.is_deleted == False
+            )
+        }
+        if len(existing) < len(deltas):
+            logger.info("忽略不存在的%s点击: %s", entity_type, sorted(set(deltas) - existing))
+
+        # 按ID顺序更新，多进程同时刷新时加锁顺序一致，避免死锁
+        table = model.__table__
+        params = [
+            {"b_id": entity_id, "b_views": deltas[entity_id][0], "b_clicks": deltas[entity_id][1]}
+            for entity_id in sorted(existing)
+        ]
+        if params:
+            db.execute(
+                table.update().where(table.c.id == bindparam("b_id")).values({
+                    view_column: func.coalesce(table.c[view_column], 0) + bindparam("b_views"),
+                    click_column: func.coalesce(table.c[click_column], 0) + bindparam("b_clicks"),
+                }),
+                params
+            )
+
+        return existing
+
+    def _restore(
+        self,
+        counters: Dict[CounterKey, List[int]],
+        clicks: Dict[str, List[Dict[str, Any]]],
+        events: int
+    ) -> None:
+        """
+        写库失败时把数据合并回缓冲区
+
+        Args:
+            counters: 未写入的计数增量
+            clicks: 未写入的点击明细
+            events: 事件数
+        """
+        with self._lock:
+            for key, (views, click_count) in counters.items():
+                self._counters[key][0] += views
+                self._counters[key][1] += click_count
+            for entity_type, rows in clicks.items():
+                pending = rows + self._clicks[entity_type]
+                if len(pending) > self.max_pending:
+                    logger.warning("待写点击明细超出上限，丢弃 %s 条", len(pending) - self.max_pending)
+                    pending = pending[-self.max_pending:]
+                self._clicks[entity_type] = pending
+            self._events += events
+
+    def start(self) -> None:
+        """
+        启动后台刷新线程
+        """
+        if self._thread is not None:
+            return
+
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._run, name="click-buffer", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """
+        停止后台刷新线程，并写入剩余数据
+
+        Args:
+            timeout: 等待线程退出的秒数
+        """
+        self._stopped.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        self.flush()
+        self.refresh_rollup()
+
+    def _run(self) -> None:
+        """
+        后台刷新线程主循环
+        """
+        while not self._stopped.is_set():
+            self._wakeup.wait(self.flush_interval)
+            started = time.monotonic()
+            try:
+                events = self.flush()
+            except Exception:
+                logger.exception("点击统计刷新失败")
+                continue
+            if events:
+                logger.debug("点击统计已写入 %s 个事件，耗时 %.3fs", events, time.monotonic() - started)
+
+            if time.monotonic() - self._last_rollup >= self.rollup_interval:
+                self.refresh_rollup()
+
+
+# 创建缓冲区实例
+click_buffer = ClickBuffer(
+    flush_interval=settings.CLICK_FLUSH_INTERVAL_MS / 1000,
+    max_events=settings.CLICK_FLUSH_MAX_EVENTS,
+    max_pending=settings.CLICK_BUFFER_MAX_PENDING,
+    rollup_interval=settings.CLICK_ROLLUP_INTERVAL
+)
@@ -0,0 +1,245 @@
+import csv
+import gzip
+import json
+import logging
+import os
+import re
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, List, Optional, Sequence
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.services.click_stats_service import ENTITY_MODELS
+
+logger = logging.getLogger(__name__)
+
+# 导出文件的列（entity_id 对应 banner_id/application_id）
+EXPORT_COLUMNS = ("id", "entity_id", "user_id", "ip_address", "user_agent", "device_type", "created_at")
+
+FORMAT_PARQUET = "parquet"
+FORMAT_CSV = "csv"
+
+CHECKPOINT_FILE = "_checkpoint.json"
+
+# 分片文件名：part-<首条ID>-<末条ID>.<扩展名>
+_PART_PATTERN = re.compile(r"^part-(\d+)-(\d+)\.(parquet|csv\.gz)$")
+
+
+def _parquet_available() -> bool:
+    try:
+        import pyarrow  # noqa: F401
+        import pyarrow.parquet  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+class ClickExportService:
+    """
+    点击明细导出服务
+
+    按主键顺序分批读取 banner_clicks / application_clicks，按点击日期写入分区目录：
+
+        <导出目录>/<对象类型>/date=YYYY-MM-DD/part-<首条ID>-<末条ID>.parquet
+
+    未安装 pyarrow 时写入 gzip 压缩的CSV（.csv.gz）。每批写完后记录检查点（已导出的最大ID），
+    中断后再次执行从检查点继续；上次中断时写了一半、未记入检查点的分片会先被删除，避免重复数据。
+
+    检查点按ID推进，但并发的批量写库事务提交顺序与ID顺序不一致：较小的ID可能在较大的ID之后才提交，
+    若导出时它还未提交，检查点越过它后这些行就永远不会被导出。因此只导出到第一条点击时间晚于
+    当前时间减 lag_seconds 的行为止（不跳过它导出后面的行），之后的行留到下次导出。
+    点击时间在缓冲区记录时生成，要求 lag_seconds 大于缓冲区刷新间隔（含写库失败后的重试）
+    与写库事务耗时之和，这样未提交的行及其之后分配的ID都晚于截止时间。
+    """
+
+    def __init__(self, export_dir: str, chunk_size: int = 50000, lag_seconds: float = 300):
+        """
+        初始化导出服务
+
+        Args:
+            export_dir: 导出根目录
+            chunk_size: 每批读取的行数
+            lag_seconds: 安全延迟秒数，只导出点击时间早于当前时间减该秒数的行
+        """
+        self.export_dir = export_dir
+        self.chunk_size = chunk_size
+        self.lag_seconds = lag_seconds
+
+    def export(
+        self,
+        db: Session,
+        entity_type: str,
+        file_format: Optional[str] = None,
+        max_rows: Optional[int] = None
+    ) -> int:
+        """
+        从检查点开始导出某类对象的点击明细（不含安全延迟内的最新点击）
+
+        Args:
+            db: 数据库会话
+            entity_type: 对象类型（banner/application）
+            file_format: 文件格式（parquet/csv），默认有 pyarrow 时用parquet
+            max_rows: 本次最多导出的行数，默认不限
+
+        Returns:
+            本次导出的行数
+        """
+        file_format = file_format or (FORMAT_PARQUET if _parquet_available() else FORMAT_CSV)
+        if file_format == FORMAT_PARQUET and not _parquet_available():
+            raise RuntimeError("未安装 pyarrow，无法导出Parquet，请使用CSV格式")
+
+        _, click_model, foreign_key, user_key = ENTITY_MODELS[entity_type]
+        table = click_model.__table__
+        statement = select(
+            table.c.id,
+            table.c[foreign_key].label("entity_id"),
+            table.c[user_key].label("user_id"),
+            table.c.ip_address,
+            table.c.user_agent,
+            table.c.device_type,
+            table.c.created_at,
+        ).order_by(table.c.id)
+
+        base_dir = os.path.join(self.export_dir, entity_type)
+        last_id = self.get_checkpoint(entity_type)
+        self._remove_uncommitted_parts(base_dir, last_id)
+        cutoff = datetime.now() - timedelta(seconds=self.lag_seconds)
+
+        exported = 0
+        while max_rows is None or exported < max_rows:
+            limit = self.chunk_size if max_rows is None else min(self.chunk_size, max_rows - exported)
+            rows = db.execute(statement.where(table.c.id > last_id).limit(limit)).all()
+            # 截止到第一条安全延迟内的点击，检查点不越过可能还有未提交行的ID区间
+            for index, row in enumerate(rows):
+                if row.created_at >= cutoff:
+                    rows = rows[:index]
+                    break
+            if not rows:
+                break
+
+            partitions: Dict[date, List[Sequence[Any]]] = defaultdict(list)
+            for row in rows:
+                partitions[row.created_at.date()].append(row)
+
+            for day, day_rows in partitions.items():
+                self._write_part(base_dir, day, day_rows, file_format)
+
+            last_id = rows[-1].id
+            exported += len(rows)
+            self._save_checkpoint(base_dir, last_id)
+            logger.info(f"已导出 {entity_type} 点击 {exported} 行，检查点ID {last_id}")
+
+            if len(rows) < limit:
+                break
+
+        return exported
+
+    def get_checkpoint(self, entity_type: str) -> int:
+        """
+        获取已导出的最大ID
+
+        Args:
+            entity_type: 对象类型
+
+        Returns:
+            最大ID，未导出过返回0
+        """
+        path = os.path.join(self.export_dir, entity_type, CHECKPOINT_FILE)
+        if not os.path.exists(path):
+            return 0
+        with open(path, encoding="utf-8") as f:
+            return int(json.load(f)["last_id"])
+
+    def _save_checkpoint(self, base_dir: str, last_id: int) -> None:
+        """
+        原子写入检查点（先写临时文件再替换）
+
+        Args:
+            base_dir: 对象类型目录
+            last_id: 已导出的最大ID
+        """
+        os.makedirs(base_dir, exist_ok=True)
+        path = os.path.join(base_dir, CHECKPOINT_FILE)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"last_id": last_id, "updated_at": datetime.now().isoformat()}, f)
+        os.replace(tmp_path, path)
+
+    @staticmethod
+    def _remove_uncommitted_parts(base_dir: str, last_id: int) -> None:
+        """
+        删除首条ID大于检查点的分片（上次导出中断时写入但未记入检查点）
+
+        Args:
+            base_dir: 对象类型目录
+            last_id: 检查点ID
+        """
+        if not os.path.isdir(base_dir):
+            return
+
+        for partition in os.listdir(base_dir):
+            partition_dir = os.path.join(base_dir, partition)
+            if not os.path.isdir(partition_dir):
+                continue
+            for name in os.listdir(partition_dir):
+                match = _PART_PATTERN.match(name)
+                if match and int(match.group(1)) > last_id:
+                    logger.warning(f"删除未完成的导出分片: {partition}/{name}")
+                    os.remove(os.path.join(partition_dir, name))
+
+    @staticmethod
+    def _write_part(base_dir: str, day: date, rows: List[Sequence[Any]], file_format: str) -> str:
+        """
+        写入一个分片文件
+
+        Args:
+            base_dir: 对象类型目录
+            day: 分区日期
+            rows: 按ID升序的行
+            file_format: 文件格式
+
+        Returns:
+            文件路径
+        """
+        partition_dir = os.path.join(base_dir, f"date={day.isoformat()}")
+        os.makedirs(partition_dir, exist_ok=True)
+        extension = "parquet" if file_format == FORMAT_PARQUET else "csv.gz"
+        path = os.path.join(partition_dir, f"part-{rows[0].id:012d}-{rows[-1].id:012d}.{extension}")
+
+        if file_format == FORMAT_PARQUET:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+
+            schema = pa.schema([
+                ("id", pa.int64()),
+                ("entity_id", pa.int64()),
+                ("user_id", pa.int64()),
+                ("ip_address", pa.string()),
+                ("user_agent", pa.string()),
+                ("device_type", pa.string()),
+                ("created_at", pa.timestamp("us")),
+            ])
+            columns = {name: [row[index] for row in rows] for index, name in enumerate(EXPORT_COLUMNS)}
+            pq.write_table(pa.Table.from_pydict(columns, schema=schema), path, compression="zstd")
+        else:
+            with gzip.open(path, "wt", encoding="utf-8", newline="") as f:
+                writer = csv.writer(f)
+                writer.writerow(EXPORT_COLUMNS)
+                for row in rows:
+                    writer.writerow([
+                        value.isoformat(sep=" ") if isinstance(value, datetime) else value
+                        for value in row
+                    ])
+
+        return path
+
+
+# 创建导出服务实例
+click_export_service = ClickExportService(
+    export_dir=settings.CLICK_EXPORT_DIR,
+    chunk_size=settings.CLICK_EXPORT_CHUNK_SIZE,
+    lag_seconds=settings.CLICK_EXPORT_LAG_SECONDS
+)
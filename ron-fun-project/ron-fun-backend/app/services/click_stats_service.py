@@ -0,0 +1,419 @@
+import logging
+from datetime import date, datetime, time, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from fastapi import HTTPException, status
+from sqlalchemy import distinct, func
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.hll import HyperLogLog
+from app.models.application import Application, ApplicationClick
+from app.models.banner import Banner, BannerClick
+from app.models.statistics import ClickDailyStat, ClickDailySketch
+
+logger = logging.getLogger(__name__)
+
+# 统计对象类型
+ENTITY_BANNER = "banner"
+ENTITY_APPLICATION = "application"
+
+# 对象类型 -> (模型, 点击记录模型, 点击记录中的外键字段, 点击记录中的用户字段)
+ENTITY_MODELS = {
+    ENTITY_BANNER: (Banner, BannerClick, "banner_id", "click_user_id"),
+    ENTITY_APPLICATION: (Application, ApplicationClick, "application_id", "user_id"),
+}
+
+# 独立访客草图的去重维度：登录用户、IP、访客（登录用户按用户，未登录按IP）
+SKETCH_KINDS = ("user", "ip", "visitor")
+
+# (对象ID, 日期, 用户ID, IP)
+ClickKey = Tuple[int, date, Optional[int], Optional[str]]
+
+# 对象类型 -> 名称字段
+ENTITY_TITLES = {
+    ENTITY_BANNER: Banner.title,
+    ENTITY_APPLICATION: Application.app_name,
+}
+
+
+class ClickStatsService:
+    """
+    点击统计服务
+
+    维护 click_daily_stats 日汇总表：按 (对象, 日期) 从原始点击表重新汇总（只扫描当天的时间范围，可走
+    (对象ID, created_at) 索引），写入前先删除旧的汇总行，因此重复刷新和回填都是幂等的。
+    统计接口只读汇总表，查询量与点击数无关。
+
+    独立访客另外按天维护HyperLogLog草图（click_daily_sketches），点击写库时合并，
+    查询时合并日期范围内的草图即可得到任意范围的去重数。
+    """
+
+    def refresh_daily_stats(
+        self,
+        db: Session,
+        entity_type: str,
+        day: date,
+        entity_ids: Optional[Iterable[int]] = None
+    ) -> int:
+        """
+        重新汇总某天的点击统计（不提交事务）
+
+        Args:
+            db: 数据库会话
+            entity_type: 对象类型
+            day: 日期
+            entity_ids: 只刷新这些对象，None表示刷新当天所有对象
+
+        Returns:
+            写入的汇总行数
+        """
+        _, click_model, foreign_key, user_key = ENTITY_MODELS[entity_type]
+        entity_column = getattr(click_model, foreign_key)
+        start = datetime.combine(day, time.min)
+        end = start + timedelta(days=1)
+
+        query = db.query(
+            entity_column.label("entity_id"),
+            click_model.device_type,
+            func.count().label("clicks"),
+            func.count(distinct(getattr(click_model, user_key))).label("unique_users"),
+            func.count(distinct(click_model.ip_address)).label("unique_ips")
+        ).filter(
+            click_model.created_at >= start,
+            click_model.created_at < end
+        )
+        stale = db.query(ClickDailyStat).filter(
+            ClickDailyStat.entity_type == entity_type,
+            ClickDailyStat.date == day
+        )
+
+        if entity_ids is not None:
+            entity_ids = list(entity_ids)
+            if not entity_ids:
+                return 0
+            query = query.filter(entity_column.in_(entity_ids))
+            stale = stale.filter(ClickDailyStat.entity_id.in_(entity_ids))
+
+        # 设备类型为空的记录归入unknown
+        rows: Dict[tuple, Dict[str, Any]] = {}
+        for item in query.group_by(entity_column, click_model.device_type):
+            key = (item.entity_id, item.device_type or "unknown")
+            row = rows.setdefault(key, {
+                "entity_type": entity_type,
+                "entity_id": item.entity_id,
+                "date": day,
+                "device_type": key[1],
+                "clicks": 0,
+                "unique_users": 0,
+                "unique_ips": 0,
+                "is_deleted": False,
+            })
+            row["clicks"] += item.clicks
+            row["unique_users"] += item.unique_users
+            row["unique_ips"] += item.unique_ips
+
+        stale.delete(synchronize_session=False)
+        if rows:
+            db.execute(ClickDailyStat.__table__.insert(), list(rows.values()))
+
+        return len(rows)
+
+    def backfill(
+        self,
+        db: Session,
+        start_date: date,
+        end_date: date,
+        entity_types: Optional[Iterable[str]] = None
+    ) -> int:
+        """
+        回填日期范围内的点击统计，每天提交一次
+
+        Args:
+            db: 数据库会话
+            start_date: 开始日期（包含）
+            end_date: 结束日期（包含）
+            entity_types: 对象类型，默认全部
+
+        Returns:
+            写入的汇总行数
+        """
+        total = 0
+        day = start_date
+        while day <= end_date:
+            for entity_type in entity_types or ENTITY_MODELS:
+                total += self.refresh_daily_stats(db, entity_type, day)
+                self.rebuild_sketches(db, entity_type, day)
+            db.commit()
+            logger.info("点击统计已回填: %s", day)
+            day += timedelta(days=1)
+
+        return total
+
+    def add_to_sketches(self, db: Session, entity_type: str, clicks: Iterable[ClickKey]) -> None:
+        """
+        把一批点击合并进每日独立访客草图（不提交事务）
+
+        Args:
+            db: 数据库会话
+            entity_type: 对象类型
+            clicks: (对象ID, 日期, 用户ID, IP) 列表
+        """
+        sketches: Dict[Tuple[int, date, str], HyperLogLog] = {}
+        for entity_id, day, user_id, ip_address in clicks:
+            for kind, value in self._visitor_values(user_id, ip_address):
+                key = (entity_id, day, kind)
+                if key not in sketches:
+                    sketches[key] = HyperLogLog()
+                sketches[key].add(value)
+
+        if not sketches:
+            return
+
+        # 锁定已有草图行，多进程同时合并时不会互相覆盖
+        entity_ids = {key[0] for key in sketches}
+        days = {key[1] for key in sketches}
+        existing = {
+            (row.entity_id, row.date, row.kind): row
+            for row in db.query(ClickDailySketch).filter(
+                ClickDailySketch.entity_type == entity_type,
+                ClickDailySketch.entity_id.in_(entity_ids),
+                ClickDailySketch.date.in_(days)
+            ).with_for_update()
+        }
+
+        new_rows = []
+        for (entity_id, day, kind), sketch in sketches.items():
+            row = existing.get((entity_id, day, kind))
+            if row is not None:
+                row.sketch = HyperLogLog.from_bytes(row.sketch).merge(sketch).to_bytes()
+            else:
+                new_rows.append({
+                    "entity_type": entity_type,
+                    "entity_id": entity_id,
+                    "date": day,
+                    "kind": kind,
+                    "sketch": sketch.to_bytes(),
+                })
+
+        # 新草图一条批量INSERT写入（ORM逐行INSERT会随草图数量增加语句数）
+        if new_rows:
+            db.execute(ClickDailySketch.__table__.insert(), new_rows)
+
+    def rebuild_sketches(self, db: Session, entity_type: str, day: date) -> None:
+        """
+        从原始点击记录重建某天的独立访客草图（回填用，不提交事务）
+
+        Args:
+            db: 数据库会话
+            entity_type: 对象类型
+            day: 日期
+        """
+        _, click_model, foreign_key, user_key = ENTITY_MODELS[entity_type]
+        start = datetime.combine(day, time.min)
+
+        clicks = db.query(
+            getattr(click_model, foreign_key),
+            getattr(click_model, user_key),
+            click_model.ip_address
+        ).filter(
+            click_model.created_at >= start,
+            click_model.created_at < start + timedelta(days=1)
+        ).execution_options(yield_per=5000)
+
+        db.query(ClickDailySketch).filter(
+            ClickDailySketch.entity_type == entity_type,
+            ClickDailySketch.date == day
+        ).delete(synchronize_session=False)
+
+        self.add_to_sketches(
+            db,
+            entity_type,
+            ((entity_id, day, user_id, ip_address) for entity_id, user_id, ip_address in clicks)
+        )
+
+    def get_unique_visitors(
+        self,
+        db: Session,
+        entity_type: str,
+        entity_id: int,
+        start_date: date,
+        end_date: date
+    ) -> Dict[str, Any]:
+        """
+        估算日期范围内的独立访客数（误差约1%）
+
+        Args:
+            db: 数据库会话
+            entity_type: 对象类型
+            entity_id: 对象ID
+            start_date: 开始日期（包含）
+            end_date: 结束日期（包含）
+
+        Returns:
+            范围内的去重数和每日去重数
+
+        Raises:
+            HTTPException: 如果日期范围无效或超过 CLICK_UV_MAX_DAYS 天
+        """
+        if start_date > end_date:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="开始日期不能晚于结束日期"
+            )
+        if (end_date - start_date).days >= settings.CLICK_UV_MAX_DAYS:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"日期范围不能超过{settings.CLICK_UV_MAX_DAYS}天"
+            )
+
+        rows = db.query(ClickDailySketch).filter(
+            ClickDailySketch.entity_type == entity_type,
+            ClickDailySketch.entity_id == entity_id,
+            ClickDailySketch.date >= start_date,
+            ClickDailySketch.date <= end_date
+        ).order_by(ClickDailySketch.date).all()
+
+        total = {kind: HyperLogLog() for kind in SKETCH_KINDS}
+        daily: Dict[date, Dict[str, Any]] = {}
+        for row in rows:
+            sketch = HyperLogLog.from_bytes(row.sketch)
+            total[row.kind].merge(sketch)
+            daily.setdefault(row.date, {"date": row.date.strftime("%Y-%m-%d")})[row.kind] = sketch.count()
+
+        return {
+            "entity_id": entity_id,
+            "start_date": start_date.strftime("%Y-%m-%d"),
+            "end_date": end_date.strftime("%Y-%m-%d"),
+            "unique_users": total["user"].count(),
+            "unique_ips": total["ip"].count(),
+            "unique_visitors": total["visitor"].count(),
+            "daily": [
+                {
+                    "date": item["date"],
+                    "unique_users": item.get("user", 0),
+                    "unique_ips": item.get("ip", 0),
+                    "unique_visitors": item.get("visitor", 0),
+                }
+                for item in daily.values()
+            ]
+        }
+
+    def get_daily_statistics(self, db: Session, entity_type: str, days: int = 7) -> List[Dict[str, Any]]:
+        """
+        获取每个对象每天的点击统计
+
+        Args:
+            db: 数据库会话
+            entity_type: 对象类型
+            days: 统计的天数
+
+        Returns:
+            统计列表：entity_id, title, date, count, unique_users, unique_ips
+            （独立用户/IP按设备类型累加，同一用户跨设备会重复计算）
+        """
+        result = db.query(
+            ClickDailyStat.entity_id,
+            ClickDailyStat.date,
+            func.sum(ClickDailyStat.clicks).label("count"),
+            func.sum(ClickDailyStat.unique_users).label("unique_users"),
+            func.sum(ClickDailyStat.unique_ips).label("unique_ips")
+        ).filter(
+            ClickDailyStat.entity_type == entity_type,
+            ClickDailyStat.date >= date.today() - timedelta(days=days)
+        ).group_by(
+            ClickDailyStat.entity_id,
+            ClickDailyStat.date
+        ).order_by(
+            ClickDailyStat.date,
+            ClickDailyStat.entity_id
+        ).all()
+
+        titles = self._titles(db, entity_type, {item.entity_id for item in result})
+
+        return [
+            {
+                "entity_id": item.entity_id,
+                "title": titles.get(item.entity_id),
+                "date": item.date.strftime("%Y-%m-%d"),
+                "count": int(item.count),
+                "unique_users": int(item.unique_users),
+                "unique_ips": int(item.unique_ips),
+            }
+            for item in result
+        ]
+
+    def get_device_distribution(self, db: Session, entity_type: str, days: int = 7) -> Dict[str, int]:
+        """
+        获取点击设备分布
+
+        Args:
+            db: 数据库会话
+            entity_type: 对象类型
+            days: 统计的天数
+
+        Returns:
+            设备类型 -> 点击次数
+        """
+        result = db.query(
+            ClickDailyStat.device_type,
+            func.sum(ClickDailyStat.clicks).label("count")
+        ).filter(
+            ClickDailyStat.entity_type == entity_type,
+            ClickDailyStat.date >= date.today() - timedelta(days=days)
+        ).group_by(
+            ClickDailyStat.device_type
+        ).all()
+
+        return {item.device_type: int(item.count) for item in result}
+
+    @staticmethod
+    def _visitor_values(user_id: Optional[int], ip_address: Optional[str]) -> List[Tuple[str, str]]:
+        """
+        计算一次点击在各去重维度下的取值
+
+        Args:
+            user_id: 用户ID
+            ip_address: IP地址
+
+        Returns:
+            (维度, 取值) 列表
+        """
+        values = []
+        if user_id is not None:
+            values.append(("user", str(user_id)))
+        if ip_address:
+            values.append(("ip", ip_address))
+        if user_id is not None:
+            values.append(("visitor", f"u:{user_id}"))
+        elif ip_address:
+            values.append(("visitor", f"ip:{ip_address}"))
+        return values
+
+    @staticmethod
+    def _titles(db: Session, entity_type: str, entity_ids: Iterable[int]) -> Dict[int, str]:
+        """
+        查询对象名称
+
+        Args:
+            db: 数据库会话
+            entity_type: 对象类型
+            entity_ids: 对象ID
+
+        Returns:
+            对象ID -> 名称
+        """
+        entity_ids = list(entity_ids)
+        if not entity_ids:
+            return {}
+
+        model = ENTITY_MODELS[entity_type][0]
+        return {
+            row.id: row.title for row in db.query(
+                model.id, ENTITY_TITLES[entity_type].label("title")
+            ).filter(model.id.in_(entity_ids))
+        }
+
+
+# 创建服务实例
+click_stats_service = ClickStatsService()
@@ -0,0 +1,418 @@
+import hashlib
+import logging
+import math
+from datetime import datetime
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+from fastapi import HTTPException, status
+from sqlalchemy.orm import Session, selectinload
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.models.banner import Banner
+from app.models.experiment import BannerExperiment, BannerExperimentVariant
+from app.schemas.experiment import BannerExperimentCreate
+from app.services.click_buffer import click_buffer, ENTITY_EXPERIMENT_VARIANT
+
+logger = logging.getLogger(__name__)
+
+STATUS_DRAFT = "draft"
+STATUS_RUNNING = "running"
+STATUS_STOPPED = "stopped"
+
+# 显著性水平（双侧）
+SIGNIFICANCE_LEVEL = 0.05
+
+
+class VariantEntry(NamedTuple):
+    id: int
+    banner_id: int
+    weight: int
+
+
+class RunningExperiment(NamedTuple):
+    id: int
+    position: str
+    variants: Tuple[VariantEntry, ...]
+    total_weight: int
+
+    @property
+    def banner_ids(self) -> Tuple[int, ...]:
+        return tuple(variant.banner_id for variant in self.variants)
+
+
+class ExperimentSnapshot(NamedTuple):
+    by_position: Dict[str, Tuple[RunningExperiment, ...]]
+    by_banner: Dict[int, RunningExperiment]
+
+
+def assign_variant(experiment: RunningExperiment, user_id: int) -> VariantEntry:
+    """
+    按 hash(实验ID, 用户ID) 把用户分到变体（不写库，结果稳定）
+
+    不同实验使用不同的哈希输入，同一用户在各实验中的分组相互独立。
+
+    Args:
+        experiment: 进行中的实验
+        user_id: 用户ID
+
+    Returns:
+        变体
+    """
+    digest = hashlib.blake2b(f"{experiment.id}:{user_id}".encode("utf-8"), digest_size=8).digest()
+    bucket = int.from_bytes(digest, "big") % experiment.total_weight
+    for variant in experiment.variants:
+        if bucket < variant.weight:
+            return variant
+        bucket -= variant.weight
+    return experiment.variants[-1]
+
+
+def two_proportion_z_test(clicks_a: int, views_a: int, clicks_b: int, views_b: int) -> Tuple[Optional[float], Optional[float]]:
+    """
+    双比例z检验（B相对A）
+
+    Args:
+        clicks_a: 对照组点击数
+        views_a: 对照组曝光数
+        clicks_b: 实验组点击数
+        views_b: 实验组曝光数
+
+    Returns:
+        (z值, 双侧p值)，样本不足时为 (None, None)
+    """
+    if not views_a or not views_b:
+        return None, None
+
+    pooled = (clicks_a + clicks_b) / (views_a + views_b)
+    variance = pooled * (1 - pooled) * (1 / views_a + 1 / views_b)
+    if variance <= 0:
+        return None, None
+
+    z = (clicks_b / views_b - clicks_a / views_a) / math.sqrt(variance)
+    return z, math.erfc(abs(z) / math.sqrt(2))
+
+
+class ExperimentService:
+    """
+    Banner A/B实验服务
+
+    进行中的实验（数量很少）整体缓存在内存中，首页请求按用户ID哈希选出变体Banner，
+    曝光和点击计数写入点击统计缓冲区，由后台线程批量累加到变体表。
+    未登录用户固定看到对照组，不计入实验数据。
+    """
+
+    def __init__(self, ttl: int = 60):
+        """
+        初始化实验服务
+
+        Args:
+            ttl: 进行中实验缓存的过期秒数
+        """
+        self.cache = TTLCache("banner_experiments", maxsize=1, ttl=ttl)
+
+    def get_running(self, db: Session) -> ExperimentSnapshot:
+        """
+        获取进行中的实验（带缓存）
+
+        Args:
+            db: 数据库会话
+
+        Returns:
+            按展示位置和Banner ID索引的实验
+        """
+        snapshot = self.cache.get("running", None)
+        if snapshot is not None:
+            return snapshot
+
+        experiments = db.query(BannerExperiment).options(
+            selectinload(BannerExperiment.variants)
+        ).filter(
+            BannerExperiment.is_deleted == False,
+            BannerExperiment.status == STATUS_RUNNING
+        ).all()
+
+        by_position: Dict[str, List[RunningExperiment]] = {}
+        by_banner: Dict[int, RunningExperiment] = {}
+        for experiment in experiments:
+            variants = tuple(
+                VariantEntry(variant.id, variant.banner_id, variant.weight)
+                for variant in experiment.variants if not variant.is_deleted
+            )
+            if len(variants) < 2:
+                continue
+            running = RunningExperiment(
+                experiment.id, experiment.position, variants, sum(variant.weight for variant in variants)
+            )
+            by_position.setdefault(experiment.position, []).append(running)
+            for variant in variants:
+                by_banner[variant.banner_id] = running
+
+        snapshot = ExperimentSnapshot(
+            {position: tuple(items) for position, items in by_position.items()},
+            by_banner
+        )
+        self.cache.set("running", snapshot)
+        return snapshot
+
+    def invalidate(self) -> None:
+        """
+        实验写入后失效缓存
+        """
+        self.cache.clear()
+
+    def select_banners(
+        self,
+        db: Session,
+        position: str,
+        banner_ids: Sequence[int],
+        user_id: Optional[int]
+    ) -> Tuple[List[int], List[int]]:
+        """
+        按实验分组过滤Banner：每个实验只保留用户所在变体的Banner
+
+        Args:
+            db: 数据库会话
+            position: 展示位置
+            banner_ids: 当前展示的Banner ID（已排序）
+            user_id: 用户ID，未登录为None
+
+        Returns:
+            (过滤后的Banner ID, 本次曝光的变体ID)
+        """
+        experiments = self.get_running(db).by_position.get(position)
+        if not experiments:
+            return list(banner_ids), []
+
+        hidden = set()
+        exposed: List[int] = []
+        present = set(banner_ids)
+        for experiment in experiments:
+            if not present.intersection(experiment.banner_ids):
+                continue
+            if user_id is None:
+                chosen = experiment.variants[0]
+            else:
+                chosen = assign_variant(experiment, user_id)
+                if chosen.banner_id in present:
+                    exposed.append(chosen.id)
+            hidden.update(banner_id for banner_id in experiment.banner_ids if banner_id != chosen.banner_id)
+
+        return [banner_id for banner_id in banner_ids if banner_id not in hidden], exposed
+
+    @staticmethod
+    def record_impressions(variant_ids: Iterable[int]) -> None:
+        """
+        记录变体曝光（写入缓冲区）
+
+        Args:
+            variant_ids: 变体ID列表
+        """
+        for variant_id in variant_ids:
+            click_buffer.record_counter(ENTITY_EXPERIMENT_VARIANT, variant_id, views=1)
+
+    def record_click(self, db: Session, banner_id: int, user_id: Optional[int]) -> None:
+        """
+        Banner被点击时，如果属于用户所在的实验变体则累计变体点击
+
+        Args:
+            db: 数据库会话
+            banner_id: Banner ID
+            user_id: 用户ID，未登录为None
+        """
+        if user_id is None:
+            return
+
+        experiment = self.get_running(db).by_banner.get(banner_id)
+        if experiment is None:
+            return
+
+        variant = assign_variant(experiment, user_id)
+        if variant.banner_id == banner_id:
+            click_buffer.record_counter(ENTITY_EXPERIMENT_VARIANT, variant.id, clicks=1)
+
+    def create_experiment(self, db: Session, experiment_in: BannerExperimentCreate) -> BannerExperiment:
+        """
+        创建实验（草稿状态）
+
+        Args:
+            db: 数据库会话
+            experiment_in: 实验数据
+
+        Returns:
+            创建的实验
+
+        Raises:
+            HTTPException: 变体不足2个、Banner重复、不存在或不在该展示位置
+        """
+        banner_ids = [variant.banner_id for variant in experiment_in.variants]
+        if len(banner_ids) < 2:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="实验至少需要2个变体"
+            )
+        if len(set(banner_ids)) != len(banner_ids):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="同一Banner不能作为多个变体"
+            )
+
+        positions = dict(
+            db.query(Banner.id, Banner.position).filter(
+                Banner.id.in_(banner_ids),
+                Banner.is_deleted == False
+            ).all()
+        )
+        missing = [banner_id for banner_id in banner_ids if banner_id not in positions]
+        if missing:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Banner不存在: {missing}"
+            )
+        if any(position != experiment_in.position for position in positions.values()):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="变体Banner必须属于实验的展示位置"
+            )
+
+        experiment = BannerExperiment(
+            name=experiment_in.name,
+            description=experiment_in.description,
+            position=experiment_in.position,
+            status=STATUS_DRAFT
+        )
+        experiment.variants = [
+            BannerExperimentVariant(banner_id=variant.banner_id, name=variant.name, weight=variant.weight)
+            for variant in experiment_in.variants
+        ]
+        db.add(experiment)
+        db.commit()
+        db.refresh(experiment)
+        return experiment
+
+    def update_status(self, db: Session, experiment_id: int, new_status: str) -> BannerExperiment:
+        """
+        开始或停止实验
+
+        Args:
+            db: 数据库会话
+            experiment_id: 实验ID
+            new_status: running 或 stopped
+
+        Returns:
+            更新后的实验
+
+        Raises:
+            HTTPException: 实验不存在、状态转换不合法，或变体Banner已在其他进行中的实验里
+        """
+        experiment = self._get_experiment(db, experiment_id)
+
+        allowed = {STATUS_DRAFT: (STATUS_RUNNING,), STATUS_RUNNING: (STATUS_STOPPED,)}
+        if new_status not in allowed.get(experiment.status, ()):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"实验状态不能从 {experiment.status} 改为 {new_status}"
+            )
+
+        if new_status == STATUS_RUNNING:
+            # 一个Banner同时只能属于一个进行中的实验，否则点击和曝光会记到不同实验
+            banner_ids = [variant.banner_id for variant in experiment.variants if not variant.is_deleted]
+            conflict = db.query(
+                BannerExperimentVariant.banner_id, BannerExperimentVariant.experiment_id
+            ).join(
+                BannerExperiment, BannerExperiment.id == BannerExperimentVariant.experiment_id
+            ).filter(
+                BannerExperiment.id != experiment.id,
+                BannerExperiment.status == STATUS_RUNNING,
+                BannerExperiment.is_deleted == False,
+                BannerExperimentVariant.is_deleted == False,
+                BannerExperimentVariant.banner_id.in_(banner_ids)
+            ).first()
+            if conflict:
+                raise HTTPException(
+                    status_code=status.HTTP_409_CONFLICT,
+                    detail=f"Banner {conflict.banner_id} 已在进行中的实验 {conflict.experiment_id} 中"
+                )
+
+        experiment.status = new_status
+        if new_status == STATUS_RUNNING:
+            experiment.started_at = datetime.now()
+        else:
+            experiment.stopped_at = datetime.now()
+
+        db.commit()
+        db.refresh(experiment)
+        self.invalidate()
+        return experiment
+
+    def get_stats(self, db: Session, experiment_id: int) -> dict:
+        """
+        计算实验各变体的点击率和相对对照组的显著性（读取变体表上的累计计数）
+
+        Args:
+            db: 数据库会话
+            experiment_id: 实验ID
+
+        Returns:
+            实验统计
+
+        Raises:
+            HTTPException: 实验不存在
+        """
+        experiment = self._get_experiment(db, experiment_id)
+        variants = [variant for variant in experiment.variants if not variant.is_deleted]
+        control = variants[0] if variants else None
+
+        results = []
+        for variant in variants:
+            impressions, clicks = variant.impressions or 0, variant.clicks or 0
+            ctr = clicks / impressions if impressions else 0.0
+            item = {
+                "variant_id": variant.id,
+                "name": variant.name,
+                "banner_id": variant.banner_id,
+                "is_control": variant is control,
+                "impressions": impressions,
+                "clicks": clicks,
+                "ctr": ctr,
+                "lift": None,
+                "z_score": None,
+                "p_value": None,
+                "significant": False,
+            }
+            if variant is not control:
+                control_views, control_clicks = control.impressions or 0, control.clicks or 0
+                z_score, p_value = two_proportion_z_test(control_clicks, control_views, clicks, impressions)
+                control_ctr = control_clicks / control_views if control_views else 0.0
+                item.update(
+                    lift=(ctr - control_ctr) / control_ctr if control_ctr else None,
+                    z_score=z_score,
+                    p_value=p_value,
+                    significant=p_value is not None and p_value < SIGNIFICANCE_LEVEL,
+                )
+            results.append(item)
+
+        return {
+            "experiment_id": experiment.id,
+            "name": experiment.name,
+            "status": experiment.status,
+            "significance_level": SIGNIFICANCE_LEVEL,
+            "variants": results,
+        }
+
+    @staticmethod
+    def _get_experiment(db: Session, experiment_id: int) -> BannerExperiment:
+        experiment = db.query(BannerExperiment).filter(
+            BannerExperiment.id == experiment_id,
+            BannerExperiment.is_deleted == False
+        ).first()
+        if not experiment:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="实验不存在"
+            )
+        return experiment
+
+
+# 创建服务实例
+experiment_service = ExperimentService(ttl=settings.BANNER_EXPERIMENT_CACHE_TTL)
@@ -0,0 +1,218 @@
+import hashlib
+import logging
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, Optional, Sequence, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.schemas.home import ApplicationResponse, BannerResponse
+from app.services.banner_schedule import banner_schedule
+from app.services.home_service import home_service
+
+logger = logging.getLogger(__name__)
+
+
+class HomeFeed:
+    """
+    预先序列化好的首页数据
+
+    除整段响应体外，还保留每个Banner和应用各自的JSON片段，
+    个性化排序或实验分组时只需按新顺序拼接片段，不必重新序列化。
+    """
+
+    __slots__ = (
+        "body", "etag", "built_at", "expires_at",
+        "banner_ids", "application_ids", "_banner_json", "_application_json"
+    )
+
+    def __init__(
+        self,
+        banner_json: Dict[int, bytes],
+        banner_ids: Tuple[int, ...],
+        application_json: Dict[int, bytes],
+        application_ids: Tuple[int, ...],
+        built_at: datetime,
+        expires_at: datetime
+    ):
+        self._banner_json = banner_json
+        self.banner_ids = banner_ids
+        self._application_json = application_json
+        self.application_ids = application_ids
+        self.body, self.etag = self.render(application_ids, banner_ids)
+        self.built_at = built_at
+        self.expires_at = expires_at
+
+    def render(
+        self,
+        application_ids: Sequence[int],
+        banner_ids: Optional[Sequence[int]] = None
+    ) -> Tuple[bytes, str]:
+        """
+        按指定的Banner和应用顺序拼接响应体
+
+        Args:
+            application_ids: 应用ID顺序（application_ids 的排列）
+            banner_ids: 要展示的Banner ID（banner_ids 的子序列），默认全部
+
+        Returns:
+            (响应体, ETag)
+        """
+        if banner_ids is None:
+            banner_ids = self.banner_ids
+
+        body = b"".join((
+            b'{"banners":[',
+            b",".join(self._banner_json[banner_id] for banner_id in banner_ids),
+            b'],"applications":[',
+            b",".join(self._application_json[app_id] for app_id in application_ids),
+            b"]}",
+        ))
+        return body, '"' + hashlib.md5(body).hexdigest() + '"'
+
+    def matches(self, if_none_match: Optional[str]) -> bool:
+        """
+        判断客户端缓存的ETag是否仍然有效
+
+        Args:
+            if_none_match: 请求头 If-None-Match 的值
+
+        Returns:
+            是否可以返回304
+        """
+        return etag_matches(if_none_match, self.etag)
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    判断请求头 If-None-Match 是否包含指定ETag（忽略弱校验前缀）
+
+    Args:
+        if_none_match: 请求头 If-None-Match 的值
+        etag: 当前响应的ETag
+
+    Returns:
+        是否可以返回304
+    """
+    if not if_none_match:
+        return False
+
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        if tag == "*" or tag.removeprefix("W/") == etag:
+            return True
+    return False
+
+
+class HomeFeedCache:
+    """
+    首页数据缓存
+
+    同一展示位置的首页数据对所有用户相同（登录用户的应用顺序由接口按个性化结果重新拼接），
+    按 position 缓存整段JSON响应体和ETag。
+    缓存在 HOME_FEED_CACHE_TTL 秒后过期，若期间有Banner到达 start_time 或 end_time，
+    则在该时间点提前过期，下一个请求重新计算，保证定时上下线准确。
+    Banner或应用被修改时由写接口调用 invalidate()。
+    """
+
+    def __init__(self, ttl: int = 60, maxsize: int = 64):
+        """
+        初始化首页数据缓存
+
+        Args:
+            ttl: 最长缓存秒数
+            maxsize: 最多缓存的展示位置数
+        """
+        self.ttl = ttl
+        self.feeds = TTLCache("home_feed", maxsize=maxsize)
+        self.generation = 0
+        self._lock = threading.Lock()
+
+    def get(self, db: Session, position: str = "home") -> HomeFeed:
+        """
+        获取展示位置的首页数据，未命中时查询数据库并缓存
+
+        Args:
+            db: 数据库会话
+            position: 展示位置
+
+        Returns:
+            首页数据
+        """
+        feed = self.feeds.get(position, None)
+        if feed is not None:
+            return feed
+
+        generation = self.generation
+        feed = self._build(db, position)
+
+        with self._lock:
+            # 计算期间发生过失效则不缓存，避免写入旧数据
+            if generation == self.generation:
+                ttl = (feed.expires_at - feed.built_at).total_seconds()
+                self.feeds.set(position, feed, ttl=ttl)
+
+        return feed
+
+    def invalidate(self) -> None:
+        """
+        Banner或应用写入后失效所有展示位置的缓存（修改可能涉及展示位置变更）
+        """
+        with self._lock:
+            self.generation += 1
+            self.feeds.clear()
+
+    def _build(self, db: Session, position: str) -> HomeFeed:
+        """
+        查询并序列化首页数据
+
+        Args:
+            db: 数据库会话
+            position: 展示位置
+
+        Returns:
+            首页数据
+        """
+        now = datetime.now()
+
+        banners = home_service.get_banners(db, position)
+        applications = home_service.get_applications(db, position)
+
+        banner_json = {
+            banner.id: BannerResponse.from_orm(banner).json().encode("utf-8")
+            for banner in banners
+        }
+        banner_ids = tuple(banner.id for banner in banners)
+        application_json = {
+            application.id: ApplicationResponse.from_orm(application).json().encode("utf-8")
+            for application in applications
+        }
+        application_ids = tuple(application.id for application in applications)
+
+        expires_at = now + timedelta(seconds=self.ttl)
+        boundary = self._next_boundary(db, position, now)
+        if boundary is not None and boundary < expires_at:
+            expires_at = boundary
+
+        return HomeFeed(banner_json, banner_ids, application_json, application_ids, now, expires_at)
+
+    @staticmethod
+    def _next_boundary(db: Session, position: str, now: datetime) -> Optional[datetime]:
+        """
+        获取下一个Banner上线或下线的时间点（由Banner排期索引计算）
+
+        Args:
+            db: 数据库会话
+            position: 展示位置
+            now: 当前时间
+
+        Returns:
+            下一个边界时间，没有则返回None
+        """
+        return banner_schedule.next_boundary(db, position, now)
+
+
+# 创建缓存实例
+home_feed_cache = HomeFeedCache(ttl=settings.HOME_FEED_CACHE_TTL)
@@ -1,13 +1,16 @@
 import logging
 from typing import List, Dict, Any, Optional, Tuple
-from datetime import datetime
 from fastapi import HTTPException, status, Request
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from sqlalchemy import func, desc
+from sqlalchemy import func, desc, select
 
-from app.models.banner import Banner, BannerClick
-from app.models.application import Application, ApplicationClick
-from app.models.user import User
+from app.models.banner import Banner
+from app.models.application import Application
+from app.services.principal_cache import Principal
+from app.services.banner_schedule import banner_schedule
+from app.services.experiment_service import experiment_service
+from app.services.click_buffer import click_buffer, ENTITY_BANNER, ENTITY_APPLICATION
 
 logger = logging.getLogger(__name__)
 
@@ -35,19 +38,17 @@ class HomeService:
         Returns:
             Banner列表
         """
-        now = datetime.now()
+        # 展示时间段由排期索引计算，这里只按主键取当前页
+        banner_ids = banner_schedule.active_ids(db, position)[skip:skip + limit]
+        if not banner_ids:
+            return []
         
         banners = db.query(Banner).filter(
-            Banner.is_deleted == False,
-            Banner.is_active == True,
-            Banner.position == position,
-            (Banner.start_time == None) | (Banner.start_time <= now),
-            (Banner.end_time == None) | (Banner.end_time >= now)
-        ).order_by(
-            Banner.sort_order.desc()
-        ).offset(skip).limit(limit).all()
+            Banner.id.in_(banner_ids)
+        ).all()
         
-        return banners
+        order = {banner_id: index for index, banner_id in enumerate(banner_ids)}
+        return sorted(banners, key=lambda banner: order[banner.id])
     
     def get_banner(self, db: Session, banner_id: int) -> Banner:
         """
@@ -80,35 +81,29 @@ class HomeService:
         self, 
         db: Session, 
         banner_id: int, 
-        user: Optional[User] = None,
+        user: Optional[Principal] = None,
         request: Optional[Request] = None
     ) -> None:
         """
         记录Banner点击
         
+        点击写入缓冲区，计数和点击明细由后台线程批量写库，不存在的Banner在写库时忽略。
+        Banner属于用户所在的实验变体时同时累计变体点击。
+        
         Args:
             db: 数据库会话
             banner_id: Banner ID
-            user: 用户对象（可选）
+            user: 当前用户（可选）
             request: 请求对象（用于获取IP和UA）
         """
-        # 获取Banner
-        banner = self.get_banner(db, banner_id)
-        
-        # 增加点击次数
-        banner.click_count += 1
-        
-        # 创建点击记录
-        click = BannerClick(
-            banner_id=banner_id,
+        click_buffer.record_click(
+            ENTITY_BANNER,
+            banner_id,
             user_id=user.id if user else None,
             ip_address=request.client.host if request and request.client else None,
-            user_agent=request.headers.get("user-agent") if request else None,
-            device_type=self._get_device_type(request) if request else None
+            user_agent=request.headers.get("user-agent") if request else None
         )
-        
-        db.add(click)
-        db.commit()
+        experiment_service.record_click(db, banner_id, user.id if user else None)
     
     def get_applications(
         self, 
@@ -166,56 +161,119 @@ class HomeService:
             
         return application
     
+    async def get_banner_async(self, db: AsyncSession, banner_id: int) -> Banner:
+        """
+        获取Banner详情（异步会话）
+        
+        Args:
+            db: 异步数据库会话
+            banner_id: Banner ID
+            
+        Returns:
+            Banner对象
+            
+        Raises:
+            HTTPException: 如果Banner不存在
+        """
+        banner = (await db.execute(
+            select(Banner).filter(
+                Banner.id == banner_id,
+                Banner.is_deleted == False
+            )
+        )).scalars().first()
+        
+        if not banner:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Banner不存在"
+            )
+            
+        return banner
+    
+    async def get_applications_async(
+        self, 
+        db: AsyncSession, 
+        position: str = "home", 
+        skip: int = 0, 
+        limit: int = 10
+    ) -> List[Application]:
+        """
+        获取应用列表（异步会话）
+        
+        Args:
+            db: 异步数据库会话
+            position: 展示位置
+            skip: 跳过记录数
+            limit: 返回记录数
+            
+        Returns:
+            应用列表
+        """
+        result = await db.execute(
+            select(Application).filter(
+                Application.is_deleted == False,
+                Application.is_active == True,
+                Application.position == position
+            ).order_by(
+                Application.sort_order.desc()
+            ).offset(skip).limit(limit)
+        )
+        return list(result.scalars())
+    
+    async def get_application_async(self, db: AsyncSession, app_id: int) -> Application:
+        """
+        获取应用详情（异步会话）
+        
+        Args:
+            db: 异步数据库会话
+            app_id: 应用ID
+            
+        Returns:
+            应用对象
+            
+        Raises:
+            HTTPException: 如果应用不存在
+        """
+        application = (await db.execute(
+            select(Application).filter(
+                Application.id == app_id,
+                Application.is_deleted == False
+            )
+        )).scalars().first()
+        
+        if not application:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="应用不存在"
+            )
+            
+        return application
+    
     def record_application_click(
         self, 
         db: Session, 
         app_id: int, 
-        user: Optional[User] = None,
+        user: Optional[Principal] = None,
         request: Optional[Request] = None
     ) -> None:
         """
         记录应用点击
         
+        点击写入缓冲区，计数和点击明细由后台线程批量写库，不存在的应用在写库时忽略。
+        
         Args:
             db: 数据库会话
             app_id: 应用ID
-            user: 用户对象（可选）
+            user: 当前用户（可选）
             request: 请求对象（用于获取IP和UA）
         """
-        # 获取应用
-        application = self.get_application(db, app_id)
-        
-        # 增加点击次数
-        application.click_count += 1
-        
-        # 创建点击记录
-        click = ApplicationClick(
-            application_id=app_id,
+        click_buffer.record_click(
+            ENTITY_APPLICATION,
+            app_id,
             user_id=user.id if user else None,
             ip_address=request.client.host if request and request.client else None,
-            user_agent=request.headers.get("user-agent") if request else None,
-            device_type=self._get_device_type(request) if request else None
+            user_agent=request.headers.get("user-agent") if request else None
         )
-        
-        db.add(click)
-        db.commit()
-    
-    def _get_device_type(self, request: Request) -> str:
-        """
-        根据User-Agent判断设备类型
-        
-        Args:
-            request: 请求对象
-            
-        Returns:
-            设备类型：mobile, desktop等
-        """
-        user_agent = request.headers.get("user-agent", "").lower()
-        
-        if "mobile" in user_agent or "android" in user_agent or "iphone" in user_agent or "ipad" in user_agent:
-            return "mobile"
-        else:
-            return "desktop"
 
 # 创建服务实例
 home_service = HomeService() 
\ No newline at end of file
@@ -1,15 +1,18 @@
 import random
 import logging
-from typing import List, Dict, Any, Optional, Tuple
+from typing import List, Dict, Any, Optional, Tuple, Union
 from datetime import datetime, timedelta
 from fastapi import HTTPException, status
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy import func, select
 
 from app.models.lottery import LotteryActivity, LotteryRecord, LotteryPrize, LotteryType
 from app.models.user import User
 from app.models.point import PointLog
-from app.schemas.lottery import LotteryDrawRequest
+from app.schemas.lottery import LotteryDrawRequest, LotteryActivityResponse
+from app.core.cache import TTLCache
+from app.core.config import settings
 
 logger = logging.getLogger(__name__)
 
@@ -18,6 +21,17 @@ class LotteryService:
     抽奖服务，提供抽奖相关的功能
     """
     
+    def __init__(self, activity_cache_ttl: int = 30):
+        """
+        初始化抽奖服务
+        
+        Args:
+            activity_cache_ttl: 进行中活动列表的缓存秒数
+        """
+        self.activity_cache_ttl = activity_cache_ttl
+        # 进行中的活动列表（序列化后的数据），活动到达开始/结束时间时提前过期
+        self.active_activities = TTLCache("lottery_activities", maxsize=1)
+    
     def get_activity(self, db: Session, activity_id: int) -> LotteryActivity:
         """
         获取抽奖活动
@@ -281,7 +295,9 @@ class LotteryService:
             LotteryRecord.is_deleted == False
         ).order_by(LotteryRecord.created_at.desc()).offset(skip).limit(limit).all()
     
-    def get_activities(self, db: Session, skip: int = 0, limit: int = 10, active_only: bool = False) -> List[LotteryActivity]:
+    def get_activities(
+        self, db: Session, skip: int = 0, limit: int = 10, active_only: bool = False
+    ) -> Union[List[LotteryActivity], List[Dict[str, Any]]]:
         """
         获取抽奖活动列表
         
@@ -292,20 +308,183 @@ class LotteryService:
             active_only: 是否只返回激活的活动
             
         Returns:
-            活动列表
+            活动列表：active_only 时为缓存中序列化后的活动字典（同 get_active_activities），否则为 LotteryActivity 对象
         """
+        if active_only:
+            return self.get_active_activities(db)[skip:skip + limit]
+        
         query = db.query(LotteryActivity).filter(LotteryActivity.is_deleted == False)
+        return query.order_by(LotteryActivity.start_time.desc()).offset(skip).limit(limit).all()
+    
+    def get_active_activities(self, db: Session) -> List[Dict[str, Any]]:
+        """
+        获取进行中的抽奖活动（带缓存，按开始时间倒序）
         
-        if active_only:
-            now = datetime.now()
-            query = query.filter(
-                LotteryActivity.is_active == True,
-                (LotteryActivity.start_time == None) | (LotteryActivity.start_time <= now),
-                (LotteryActivity.end_time == None) | (LotteryActivity.end_time >= now)
+        缓存在 activity_cache_ttl 秒后过期；若期间有活动开始或结束，则在该时间点提前过期。
+        
+        Args:
+            db: 数据库会话
+            
+        Returns:
+            序列化后的活动列表
+        """
+        cached = self.active_activities.get("active", None)
+        if cached is not None:
+            return cached
+        
+        now = datetime.now()
+        # 一次查询取出进行中和未开始的活动，同时得到下一个开始/结束时间
+        candidates = db.query(LotteryActivity).filter(
+            *self._candidate_criteria(now)
+        ).order_by(LotteryActivity.start_time.desc()).all()
+        
+        return self._cache_active(candidates, now)
+    
+    async def get_active_activities_async(self, db: AsyncSession) -> List[Dict[str, Any]]:
+        """
+        获取进行中的抽奖活动（异步会话，与 get_active_activities 共用缓存）
+        
+        Args:
+            db: 异步数据库会话
+            
+        Returns:
+            序列化后的活动列表
+        """
+        cached = self.active_activities.get("active", None)
+        if cached is not None:
+            return cached
+        
+        now = datetime.now()
+        result = await db.execute(
+            select(LotteryActivity).filter(
+                *self._candidate_criteria(now)
+            ).order_by(LotteryActivity.start_time.desc())
+        )
+        return self._cache_active(list(result.scalars()), now)
+    
+    @staticmethod
+    def _candidate_criteria(now: datetime) -> List[Any]:
+        """
+        进行中和未开始活动的筛选条件
+        """
+        return [
+            LotteryActivity.is_deleted == False,
+            LotteryActivity.is_active == True,
+            (LotteryActivity.end_time == None) | (LotteryActivity.end_time >= now)
+        ]
+    
+    def _cache_active(self, candidates: List[LotteryActivity], now: datetime) -> List[Dict[str, Any]]:
+        """
+        从候选活动中选出进行中的活动并写入缓存，过期时间不晚于下一个开始/结束时间
+        """
+        activities = []
+        boundaries = []
+        for activity in candidates:
+            if activity.start_time and activity.start_time > now:
+                boundaries.append(activity.start_time)
+                continue
+            activities.append(LotteryActivityResponse.from_orm(activity).dict())
+            if activity.end_time:
+                boundaries.append(activity.end_time + timedelta(microseconds=1))
+        
+        ttl = float(self.activity_cache_ttl)
+        if boundaries:
+            ttl = max(min(ttl, (min(boundaries) - now).total_seconds()), 0)
+        self.active_activities.set("active", activities, ttl=ttl)
+        return activities
+    
+    async def get_activity_async(self, db: AsyncSession, activity_id: int) -> LotteryActivity:
+        """
+        获取抽奖活动（异步会话）
+        
+        Args:
+            db: 异步数据库会话
+            activity_id: 活动ID
+            
+        Returns:
+            抽奖活动对象
+            
+        Raises:
+            HTTPException: 如果活动不存在
+        """
+        activity = (await db.execute(
+            select(LotteryActivity).filter(
+                LotteryActivity.id == activity_id,
+                LotteryActivity.is_deleted == False
+            )
+        )).scalars().first()
+        
+        if not activity:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="抽奖活动不存在"
             )
             
-        return query.order_by(LotteryActivity.start_time.desc()).offset(skip).limit(limit).all()
+        return activity
+    
+    async def get_activities_async(
+        self, db: AsyncSession, skip: int = 0, limit: int = 10, active_only: bool = False
+    ) -> Union[List[LotteryActivity], List[Dict[str, Any]]]:
+        """
+        获取抽奖活动列表（异步会话）
+        
+        Args:
+            db: 异步数据库会话
+            skip: 跳过记录数
+            limit: 返回记录数
+            active_only: 是否只返回激活的活动
+            
+        Returns:
+            活动列表：active_only 时为缓存中序列化后的活动字典（同 get_active_activities），否则为 LotteryActivity 对象
+        """
+        if active_only:
+            return (await self.get_active_activities_async(db))[skip:skip + limit]
+        
+        result = await db.execute(
+            select(LotteryActivity).filter(
+                LotteryActivity.is_deleted == False
+            ).order_by(LotteryActivity.start_time.desc()).offset(skip).limit(limit)
+        )
+        return list(result.scalars())
+    
+    async def get_records_async(
+        self,
+        db: AsyncSession,
+        user_id: Optional[int] = None,
+        activity_id: Optional[int] = None,
+        skip: int = 0,
+        limit: int = 10
+    ) -> List[LotteryRecord]:
+        """
+        获取抽奖记录（异步会话），按用户和/或活动筛选
+        
+        Args:
+            db: 异步数据库会话
+            user_id: 用户ID
+            activity_id: 活动ID
+            skip: 跳过记录数
+            limit: 返回记录数
+            
+        Returns:
+            抽奖记录列表
+        """
+        statement = select(LotteryRecord).filter(LotteryRecord.is_deleted == False)
+        if user_id is not None:
+            statement = statement.filter(LotteryRecord.user_id == user_id)
+        if activity_id is not None:
+            statement = statement.filter(LotteryRecord.activity_id == activity_id)
+        
+        result = await db.execute(
+            statement.order_by(LotteryRecord.created_at.desc()).offset(skip).limit(limit)
+        )
+        return list(result.scalars())
+    
+    def invalidate_activities(self) -> None:
+        """
+        抽奖活动写入后失效进行中活动缓存
+        """
+        self.active_activities.clear()
 
 
 # 创建服务实例
-lottery_service = LotteryService() 
\ No newline at end of file
+lottery_service = LotteryService(activity_cache_ttl=settings.LOTTERY_ACTIVITY_CACHE_TTL) 
\ No newline at end of file
@@ -0,0 +1,361 @@
+import logging
+from typing import Any, Dict, List, Optional, Set, Tuple
+from datetime import datetime
+from fastapi import HTTPException, status
+from sqlalchemy.orm import Session, selectinload
+
+from app.models.product import Order, OrderEvent, Product
+from app.models.user import User
+from app.models.point import PointLog
+
+logger = logging.getLogger(__name__)
+
+# 订单状态
+ORDER_STATUS_PENDING = 0  # 待处理
+ORDER_STATUS_CONFIRMED = 1  # 已确认
+ORDER_STATUS_SHIPPED = 2  # 已发货
+ORDER_STATUS_FINISHED = 3  # 已完成
+ORDER_STATUS_CANCELLED = -1  # 已取消
+
+# 订单状态机：事件类型 -> (允许的当前状态, 目标状态)
+ORDER_TRANSITIONS: Dict[str, Tuple[Set[int], int]] = {
+    "confirm": ({ORDER_STATUS_PENDING}, ORDER_STATUS_CONFIRMED),
+    "ship": ({ORDER_STATUS_CONFIRMED}, ORDER_STATUS_SHIPPED),
+    "express": ({ORDER_STATUS_SHIPPED}, ORDER_STATUS_SHIPPED),  # 仅更新物流信息
+    "finish": ({ORDER_STATUS_SHIPPED}, ORDER_STATUS_FINISHED),
+    "cancel": ({ORDER_STATUS_PENDING, ORDER_STATUS_CONFIRMED}, ORDER_STATUS_CANCELLED),
+}
+
+# 订单事件处理状态
+EVENT_STATUS_PENDING = 0
+EVENT_STATUS_PROCESSING = 1
+EVENT_STATUS_DONE = 2
+EVENT_STATUS_FAILED = -1
+
+def _order_listing_options():
+    # 订单列表的预加载选项：
+    # OrderResponse 只序列化订单项（收货信息已冗余在订单上），订单项额外一条IN查询加载。
+    # 无论返回多少订单，查询数都是固定的，避免序列化时逐个懒加载。
+    # 在查询时构造：模块级构造会在导入时触发映射器配置
+    return (selectinload(Order.items),)
+
+
+class OrderService:
+    """
+    订单服务，提供订单查询相关功能
+    """
+
+    def _listing_query(self, db: Session):
+        """
+        构建带预加载的订单查询
+
+        Args:
+            db: 数据库会话
+
+        Returns:
+            查询对象
+        """
+        return db.query(Order).options(*_order_listing_options()).filter(
+            Order.is_deleted == False
+        )
+
+    def get_user_orders(
+        self,
+        db: Session,
+        user_id: int,
+        status: Optional[int] = None,
+        skip: int = 0,
+        limit: int = 10
+    ) -> List[Order]:
+        """
+        获取用户订单列表
+
+        Args:
+            db: 数据库会话
+            user_id: 用户ID
+            status: 订单状态
+            skip: 跳过记录数
+            limit: 返回记录数
+
+        Returns:
+            订单列表（已预加载订单项）
+        """
+        query = self._listing_query(db).filter(Order.user_id == user_id)
+
+        # 按状态筛选
+        if status is not None:
+            query = query.filter(Order.status == status)
+
+        # 排序和分页
+        return query.order_by(
+            Order.created_at.desc()
+        ).offset(skip).limit(limit).all()
+
+    def get_user_order(self, db: Session, user_id: int, order_id: int) -> Order:
+        """
+        获取用户订单详情
+
+        Args:
+            db: 数据库会话
+            user_id: 用户ID
+            order_id: 订单ID
+
+        Returns:
+            订单对象
+
+        Raises:
+            HTTPException: 如果订单不存在
+        """
+        order = self._listing_query(db).filter(
+            Order.id == order_id,
+            Order.user_id == user_id
+        ).first()
+
+        if not order:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="订单不存在"
+            )
+
+        return order
+
+    def get_orders(
+        self,
+        db: Session,
+        skip: int = 0,
+        limit: int = 10,
+        user_id: Optional[int] = None,
+        status: Optional[int] = None,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None
+    ) -> Tuple[List[Order], int]:
+        """
+        获取订单列表（管理后台）
+
+        Args:
+            db: 数据库会话
+            skip: 跳过记录数
+            limit: 返回记录数
+            user_id: 用户ID
+            status: 订单状态
+            start_date: 开始日期
+            end_date: 结束日期
+
+        Returns:
+            (订单列表, 总数)
+        """
+        query = db.query(Order)
+
+        # 应用过滤条件
+        if user_id:
+            query = query.filter(Order.user_id == user_id)
+
+        if status is not None:
+            query = query.filter(Order.status == status)
+
+        if start_date:
+            query = query.filter(Order.created_at >= start_date)
+
+        if end_date:
+            query = query.filter(Order.created_at <= end_date)
+
+        # 计数不需要预加载
+        total = query.count()
+
+        orders = query.options(*_order_listing_options()).order_by(
+            Order.created_at.desc()
+        ).offset(skip).limit(limit).all()
+
+        return orders, total
+
+    def enqueue_event(
+        self,
+        db: Session,
+        order: Order,
+        event_type: str,
+        payload: Optional[Dict[str, Any]] = None,
+        operator: Optional[User] = None
+    ) -> OrderEvent:
+        """
+        写入订单事件，由后台工作线程异步处理
+
+        只做状态机校验和一次插入，不在请求中执行退款、库存等操作。
+
+        Args:
+            db: 数据库会话
+            order: 订单对象
+            event_type: 事件类型
+            payload: 事件参数
+            operator: 操作人（管理员操作时）
+
+        Returns:
+            订单事件对象
+
+        Raises:
+            HTTPException: 如果事件类型无效、当前状态不允许或订单有未处理完的事件
+        """
+        if event_type not in ORDER_TRANSITIONS:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="无效的订单事件类型"
+            )
+
+        from_statuses, _ = ORDER_TRANSITIONS[event_type]
+        if order.status not in from_statuses:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="当前订单状态不允许该操作"
+            )
+
+        if event_type in ("ship", "express") and not (
+            payload and payload.get("express_company") and payload.get("express_no")
+        ):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="请提供快递公司和快递单号"
+            )
+
+        # 同一订单同时只允许一个未处理完的事件，保证状态流转顺序
+        in_flight = db.query(OrderEvent.id).filter(
+            OrderEvent.order_id == order.id,
+            OrderEvent.status.in_([EVENT_STATUS_PENDING, EVENT_STATUS_PROCESSING])
+        ).first()
+        if in_flight:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="订单正在处理中，请稍后再试"
+            )
+
+        event = OrderEvent(
+            order_id=order.id,
+            event_type=event_type,
+            payload=payload or {},
+            status=EVENT_STATUS_PENDING,
+            attempts=0,
+            operator_id=operator.id if operator else None,
+            operator_name=(operator.nickname or operator.username) if operator else None
+        )
+        db.add(event)
+        db.commit()
+        db.refresh(event)
+
+        return event
+
+    def apply_event(self, db: Session, event: OrderEvent) -> Set[int]:
+        """
+        执行订单事件（在工作线程中调用，不提交事务）
+
+        Args:
+            db: 数据库会话
+            event: 订单事件
+
+        Returns:
+            库存发生变化的商品ID集合
+
+        Raises:
+            ValueError: 如果订单不存在或当前状态不允许该事件
+        """
+        order = db.query(Order).options(
+            selectinload(Order.items)
+        ).filter(Order.id == event.order_id).with_for_update().first()
+        if not order:
+            raise ValueError("订单不存在")
+
+        from_statuses, to_status = ORDER_TRANSITIONS[event.event_type]
+        if order.status not in from_statuses:
+            raise ValueError(f"订单状态{order.status}不允许执行{event.event_type}")
+
+        payload = event.payload or {}
+        now = datetime.now()
+        changed_products: Set[int] = set()
+
+        if event.event_type in ("ship", "express"):
+            order.express_company = payload.get("express_company")
+            order.express_no = payload.get("express_no")
+            if event.event_type == "ship":
+                order.express_time = now
+        elif event.event_type == "finish":
+            order.finish_time = now
+        elif event.event_type == "cancel":
+            order.cancel_time = now
+            order.cancel_reason = payload.get("cancel_reason")
+            self._refund_points(db, order)
+            changed_products = self._restore_stock(db, order)
+
+        order.status = to_status
+        if event.operator_id:
+            order.operator_id = event.operator_id
+            order.operator_name = event.operator_name
+
+        return changed_products
+
+    def _refund_points(self, db: Session, order: Order) -> None:
+        """
+        取消订单时退还积分
+
+        Args:
+            db: 数据库会话
+            order: 订单对象
+        """
+        if not order.total_points:
+            return
+
+        user = db.query(User).filter(User.id == order.user_id).with_for_update().first()
+        if not user:
+            return
+
+        user.points += order.total_points
+        user.used_points -= order.total_points
+
+        db.add(PointLog(
+            user_id=user.id,
+            points=order.total_points,
+            balance=user.points,
+            type="refund",
+            related_id=order.id,
+            related_type="order",
+            description=f"订单取消退还积分：{order.order_no}"
+        ))
+
+    def _restore_stock(self, db: Session, order: Order) -> Set[int]:
+        """
+        取消订单时恢复库存和销量
+
+        Args:
+            db: 数据库会话
+            order: 订单对象
+
+        Returns:
+            库存发生变化的商品ID集合
+        """
+        quantities: Dict[int, int] = {}
+        # 只归还下单时实际扣减的库存：不能按当前库存判断，最后一件被兑换后库存为0，与“不限量”相同
+        restock: Dict[int, int] = {}
+        # 没有扣减标记的旧订单项，沿用按当前库存判断的规则
+        legacy: Dict[int, int] = {}
+        for item in order.items:
+            quantities[item.product_id] = quantities.get(item.product_id, 0) + item.quantity
+            if item.stock_deducted is None:
+                legacy[item.product_id] = legacy.get(item.product_id, 0) + item.quantity
+            elif item.stock_deducted:
+                restock[item.product_id] = restock.get(item.product_id, 0) + item.quantity
+
+        if not quantities:
+            return set()
+
+        products = db.query(Product).filter(
+            Product.id.in_(list(quantities))
+        ).with_for_update().all()
+
+        for product in products:
+            quantity = quantities[product.id]
+            product.stock += restock.get(product.id, 0)
+            if product.stock > 0:
+                product.stock += legacy.get(product.id, 0)
+            product.sold_count = max((product.sold_count or 0) - quantity, 0)
+
+        return {product.id for product in products}
+
+
+# 创建服务实例
+order_service = OrderService()
@@ -0,0 +1,232 @@
+import logging
+import os
+import threading
+import uuid
+from datetime import datetime, timedelta
+from typing import Callable, List
+
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.models.product import OrderEvent
+from app.services.order_service import (
+    order_service,
+    EVENT_STATUS_PENDING,
+    EVENT_STATUS_PROCESSING,
+    EVENT_STATUS_DONE,
+    EVENT_STATUS_FAILED,
+)
+from app.services.product_cache import product_listing_cache
+
+logger = logging.getLogger(__name__)
+
+
+class OrderWorkerPool:
+    """
+    订单事件工作线程池
+
+    每个工作线程负责 order_id % worker_count == index 的分区，批量认领待处理事件并执行，
+    同一订单的事件总是由同一个线程按顺序处理。多进程部署时通过条件更新保证事件只被认领一次。
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session] = SessionLocal,
+        worker_count: int = 2,
+        batch_size: int = 50,
+        poll_interval: float = 1.0,
+        max_attempts: int = 3,
+        lease_seconds: int = 300
+    ):
+        """
+        初始化工作线程池
+
+        Args:
+            session_factory: 数据库会话工厂
+            worker_count: 工作线程数
+            batch_size: 每批认领的事件数
+            poll_interval: 无事件时的轮询间隔（秒）
+            max_attempts: 事件最大尝试次数
+            lease_seconds: 处理中事件的租约秒数
+        """
+        self.session_factory = session_factory
+        self.worker_count = max(worker_count, 1)
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.max_attempts = max_attempts
+        self.lease_seconds = lease_seconds
+        self._stop_event = threading.Event()
+        self._threads: List[threading.Thread] = []
+        # 进程内唯一标识，用于认领事件
+        self._token_prefix = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+
+    def start(self) -> None:
+        """
+        启动工作线程
+        """
+        if self._threads:
+            return
+
+        self._stop_event.clear()
+        for index in range(self.worker_count):
+            thread = threading.Thread(
+                target=self._run,
+                args=(index,),
+                name=f"order-worker-{index}",
+                daemon=True
+            )
+            thread.start()
+            self._threads.append(thread)
+
+        logger.info("订单事件工作线程已启动，线程数: %s", self.worker_count)
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """
+        停止工作线程，等待当前批次处理完成
+
+        Args:
+            timeout: 每个线程的等待秒数
+        """
+        self._stop_event.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    def _run(self, index: int) -> None:
+        """
+        工作线程主循环
+
+        Args:
+            index: 分区序号
+        """
+        while not self._stop_event.is_set():
+            try:
+                processed = self.process_batch(index)
+            except Exception:
+                logger.exception("订单事件处理批次失败，分区: %s", index)
+                processed = 0
+
+            # 本批已满时立即处理下一批，否则等待新事件
+            if processed < self.batch_size:
+                self._stop_event.wait(self.poll_interval)
+
+    def process_batch(self, index: int = 0) -> int:
+        """
+        认领并处理一批事件
+
+        Args:
+            index: 分区序号
+
+        Returns:
+            本批处理的事件数
+        """
+        db = self.session_factory()
+        try:
+            events = self._claim(db, index)
+            changed_products = set()
+
+            for event in events:
+                savepoint = db.begin_nested()
+                try:
+                    changed_products |= order_service.apply_event(db, event)
+                    savepoint.commit()
+                except Exception as e:
+                    savepoint.rollback()
+                    self._mark_failed(event, e)
+                    continue
+
+                event.status = EVENT_STATUS_DONE
+                event.attempts = (event.attempts or 0) + 1
+                event.processed_at = datetime.now()
+                event.locked_by = None
+
+            db.commit()
+
+            # 取消订单恢复了库存，失效商品详情缓存
+            for product_id in changed_products:
+                product_listing_cache.invalidate(product_id, ())
+
+            return len(events)
+        finally:
+            db.close()
+
+    def _claim(self, db: Session, index: int) -> List[OrderEvent]:
+        """
+        认领本分区的一批事件
+
+        Args:
+            db: 数据库会话
+            index: 分区序号
+
+        Returns:
+            已认领的事件列表（按ID顺序）
+        """
+        lease_expired = datetime.now() - timedelta(seconds=self.lease_seconds)
+        claimable = and_(
+            (OrderEvent.order_id % self.worker_count) == index,
+            or_(
+                OrderEvent.status == EVENT_STATUS_PENDING,
+                # 租约过期的处理中事件（工作线程崩溃）
+                and_(
+                    OrderEvent.status == EVENT_STATUS_PROCESSING,
+                    OrderEvent.updated_at < lease_expired
+                )
+            )
+        )
+
+        candidate_ids = [
+            row.id for row in db.query(OrderEvent.id).filter(claimable).order_by(
+                OrderEvent.id
+            ).limit(self.batch_size).all()
+        ]
+        if not candidate_ids:
+            return []
+
+        token = f"{self._token_prefix}-{index}-{uuid.uuid4().hex[:8]}"
+        db.query(OrderEvent).filter(
+            OrderEvent.id.in_(candidate_ids),
+            claimable
+        ).update({
+            OrderEvent.status: EVENT_STATUS_PROCESSING,
+            OrderEvent.locked_by: token,
+            OrderEvent.updated_at: datetime.now()
+        }, synchronize_session=False)
+        db.commit()
+
+        return db.query(OrderEvent).filter(
+            OrderEvent.locked_by == token,
+            OrderEvent.status == EVENT_STATUS_PROCESSING
+        ).order_by(OrderEvent.id).all()
+
+    def _mark_failed(self, event: OrderEvent, error: Exception) -> None:
+        """
+        记录事件处理失败，未超过最大次数时重新排队
+
+        订单不存在或状态不允许（apply_event 抛出 ValueError）重试也不会成功，直接标记失败。
+
+        Args:
+            event: 订单事件
+            error: 异常
+        """
+        event.attempts = (event.attempts or 0) + 1
+        event.last_error = str(error)[:255]
+        event.locked_by = None
+        retryable = not isinstance(error, ValueError) and event.attempts < self.max_attempts
+        event.status = EVENT_STATUS_PENDING if retryable else EVENT_STATUS_FAILED
+
+        logger.warning(
+            "订单事件处理失败: event_id=%s order_id=%s attempts=%s error=%s",
+            event.id, event.order_id, event.attempts, error
+        )
+
+
+# 创建工作线程池实例
+order_worker_pool = OrderWorkerPool(
+    worker_count=settings.ORDER_WORKER_COUNT,
+    batch_size=settings.ORDER_WORKER_BATCH_SIZE,
+    poll_interval=settings.ORDER_WORKER_POLL_INTERVAL,
+    max_attempts=settings.ORDER_EVENT_MAX_ATTEMPTS,
+    lease_seconds=settings.ORDER_EVENT_LEASE_SECONDS
+)
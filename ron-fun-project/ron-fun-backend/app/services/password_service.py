@@ -0,0 +1,136 @@
+import asyncio
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional, Tuple, TypeVar
+
+from fastapi import HTTPException, status
+from passlib.context import CryptContext
+
+from app.core.config import settings
+from app.core.security import pwd_context
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class PasswordService:
+    """
+    密码哈希服务
+
+    bcrypt单次计算需要上百毫秒，直接在 async 接口中执行会阻塞事件循环，拖慢同一进程的所有请求。
+    计算统一提交到专用线程池（bcrypt计算时释放GIL），等待中的任务数超过上限时直接返回503，
+    避免登录洪峰在内存中无限排队。
+    """
+
+    def __init__(self, context: CryptContext = pwd_context, max_workers: int = 2, max_pending: int = 64):
+        """
+        初始化服务
+
+        Args:
+            context: 密码哈希上下文
+            max_workers: 哈希计算线程数
+            max_pending: 最多同时提交（执行中+排队）的计算任务数
+        """
+        self.context = context
+        self.max_workers = max(max_workers, 1)
+        self.max_pending = max_pending
+        self._pending = 0
+        self._lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    @property
+    def pending(self) -> int:
+        """
+        当前已提交未完成的计算任务数
+        """
+        return self._pending
+
+    async def hash(self, password: str) -> str:
+        """
+        生成密码哈希
+
+        Args:
+            password: 明文密码
+
+        Returns:
+            密码哈希
+
+        Raises:
+            HTTPException: 排队任务数超过上限
+        """
+        return await self._submit(self.context.hash, password)
+
+    async def verify(self, password: str, hashed_password: str) -> bool:
+        """
+        验证密码
+
+        Args:
+            password: 明文密码
+            hashed_password: 密码哈希
+
+        Returns:
+            是否匹配
+
+        Raises:
+            HTTPException: 排队任务数超过上限
+        """
+        return await self._submit(self.context.verify, password, hashed_password)
+
+    async def verify_and_update(self, password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+        """
+        验证密码，哈希的算法或成本参数已过时时同时生成新哈希
+
+        调整 PASSWORD_BCRYPT_ROUNDS 后，用户下次登录时透明地升级为新参数的哈希。
+
+        Args:
+            password: 明文密码
+            hashed_password: 密码哈希
+
+        Returns:
+            (是否匹配, 新哈希)，无需更新时新哈希为None
+
+        Raises:
+            HTTPException: 排队任务数超过上限
+        """
+        return await self._submit(self.context.verify_and_update, password, hashed_password)
+
+    async def _submit(self, func: Callable[..., T], *args) -> T:
+        """
+        提交计算任务到线程池
+        """
+        with self._lock:
+            if self._pending >= self.max_pending:
+                logger.warning(f"密码哈希排队任务数达到上限 {self.max_pending}，拒绝请求")
+                raise HTTPException(
+                    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                    detail="服务繁忙，请稍后重试",
+                    headers={"Retry-After": "1"},
+                )
+            self._pending += 1
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="password-hash")
+            executor = self._executor
+
+        try:
+            return await asyncio.get_running_loop().run_in_executor(executor, func, *args)
+        finally:
+            with self._lock:
+                self._pending -= 1
+
+    def shutdown(self) -> None:
+        """
+        关闭线程池，等待执行中的计算完成
+        """
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+
+# 创建服务实例
+password_service = PasswordService(
+    max_workers=settings.PASSWORD_HASH_WORKERS,
+    max_pending=settings.PASSWORD_HASH_MAX_PENDING
+)
@@ -0,0 +1,96 @@
+import logging
+from typing import NamedTuple, Optional
+
+from sqlalchemy.orm import Session
+
+from app.core.cache import TTLCache, MISSING
+from app.core.config import settings
+from app.models.user import User
+
+logger = logging.getLogger(__name__)
+
+
+class Principal(NamedTuple):
+    """
+    已认证用户的只读快照
+
+    只包含鉴权需要的字段，积分、昵称等可变字段需要时由接口自行加载用户对象。
+    """
+    id: int
+    is_active: bool
+    is_superuser: bool
+    user_status: int
+
+
+class PrincipalCache:
+    """
+    已认证用户缓存
+
+    每个带令牌的请求都需要根据令牌中的用户ID确认用户存在、是否禁用和是否为管理员，
+    这些字段很少变化，按用户ID缓存较短时间，避免每个请求查询一次用户表。
+    管理员修改用户后显式失效；其他进程的修改最迟在过期时间后生效。
+    """
+
+    def __init__(self, ttl: int = 30, maxsize: int = 10000):
+        """
+        初始化缓存
+
+        Args:
+            ttl: 过期秒数
+            maxsize: 最大缓存用户数
+        """
+        self.cache = TTLCache("principals", maxsize=maxsize, ttl=ttl)
+
+    def get_cached(self, user_id: int) -> object:
+        """
+        只读取缓存，不查询数据库
+
+        Args:
+            user_id: 用户ID
+
+        Returns:
+            用户快照；用户不存在时为None；未缓存时为MISSING
+        """
+        return self.cache.get(int(user_id))
+
+    def get(self, db: Session, user_id: int) -> Optional[Principal]:
+        """
+        获取用户快照（带缓存），不存在的用户同样缓存
+
+        Args:
+            db: 数据库会话
+            user_id: 用户ID
+
+        Returns:
+            用户快照，用户不存在时为None
+        """
+        principal = self.get_cached(user_id)
+        if principal is not MISSING:
+            return principal
+
+        row = db.query(
+            User.id, User.is_active, User.is_superuser, User.user_status
+        ).filter(User.id == int(user_id)).first()
+
+        principal = Principal(row.id, bool(row.is_active), bool(row.is_superuser), row.user_status) if row else None
+        self.cache.set(int(user_id), principal)
+        return principal
+
+    def invalidate(self, user_id: int) -> None:
+        """
+        用户信息修改后失效缓存
+
+        Args:
+            user_id: 用户ID
+        """
+        self.cache.delete(int(user_id))
+
+    def clear(self) -> None:
+        """
+        清空缓存
+        """
+        self.cache.clear()
+
+
+# 创建缓存实例
+principal_cache = PrincipalCache(ttl=settings.PRINCIPAL_CACHE_TTL)
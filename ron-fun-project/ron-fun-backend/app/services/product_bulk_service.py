@@ -0,0 +1,439 @@
+import csv
+import io
+import logging
+from itertools import islice
+from typing import Any, BinaryIO, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from fastapi import HTTPException, status
+from pydantic import ValidationError
+from sqlalchemy import bindparam
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.product import Product, ProductCategory
+from app.schemas.product import ProductCreate, ProductUpdate
+from app.services.product_cache import product_listing_cache, product_facets
+
+logger = logging.getLogger(__name__)
+
+# 导入导出的列，导出文件可直接修改后重新导入
+EXPORT_COLUMNS = [
+    "id", "product_name", "product_introduction", "points_price", "original_price",
+    "stock", "sold_count", "category_id", "category_name", "main_image", "product_image",
+    "images", "is_recommended", "is_hot", "is_new", "sort_order", "exchange_rule",
+    "exchange_type", "status",
+]
+
+# 可由导入文件写入的商品字段
+IMPORT_FIELDS = [
+    "product_name", "product_introduction", "points_price", "original_price", "stock",
+    "category_id", "main_image", "product_image", "images", "is_recommended", "is_hot",
+    "is_new", "sort_order", "exchange_rule", "exchange_type",
+]
+
+# 图片列表在单元格中用竖线分隔
+IMAGES_SEPARATOR = "|"
+
+# 导出时累积到该字节数再输出一块
+EXPORT_FLUSH_SIZE = 64 * 1024
+
+Row = Tuple[int, Dict[str, Any]]
+
+
+class ProductBulkService:
+    """
+    商品批量导入导出服务
+
+    导入按批流式读取文件，新增行用 ProductCreate、更新行用 ProductUpdate 校验，
+    每批以一条批量 INSERT 和按列组合分组的批量 UPDATE 写入；
+    导出通过服务端游标逐批读取，内存占用与商品总数无关。
+    """
+
+    def import_products(self, db: Session, file: BinaryIO, filename: str) -> Dict[str, Any]:
+        """
+        批量导入商品
+
+        带 id 列的行更新对应商品（只更新该行非空的单元格），其余行新增商品。
+        分类可以通过 category_id 或 category_name 指定。
+
+        Args:
+            db: 数据库会话
+            file: 上传的文件对象
+            filename: 文件名，根据扩展名判断CSV或XLSX
+
+        Returns:
+            导入结果：新增数、更新数、失败数和错误行
+
+        Raises:
+            HTTPException: 如果文件格式不支持或缺少必要的列
+        """
+        columns, rows = self._open_rows(file, filename)
+
+        if "product_name" not in columns and "id" not in columns:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="导入文件缺少 product_name 列"
+            )
+
+        category_ids, category_names = self._category_maps(db)
+        result = {"created": 0, "updated": 0, "failed": 0, "errors": []}
+
+        while True:
+            chunk = list(islice(rows, settings.PRODUCT_IMPORT_CHUNK_SIZE))
+            if not chunk:
+                break
+            self._import_chunk(db, chunk, category_ids, category_names, result)
+
+        logger.info(
+            "商品导入完成: 新增%s 更新%s 失败%s",
+            result["created"], result["updated"], result["failed"]
+        )
+        return result
+
+    def export_csv(self, db: Session, category_id: Optional[int] = None) -> Iterator[str]:
+        """
+        流式导出商品CSV
+
+        使用独立会话和服务端游标，响应发送期间逐批读取，不一次性加载全表。
+
+        Args:
+            db: 数据库会话（仅用于获取连接）
+            category_id: 分类ID
+
+        Returns:
+            CSV文本块迭代器
+        """
+        session = Session(bind=db.get_bind())
+        try:
+            query = session.query(
+                Product.id,
+                Product.product_name,
+                Product.product_introduction,
+                Product.points_price,
+                Product.original_price,
+                Product.stock,
+                Product.sold_count,
+                Product.category_id,
+                ProductCategory.name.label("category_name"),
+                Product.main_image,
+                Product.product_image,
+                Product.images,
+                Product.is_recommended,
+                Product.is_hot,
+                Product.is_new,
+                Product.sort_order,
+                Product.exchange_rule,
+                Product.exchange_type,
+                Product.status,
+            ).outerjoin(
+                ProductCategory, Product.category_id == ProductCategory.id
+            ).filter(
+                Product.is_deleted == False
+            )
+
+            if category_id:
+                query = query.filter(Product.category_id == category_id)
+
+            query = query.order_by(Product.id).execution_options(
+                stream_results=True,
+                yield_per=settings.PRODUCT_EXPORT_BATCH_SIZE
+            )
+
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            # BOM让Excel正确识别UTF-8中文
+            buffer.write("\ufeff")
+            writer.writerow(EXPORT_COLUMNS)
+
+            for row in query:
+                writer.writerow([self._format_cell(value) for value in row])
+                if buffer.tell() >= EXPORT_FLUSH_SIZE:
+                    yield buffer.getvalue()
+                    buffer.seek(0)
+                    buffer.truncate()
+
+            yield buffer.getvalue()
+        finally:
+            session.close()
+
+    def _import_chunk(
+        self,
+        db: Session,
+        chunk: List[Row],
+        category_ids: Set[int],
+        category_names: Dict[str, int],
+        result: Dict[str, Any]
+    ) -> None:
+        """
+        校验并写入一批行
+
+        Args:
+            db: 数据库会话
+            chunk: (行号, 行数据) 列表
+            category_ids: 已存在的分类ID
+            category_names: 分类名称到ID的映射
+            result: 导入结果，原地累加
+        """
+        parsed: List[Tuple[int, Optional[int], Dict[str, Any]]] = []
+        for row_number, raw in chunk:
+            try:
+                product_id, data = self._parse_row(raw, category_ids, category_names)
+            except ValueError as e:
+                self._add_error(result, row_number, str(e))
+                continue
+            parsed.append((row_number, product_id, data))
+
+        # 一次查询本批要更新的商品，用于校验存在性和计算修改前的缓存维度
+        update_ids = [product_id for _, product_id, _ in parsed if product_id is not None]
+        existing = {}
+        if update_ids:
+            existing = {
+                row.id: row for row in db.query(
+                    Product.id, Product.category_id, Product.is_recommended,
+                    Product.is_hot, Product.is_new
+                ).filter(
+                    Product.id.in_(update_ids),
+                    Product.is_deleted == False
+                )
+            }
+
+        inserts: List[Dict[str, Any]] = []
+        # 按更新的列组合分组，每组的参数结构一致，可以用一条批量UPDATE写入
+        updates: Dict[Tuple[str, ...], List[Dict[str, Any]]] = {}
+        updated_ids: List[int] = []
+        facets = set()
+        for row_number, product_id, data in parsed:
+            if product_id is None:
+                inserts.append(dict(data, product_price=data["points_price"], status=1, sold_count=0))
+                facets |= product_facets(
+                    data["category_id"], data["is_recommended"], data["is_hot"], data["is_new"]
+                )
+                continue
+
+            old = existing.get(product_id)
+            if old is None:
+                self._add_error(result, row_number, f"商品不存在: {product_id}")
+                continue
+
+            updated_ids.append(product_id)
+            if not data:
+                continue
+            params = {"b_id": product_id}
+            params.update({f"b_{field}": value for field, value in data.items()})
+            updates.setdefault(tuple(sorted(data)), []).append(params)
+
+            new = {field: getattr(old, field) for field in ("category_id", "is_recommended", "is_hot", "is_new")}
+            new.update({field: data[field] for field in new if field in data})
+            facets |= product_facets(old.category_id, old.is_recommended, old.is_hot, old.is_new)
+            facets |= product_facets(new["category_id"], new["is_recommended"], new["is_hot"], new["is_new"])
+
+        table = Product.__table__
+        if inserts:
+            db.execute(table.insert(), inserts)
+        for fields, group in updates.items():
+            values = {field: bindparam(f"b_{field}") for field in fields}
+            if "points_price" in fields:
+                values["product_price"] = bindparam("b_points_price")
+            db.execute(
+                table.update().where(table.c.id == bindparam("b_id")).values(values),
+                group
+            )
+        db.commit()
+
+        result["created"] += len(inserts)
+        result["updated"] += len(updated_ids)
+
+        for product_id in updated_ids:
+            product_listing_cache.invalidate(product_id, ())
+        if facets:
+            product_listing_cache.invalidate(None, facets)
+
+    def _parse_row(
+        self,
+        raw: Dict[str, Any],
+        category_ids: Set[int],
+        category_names: Dict[str, int]
+    ) -> Tuple[Optional[int], Dict[str, Any]]:
+        """
+        清洗并校验一行数据
+
+        Args:
+            raw: 原始行数据
+            category_ids: 已存在的分类ID
+            category_names: 分类名称到ID的映射
+
+        Returns:
+            (商品ID或None, 校验后的字段；更新行只包含非空的字段)
+
+        Raises:
+            ValueError: 如果数据不合法
+        """
+        values = {key: self._clean_cell(key, value) for key, value in raw.items() if key}
+
+        product_id = values.pop("id", None)
+        if product_id is not None:
+            try:
+                product_id = int(product_id)
+            except (TypeError, ValueError):
+                raise ValueError(f"id 不是有效的整数: {product_id}")
+
+        category_name = values.pop("category_name", None)
+        if category_name is not None and values.get("category_id") is None:
+            if category_name not in category_names:
+                raise ValueError(f"分类不存在: {category_name}")
+            values["category_id"] = category_names[category_name]
+
+        fields = {key: value for key, value in values.items() if key in IMPORT_FIELDS and value is not None}
+
+        try:
+            if product_id is None:
+                data = ProductCreate(**fields).dict()
+            else:
+                # 空单元格表示不修改，不能用默认值覆盖原数据
+                data = ProductUpdate(**fields).dict(exclude_unset=True)
+        except ValidationError as e:
+            raise ValueError("; ".join(
+                f"{'.'.join(str(loc) for loc in error['loc'])}: {error['msg']}" for error in e.errors()
+            ))
+
+        if data.get("category_id") is not None and data["category_id"] not in category_ids:
+            raise ValueError(f"分类不存在: {data['category_id']}")
+
+        return product_id, data
+
+    def _open_rows(self, file: BinaryIO, filename: str) -> Tuple[List[str], Iterator[Row]]:
+        """
+        打开导入文件，返回列名和行迭代器
+
+        Args:
+            file: 文件对象
+            filename: 文件名
+
+        Returns:
+            (列名列表, (行号, 行数据) 迭代器)
+
+        Raises:
+            HTTPException: 如果文件格式不支持
+        """
+        extension = (filename or "").rsplit(".", 1)[-1].lower()
+
+        if extension == "csv":
+            reader = csv.DictReader(io.TextIOWrapper(file, encoding="utf-8-sig", newline=""))
+            columns = [name.strip() for name in (reader.fieldnames or [])]
+            reader.fieldnames = columns
+            return columns, enumerate(reader, start=2)
+
+        if extension == "xlsx":
+            try:
+                from openpyxl import load_workbook
+            except ImportError:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="服务器未安装 openpyxl，暂不支持XLSX导入，请使用CSV"
+                )
+
+            # 只读模式逐行解析，不把整个工作表加载到内存
+            workbook = load_workbook(file, read_only=True, data_only=True)
+            sheet_rows = workbook.active.iter_rows(values_only=True)
+            header = next(sheet_rows, None) or ()
+            columns = [str(name).strip() if name is not None else "" for name in header]
+            return columns, self._xlsx_rows(workbook, columns, sheet_rows)
+
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="仅支持CSV或XLSX文件"
+        )
+
+    @staticmethod
+    def _xlsx_rows(workbook: Any, columns: List[str], sheet_rows: Iterable[tuple]) -> Iterator[Row]:
+        """
+        逐行读取XLSX数据，跳过空行，读取完毕后关闭工作簿
+
+        Args:
+            workbook: 只读工作簿
+            columns: 列名
+            sheet_rows: 数据行迭代器
+
+        Returns:
+            (行号, 行数据) 迭代器
+        """
+        try:
+            for row_number, values in enumerate(sheet_rows, start=2):
+                if all(value is None or value == "" for value in values):
+                    continue
+                yield row_number, dict(zip(columns, values))
+        finally:
+            workbook.close()
+
+    @staticmethod
+    def _category_maps(db: Session) -> Tuple[Set[int], Dict[str, int]]:
+        """
+        一次查询所有分类，构建ID集合和名称映射
+
+        Args:
+            db: 数据库会话
+
+        Returns:
+            (分类ID集合, 分类名称到ID的映射)
+        """
+        rows = db.query(ProductCategory.id, ProductCategory.name).filter(
+            ProductCategory.is_deleted == False
+        ).all()
+        return {row.id for row in rows}, {row.name: row.id for row in rows}
+
+    @staticmethod
+    def _clean_cell(key: str, value: Any) -> Any:
+        """
+        清洗单元格：去除空白，空字符串视为未填写，图片列表按竖线拆分
+
+        Args:
+            key: 列名
+            value: 单元格值
+
+        Returns:
+            清洗后的值
+        """
+        if isinstance(value, str):
+            value = value.strip()
+            if value == "":
+                return None
+            if key == "images":
+                return [image.strip() for image in value.split(IMAGES_SEPARATOR) if image.strip()]
+        return value
+
+    @staticmethod
+    def _format_cell(value: Any) -> Any:
+        """
+        格式化导出单元格
+
+        Args:
+            value: 字段值
+
+        Returns:
+            CSV单元格值
+        """
+        if value is None:
+            return ""
+        if isinstance(value, bool):
+            return int(value)
+        if isinstance(value, list):
+            return IMAGES_SEPARATOR.join(str(item) for item in value)
+        return value
+
+    @staticmethod
+    def _add_error(result: Dict[str, Any], row_number: int, error: str) -> None:
+        """
+        记录失败行
+
+        Args:
+            result: 导入结果
+            row_number: 行号
+            error: 错误信息
+        """
+        result["failed"] += 1
+        if len(result["errors"]) < settings.PRODUCT_IMPORT_MAX_ERRORS:
+            result["errors"].append({"row": row_number, "error": error})
+
+
+# 创建服务实例
+product_bulk_service = ProductBulkService()
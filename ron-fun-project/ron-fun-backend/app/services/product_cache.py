@@ -0,0 +1,192 @@
+import logging
+import threading
+from itertools import product as cartesian_product
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from app.core.cache import MISSING, TTLCache
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# 列表维度：(分类ID, 是否推荐, 是否热门, 是否新品)，None表示不限
+FacetKey = Tuple[Optional[int], Optional[bool], Optional[bool], Optional[bool]]
+
+
+def product_facets(
+    category_id: Optional[int],
+    is_recommended: Optional[bool],
+    is_hot: Optional[bool],
+    is_new: Optional[bool]
+) -> Set[FacetKey]:
+    """
+    计算商品所属的全部列表维度组合
+
+    Args:
+        category_id: 分类ID
+        is_recommended: 是否推荐
+        is_hot: 是否热门
+        is_new: 是否新品
+
+    Returns:
+        维度键集合
+    """
+    categories = [None, category_id] if category_id else [None]
+    flags = [[None, True] if flag else [None] for flag in (is_recommended, is_hot, is_new)]
+    return set(cartesian_product(categories, *flags))
+
+
+class ProductListingCache:
+    """
+    商品列表缓存
+
+    按维度组合预计算有序的商品ID列表，分页时直接切片；
+    商品详情按ID缓存序列化后的数据。商品写入时只失效受影响的维度。
+    """
+
+    def __init__(self, ttl: Optional[float] = None, maxsize: int = 10000):
+        """
+        初始化缓存
+
+        Args:
+            ttl: 过期秒数
+            maxsize: 商品详情缓存最大条目数
+        """
+        self.listings = TTLCache("product_listings", maxsize=1024, ttl=ttl)
+        self.objects = TTLCache("product_objects", maxsize=maxsize, ttl=ttl)
+        # 每次失效递增，防止并发加载把失效前的旧列表写回缓存
+        self.generation = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def facet_key(
+        category_id: Optional[int] = None,
+        is_recommended: Optional[bool] = None,
+        is_hot: Optional[bool] = None,
+        is_new: Optional[bool] = None
+    ) -> Optional[FacetKey]:
+        """
+        根据查询条件生成维度键
+
+        Args:
+            category_id: 分类ID
+            is_recommended: 是否推荐
+            is_hot: 是否热门
+            is_new: 是否新品
+
+        Returns:
+            维度键，查询条件不可缓存（如筛选False）时返回None
+        """
+        if False in (is_recommended, is_hot, is_new):
+            return None
+        return (category_id or None, is_recommended, is_hot, is_new)
+
+    @staticmethod
+    def facets_of(product: Any) -> Set[FacetKey]:
+        """
+        获取商品当前所属的维度键
+
+        Args:
+            product: 商品对象
+
+        Returns:
+            维度键集合
+        """
+        return product_facets(
+            product.category_id, product.is_recommended, product.is_hot, product.is_new
+        )
+
+    def get_ids(self, facet: FacetKey) -> Optional[List[int]]:
+        """
+        获取维度对应的有序商品ID列表
+
+        Args:
+            facet: 维度键
+
+        Returns:
+            商品ID列表，未缓存时返回None
+        """
+        ids = self.listings.get(facet)
+        return None if ids is MISSING else ids
+
+    def set_ids(self, facet: FacetKey, ids: List[int], generation: int) -> None:
+        """
+        写入维度对应的商品ID列表
+
+        Args:
+            facet: 维度键
+            ids: 有序商品ID列表
+            generation: 开始加载时的版本号，加载期间发生过失效则丢弃
+        """
+        with self._lock:
+            if generation != self.generation:
+                return
+            self.listings.set(facet, ids)
+
+    def get_products(self, product_ids: Iterable[int]) -> Dict[int, Dict[str, Any]]:
+        """
+        批量获取缓存的商品数据
+
+        Args:
+            product_ids: 商品ID列表
+
+        Returns:
+            命中的商品数据字典
+        """
+        return self.objects.get_many(product_ids)
+
+    def set_products(self, payloads: Dict[int, Dict[str, Any]], generation: int) -> None:
+        """
+        批量写入商品数据
+
+        Args:
+            payloads: 商品ID到序列化数据的字典
+            generation: 开始加载时的版本号
+        """
+        with self._lock:
+            if generation != self.generation:
+                return
+            for product_id, payload in payloads.items():
+                self.objects.set(product_id, payload)
+
+    def invalidate(self, product_id: Optional[int], facets: Iterable[FacetKey]) -> None:
+        """
+        商品写入后失效相关缓存
+
+        Args:
+            product_id: 商品ID，None表示不失效详情缓存
+            facets: 受影响的维度键（应包含修改前和修改后的维度）
+        """
+        with self._lock:
+            self.generation += 1
+            if product_id is not None:
+                self.objects.delete(product_id)
+            for facet in facets:
+                self.listings.delete(facet)
+
+    def invalidate_category(self, category_id: int) -> None:
+        """
+        分类修改后失效商品详情缓存（详情中内嵌了分类信息）
+
+        Args:
+            category_id: 分类ID
+        """
+        with self._lock:
+            self.generation += 1
+            self.objects.clear()
+        logger.debug("分类%s已修改，清空商品详情缓存", category_id)
+
+    def clear(self) -> None:
+        """
+        清空全部缓存
+        """
+        with self._lock:
+            self.generation += 1
+            self.listings.clear()
+            self.objects.clear()
+
+
+# 创建缓存实例
+product_listing_cache = ProductListingCache(
+    ttl=settings.PRODUCT_CACHE_TTL,
+    maxsize=settings.PRODUCT_CACHE_MAXSIZE
+)
@@ -2,12 +2,17 @@ import logging
 from typing import List, Dict, Any, Optional, Tuple
 from datetime import datetime
 from fastapi import HTTPException, status
-from sqlalchemy.orm import Session
-from sqlalchemy import func, desc
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, joinedload
+from sqlalchemy import func, desc, select
 
 from app.models.product import Product, ProductCategory, Order, OrderItem, Address
 from app.models.user import User
 from app.models.point import PointLog
+from app.core.config import settings
+from app.schemas.product import ProductResponse
+from app.services.product_cache import product_listing_cache
+from app.services.order_service import order_service
 
 logger = logging.getLogger(__name__)
 
@@ -54,10 +59,13 @@ class ProductService:
         is_hot: Optional[bool] = None,
         is_new: Optional[bool] = None,
         keyword: Optional[str] = None
-    ) -> List[Product]:
+    ) -> List[Any]:
         """
         获取商品列表
         
+        不带关键词的查询走列表缓存：按维度缓存有序ID列表，分页时切片，
+        再从商品详情缓存中组装数据。
+        
         Args:
             db: 数据库会话
             skip: 跳过记录数
@@ -69,41 +77,182 @@ class ProductService:
             keyword: 搜索关键词
             
         Returns:
-            商品列表
+            商品列表（走缓存时为序列化后的商品数据）
         """
-        query = db.query(Product).filter(
+        facet = product_listing_cache.facet_key(category_id, is_recommended, is_hot, is_new)
+        if facet is not None and not keyword:
+            product_ids = product_listing_cache.get_ids(facet)
+            if product_ids is None:
+                generation = product_listing_cache.generation
+                rows = self._listing_query(
+                    db, category_id, is_recommended, is_hot, is_new
+                ).with_entities(Product.id).all()
+                product_ids = [row.id for row in rows]
+                product_listing_cache.set_ids(facet, product_ids, generation)
+            
+            return self.hydrate_products(db, product_ids[skip:skip + limit])
+        
+        query = self._listing_query(db, category_id, is_recommended, is_hot, is_new)
+            
+        # 按关键词搜索
+        if keyword:
+            query = query.filter(
+                Product.product_name.ilike(f"%{keyword}%") | 
+                Product.product_introduction.ilike(f"%{keyword}%")
+            )
+        
+        # 分页
+        products = query.offset(skip).limit(limit).all()
+        
+        return products
+    
+    def _listing_query(
+        self,
+        db: Session,
+        category_id: Optional[int] = None,
+        is_recommended: Optional[bool] = None,
+        is_hot: Optional[bool] = None,
+        is_new: Optional[bool] = None
+    ):
+        """
+        构建商品列表查询（已排序，未分页）
+        
+        Args:
+            db: 数据库会话
+            category_id: 分类ID
+            is_recommended: 是否推荐
+            is_hot: 是否热门
+            is_new: 是否新品
+            
+        Returns:
+            查询对象
+        """
+        return db.query(Product).filter(
+            *self._listing_criteria(category_id, is_recommended, is_hot, is_new)
+        ).order_by(desc(Product.sort_order), desc(Product.created_at))
+    
+    @staticmethod
+    def _listing_criteria(
+        category_id: Optional[int] = None,
+        is_recommended: Optional[bool] = None,
+        is_hot: Optional[bool] = None,
+        is_new: Optional[bool] = None
+    ) -> List[Any]:
+        """
+        商品列表的筛选条件（同步和异步查询共用）
+        """
+        criteria = [
             Product.is_deleted == False,
             Product.status == 1  # 正常状态
-        )
+        ]
         
         # 按分类筛选
         if category_id:
-            query = query.filter(Product.category_id == category_id)
+            criteria.append(Product.category_id == category_id)
             
         # 按属性筛选
         if is_recommended is not None:
-            query = query.filter(Product.is_recommended == is_recommended)
+            criteria.append(Product.is_recommended == is_recommended)
             
         if is_hot is not None:
-            query = query.filter(Product.is_hot == is_hot)
+            criteria.append(Product.is_hot == is_hot)
             
         if is_new is not None:
-            query = query.filter(Product.is_new == is_new)
+            criteria.append(Product.is_new == is_new)
             
-        # 按关键词搜索
-        if keyword:
-            query = query.filter(
-                Product.product_name.ilike(f"%{keyword}%") | 
-                Product.product_introduction.ilike(f"%{keyword}%")
-            )
+        return criteria
+    
+    def hydrate_products(self, db: Session, product_ids: List[int]) -> List[Dict[str, Any]]:
+        """
+        按ID组装商品数据，优先读取商品详情缓存，未命中的一次性查询
+        
+        Args:
+            db: 数据库会话
+            product_ids: 有序商品ID列表
             
-        # 排序
-        query = query.order_by(desc(Product.sort_order), desc(Product.created_at))
+        Returns:
+            与ID顺序一致的商品数据列表（已不存在或下架的商品会被跳过）
+        """
+        cached = product_listing_cache.get_products(product_ids)
+        missing_ids = [product_id for product_id in product_ids if product_id not in cached]
         
-        # 分页
-        products = query.offset(skip).limit(limit).all()
+        if missing_ids:
+            generation = product_listing_cache.generation
+            products = db.query(Product).options(
+                joinedload(Product.category)
+            ).filter(
+                Product.id.in_(missing_ids),
+                Product.is_deleted == False,
+                Product.status == 1
+            ).all()
+            
+            loaded = {
+                product.id: ProductResponse.from_orm(product).dict()
+                for product in products
+            }
+            product_listing_cache.set_products(loaded, generation)
+            cached.update(loaded)
         
-        return products
+        return [cached[product_id] for product_id in product_ids if product_id in cached]
+    
+    def get_products_by_ids(
+        self, db: Session, product_ids: List[int]
+    ) -> Tuple[List[Dict[str, Any]], List[int]]:
+        """
+        批量获取商品，一次IN查询加载缓存未命中的商品
+        
+        Args:
+            db: 数据库会话
+            product_ids: 商品ID列表
+            
+        Returns:
+            (按请求顺序排列的商品数据列表, 不存在或已下架的商品ID列表)
+        """
+        self._check_batch_size(product_ids)
+        items = self.hydrate_products(db, list(dict.fromkeys(product_ids)))
+        return self._order_batch(product_ids, items)
+    
+    async def get_products_by_ids_async(
+        self, db: AsyncSession, product_ids: List[int]
+    ) -> Tuple[List[Dict[str, Any]], List[int]]:
+        """
+        批量获取商品（异步会话）
+        
+        Args:
+            db: 异步数据库会话
+            product_ids: 商品ID列表
+            
+        Returns:
+            (按请求顺序排列的商品数据列表, 不存在或已下架的商品ID列表)
+        """
+        self._check_batch_size(product_ids)
+        items = await self.hydrate_products_async(db, list(dict.fromkeys(product_ids)))
+        return self._order_batch(product_ids, items)
+    
+    @staticmethod
+    def _check_batch_size(product_ids: List[int]) -> None:
+        """
+        校验批量获取的商品ID数量
+        """
+        if len(product_ids) > settings.PRODUCT_BATCH_MAX_IDS:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"单次最多获取{settings.PRODUCT_BATCH_MAX_IDS}个商品"
+            )
+    
+    @staticmethod
+    def _order_batch(
+        product_ids: List[int], items: List[Dict[str, Any]]
+    ) -> Tuple[List[Dict[str, Any]], List[int]]:
+        """
+        按请求顺序排列批量获取的商品，并找出缺失的ID
+        """
+        found = {item["id"]: item for item in items}
+        
+        ordered = [found[product_id] for product_id in product_ids if product_id in found]
+        missing_ids = [product_id for product_id in dict.fromkeys(product_ids) if product_id not in found]
+        
+        return ordered, missing_ids
     
     def get_categories(self, db: Session, skip: int = 0, limit: int = 10) -> List[ProductCategory]:
         """
@@ -125,6 +274,145 @@ class ProductService:
         
         return categories
     
+    async def get_product_async(self, db: AsyncSession, product_id: int) -> Product:
+        """
+        获取商品详情（异步会话）
+        
+        Args:
+            db: 异步数据库会话
+            product_id: 商品ID
+            
+        Returns:
+            商品对象（已加载分类）
+            
+        Raises:
+            HTTPException: 如果商品不存在
+        """
+        product = (await db.execute(
+            select(Product).options(joinedload(Product.category)).filter(
+                Product.id == product_id,
+                Product.is_deleted == False,
+                Product.status == 1  # 正常状态
+            )
+        )).scalars().first()
+        
+        if not product:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="商品不存在"
+            )
+            
+        return product
+    
+    async def get_products_async(
+        self, 
+        db: AsyncSession, 
+        skip: int = 0, 
+        limit: int = 10, 
+        category_id: Optional[int] = None,
+        is_recommended: Optional[bool] = None,
+        is_hot: Optional[bool] = None,
+        is_new: Optional[bool] = None,
+        keyword: Optional[str] = None
+    ) -> List[Any]:
+        """
+        获取商品列表（异步会话），缓存逻辑与 get_products 相同
+        
+        Args:
+            db: 异步数据库会话
+            skip: 跳过记录数
+            limit: 返回记录数
+            category_id: 分类ID
+            is_recommended: 是否推荐
+            is_hot: 是否热门
+            is_new: 是否新品
+            keyword: 搜索关键词
+            
+        Returns:
+            商品列表（走缓存时为序列化后的商品数据）
+        """
+        criteria = self._listing_criteria(category_id, is_recommended, is_hot, is_new)
+        order_by = (desc(Product.sort_order), desc(Product.created_at))
+        
+        facet = product_listing_cache.facet_key(category_id, is_recommended, is_hot, is_new)
+        if facet is not None and not keyword:
+            product_ids = product_listing_cache.get_ids(facet)
+            if product_ids is None:
+                generation = product_listing_cache.generation
+                product_ids = list((await db.execute(
+                    select(Product.id).filter(*criteria).order_by(*order_by)
+                )).scalars())
+                product_listing_cache.set_ids(facet, product_ids, generation)
+            
+            return await self.hydrate_products_async(db, product_ids[skip:skip + limit])
+        
+        statement = select(Product).options(joinedload(Product.category)).filter(*criteria)
+        
+        # 按关键词搜索
+        if keyword:
+            statement = statement.filter(
+                Product.product_name.ilike(f"%{keyword}%") | 
+                Product.product_introduction.ilike(f"%{keyword}%")
+            )
+        
+        # 分页
+        result = await db.execute(statement.order_by(*order_by).offset(skip).limit(limit))
+        return list(result.scalars())
+    
+    async def hydrate_products_async(self, db: AsyncSession, product_ids: List[int]) -> List[Dict[str, Any]]:
+        """
+        按ID组装商品数据（异步会话），优先读取商品详情缓存，未命中的一次性查询
+        
+        Args:
+            db: 异步数据库会话
+            product_ids: 有序商品ID列表
+            
+        Returns:
+            与ID顺序一致的商品数据列表（已不存在或下架的商品会被跳过）
+        """
+        cached = product_listing_cache.get_products(product_ids)
+        missing_ids = [product_id for product_id in product_ids if product_id not in cached]
+        
+        if missing_ids:
+            generation = product_listing_cache.generation
+            products = (await db.execute(
+                select(Product).options(joinedload(Product.category)).filter(
+                    Product.id.in_(missing_ids),
+                    Product.is_deleted == False,
+                    Product.status == 1
+                )
+            )).scalars()
+            
+            loaded = {
+                product.id: ProductResponse.from_orm(product).dict()
+                for product in products
+            }
+            product_listing_cache.set_products(loaded, generation)
+            cached.update(loaded)
+        
+        return [cached[product_id] for product_id in product_ids if product_id in cached]
+    
+    async def get_categories_async(self, db: AsyncSession, skip: int = 0, limit: int = 10) -> List[ProductCategory]:
+        """
+        获取商品分类列表（异步会话）
+        
+        Args:
+            db: 异步数据库会话
+            skip: 跳过记录数
+            limit: 返回记录数
+            
+        Returns:
+            分类列表
+        """
+        result = await db.execute(
+            select(ProductCategory).filter(
+                ProductCategory.is_deleted == False
+            ).order_by(
+                ProductCategory.sort_order.desc()
+            ).offset(skip).limit(limit)
+        )
+        return list(result.scalars())
+    
     def create_order(
         self, 
         db: Session, 
@@ -218,7 +506,9 @@ class ProductService:
             product_image=product.main_image or product.product_image,
             points_price=product.points_price,
             quantity=quantity,
-            total_points=total_points
+            total_points=total_points,
+            # 库存为0表示不限量，不扣减库存
+            stock_deducted=product.stock > 0
         )
         
         # 保存订单项
@@ -255,6 +545,9 @@ class ProductService:
         db.commit()
         db.refresh(order)
         
+        # 库存和销量变化不影响列表排序，只失效商品详情
+        product_listing_cache.invalidate(product.id, ())
+        
         return order
     
     def get_user_orders(
@@ -278,21 +571,7 @@ class ProductService:
         Returns:
             订单列表
         """
-        query = db.query(Order).filter(
-            Order.user_id == user_id,
-            Order.is_deleted == False
-        )
-        
-        # 按状态筛选
-        if status is not None:
-            query = query.filter(Order.status == status)
-            
-        # 排序和分页
-        orders = query.order_by(
-            Order.created_at.desc()
-        ).offset(skip).limit(limit).all()
-        
-        return orders
+        return order_service.get_user_orders(db, user_id, status, skip, limit)
 
 # 创建服务实例
 product_service = ProductService() 
\ No newline at end of file
@@ -0,0 +1,65 @@
+#!/usr/bin/env python
+"""
+回填点击统计日汇总表（click_daily_stats）
+
+用法:
+    python scripts/backfill_click_stats.py --days 30
+    python scripts/backfill_click_stats.py --start 2024-01-01 --end 2024-01-31 --type banner
+
+按天从原始点击表重新汇总，可重复执行。
+"""
+import os
+import sys
+import argparse
+import logging
+from datetime import date, datetime, timedelta
+
+# 将项目根目录添加到Python路径中
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy.exc import SQLAlchemyError
+from app.db.session import SessionLocal, engine
+from app.models.statistics import ClickDailyStat
+from app.services.click_stats_service import click_stats_service, ENTITY_MODELS
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def parse_date(value: str) -> date:
+    return datetime.strptime(value, "%Y-%m-%d").date()
+
+def backfill(start_date: date, end_date: date, entity_types) -> None:
+    """
+    回填日期范围内的点击统计
+    """
+    # 确保汇总表存在
+    ClickDailyStat.__table__.create(bind=engine, checkfirst=True)
+
+    db = SessionLocal()
+    try:
+        rows = click_stats_service.backfill(db, start_date, end_date, entity_types)
+        logger.info(f"回填完成，共写入 {rows} 行汇总数据")
+    except SQLAlchemyError as e:
+        db.rollback()
+        logger.error(f"回填失败: {e}")
+        raise
+    finally:
+        db.close()
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="回填点击统计日汇总表")
+    parser.add_argument("--days", type=int, default=30, help="回填最近多少天（含今天），默认30")
+    parser.add_argument("--start", type=parse_date, help="开始日期 YYYY-MM-DD")
+    parser.add_argument("--end", type=parse_date, help="结束日期 YYYY-MM-DD，默认今天")
+    parser.add_argument("--type", choices=list(ENTITY_MODELS), help="只回填指定对象类型")
+    args = parser.parse_args()
+
+    end_date = args.end or date.today()
+    start_date = args.start or end_date - timedelta(days=args.days - 1)
+    entity_types = [args.type] if args.type else None
+
+    logger.info(f"正在回填点击统计: {start_date} ~ {end_date}")
+    backfill(start_date, end_date, entity_types)
+
+if __name__ == "__main__":
+    main()
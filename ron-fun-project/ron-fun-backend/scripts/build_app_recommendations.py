@@ -0,0 +1,50 @@
+#!/usr/bin/env python
+"""
+离线计算首页应用的个性化排序（application_recommendations）
+
+用法:
+    python scripts/build_app_recommendations.py
+    python scripts/build_app_recommendations.py --days 30 --top-n 10
+
+根据最近的应用点击计算每个用户的推荐应用并整表替换，建议每天定时执行。
+接口进程每 APP_RECOMMENDATION_RELOAD_INTERVAL 秒检查一次并加载新结果。
+"""
+import os
+import sys
+import argparse
+import logging
+
+# 将项目根目录添加到Python路径中
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy.exc import SQLAlchemyError
+from app.db.session import SessionLocal, engine
+from app.models.recommendation import ApplicationRecommendation
+from app.services.app_recommendation_builder import build_recommendations
+from app.core.config import settings
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="离线计算首页应用个性化排序")
+    parser.add_argument("--days", type=int, default=settings.APP_RECOMMENDATION_DAYS, help="使用最近多少天的点击")
+    parser.add_argument("--top-n", type=int, default=settings.APP_RECOMMENDATION_TOP_N, help="每个用户保留的应用数")
+    args = parser.parse_args()
+
+    # 确保结果表存在
+    ApplicationRecommendation.__table__.create(bind=engine, checkfirst=True)
+
+    db = SessionLocal()
+    try:
+        users = build_recommendations(db, days=args.days, top_n=args.top_n)
+        logger.info(f"计算完成，共 {users} 个用户有推荐结果")
+    except SQLAlchemyError as e:
+        db.rollback()
+        logger.error(f"计算失败: {e}")
+        raise
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    main()
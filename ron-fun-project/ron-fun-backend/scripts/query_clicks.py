@@ -0,0 +1,63 @@
+#!/usr/bin/env python
+"""
+用DuckDB查询导出的点击明细（不访问线上数据库）
+
+用法:
+    python scripts/query_clicks.py "SELECT date, count(*) FROM banner_clicks GROUP BY date ORDER BY date"
+    python scripts/query_clicks.py --dir ./exports/clicks "SELECT device_type, count(*) FROM application_clicks GROUP BY 1"
+
+可查询的视图为 banner_clicks 和 application_clicks，列为：
+id, entity_id, user_id, ip_address, user_agent, device_type, created_at, date（分区日期）。
+需要安装 duckdb（pip install duckdb）。
+"""
+import os
+import sys
+import glob
+import argparse
+
+# 将项目根目录添加到Python路径中
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.config import settings
+from app.services.click_stats_service import ENTITY_MODELS
+
+def register_views(connection, export_dir: str) -> None:
+    """
+    为每种对象类型创建视图，同时读取parquet和csv.gz分片
+    """
+    for entity_type in ENTITY_MODELS:
+        base_dir = os.path.join(export_dir, entity_type)
+        sources = []
+        if glob.glob(os.path.join(base_dir, "date=*", "*.parquet")):
+            sources.append(
+                f"SELECT * FROM read_parquet('{base_dir}/date=*/*.parquet', hive_partitioning = true)"
+            )
+        if glob.glob(os.path.join(base_dir, "date=*", "*.csv.gz")):
+            sources.append(
+                f"SELECT * FROM read_csv_auto('{base_dir}/date=*/*.csv.gz', hive_partitioning = true)"
+            )
+        if sources:
+            connection.execute(f"CREATE VIEW {entity_type}_clicks AS " + " UNION ALL BY NAME ".join(sources))
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="查询导出的点击明细")
+    parser.add_argument("sql", help="SQL语句，视图为 banner_clicks / application_clicks")
+    parser.add_argument("--dir", default=settings.CLICK_EXPORT_DIR, help="导出根目录")
+    args = parser.parse_args()
+
+    try:
+        import duckdb
+    except ImportError:
+        sys.exit("未安装 duckdb，请先执行 pip install duckdb")
+
+    connection = duckdb.connect()
+    register_views(connection, args.dir)
+
+    result = connection.execute(args.sql)
+    columns = [column[0] for column in result.description]
+    print("\t".join(columns))
+    for row in result.fetchall():
+        print("\t".join("" if value is None else str(value) for value in row))
+
+if __name__ == "__main__":
+    main()
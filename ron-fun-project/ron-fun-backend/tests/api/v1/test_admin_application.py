@@ -90,16 +90,19 @@ def test_application_statistics(client, admin_token, create_test_applications, d
     # 先创建一些点击记录
     app_id = create_test_applications[0].id
     
-    # 模拟API点击，因为这是直接访问service，所以无法通过路由中间件进行验证
-    from app.services.application_service import ApplicationService
+    # 点击接口经过点击缓冲区，这里直接写入缓冲区并立即刷新到测试数据库
+    from app.services.click_buffer import ClickBuffer, ENTITY_APPLICATION
+    buffer = ClickBuffer(session_factory=lambda: db)
     for i in range(5):
-        ApplicationService.record_application_click(
-            db, 
-            app_id, 
-            ip_address="127.0.0.1", 
-            user_agent="test-agent", 
+        buffer.record_click(
+            ENTITY_APPLICATION,
+            app_id,
+            ip_address="127.0.0.1",
+            user_agent="test-agent",
             device_type="desktop"
         )
+    buffer.flush()
+    buffer.refresh_rollup()
     
     # 测试获取点击记录
     response = client.get(
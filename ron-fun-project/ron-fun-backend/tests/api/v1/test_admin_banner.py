@@ -98,16 +98,19 @@ def test_banner_statistics(client, admin_token, create_test_banners, db):
     # 先创建一些点击记录
     banner_id = create_test_banners[0].id
     
-    # 模拟API点击，因为这是直接访问service，所以无法通过路由中间件进行验证
-    from app.services.banner_service import BannerService
+    # 点击接口经过点击缓冲区，这里直接写入缓冲区并立即刷新到测试数据库
+    from app.services.click_buffer import ClickBuffer, ENTITY_BANNER
+    buffer = ClickBuffer(session_factory=lambda: db)
     for i in range(5):
-        BannerService.record_banner_click(
-            db, 
-            banner_id, 
-            ip_address="127.0.0.1", 
-            user_agent="test-agent", 
+        buffer.record_click(
+            ENTITY_BANNER,
+            banner_id,
+            ip_address="127.0.0.1",
+            user_agent="test-agent",
             device_type="desktop"
         )
+    buffer.flush()
+    buffer.refresh_rollup()
     
     # 测试获取点击记录
     response = client.get(
@@ -0,0 +1,28 @@
+import pytest
+from fastapi import status
+
+from app.services.cache_warmup import cache_warmup
+
+# 测试非API路由和健康检查探针不使用统一响应格式
+
+@pytest.mark.api
+def test_root_not_wrapped(client):
+    """测试根路径返回原始JSON"""
+    response = client.get("/")
+    assert response.status_code == status.HTTP_200_OK
+    assert set(response.json()) == {"message"}
+
+@pytest.mark.api
+def test_readiness_probe_payload(client, monkeypatch):
+    """测试就绪探针返回原始JSON，未就绪时保留503状态码和响应体"""
+    response = client.get("/api/v1/health/ready")
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["ready"] is True
+    assert "warmup_failed" in response.json()
+
+    monkeypatch.setattr(cache_warmup, "ready", False)
+    response = client.get("/api/v1/health/ready")
+    assert response.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+    assert response.json() == {"ready": False}
+
+    assert client.get("/api/v1/health/ping").json() == {"ping": "pong"}
@@ -1,31 +1,41 @@
 import pytest
 from fastapi.testclient import TestClient
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, Session
+from sqlalchemy.pool import NullPool
 
 from app.main import app
-from app.api.deps import get_db
 from app.core.config import settings
+from app.core.token_cache import token_cache
+from app.db.session import get_async_db, get_async_read_db, get_db, get_read_db
 from app.models.user import User
 from app.models.banner import Banner
 from app.models.application import Application
 from app.models.product import Product, ProductCategory
 from app.core.security import get_password_hash, create_access_token
+from app.services.app_recommendation_service import app_recommendation_service
+from app.services.banner_schedule import banner_schedule
+from app.services.click_buffer import click_buffer
+from app.services.home_feed_cache import home_feed_cache
+from app.services.principal_cache import principal_cache
+from app.services.product_cache import product_listing_cache
 
 # 使用SQLite内存数据库进行测试
 SQLALCHEMY_DATABASE_URL = "sqlite:///./test.db"
+ASYNC_SQLALCHEMY_DATABASE_URL = "sqlite+aiosqlite:///./test.db"
 
 engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
 TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 # 创建测试数据库和表
 def setup_database():
-    from app.db.base_class import Base
+    from app.db.session import Base
     Base.metadata.create_all(bind=engine)
 
 # 测试前清理数据库
 def teardown_database():
-    from app.db.base_class import Base
+    from app.db.session import Base
     Base.metadata.drop_all(bind=engine)
 
 # 覆盖依赖，使用测试数据库
@@ -33,6 +43,12 @@ def teardown_database():
 def db():
     # 设置测试数据库
     setup_database()
+    # 每个测试重建数据库，进程内的Banner排期索引、首页和商品列表缓存、用户和令牌缓存需要重新加载
+    banner_schedule.invalidate()
+    principal_cache.clear()
+    product_listing_cache.clear()
+    home_feed_cache.invalidate()
+    token_cache.clear()
     try:
         db = TestingSessionLocal()
         yield db
@@ -41,16 +57,78 @@ def db():
         # 清理数据库
         teardown_database()
 
+# 异步会话工厂，与同步会话使用同一个测试数据库
+@pytest.fixture
+def async_session_factory(db):
+    # 不复用连接：每个测试可能多次调用 asyncio.run，连接不能跨事件循环
+    async_engine = create_async_engine(ASYNC_SQLALCHEMY_DATABASE_URL, poolclass=NullPool)
+    yield async_sessionmaker(async_engine, expire_on_commit=False)
+    async_engine.sync_engine.dispose()
+
+# 后台任务（订单工作线程、点击缓冲区、缓存预热）使用的会话工厂：
+# 与生产环境一样每批使用独立会话并在结束时关闭，不影响测试会话中的对象
+@pytest.fixture
+def session_factory(db):
+    return TestingSessionLocal
+
+class QueryCounter:
+    """
+    SQL语句计数器，用于断言接口的查询次数上限（防止N+1查询回归）
+    
+    用法:
+        with QueryCounter(engine) as counter:
+            ...
+        assert counter.count <= 3
+    """
+    
+    def __init__(self, bind):
+        self.bind = bind
+        self.statements = []
+    
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+    
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+    
+    def __enter__(self):
+        event.listen(self.bind, "before_cursor_execute", self._before_cursor_execute)
+        return self
+    
+    def __exit__(self, *exc_info):
+        event.remove(self.bind, "before_cursor_execute", self._before_cursor_execute)
+
+# SQL语句计数
+@pytest.fixture
+def query_counter():
+    return lambda: QueryCounter(engine)
+
 # 创建测试客户端
 @pytest.fixture
-def client(db):
+def client(db, async_session_factory, monkeypatch):
     def override_get_db():
         try:
             yield db
         finally:
             pass
 
+    async def override_get_async_db():
+        async with async_session_factory() as async_db:
+            yield async_db
+
     app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_read_db] = override_get_db
+    app.dependency_overrides[get_async_db] = override_get_async_db
+    app.dependency_overrides[get_async_read_db] = override_get_async_db
+
+    # TestClient 会执行 lifespan：不启动订单工作线程、推荐结果加载线程和缓存预热，
+    # 点击缓冲区不启动后台线程，关闭时剩余数据写入测试数据库
+    monkeypatch.setattr(settings, "ORDER_WORKER_ENABLED", False)
+    monkeypatch.setattr(settings, "CACHE_WARMUP_ENABLED", False)
+    monkeypatch.setattr(app_recommendation_service, "start", lambda: None)
+    monkeypatch.setattr(click_buffer, "start", lambda: None)
+    monkeypatch.setattr(click_buffer, "session_factory", TestingSessionLocal)
     
     with TestClient(app) as test_client:
         yield test_client
@@ -75,9 +153,7 @@ def admin_token(db):
     db.refresh(admin_user)
     
     # 创建访问令牌
-    access_token = create_access_token(
-        data={"sub": admin_user.username}
-    )
+    access_token = create_access_token(admin_user.id)
     return access_token
 
 # 创建普通用户
@@ -99,9 +175,7 @@ def normal_token(db):
     db.refresh(normal_user)
     
     # 创建访问令牌
-    access_token = create_access_token(
-        data={"sub": normal_user.username}
-    )
+    access_token = create_access_token(normal_user.id)
     return access_token
 
 # 创建测试Banner
@@ -112,7 +186,7 @@ def create_test_banners(db):
         Banner(
             title=f"Test Banner {i}",
             description=f"Test Banner Description {i}",
-            image_url=f"http://example.com/banner{i}.jpg",
+            image=f"http://example.com/banner{i}.jpg",
             link_type="url",
             link_url="http://example.com",
             is_active=True,
@@ -136,9 +210,10 @@ def create_test_applications(db):
     # 创建Application数据
     applications = [
         Application(
-            name=f"Test App {i}",
-            description=f"Test App Description {i}",
-            icon=f"http://example.com/app{i}.jpg",
+            app_name=f"Test App {i}",
+            app_introduction=f"Test App Description {i}",
+            app_icon=f"http://example.com/app{i}.jpg",
+            app_link="http://example.com",
             link_type="url",
             link_url="http://example.com",
             is_active=True,
@@ -187,13 +262,13 @@ def create_test_products(db, create_test_product_categories):
     products = []
     for i in range(1, 10):
         product = Product(
-            name=f"Product {i}",
-            description=f"Product Description {i}",
+            product_name=f"Product {i}",
+            product_introduction=f"Product Description {i}",
             category_id=categories[i % 3].id,
-            image_url=f"http://example.com/product{i}.jpg",
+            main_image=f"http://example.com/product{i}.jpg",
             points_price=i * 100,
             stock=100,
-            is_active=True,
+            status=1,
             sort_order=i,
         )
         products.append(product)
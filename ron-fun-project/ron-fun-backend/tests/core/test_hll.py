@@ -0,0 +1,46 @@
+import pytest
+
+from app.core.hll import HyperLogLog
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize("cardinality", [100, 10000, 200000])
+def test_count_error_within_bound(cardinality):
+    """测试估计误差在约1%范围内（p=14，标准误差0.81%，取3倍标准误差作为上限）"""
+    sketch = HyperLogLog()
+    sketch.update(f"visitor-{i}" for i in range(cardinality))
+
+    assert abs(sketch.count() - cardinality) / cardinality < 0.025
+
+@pytest.mark.unit
+def test_duplicates_not_counted():
+    """测试重复元素不影响估计"""
+    sketch = HyperLogLog()
+    for _ in range(5):
+        sketch.update(range(1000))
+
+    assert abs(sketch.count() - 1000) <= 20
+
+@pytest.mark.unit
+def test_merge_and_serialize():
+    """测试草图合并等价于并集，序列化后结果不变"""
+    first, second = HyperLogLog(), HyperLogLog()
+    first.update(range(0, 6000))
+    second.update(range(3000, 9000))
+
+    restored = HyperLogLog.from_bytes(first.to_bytes())
+    assert restored.count() == first.count()
+
+    merged = restored.merge(HyperLogLog.from_bytes(second.to_bytes()))
+    assert abs(merged.count() - 9000) / 9000 < 0.025
+
+    # 低基数时压缩后的草图很小
+    small = HyperLogLog()
+    small.update(range(10))
+    assert len(small.to_bytes()) < 200
+
+@pytest.mark.unit
+def test_merge_requires_same_precision():
+    """测试不同精度的草图不能合并"""
+    with pytest.raises(ValueError):
+        HyperLogLog(precision=12).merge(HyperLogLog(precision=14))
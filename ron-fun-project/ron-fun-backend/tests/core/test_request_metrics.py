@@ -0,0 +1,139 @@
+import asyncio
+import time
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+from starlette.concurrency import run_in_threadpool
+
+from app.api.v1.endpoints.metrics import render_metrics
+from app.core.cache import TTLCache, cache_stats
+from app.core.metrics import LogHistogram
+from app.core.request_metrics import RequestStats, current_request_stats, request_metrics, track_queries
+from app.middleware.metrics import MetricsMiddleware
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'metrics.db'}", connect_args={"check_same_thread": False})
+    track_queries(engine)
+    yield engine
+    engine.dispose()
+
+@pytest.fixture
+def metrics_app(engine):
+    app = FastAPI()
+    app.add_middleware(MetricsMiddleware)
+
+    @app.get("/api/v1/items/{item_id}")
+    def get_item(item_id: int):
+        with engine.connect() as connection:
+            connection.execute(text("SELECT 1"))
+            connection.execute(text("SELECT 2"))
+        return {"id": item_id}
+
+    request_metrics.reset()
+    yield app
+    request_metrics.reset()
+
+
+@pytest.mark.unit
+def test_log_histogram_buckets():
+    """测试对数分桶：桶下标由对数计算，相对误差不超过一个桶宽"""
+    histogram = LogHistogram("test", min_value=0.001, max_value=1.0, buckets_per_doubling=2)
+    assert histogram.buckets[:3] == (0.001, 0.001414, 0.002)
+    for value in (0.0005, 0.001, 0.0015, 0.003, 5.0):
+        histogram.observe(value)
+
+    buckets = histogram.snapshot()["buckets"]
+    assert buckets["0.001"] == 2 and buckets["0.002"] == 3 and buckets["0.004"] == 4
+    assert buckets["+Inf"] == 5 and histogram.snapshot()["max"] == 5.0
+
+@pytest.mark.unit
+def test_query_tracking_follows_request_context(engine):
+    """测试SQL统计只计入当前请求，线程池中执行的查询同样计入"""
+    with engine.connect() as connection:
+        connection.execute(text("SELECT 1"))
+
+    stats = RequestStats()
+    token = current_request_stats.set(stats)
+    try:
+        def query():
+            with engine.connect() as connection:
+                connection.execute(text("SELECT 1"))
+        query()
+        asyncio.run(run_in_threadpool(query))
+    finally:
+        current_request_stats.reset(token)
+
+    assert stats.db_queries == 2 and stats.db_seconds > 0
+
+@pytest.mark.unit
+def test_metrics_endpoint_output(metrics_app):
+    """测试按路由模板统计请求并输出Prometheus格式"""
+    cache = TTLCache("metrics_test_cache")
+    cache.set("a", 1)
+    cache.get("a")
+    cache.get("b")
+
+    client = TestClient(metrics_app)
+    for item_id in (1, 2):
+        assert client.get(f"/api/v1/items/{item_id}").status_code == 200
+    assert client.get("/not-found").status_code == 404
+
+    snapshot = request_metrics.snapshot()
+    route = snapshot["routes"][("GET", "/api/v1/items/{item_id}")]
+    assert route["latency"]["count"] == 2
+    assert route["db_queries"]["buckets"]["2.0"] == 2 and route["db_queries"]["sum"] == 4
+    assert snapshot["responses"] == {("GET", "/api/v1/items/{item_id}", 200): 2, ("GET", "unmatched", 404): 1}
+    assert cache_stats()["metrics_test_cache"]["hit_ratio"] == 0.5
+
+    output = render_metrics()
+    assert 'http_requests_total{method="GET",route="/api/v1/items/{item_id}",status="200"} 2' in output
+    assert 'http_request_duration_seconds_count{method="GET",route="/api/v1/items/{item_id}"} 2' in output
+    assert 'http_request_db_queries_sum{method="GET",route="/api/v1/items/{item_id}"} 4' in output
+    assert 'cache_hit_ratio{cache="metrics_test_cache"} 0.5' in output
+
+@pytest.mark.performance
+def test_metrics_middleware_overhead_benchmark():
+    """测试指标中间件的单次请求额外耗时"""
+    requests = 10000
+    scope = {"type": "http", "method": "GET", "path": "/api/v1/items/1", "headers": []}
+
+    async def endpoint(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b"{}"})
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        pass
+
+    async def measure(app) -> float:
+        start_time = time.perf_counter()
+        for _ in range(requests):
+            await app(dict(scope), receive, send)
+        return (time.perf_counter() - start_time) / requests
+
+    async def run():
+        # 交替测量多轮取最小值，减少机器负载波动的影响
+        instrumented = MetricsMiddleware(endpoint)
+        bare, measured = [], []
+        for _ in range(5):
+            bare.append(await measure(endpoint))
+            measured.append(await measure(instrumented))
+        return min(bare), min(measured)
+
+    request_metrics.reset()
+    try:
+        bare_seconds, instrumented_seconds = asyncio.run(run())
+    finally:
+        request_metrics.reset()
+
+    overhead = instrumented_seconds - bare_seconds
+    print(f"指标中间件额外耗时: {overhead * 1e6:.2f}微秒/请求")
+    # 包括上下文变量切换、3个直方图和状态码计数，通常在几微秒以内；
+    # 结果只打印，断言的上限留足余量，避免负载高的机器上误报
+    assert overhead < 1e-3, "指标中间件额外耗时过长"
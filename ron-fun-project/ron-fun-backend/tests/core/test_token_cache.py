@@ -0,0 +1,61 @@
+import time
+
+import pytest
+from jose import JWTError, jwt
+
+from app.core.token_cache import VerifiedTokenCache
+
+SECRET_KEY = "test-secret"
+ALGORITHM = "HS256"
+
+
+def _token(sub: int = 1, expires_in: float = 3600) -> str:
+    return jwt.encode({"sub": str(sub), "exp": time.time() + expires_in}, SECRET_KEY, algorithm=ALGORITHM)
+
+@pytest.mark.unit
+def test_decode_caches_until_exp():
+    """测试验证通过的令牌缓存到exp过期，无效令牌不缓存"""
+    cache = VerifiedTokenCache(SECRET_KEY, [ALGORITHM])
+    token = _token(expires_in=60)
+
+    assert cache.decode(token)["sub"] == "1"
+    assert cache.decode(token)["sub"] == "1"
+    assert cache.cache.hits == 1 and cache.hit_ratio == 0.5
+
+    expires_at = next(iter(cache.cache._data.values()))[1]
+    assert 0 < expires_at - time.monotonic() <= 60
+
+    with pytest.raises(TypeError):
+        cache.decode(token)["sub"] = "2"
+
+    tampered = jwt.encode({"sub": "1", "exp": time.time() + 60}, "other-secret", algorithm=ALGORITHM)
+    for _ in range(2):
+        with pytest.raises(JWTError):
+            cache.decode(tampered)
+    with pytest.raises(JWTError):
+        cache.decode(_token(expires_in=-1))
+    assert len(cache.cache) == 1
+
+@pytest.mark.performance
+def test_decode_benchmark():
+    """对比python-jose、PyJWT和缓存路径的令牌验证耗时"""
+    pyjwt = pytest.importorskip("jwt")
+    token = _token()
+    cache = VerifiedTokenCache(SECRET_KEY, [ALGORITHM])
+    rounds = 2000
+
+    def measure(decode) -> float:
+        start_time = time.perf_counter()
+        for _ in range(rounds):
+            decode(token)
+        return (time.perf_counter() - start_time) / rounds
+
+    jose_time = measure(lambda t: jwt.decode(t, SECRET_KEY, algorithms=[ALGORITHM]))
+    pyjwt_time = measure(lambda t: pyjwt.decode(t, SECRET_KEY, algorithms=[ALGORITHM]))
+    cached_time = measure(cache.decode)
+
+    print(
+        f"令牌验证平均耗时: python-jose {jose_time * 1e6:.1f}微秒，"
+        f"PyJWT {pyjwt_time * 1e6:.1f}微秒，缓存 {cached_time * 1e6:.1f}微秒"
+    )
+    assert cached_time < jose_time / 5, "缓存路径没有明显快于python-jose"
@@ -0,0 +1,89 @@
+import time
+
+import pytest
+
+from app.core.user_agent import UNKNOWN, _classify, get_device_type, parse_user_agent
+
+WECHAT_IOS = (
+    "Mozilla/5.0 (iPhone; CPU iPhone OS 17_0 like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) "
+    "Mobile/15E148 MicroMessenger/8.0.42(0x18002a2f) NetType/WIFI Language/zh_CN"
+)
+WXWORK_ANDROID = (
+    "Mozilla/5.0 (Linux; Android 13; V2219A Build/TP1A.220624.014; wv) AppleWebKit/537.36 (KHTML, like Gecko) "
+    "Version/4.0 Chrome/107.0.5304.141 Mobile Safari/537.36 wxwork/4.1.10 MicroMessenger/7.0.1 Language/zh"
+)
+ALIPAY_ANDROID = (
+    "Mozilla/5.0 (Linux; U; Android 12; zh-CN; PEDM00 Build/SKQ1.210216.001) AppleWebKit/537.36 "
+    "(KHTML, like Gecko) Version/4.0 Chrome/69.0.3497.100 UWS/3.22.2.59 Mobile Safari/537.36 "
+    "AlipayClient/10.5.26.8000 Language/zh-Hans"
+)
+DINGTALK_IPAD = (
+    "Mozilla/5.0 (iPad; CPU OS 16_6 like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) "
+    "Mobile/15E148 AliApp(DingTalk/7.0.40) com.laiwang.DingTalk/30129013 Channel/201200 language/zh-Hans-CN"
+)
+DOUYIN_ANDROID = (
+    "Mozilla/5.0 (Linux; Android 12; ANA-AN00 Build/HUAWEIANA-AN00; wv) AppleWebKit/537.36 (KHTML, like Gecko) "
+    "Version/4.0 Chrome/91.0.4472.114 Mobile Safari/537.36 aweme_260200 JsSdk/1.0 NetType/WIFI Channel/huawei_1128_64"
+)
+QQ_IOS = (
+    "Mozilla/5.0 (iPhone; CPU iPhone OS 16_1 like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) "
+    "Mobile/15E148 QQ/8.9.28.635 V1_IPH_SQ_8.9.28_1_APP_A Pixel/1170 Core/WKWebView NetType/WIFI"
+)
+ANDROID_TABLET = (
+    "Mozilla/5.0 (Linux; Android 13; SM-X700) AppleWebKit/537.36 (KHTML, like Gecko) "
+    "Chrome/118.0.0.0 Safari/537.36"
+)
+EDGE_WINDOWS = (
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) "
+    "Chrome/118.0.0.0 Safari/537.36 Edg/118.0.2088.76"
+)
+SAFARI_MAC = (
+    "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/605.1.15 (KHTML, like Gecko) "
+    "Version/17.0 Safari/605.1.15"
+)
+BAIDU_SPIDER = "Mozilla/5.0 (compatible; Baiduspider/2.0; +http://www.baidu.com/search/spider.html)"
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize("user_agent, expected", [
+    (WECHAT_IOS, ("mobile", "ios", "unknown", "wechat")),
+    (WXWORK_ANDROID, ("mobile", "android", "chrome", "wxwork")),
+    (ALIPAY_ANDROID, ("mobile", "android", "chrome", "alipay")),
+    (DINGTALK_IPAD, ("tablet", "ios", "unknown", "dingtalk")),
+    (DOUYIN_ANDROID, ("mobile", "android", "chrome", "douyin")),
+    (QQ_IOS, ("mobile", "ios", "unknown", "qq")),
+    (ANDROID_TABLET, ("tablet", "android", "chrome", None)),
+    (EDGE_WINDOWS, ("desktop", "windows", "edge", None)),
+    (SAFARI_MAC, ("desktop", "macos", "safari", None)),
+    (BAIDU_SPIDER, ("bot", "unknown", "unknown", None)),
+])
+def test_parse_user_agent(user_agent, expected):
+    """测试设备类型、操作系统、浏览器和App内置WebView识别"""
+    assert tuple(parse_user_agent(user_agent)) == expected
+
+@pytest.mark.unit
+def test_empty_user_agent():
+    """测试缺少User-Agent"""
+    assert parse_user_agent(None) is UNKNOWN
+    assert get_device_type("") == "unknown"
+
+@pytest.mark.performance
+def test_cached_classification_benchmark():
+    """测试缓存命中时的解析耗时（点击接口每次请求都要解析User-Agent）"""
+    user_agents = [WECHAT_IOS, WXWORK_ANDROID, ALIPAY_ANDROID, DOUYIN_ANDROID, EDGE_WINDOWS]
+    rounds = 2000
+
+    start_time = time.perf_counter()
+    for _ in range(rounds):
+        for user_agent in user_agents:
+            _classify(user_agent)
+    uncached_time = time.perf_counter() - start_time
+
+    start_time = time.perf_counter()
+    for _ in range(rounds):
+        for user_agent in user_agents:
+            parse_user_agent(user_agent)
+    cached_time = time.perf_counter() - start_time
+
+    print(f"User-Agent解析 {rounds * len(user_agents)} 次: 不缓存 {uncached_time:.4f}秒，缓存 {cached_time:.4f}秒")
+    assert cached_time < uncached_time, "缓存命中时解析应更快"
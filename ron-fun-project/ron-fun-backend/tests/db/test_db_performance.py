@@ -18,7 +18,7 @@ def test_banner_query_performance(db, create_test_banners):
         banner = Banner(
             title=f"Performance Test Banner {i}",
             description=f"Performance Test Description {i}",
-            image_url=f"http://example.com/perf_banner{i}.jpg",
+            image=f"http://example.com/perf_banner{i}.jpg",
             link_type="url",
             link_url="http://example.com",
             is_active=True,
@@ -147,13 +147,13 @@ def test_transaction_performance(db):
     products = []
     for i in range(100):
         product = Product(
-            name=f"Batch Product {i}",
-            description=f"Batch Product Description {i}",
+            product_name=f"Batch Product {i}",
+            product_introduction=f"Batch Product Description {i}",
             category_id=1,  # 假设ID为1的分类存在
-            image_url=f"http://example.com/batch_product{i}.jpg",
+            main_image=f"http://example.com/batch_product{i}.jpg",
             points_price=i * 10,
             stock=100,
-            is_active=True,
+            status=1,
             sort_order=i,
         )
         products.append(product)
@@ -169,7 +169,7 @@ def test_transaction_performance(db):
     # 测试批量更新性能
     start_time = time.time()
     db.execute(
-        text("UPDATE product SET stock = stock + 10 WHERE is_active = 1")
+        text("UPDATE products SET stock = stock + 10 WHERE status = 1")
     )
     db.commit()
     update_time = time.time() - start_time
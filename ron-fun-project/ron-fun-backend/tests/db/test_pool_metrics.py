@@ -0,0 +1,104 @@
+import logging
+import sqlite3
+import threading
+import time
+
+import pytest
+from sqlalchemy import create_engine, exc, text
+
+from app.core.metrics import Histogram
+from app.db.pool_metrics import InstrumentedQueuePool, pool_metrics
+
+
+@pytest.mark.unit
+def test_histogram_cumulative_buckets():
+    """测试直方图累计分桶"""
+    histogram = Histogram("test", buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 3.0):
+        histogram.observe(value)
+
+    snapshot = histogram.snapshot()
+    assert snapshot["buckets"] == {"0.1": 2, "1.0": 3, "+Inf": 4}
+    assert snapshot["count"] == 4 and snapshot["max"] == 3.0
+    assert snapshot["sum"] == pytest.approx(3.65)
+
+@pytest.mark.performance
+def test_pool_saturation(tmp_path, caplog):
+    """测试连接池耗尽时的行为：超出 pool_size + max_overflow 的请求排队等待，等待超时后失败并记录指标"""
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'pool.db'}",
+        connect_args={"check_same_thread": False},
+        poolclass=InstrumentedQueuePool,
+        pool_logging_name="saturation_test",
+        pool_size=2,
+        max_overflow=1,
+        pool_timeout=0.3,
+    )
+    hold_seconds = 0.2
+    workers = 9
+    errors = []
+    barrier = threading.Barrier(workers)
+    old_threshold = pool_metrics.slow_threshold
+    pool_metrics.slow_threshold = 0.1
+
+    def request():
+        barrier.wait()
+        try:
+            with engine.connect() as connection:
+                connection.execute(text("SELECT 1"))
+                time.sleep(hold_seconds)
+        except exc.TimeoutError as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=request) for _ in range(workers)]
+    try:
+        with caplog.at_level(logging.WARNING, logger="app.db.pool_metrics"):
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+    finally:
+        pool_metrics.slow_threshold = old_threshold
+
+    stats = pool_metrics.snapshot()["saturation_test"]
+    engine.dispose()
+
+    waits = stats["checkout_wait_seconds"]
+    print(
+        f"连接池饱和: {workers}个并发请求，容量3，超时{len(errors)}个，"
+        f"最长等待{waits['max'] * 1000:.0f}毫秒，慢获取{stats['slow_checkouts']}次"
+    )
+    # 前3个请求立即拿到连接，随后3个等待约一个持有周期，最后3个等待超过超时时间
+    assert waits["count"] == workers
+    assert waits["buckets"]["0.1"] >= 3
+    assert len(errors) == stats["timeouts"] == 3
+    assert stats["checked_out"] == 0 and stats["size"] == 2
+    assert stats["slow_checkouts"] >= 3
+    assert any("获取连接等待" in record.getMessage() for record in caplog.records)
+
+@pytest.mark.unit
+def test_checkout_wait_excludes_connect_time(tmp_path):
+    """测试新建连接和 pre_ping 的耗时不计入排队等待"""
+    def slow_connect():
+        time.sleep(0.2)
+        return sqlite3.connect(str(tmp_path / "slow.db"), check_same_thread=False)
+
+    engine = create_engine(
+        "sqlite://",
+        creator=slow_connect,
+        poolclass=InstrumentedQueuePool,
+        pool_logging_name="slow_connect_test",
+        pool_pre_ping=True,
+    )
+    try:
+        for _ in range(2):
+            with engine.connect() as connection:
+                connection.execute(text("SELECT 1"))
+        stats = pool_metrics.snapshot()["slow_connect_test"]
+    finally:
+        engine.dispose()
+
+    waits = stats["checkout_wait_seconds"]
+    assert waits["count"] == 2
+    assert waits["max"] < 0.1
+    assert stats["slow_checkouts"] == 0
@@ -0,0 +1,136 @@
+import time
+from http.cookies import SimpleCookie
+
+import pytest
+from sqlalchemy import create_engine, update
+from sqlalchemy.orm import sessionmaker
+from starlette.requests import Request
+from starlette.responses import Response
+
+from app.db import session as session_module
+from app.db.replica import LAST_WRITE_COOKIE, ReplicaRouter
+from app.db.session import SessionLocal, get_db, get_read_db
+from app.models.application import Application
+
+STICKY_SECONDS = 0.3
+
+
+def _request(response: Response = None) -> Request:
+    # 模拟客户端带上一次响应设置的Cookie发起请求
+    headers = []
+    if response is not None:
+        cookie = SimpleCookie(response.headers.get("set-cookie", ""))
+        if LAST_WRITE_COOKIE in cookie:
+            headers.append((b"cookie", f"{LAST_WRITE_COOKIE}={cookie[LAST_WRITE_COOKIE].value}".encode()))
+    return Request({"type": "http", "headers": headers})
+
+def _application(name: str) -> Application:
+    return Application(app_name=name, app_link="http://example.com", link_type="url", is_active=True, sort_order=0)
+
+def _read_names(request: Request):
+    dependency = get_read_db(request)
+    db = next(dependency)
+    try:
+        return sorted(application.app_name for application in db.query(Application))
+    finally:
+        dependency.close()
+
+def _write(statement=None) -> Response:
+    # 通过主库会话依赖提交一次写操作，返回该请求的响应
+    response = Response()
+    dependency = get_db(response)
+    db = next(dependency)
+    if statement is None:
+        db.add(_application("written"))
+    else:
+        db.execute(statement)
+    db.commit()
+    dependency.close()
+    return response
+
+# 两个SQLite文件模拟主库和从库，从库数据落后于主库
+@pytest.fixture
+def primary_and_replica(tmp_path, monkeypatch):
+    primary_engine = create_engine(f"sqlite:///{tmp_path / 'primary.db'}", connect_args={"check_same_thread": False})
+    replica_engine = create_engine(f"sqlite:///{tmp_path / 'replica.db'}", connect_args={"check_same_thread": False})
+    for bind, name in ((primary_engine, "primary"), (replica_engine, "replica")):
+        Application.__table__.create(bind=bind)
+        with sessionmaker(bind=bind)() as db:
+            db.add(_application(name))
+            db.commit()
+
+    monkeypatch.setattr(session_module, "replica_router", ReplicaRouter(enabled=True, sticky_seconds=STICKY_SECONDS))
+    monkeypatch.setattr(session_module, "ReplicaSessionLocal", sessionmaker(bind=replica_engine))
+    original_bind = SessionLocal.kw["bind"]
+    SessionLocal.configure(bind=primary_engine)
+    try:
+        yield
+    finally:
+        SessionLocal.configure(bind=original_bind)
+        primary_engine.dispose()
+        replica_engine.dispose()
+
+
+@pytest.mark.unit
+def test_replica_router():
+    """测试读写分离路由：未配置从库时走主库，写入后粘滞期内走主库"""
+    assert ReplicaRouter(enabled=False).use_replica(None) is False
+
+    router = ReplicaRouter(enabled=True, sticky_seconds=STICKY_SECONDS)
+    router.mark_write(None)
+    assert router.use_replica(None) is True
+    assert router.use_replica(_request()) is True
+
+    response = Response()
+    router.mark_write(response)
+    assert "httponly" in response.headers["set-cookie"].lower()
+    assert router.use_replica(_request(response)) is False
+    time.sleep(STICKY_SECONDS + 0.05)
+    assert router.use_replica(_request(response)) is True
+
+    # 无效的Cookie值按未写入处理
+    request = Request({"type": "http", "headers": [(b"cookie", f"{LAST_WRITE_COOKIE}=invalid".encode())]})
+    assert router.use_replica(request) is True
+
+@pytest.mark.unit
+def test_sticky_across_router_instances():
+    """测试写入和读取由不同进程（不同路由实例）处理时仍然读主库"""
+    writer = ReplicaRouter(enabled=True, sticky_seconds=STICKY_SECONDS)
+    reader = ReplicaRouter(enabled=True, sticky_seconds=STICKY_SECONDS)
+
+    response = Response()
+    writer.mark_write(response)
+    assert reader.use_replica(_request(response)) is False
+    assert reader.use_replica(_request()) is True
+
+@pytest.mark.service
+def test_read_your_writes(primary_and_replica, monkeypatch):
+    """测试只读会话读从库，客户端提交写操作后在粘滞期内读主库"""
+    assert _read_names(_request()) == ["replica"]
+
+    # 只读的主库会话提交不设置Cookie
+    response = Response()
+    dependency = get_db(response)
+    db = next(dependency)
+    db.query(Application).all()
+    db.commit()
+    dependency.close()
+    assert "set-cookie" not in response.headers
+    assert _read_names(_request(response)) == ["replica"]
+
+    # 新增数据后立即能读到自己的写入，其他客户端仍读从库
+    first = _write()
+    assert _read_names(_request(first)) == ["primary", "written"]
+    assert _read_names(_request()) == ["replica"]
+
+    # 读请求由另一个工作进程处理（路由实例不同）时同样读主库
+    monkeypatch.setattr(session_module, "replica_router", ReplicaRouter(enabled=True, sticky_seconds=STICKY_SECONDS))
+    assert _read_names(_request(first)) == ["primary", "written"]
+
+    # 批量更新语句同样视为写操作
+    second = _write(update(Application).where(Application.app_name == "primary").values(sort_order=1))
+    assert _read_names(_request(second)) == ["primary", "written"]
+
+    time.sleep(STICKY_SECONDS + 0.05)
+    assert _read_names(_request(first)) == ["replica"]
+    assert _read_names(_request(second)) == ["replica"]
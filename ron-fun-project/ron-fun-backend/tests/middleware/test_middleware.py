@@ -0,0 +1,299 @@
+import asyncio
+import json
+import logging
+import time
+from datetime import datetime
+from decimal import Decimal
+from types import SimpleNamespace
+
+import pytest
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from fastapi.testclient import TestClient
+from pydantic import BaseModel
+from starlette.middleware.base import BaseHTTPMiddleware
+
+from app.core.security import create_access_token
+from app.middleware import (
+    ApiJSONResponse,
+    ExceptionMiddleware,
+    LoggerMiddleware,
+    ValidationMiddleware,
+    add_api_exception_handlers,
+)
+from app.middleware.authentication import AuthenticationMiddleware
+from app.middleware.response import api_envelope_body
+from app.schemas.common import ApiResponse
+from app.schemas.user import UserResponse
+from app.services.principal_cache import Principal, principal_cache
+
+ITEMS = [{"id": i, "name": f"商品{i}", "price": i * 10} for i in range(20)]
+
+
+class ItemCreate(BaseModel):
+    name: str
+    price: int
+
+
+def _create_app(default_response_class=ApiJSONResponse) -> FastAPI:
+    app = FastAPI(default_response_class=default_response_class)
+    if default_response_class is ApiJSONResponse:
+        add_api_exception_handlers(app)
+
+    @app.get("/api/v1/items")
+    async def list_items():
+        return ITEMS
+
+    @app.post("/api/v1/items", status_code=201)
+    async def create_item(request: Request):
+        return {"validated": request.state.validated_data.name, "body": await request.json()}
+
+    @app.get("/api/v1/items/{item_id}")
+    async def get_item(item_id: int):
+        raise HTTPException(status_code=404, detail="商品不存在")
+
+    @app.get("/api/v1/me")
+    async def me(request: Request):
+        return {"user_id": request.state.user_id}
+
+    @app.get("/api/v1/boom")
+    async def boom():
+        raise RuntimeError("boom")
+
+    return app
+
+def _pure_asgi_app() -> FastAPI:
+    app = _create_app()
+    app.add_middleware(ValidationMiddleware, validators={"/api/v1/items": ItemCreate})
+    app.add_middleware(ExceptionMiddleware)
+    app.add_middleware(LoggerMiddleware)
+    return app
+
+
+@pytest.mark.unit
+def test_envelope_produced_by_response_class():
+    """测试统一响应格式在序列化时生成，错误响应保留状态码"""
+    client = TestClient(_pure_asgi_app(), raise_server_exceptions=False)
+
+    response = client.get("/api/v1/items")
+    body = response.json()
+    assert response.status_code == 200
+    assert body["code"] == 0 and body["message"] == "success" and body["data"] == ITEMS
+    assert body["timestamp"] > 0
+    assert response.headers["X-Request-ID"] and float(response.headers["X-Process-Time"]) >= 0
+
+    response = client.post("/api/v1/items", json={"name": "新品", "price": 1})
+    assert response.status_code == 200
+    assert response.json()["data"] == {"validated": "新品", "body": {"name": "新品", "price": 1}}
+
+    response = client.get("/api/v1/items/1")
+    assert response.status_code == 404
+    assert response.json()["code"] == 404 and response.json()["message"] == "商品不存在"
+    assert response.json()["data"] is None
+
+    response = client.get("/api/v1/items/abc")
+    assert response.status_code == 422 and response.json()["code"] == 422
+
+@pytest.mark.unit
+def test_request_log_sampling(caplog):
+    """测试请求日志按路由采样，错误和慢请求始终记录，沿用上游的X-Request-ID"""
+    app = _create_app()
+    app.add_middleware(ExceptionMiddleware)
+    app.add_middleware(LoggerMiddleware, sample_rate=1.0, route_sample_rates={"/api/v1/items/{item_id}": 0.0, "/api/v1/items": 0.0}, slow_seconds=60)
+    client = TestClient(app)
+
+    with caplog.at_level(logging.INFO, logger="api"):
+        response = client.get("/api/v1/items", headers={"X-Request-ID": "upstream-id"})
+        assert response.headers["X-Request-ID"] == "upstream-id"
+        client.get("/api/v1/items/1")
+        client.get("/api/v1/boom")
+        client.get("/openapi.json")
+
+    records = [record for record in caplog.records if record.name == "api"]
+    assert [(record.route, record.status, record.levelname) for record in records] == [
+        ("/api/v1/items/{item_id}", 404, "WARNING"),
+        ("/api/v1/boom", 500, "ERROR"),
+        ("/openapi.json", 200, "INFO"),
+    ]
+    assert len(records[0].request_id) == 16
+
+    caplog.clear()
+    app = _create_app()
+    app.add_middleware(LoggerMiddleware, sample_rate=0.0, slow_seconds=0.0)
+    with caplog.at_level(logging.INFO, logger="api"):
+        TestClient(app).get("/api/v1/items")
+    assert [record.levelname for record in caplog.records if record.name == "api"] == ["WARNING"]
+
+@pytest.mark.unit
+def test_validation_and_exception_middleware():
+    """测试参数验证失败和未处理异常返回统一格式的错误"""
+    client = TestClient(_pure_asgi_app(), raise_server_exceptions=False)
+
+    response = client.post("/api/v1/items", json={"name": "新品"})
+    assert response.status_code == 422 and response.json()["message"] == "参数验证失败"
+
+    response = client.post("/api/v1/items", content=b"{", headers={"content-type": "application/json"})
+    assert response.status_code == 400 and response.json()["message"] == "无效的JSON格式"
+
+    response = client.get("/api/v1/boom")
+    assert response.status_code == 500 and response.json()["message"] == "服务器内部错误"
+
+@pytest.mark.unit
+def test_authentication_middleware():
+    """测试认证中间件：公开路径放行，令牌有效时写入请求状态"""
+    principal_cache.clear()
+    principal_cache.cache.set(1, Principal(1, True, False, 1))
+    principal_cache.cache.set(2, Principal(2, False, False, 1))
+    app = _create_app()
+    app.add_middleware(AuthenticationMiddleware)
+    client = TestClient(app)
+
+    try:
+        assert client.get("/openapi.json").status_code == 200
+        assert client.get("/api/v1/me").json()["message"] == "缺少认证令牌"
+        assert client.get("/api/v1/me", headers={"Authorization": "Bearer invalid"}).status_code == 401
+
+        response = client.get("/api/v1/me", headers={"Authorization": f"Bearer {create_access_token(1)}"})
+        assert response.json()["data"] == {"user_id": 1}
+
+        response = client.get("/api/v1/me", headers={"Authorization": f"Bearer {create_access_token(2)}"})
+        assert response.status_code == 401 and response.json()["message"] == "用户已被禁用"
+    finally:
+        principal_cache.clear()
+
+
+@pytest.mark.unit
+def test_orjson_response_types():
+    """测试orjson响应直接序列化datetime、Decimal和Pydantic模型，204不带响应体"""
+    created_at = datetime(2024, 5, 1, 12, 30, 15)
+    user = UserResponse(id=1, username="tester", is_active=True, is_superuser=False, points=5)
+    response = ApiJSONResponse({"created_at": created_at, "price": Decimal("9.90"), "user": user, 1: "int key"})
+    body = json.loads(response.body)
+
+    assert body["data"] == {
+        "created_at": "2024-05-01T12:30:15",
+        "price": 9.9,
+        "user": jsonable_encoder(user),
+        "1": "int key",
+    }
+    assert ApiJSONResponse(None, status_code=204).body == b""
+    assert json.loads(api_envelope_body(b'[1,2]'))["data"] == [1, 2]
+
+@pytest.mark.performance
+def test_user_listing_serialization_benchmark():
+    """对比100个用户的列表（/admin/users limit=100）改造前后的序列化耗时"""
+    users = [
+        SimpleNamespace(
+            id=i, username=f"user{i:04d}", email=f"user{i}@example.com", phone="13800138000",
+            nickname=f"用户{i}", avatar=f"http://example.com/avatar/{i}.png", bio="简介" * 10,
+            is_active=True, is_superuser=False, points=i * 10,
+        )
+        for i in range(100)
+    ]
+    listing = {"items": [UserResponse.from_orm(user) for user in users], "total": 100, "page": 1, "size": 100}
+    rounds = 200
+
+    def legacy() -> bytes:
+        # 改造前：jsonable_encoder + json编码，ResponseMiddleware 再解析、包装、编码
+        content = jsonable_encoder(listing)
+        data = json.loads(JSONResponse(content).body)
+        wrapped_response = ApiResponse(code=0, message="success", data=data, timestamp=int(time.time()))
+        return JSONResponse(content=wrapped_response.dict()).body
+
+    def current() -> bytes:
+        return ApiJSONResponse(listing).body
+
+    assert json.loads(legacy())["data"] == json.loads(current())["data"]
+
+    def measure(render) -> float:
+        start_time = time.perf_counter()
+        for _ in range(rounds):
+            render()
+        return (time.perf_counter() - start_time) / rounds
+
+    legacy_seconds, current_seconds = measure(legacy), measure(current)
+    print(
+        f"100个用户列表序列化: 改造前 {legacy_seconds * 1000:.2f}毫秒，"
+        f"orjson {current_seconds * 1000:.2f}毫秒"
+    )
+    # 耗时对比只打印，不断言比例（受机器负载影响），仅用宽松的绝对上限防止严重退化
+    assert current_seconds < 0.1, "用户列表序列化耗时过长"
+
+
+class _PassThroughMiddleware(BaseHTTPMiddleware):
+    async def dispatch(self, request, call_next):
+        return await call_next(request)
+
+class _LegacyResponseMiddleware(BaseHTTPMiddleware):
+    # 改造前的统一响应格式：读取完整响应体、解析JSON、包装后再次编码
+    async def dispatch(self, request, call_next):
+        response = await call_next(request)
+        response_body = b""
+        async for chunk in response.body_iterator:
+            response_body += chunk
+        data = json.loads(response_body.decode())
+        wrapped_response = ApiResponse(code=0, message="success", data=data, timestamp=int(time.time()))
+        return JSONResponse(
+            content=wrapped_response.dict(),
+            status_code=response.status_code,
+            headers=dict(response.headers)
+        )
+
+def _legacy_app() -> FastAPI:
+    # 改造前的中间件栈：4层 BaseHTTPMiddleware
+    app = _create_app(default_response_class=JSONResponse)
+    for middleware in (_PassThroughMiddleware, _LegacyResponseMiddleware, _PassThroughMiddleware, _PassThroughMiddleware):
+        app.add_middleware(middleware)
+    return app
+
+async def _call(app, path: str) -> bytes:
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+        "scheme": "http", "path": path, "raw_path": path.encode(), "root_path": "", "query_string": b"",
+        "headers": [(b"host", b"testserver")], "client": ("127.0.0.1", 12345), "server": ("testserver", 80),
+    }
+    body = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        if message["type"] == "http.response.body":
+            body.append(message.get("body", b""))
+
+    await app(scope, receive, send)
+    return b"".join(body)
+
+@pytest.mark.performance
+def test_middleware_overhead_benchmark():
+    """对比 BaseHTTPMiddleware 栈和纯ASGI中间件栈的单次请求耗时"""
+    requests = 2000
+    logging.getLogger("api").setLevel(logging.WARNING)
+
+    async def measure(app) -> float:
+        for _ in range(50):
+            await _call(app, "/api/v1/items")
+        start_time = time.perf_counter()
+        for _ in range(requests):
+            await _call(app, "/api/v1/items")
+        return (time.perf_counter() - start_time) / requests
+
+    async def run():
+        legacy_app, pure_app = _legacy_app(), _pure_asgi_app()
+        legacy_body = json.loads(await _call(legacy_app, "/api/v1/items"))
+        pure_body = json.loads(await _call(pure_app, "/api/v1/items"))
+        assert legacy_body["data"] == pure_body["data"] == ITEMS
+        return await measure(legacy_app), await measure(pure_app)
+
+    try:
+        legacy_seconds, pure_seconds = asyncio.run(run())
+    finally:
+        logging.getLogger("api").setLevel(logging.NOTSET)
+
+    print(
+        f"单次请求耗时: BaseHTTPMiddleware {legacy_seconds * 1e6:.0f}微秒，"
+        f"纯ASGI {pure_seconds * 1e6:.0f}微秒"
+    )
+    # 耗时对比只打印，不断言比例（受机器负载影响），仅用宽松的绝对上限防止严重退化
+    assert pure_seconds < 0.01, "纯ASGI中间件栈单次请求耗时过长"
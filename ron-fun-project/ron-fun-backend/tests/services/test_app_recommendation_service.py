@@ -0,0 +1,113 @@
+import time
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.models.application import Application, ApplicationClick
+from app.models.recommendation import ApplicationRecommendation
+from app.services.app_recommendation_builder import build_recommendations
+from app.services.app_recommendation_service import AppRecommendationService, pack_ids, unpack_ids
+
+
+@pytest.fixture
+def applications(db):
+    applications = [
+        Application(
+            app_name=f"Rec App {i}",
+            app_link=f"http://example.com/app{i}",
+            link_type="url",
+            is_active=True,
+            sort_order=10 - i,
+        )
+        for i in range(4)
+    ]
+    db.add_all(applications)
+    db.commit()
+    for application in applications:
+        db.refresh(application)
+    return applications
+
+@pytest.mark.unit
+def test_pack_ids_roundtrip():
+    """测试推荐结果的紧凑存储"""
+    ids = [3, 1, 2 ** 32 - 1]
+    assert len(pack_ids(ids)) == 12
+    assert unpack_ids(pack_ids(ids)) == ids
+
+@pytest.mark.service
+def test_rank_with_fallback(db, applications):
+    """测试有推荐结果时重排，无结果时保持全局顺序"""
+    global_order = [application.id for application in applications]
+    db.add(ApplicationRecommendation(
+        user_id=1,
+        # 不在当前列表中的应用被忽略
+        application_ids=pack_ids([global_order[2], 9999, global_order[3]]),
+        computed_at=datetime.now(),
+    ))
+    db.commit()
+    service = AppRecommendationService(reload_interval=300)
+
+    # 加载前保持全局排序；离线结果未更新时不重复加载
+    assert service.rank(1, global_order) == global_order
+    assert service.reload(db) is True
+    assert service.reload(db) is False
+
+    assert service.rank(1, global_order) == [global_order[2], global_order[3], global_order[0], global_order[1]]
+    assert service.rank(2, global_order) == global_order
+    assert service.rank(None, global_order) == global_order
+
+@pytest.mark.service
+def test_build_recommendations_from_cooccurrence(db, applications):
+    """测试按点击共现关系推荐：点过A的用户会被推荐与A同时被点击的B"""
+    a, b, c, _ = [application.id for application in applications]
+    now = datetime.now()
+    clicks = [
+        (1, a), (1, a), (1, b),
+        (2, a), (2, b),
+        (3, a),
+        (4, c),
+        # 超出时间范围的点击不参与计算
+        (3, c, now - timedelta(days=200)),
+    ]
+    db.add_all([
+        ApplicationClick(
+            user_id=click[0],
+            application_id=click[1],
+            created_at=click[2] if len(click) > 2 else now - timedelta(hours=1),
+        )
+        for click in clicks
+    ])
+    db.commit()
+
+    assert build_recommendations(db, days=90, top_n=3, now=now) == 4
+
+    service = AppRecommendationService()
+    service.reload(db)
+    assert service.get_recommendations(3) == [a, b]
+    assert service.get_recommendations(1) == [a, b]
+    assert service.get_recommendations(4) == [c]
+
+@pytest.mark.performance
+def test_rank_lookup_under_one_millisecond(db, applications):
+    """测试个性化排序查找耗时（首页接口每次请求都会调用）"""
+    global_order = [application.id for application in applications] + list(range(1000, 1020))
+    db.add_all([
+        ApplicationRecommendation(
+            user_id=user_id,
+            application_ids=pack_ids(list(reversed(global_order))[:20]),
+            computed_at=datetime.now(),
+        )
+        for user_id in range(1, 1001)
+    ])
+    db.commit()
+    service = AppRecommendationService(reload_interval=300)
+    service.reload(db)
+
+    rounds = 1000
+    start_time = time.perf_counter()
+    for user_id in range(1, rounds + 1):
+        service.rank(user_id, global_order)
+    average = (time.perf_counter() - start_time) / rounds
+
+    print(f"个性化排序平均耗时: {average * 1000:.4f}毫秒")
+    assert average < 0.001, "个性化排序查找超过1毫秒"
@@ -0,0 +1,126 @@
+import asyncio
+import time
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
+
+from app.db.session import get_async_database_uri
+from app.models.application import Application
+from app.models.lottery import LotteryActivity, LotteryRecord, LotteryType
+from app.services.home_service import home_service
+from app.services.lottery_service import LotteryService
+
+
+@pytest.mark.unit
+def test_async_database_uri():
+    """测试同步连接串转换为异步驱动"""
+    assert get_async_database_uri("mysql+pymysql://u:p@db:3306/ron") == "mysql+aiomysql://u:p@db:3306/ron"
+    assert get_async_database_uri("sqlite:///./dev.db") == "sqlite+aiosqlite:///./dev.db"
+    assert get_async_database_uri("postgresql+asyncpg://db/ron") == "postgresql+asyncpg://db/ron"
+
+@pytest.mark.service
+def test_home_service_async(db, async_session_factory):
+    """测试应用列表和详情的异步查询"""
+    db.add_all([
+        Application(app_name=f"App {i}", app_link=f"http://example.com/{i}", link_type="url",
+                    is_active=i != 2, sort_order=i)
+        for i in range(3)
+    ])
+    db.commit()
+
+    async def run():
+        async with async_session_factory() as session:
+            applications = await home_service.get_applications_async(session, "home", 0, 10)
+            detail = await home_service.get_application_async(session, applications[0].id)
+            with pytest.raises(HTTPException):
+                await home_service.get_application_async(session, 9999)
+            return [application.app_name for application in applications], detail.app_name
+
+    assert asyncio.run(run()) == (["App 1", "App 0"], "App 1")
+
+@pytest.mark.service
+def test_lottery_service_async(db, async_session_factory, query_counter):
+    """测试异步查询与同步查询共用进行中活动缓存"""
+    lottery_type = LotteryType(name="转盘", code="wheel")
+    db.add(lottery_type)
+    db.commit()
+    now = datetime.now()
+    activity = LotteryActivity(
+        title="running",
+        start_time=now - timedelta(days=1),
+        is_active=True,
+        lottery_type_id=lottery_type.id,
+        prize_settings={"prizes": []},
+    )
+    db.add(activity)
+    db.commit()
+    db.add_all([LotteryRecord(user_id=user_id, activity_id=activity.id) for user_id in (1, 1, 2)])
+    db.commit()
+    service = LotteryService(activity_cache_ttl=30)
+
+    async def run():
+        async with async_session_factory() as session:
+            active = await service.get_activities_async(session, active_only=True)
+            records = await service.get_records_async(session, user_id=1, activity_id=activity.id)
+            return active, records
+
+    active, records = asyncio.run(run())
+    assert [item["title"] for item in active] == ["running"]
+    assert len(records) == 2
+    with query_counter() as counter:
+        assert service.get_active_activities(db) == active
+    assert counter.count == 0
+
+@pytest.mark.performance
+def test_concurrent_slow_queries_throughput(tmp_path):
+    """对比并发慢查询时同步会话（阻塞事件循环）和异步会话的吞吐"""
+    pytest.importorskip("aiosqlite")
+    database_url = f"sqlite:///{tmp_path / 'benchmark.db'}"
+    query_seconds = 0.05
+    requests = 20
+
+    def add_slow_function(dbapi_connection, connection_record):
+        # 模拟耗时查询：SQL函数内休眠
+        dbapi_connection.create_function("slow_query", 1, lambda seconds: time.sleep(seconds) or 1)
+
+    sync_engine = create_engine(database_url, connect_args={"check_same_thread": False})
+    event.listen(sync_engine, "connect", add_slow_function)
+    SyncSession = sessionmaker(bind=sync_engine)
+
+    async_engine = create_async_engine(get_async_database_uri(database_url), poolclass=NullPool)
+    event.listen(async_engine.sync_engine, "connect", add_slow_function)
+    AsyncSession = async_sessionmaker(async_engine)
+
+    async def sync_request():
+        # 现有写法：async接口中调用同步会话
+        db = SyncSession()
+        try:
+            return db.execute(text("SELECT slow_query(:seconds)"), {"seconds": query_seconds}).scalar()
+        finally:
+            db.close()
+
+    async def async_request():
+        async with AsyncSession() as db:
+            return (await db.execute(text("SELECT slow_query(:seconds)"), {"seconds": query_seconds})).scalar()
+
+    async def measure(request) -> float:
+        start_time = time.perf_counter()
+        results = await asyncio.gather(*(request() for _ in range(requests)))
+        assert results == [1] * requests
+        return requests / (time.perf_counter() - start_time)
+
+    try:
+        sync_throughput = asyncio.run(measure(sync_request))
+        async_throughput = asyncio.run(measure(async_request))
+    finally:
+        sync_engine.dispose()
+        async_engine.sync_engine.dispose()
+
+    print(f"{requests}个并发慢查询吞吐: 同步会话 {sync_throughput:.1f}次/秒，异步会话 {async_throughput:.1f}次/秒")
+    # 不断言两者的比例；串行执行时吞吐恰为 1 / query_seconds，异步会话高于它即说明查询并发执行
+    assert async_throughput > 1 / query_seconds, "异步会话的慢查询没有并发执行"
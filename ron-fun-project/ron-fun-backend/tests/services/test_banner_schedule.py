@@ -0,0 +1,103 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.models.banner import Banner
+from app.services.banner_schedule import BannerSchedule
+
+POSITION = "schedule_test"
+
+
+def _banner(title, sort_order=0, position=POSITION, **kwargs):
+    return Banner(
+        title=title,
+        image=f"http://example.com/{title}.jpg",
+        link_type="url",
+        link_url="http://example.com",
+        is_active=True,
+        sort_order=sort_order,
+        position=position,
+        **kwargs
+    )
+
+@pytest.fixture
+def schedule():
+    schedule = BannerSchedule(reload_interval=3600)
+    yield schedule
+    # 停止测试中创建的定时器
+    if schedule._timer is not None:
+        schedule._timer.cancel()
+
+@pytest.mark.service
+def test_schedule_boundary_instants(db, schedule):
+    """测试Banner恰好在start_time上线、在end_time之后下线"""
+    start = datetime(2030, 1, 1, 10, 0, 0)
+    end = datetime(2030, 1, 1, 12, 0, 0)
+    banner = _banner("window", start_time=start, end_time=end)
+    db.add(banner)
+    db.commit()
+
+    assert schedule.active_ids(db, POSITION, now=start - timedelta(microseconds=1)) == []
+    assert schedule.next_boundary(db, POSITION, now=start - timedelta(microseconds=1)) == start
+
+    assert schedule.active_ids(db, POSITION, now=start) == [banner.id]
+    assert schedule.next_boundary(db, POSITION, now=start) == end + timedelta(microseconds=1)
+
+    assert schedule.active_ids(db, POSITION, now=end) == [banner.id]
+    assert schedule.active_ids(db, POSITION, now=end + timedelta(microseconds=1)) == []
+    assert schedule.next_boundary(db, POSITION, now=end + timedelta(microseconds=1)) is None
+
+    # 时间回退时重新计算
+    assert schedule.active_ids(db, POSITION, now=start) == [banner.id]
+
+@pytest.mark.service
+def test_schedule_order_and_positions(db, schedule):
+    """测试展示列表按sort_order倒序，并区分展示位置"""
+    low = _banner("low", sort_order=1)
+    high = _banner("high", sort_order=5)
+    other = _banner("other", sort_order=3, position="schedule_other")
+    inactive = _banner("inactive", sort_order=9)
+    inactive.is_active = False
+    db.add_all([low, high, other, inactive])
+    db.commit()
+
+    assert schedule.active_ids(db, POSITION) == [high.id, low.id]
+    assert schedule.active_ids(db) == [high.id, other.id, low.id]
+    assert schedule.active_ids(db, "missing") == []
+    assert schedule.next_boundary(db, POSITION) is None
+
+@pytest.mark.service
+def test_schedule_served_from_memory_until_invalidated(db, schedule, query_counter):
+    """测试排期在内存中推进，Banner写入后才重新加载"""
+    now = datetime.now()
+    banner = _banner("later", start_time=now + timedelta(hours=1))
+    db.add(banner)
+    db.commit()
+    banner_id = banner.id
+
+    assert schedule.active_ids(db, POSITION, now=now) == []
+    with query_counter() as counter:
+        assert schedule.active_ids(db, POSITION, now=now + timedelta(hours=2)) == [banner_id]
+    assert counter.count == 0
+
+    banner.is_active = False
+    db.commit()
+    assert schedule.active_ids(db, POSITION, now=now + timedelta(hours=2)) == [banner_id]
+
+    schedule.invalidate()
+    assert schedule.active_ids(db, POSITION, now=now + timedelta(hours=2)) == []
+
+@pytest.mark.service
+def test_schedule_timer_advances_at_boundary(db, schedule):
+    """测试定时器在边界时间点推进展示列表"""
+    banner = _banner("soon", start_time=datetime.now() + timedelta(milliseconds=200))
+    db.add(banner)
+    db.commit()
+
+    assert schedule.active_ids(db, POSITION) == []
+    timer = schedule._timer
+    assert timer is not None
+    timer.join(timeout=5)
+
+    # 定时器已推进，读取时不需要重新计算
+    assert schedule._active[POSITION] == [banner.id]
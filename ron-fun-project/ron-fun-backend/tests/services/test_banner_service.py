@@ -2,7 +2,23 @@ import pytest
 from datetime import datetime, timedelta
 
 from app.services.banner_service import BannerService
-from app.models.banner import Banner, BannerClick
+from app.services.click_buffer import ClickBuffer, ENTITY_BANNER
+from app.models.banner import Banner
+
+
+def _record_clicks(db, banner_id, device_types):
+    """通过点击缓冲区记录点击，并立即写库和刷新日汇总"""
+    buffer = ClickBuffer(session_factory=lambda: db)
+    for i, device_type in enumerate(device_types):
+        buffer.record_click(
+            ENTITY_BANNER,
+            banner_id,
+            ip_address=f"192.168.1.{i}",
+            user_agent="test-agent",
+            device_type=device_type
+        )
+    buffer.flush()
+    buffer.refresh_rollup()
 
 def test_get_active_banners(db, create_test_banners):
     """测试获取活跃Banner列表"""
@@ -10,7 +26,7 @@ def test_get_active_banners(db, create_test_banners):
     expired_banner = Banner(
         title="Expired Banner",
         description="This banner has expired",
-        image_url="http://example.com/expired_banner.jpg",
+        image="http://example.com/expired_banner.jpg",
         link_type="url",
         link_url="http://example.com/expired",
         is_active=True,
@@ -24,7 +40,7 @@ def test_get_active_banners(db, create_test_banners):
     future_banner = Banner(
         title="Future Banner",
         description="This banner starts in the future",
-        image_url="http://example.com/future_banner.jpg",
+        image="http://example.com/future_banner.jpg",
         link_type="url",
         link_url="http://example.com/future",
         is_active=True,
@@ -38,7 +54,7 @@ def test_get_active_banners(db, create_test_banners):
     inactive_banner = Banner(
         title="Inactive Banner",
         description="This banner is inactive",
-        image_url="http://example.com/inactive_banner.jpg",
+        image="http://example.com/inactive_banner.jpg",
         link_type="url",
         link_url="http://example.com/inactive",
         is_active=False,
@@ -87,51 +103,12 @@ def test_record_banner_view(db, create_test_banners):
     banner = db.query(Banner).filter(Banner.id == banner_id).first()
     assert banner.view_count == initial_view_count + 2
 
-def test_record_banner_click(db, create_test_banners):
-    """测试记录Banner点击"""
-    banner_id = create_test_banners[0].id
-    
-    # 获取初始点击量
-    banner = db.query(Banner).filter(Banner.id == banner_id).first()
-    initial_click_count = banner.click_count
-    
-    # 记录点击
-    click_record = BannerService.record_banner_click(
-        db, 
-        banner_id, 
-        ip_address="192.168.1.1", 
-        user_agent="test-agent", 
-        device_type="desktop"
-    )
-    
-    # 检查点击记录是否创建
-    assert click_record.banner_id == banner_id
-    assert click_record.ip_address == "192.168.1.1"
-    assert click_record.user_agent == "test-agent"
-    assert click_record.device_type == "desktop"
-    
-    # 检查点击量是否增加
-    banner = db.query(Banner).filter(Banner.id == banner_id).first()
-    assert banner.click_count == initial_click_count + 1
-    
-    # 检查数据库中是否存在点击记录
-    click_in_db = db.query(BannerClick).filter(BannerClick.banner_id == banner_id).first()
-    assert click_in_db is not None
-    assert click_in_db.ip_address == "192.168.1.1"
-
 def test_get_banner_statistics(db, create_test_banners):
     """测试获取Banner点击统计"""
     banner_id = create_test_banners[0].id
     
     # 创建一些点击记录
-    for i in range(5):
-        BannerService.record_banner_click(
-            db, 
-            banner_id, 
-            ip_address=f"192.168.1.{i}", 
-            user_agent="test-agent", 
-            device_type="desktop" if i % 2 == 0 else "mobile"
-        )
+    _record_clicks(db, banner_id, ["desktop" if i % 2 == 0 else "mobile" for i in range(5)])
     
     # 获取统计数据
     stats = BannerService.get_banner_statistics(db)
@@ -156,15 +133,7 @@ def test_get_banner_traffic_by_device(db, create_test_banners):
     banner_id = create_test_banners[0].id
     
     # 创建一些不同设备的点击记录
-    for i in range(10):
-        device_type = "desktop" if i < 6 else "mobile" if i < 9 else "tablet"
-        BannerService.record_banner_click(
-            db, 
-            banner_id, 
-            ip_address=f"192.168.1.{i}", 
-            user_agent="test-agent", 
-            device_type=device_type
-        )
+    _record_clicks(db, banner_id, ["desktop"] * 6 + ["mobile"] * 3 + ["tablet"])
     
     # 获取设备分布数据
     device_stats = BannerService.get_banner_traffic_by_device(db)
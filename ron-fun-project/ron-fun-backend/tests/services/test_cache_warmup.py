@@ -0,0 +1,80 @@
+import asyncio
+import time
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.models.banner import Banner
+from app.models.lottery import LotteryActivity, LotteryType
+from app.services.cache_warmup import CacheWarmup
+from app.services.home_feed_cache import home_feed_cache
+from app.services.lottery_service import LotteryService, lottery_service
+from app.services.product_cache import product_listing_cache
+
+
+@pytest.fixture
+def lottery_type(db):
+    lottery_type = LotteryType(name="转盘", code="wheel")
+    db.add(lottery_type)
+    db.commit()
+    db.refresh(lottery_type)
+    return lottery_type
+
+def _activity(lottery_type, title, start_time, end_time=None):
+    return LotteryActivity(
+        title=title,
+        start_time=start_time,
+        end_time=end_time,
+        is_active=True,
+        lottery_type_id=lottery_type.id,
+        prize_settings={"prizes": []},
+    )
+
+@pytest.mark.service
+def test_warmup_preloads_caches(db, create_test_products, lottery_type, query_counter):
+    """测试预热后首页、商品列表和抽奖活动直接命中缓存"""
+    db.add(Banner(
+        title="warm",
+        image="http://example.com/warm.jpg",
+        link_type="url",
+        is_active=True,
+        position="warm_test",
+    ))
+    db.add(_activity(lottery_type, "running", datetime.now() - timedelta(days=1)))
+    db.commit()
+    home_feed_cache.invalidate()
+    product_listing_cache.clear()
+    lottery_service.invalidate_activities()
+
+    # 测试中共用一个会话，串行执行
+    warmup = CacheWarmup(session_factory=lambda: db)
+    assert not warmup.ready
+    asyncio.run(warmup.run(concurrency=1))
+
+    assert warmup.ready
+    assert warmup.failed == []
+    assert warmup.duration is not None
+
+    with query_counter() as counter:
+        home_feed_cache.get(db, "warm_test")
+        home_feed_cache.get(db, "home")
+        assert len(lottery_service.get_active_activities(db)) == 1
+    assert counter.count == 0
+    assert product_listing_cache.get_ids(product_listing_cache.facet_key()) is not None
+
+@pytest.mark.service
+def test_active_activities_expire_at_next_boundary(db, lottery_type):
+    """测试进行中活动缓存在下一个活动开始/结束时间点提前过期"""
+    now = datetime.now()
+    db.add_all([
+        _activity(lottery_type, "running", now - timedelta(hours=1), now + timedelta(hours=1)),
+        _activity(lottery_type, "upcoming", now + timedelta(seconds=5)),
+        _activity(lottery_type, "ended", now - timedelta(days=2), now - timedelta(days=1)),
+    ])
+    db.commit()
+    service = LotteryService(activity_cache_ttl=30)
+
+    assert [activity["title"] for activity in service.get_active_activities(db)] == ["running"]
+    expires_at = service.active_activities._data["active"][1]
+    ttl_left = expires_at - time.monotonic()
+    assert 0 < ttl_left <= 5
@@ -0,0 +1,67 @@
+import pytest
+
+from app.models.banner import Banner, BannerClick
+from app.services.click_buffer import ClickBuffer, ENTITY_BANNER
+
+
+@pytest.fixture
+def banner(db):
+    banner = Banner(
+        title="Hot Banner",
+        image="http://example.com/hot.jpg",
+        link_type="url",
+        is_active=True,
+        position="home",
+        view_count=0,
+        click_count=0,
+    )
+    db.add(banner)
+    db.commit()
+    db.refresh(banner)
+    return banner
+
+@pytest.mark.service
+def test_flush_coalesces_counters(db, banner, session_factory, query_counter):
+    """测试同一Banner的多次点击合并为一次计数更新"""
+    buffer = ClickBuffer(session_factory=session_factory, max_events=10000)
+
+    for i in range(50):
+        buffer.record_click(ENTITY_BANNER, banner.id, ip_address=f"10.0.0.{i}", device_type="mobile")
+    for _ in range(20):
+        buffer.record_view(ENTITY_BANNER, banner.id)
+    # 不存在的Banner在写库时忽略
+    buffer.record_click(ENTITY_BANNER, 99999)
+
+    with query_counter() as counter:
+        assert buffer.flush() == 71
+
+    # 存在性检查 + 批量UPDATE + 批量INSERT + 草图查询 + 草图批量INSERT，与点击次数无关
+    assert counter.count <= 5, counter.statements
+
+    db.refresh(banner)
+    assert banner.click_count == 50
+    assert banner.view_count == 20
+    assert db.query(BannerClick).filter(BannerClick.banner_id == banner.id).count() == 50
+
+    # 缓冲区已清空
+    assert buffer.flush() == 0
+
+@pytest.mark.service
+def test_failed_flush_keeps_events(db, banner, session_factory):
+    """测试写库失败时事件保留到下次刷新"""
+    sessions = []
+
+    def failing_factory():
+        sessions.append(1)
+        if len(sessions) == 1:
+            raise RuntimeError("database unavailable")
+        return session_factory()
+
+    buffer = ClickBuffer(session_factory=failing_factory)
+    buffer.record_click(ENTITY_BANNER, banner.id)
+
+    assert buffer.flush() == 0
+    assert buffer.flush() == 1
+
+    db.refresh(banner)
+    assert banner.click_count == 1
@@ -0,0 +1,110 @@
+import csv
+import gzip
+import os
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.models.application import Application, ApplicationClick
+from app.services.click_export_service import ClickExportService, FORMAT_CSV, EXPORT_COLUMNS
+from app.services.click_stats_service import ENTITY_APPLICATION
+
+
+def _read_partitions(export_dir):
+    """读取导出目录中的所有csv.gz分片，返回 {分区: [行]}"""
+    base_dir = os.path.join(export_dir, ENTITY_APPLICATION)
+    partitions = {}
+    for partition in sorted(os.listdir(base_dir)):
+        partition_dir = os.path.join(base_dir, partition)
+        if not os.path.isdir(partition_dir):
+            continue
+        for name in sorted(os.listdir(partition_dir)):
+            with gzip.open(os.path.join(partition_dir, name), "rt", encoding="utf-8") as f:
+                partitions.setdefault(partition, []).extend(csv.DictReader(f))
+    return partitions
+
+@pytest.fixture
+def application(db):
+    application = Application(
+        app_name="Export App",
+        app_link="http://example.com/app",
+        link_type="url",
+        is_active=True,
+    )
+    db.add(application)
+    db.commit()
+    db.refresh(application)
+    return application
+
+def _add_clicks(db, application, created_ats):
+    db.add_all([
+        ApplicationClick(
+            application_id=application.id,
+            user_id=index,
+            ip_address=f"10.0.0.{index}",
+            device_type="mobile",
+            created_at=created_at,
+        )
+        for index, created_at in enumerate(created_ats, start=1)
+    ])
+    db.commit()
+
+@pytest.mark.service
+def test_export_partitions_by_day(db, application, tmp_path):
+    """测试按点击日期分区导出"""
+    _add_clicks(db, application, [
+        datetime(2024, 1, 1, 10, 0),
+        datetime(2024, 1, 1, 23, 59, 59),
+        datetime(2024, 1, 2, 0, 0),
+    ])
+    service = ClickExportService(export_dir=str(tmp_path), chunk_size=2)
+
+    assert service.export(db, ENTITY_APPLICATION, file_format=FORMAT_CSV) == 3
+
+    partitions = _read_partitions(tmp_path)
+    assert list(partitions) == ["date=2024-01-01", "date=2024-01-02"]
+    assert len(partitions["date=2024-01-01"]) == 2
+    row = partitions["date=2024-01-02"][0]
+    assert tuple(row) == EXPORT_COLUMNS
+    assert row["entity_id"] == str(application.id)
+    assert row["created_at"] == "2024-01-02 00:00:00"
+
+@pytest.mark.service
+def test_export_resumes_from_checkpoint(db, application, tmp_path):
+    """测试从检查点继续导出，中断时未记入检查点的分片不会重复"""
+    _add_clicks(db, application, [datetime(2024, 1, 1, hour) for hour in range(5)])
+    service = ClickExportService(export_dir=str(tmp_path), chunk_size=2)
+
+    assert service.export(db, ENTITY_APPLICATION, file_format=FORMAT_CSV, max_rows=2) == 2
+    checkpoint = service.get_checkpoint(ENTITY_APPLICATION)
+
+    # 模拟上次导出写入分片后、记录检查点前中断
+    orphan = tmp_path / ENTITY_APPLICATION / "date=2024-01-01" / f"part-{checkpoint + 1:012d}-{checkpoint + 3:012d}.csv.gz"
+    with gzip.open(orphan, "wt", encoding="utf-8") as f:
+        f.write(",".join(EXPORT_COLUMNS) + "\n")
+        f.write(f"{checkpoint + 1},{application.id},,,,mobile,2024-01-01 02:00:00\n")
+
+    assert service.export(db, ENTITY_APPLICATION, file_format=FORMAT_CSV) == 3
+    assert service.export(db, ENTITY_APPLICATION, file_format=FORMAT_CSV) == 0
+
+    ids = [int(row["id"]) for row in _read_partitions(tmp_path)["date=2024-01-01"]]
+    assert len(ids) == 5
+    assert ids == sorted(set(ids))
+
+@pytest.mark.service
+def test_export_stops_at_recent_clicks(db, application, tmp_path):
+    """测试只导出到第一条安全延迟内的点击为止，检查点不越过它，其后较早的点击留到下次导出"""
+    recent = datetime.now() - timedelta(seconds=10)
+    _add_clicks(db, application, [datetime(2024, 1, 1, 10, 0), recent, datetime(2024, 1, 1, 11, 0)])
+    service = ClickExportService(export_dir=str(tmp_path), chunk_size=10, lag_seconds=60)
+
+    assert service.export(db, ENTITY_APPLICATION, file_format=FORMAT_CSV) == 1
+    first_id = service.get_checkpoint(ENTITY_APPLICATION)
+    assert service.export(db, ENTITY_APPLICATION, file_format=FORMAT_CSV) == 0
+    assert service.get_checkpoint(ENTITY_APPLICATION) == first_id
+
+    # 超过安全延迟后继续导出剩余的行
+    service.lag_seconds = 5
+    assert service.export(db, ENTITY_APPLICATION, file_format=FORMAT_CSV) == 2
+    partitions = _read_partitions(tmp_path)
+    assert sum(len(rows) for rows in partitions.values()) == 3
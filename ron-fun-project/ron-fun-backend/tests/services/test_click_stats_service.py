@@ -0,0 +1,106 @@
+from datetime import date, datetime, timedelta
+
+import pytest
+
+from app.models.application import Application, ApplicationClick
+from app.models.statistics import ClickDailyStat
+from app.services.click_stats_service import click_stats_service, ENTITY_APPLICATION
+
+
+@pytest.fixture
+def application_clicks(db):
+    application = Application(
+        app_name="Stats App",
+        app_link="http://example.com/app",
+        link_type="url",
+        is_active=True,
+    )
+    db.add(application)
+    db.commit()
+    db.refresh(application)
+
+    today = datetime.combine(date.today(), datetime.min.time()) + timedelta(hours=12)
+    yesterday = today - timedelta(days=1)
+    clicks = [
+        # 今天：同一用户点击3次，2个IP
+        (today, 1, "10.0.0.1", "mobile"),
+        (today, 1, "10.0.0.1", "mobile"),
+        (today, 1, "10.0.0.2", "mobile"),
+        (today, None, "10.0.0.3", "desktop"),
+        (today, 2, "10.0.0.4", None),
+        # 昨天
+        (yesterday, 3, "10.0.0.5", "mobile"),
+    ]
+    db.add_all([
+        ApplicationClick(
+            application_id=application.id,
+            user_id=user_id,
+            ip_address=ip_address,
+            device_type=device_type,
+            created_at=created_at,
+        )
+        for created_at, user_id, ip_address, device_type in clicks
+    ])
+    db.commit()
+    return application
+
+@pytest.mark.service
+def test_backfill_daily_stats(db, application_clicks):
+    """测试回填日汇总并按汇总表查询统计"""
+    start = date.today() - timedelta(days=1)
+    click_stats_service.backfill(db, start, date.today(), [ENTITY_APPLICATION])
+
+    mobile = db.query(ClickDailyStat).filter(
+        ClickDailyStat.entity_type == ENTITY_APPLICATION,
+        ClickDailyStat.date == date.today(),
+        ClickDailyStat.device_type == "mobile"
+    ).one()
+    assert (mobile.clicks, mobile.unique_users, mobile.unique_ips) == (3, 1, 2)
+
+    stats = click_stats_service.get_daily_statistics(db, ENTITY_APPLICATION, days=7)
+    assert [(item["date"], item["count"]) for item in stats] == [
+        (start.strftime("%Y-%m-%d"), 1),
+        (date.today().strftime("%Y-%m-%d"), 5),
+    ]
+    assert stats[0]["title"] == "Stats App"
+
+    devices = click_stats_service.get_device_distribution(db, ENTITY_APPLICATION, days=7)
+    assert devices == {"mobile": 4, "desktop": 1, "unknown": 1}
+
+@pytest.mark.service
+def test_refresh_is_idempotent(db, application_clicks):
+    """测试重复刷新不会重复累计"""
+    for _ in range(2):
+        click_stats_service.refresh_daily_stats(db, ENTITY_APPLICATION, date.today(), [application_clicks.id])
+        db.commit()
+
+    total = sum(
+        row.clicks for row in db.query(ClickDailyStat).filter(ClickDailyStat.date == date.today())
+    )
+    assert total == 5
+
+@pytest.mark.performance
+def test_statistics_query_count_is_constant(db, application_clicks, query_counter):
+    """测试统计查询只读汇总表，查询次数固定"""
+    click_stats_service.backfill(db, date.today() - timedelta(days=29), date.today(), [ENTITY_APPLICATION])
+
+    with query_counter() as counter:
+        click_stats_service.get_daily_statistics(db, ENTITY_APPLICATION, days=30)
+    assert counter.count == 2
+    assert not any("applicationclicks" in statement for statement in counter.statements)
+
+@pytest.mark.service
+def test_unique_visitors_from_sketches(db, application_clicks):
+    """测试按日期范围合并HyperLogLog草图估算独立访客"""
+    start = date.today() - timedelta(days=1)
+    click_stats_service.backfill(db, start, date.today(), [ENTITY_APPLICATION])
+
+    result = click_stats_service.get_unique_visitors(
+        db, ENTITY_APPLICATION, application_clicks.id, start, date.today()
+    )
+
+    # 用户1、2、3；IP 10.0.0.1~5；访客：3个登录用户 + 1个未登录IP
+    assert result["unique_users"] == 3
+    assert result["unique_ips"] == 5
+    assert result["unique_visitors"] == 4
+    assert [day["unique_users"] for day in result["daily"]] == [1, 2]
@@ -0,0 +1,149 @@
+from collections import Counter
+
+import pytest
+from fastapi import HTTPException
+
+from app.models.banner import Banner
+from app.models.experiment import BannerExperimentVariant
+from app.schemas.experiment import BannerExperimentCreate
+from app.services.click_buffer import ClickBuffer, ENTITY_EXPERIMENT_VARIANT
+from app.services.experiment_service import (
+    ExperimentService,
+    RunningExperiment,
+    VariantEntry,
+    assign_variant,
+    two_proportion_z_test,
+)
+
+POSITION = "experiment_test"
+
+
+@pytest.fixture
+def banners(db):
+    banners = [
+        Banner(
+            title=f"Variant {name}",
+            image=f"http://example.com/{name}.jpg",
+            link_type="url",
+            is_active=True,
+            position=POSITION,
+        )
+        for name in ("a", "b", "other")
+    ]
+    db.add_all(banners)
+    db.commit()
+    for banner in banners:
+        db.refresh(banner)
+    return banners
+
+@pytest.fixture
+def running_experiment(db, banners):
+    service = ExperimentService(ttl=60)
+    experiment = service.create_experiment(db, BannerExperimentCreate(
+        name="creative test",
+        position=POSITION,
+        variants=[
+            {"banner_id": banners[0].id, "name": "control"},
+            {"banner_id": banners[1].id, "name": "new creative"},
+        ],
+    ))
+    service.update_status(db, experiment.id, "running")
+    return service, experiment
+
+@pytest.mark.unit
+def test_assign_variant_is_deterministic_and_weighted():
+    """测试按用户ID哈希分组：结果稳定，流量按权重分配"""
+    experiment = RunningExperiment(1, POSITION, (VariantEntry(10, 100, 1), VariantEntry(11, 101, 3)), 4)
+
+    assignments = Counter(assign_variant(experiment, user_id).id for user_id in range(20000))
+    assert abs(assignments[10] / 20000 - 0.25) < 0.02
+    assert all(assign_variant(experiment, 42) == assign_variant(experiment, 42) for _ in range(10))
+
+@pytest.mark.unit
+def test_two_proportion_z_test():
+    """测试双比例z检验"""
+    z, p = two_proportion_z_test(100, 10000, 150, 10000)
+    assert z == pytest.approx(3.18, abs=0.01)
+    assert p == pytest.approx(0.0015, abs=0.0002)
+    assert two_proportion_z_test(0, 0, 5, 100) == (None, None)
+
+@pytest.mark.service
+def test_select_banners_by_variant(db, banners, running_experiment):
+    """测试每个实验只展示用户所在变体的Banner，未登录用户看到对照组且不计曝光"""
+    service, experiment = running_experiment
+    banner_ids = [banner.id for banner in banners]
+
+    shown, exposed = service.select_banners(db, POSITION, banner_ids, None)
+    assert shown == [banners[0].id, banners[2].id]
+    assert exposed == []
+
+    seen = set()
+    for user_id in range(1, 50):
+        shown, exposed = service.select_banners(db, POSITION, banner_ids, user_id)
+        assert len(shown) == 2 and shown[-1] == banners[2].id
+        assert len(exposed) == 1
+        seen.add(shown[0])
+    assert seen == {banners[0].id, banners[1].id}
+
+    # 停止后恢复展示全部Banner
+    service.update_status(db, experiment.id, "stopped")
+    assert service.select_banners(db, POSITION, banner_ids, 1) == (banner_ids, [])
+
+@pytest.mark.service
+def test_variant_counters_and_stats(db, running_experiment, session_factory):
+    """测试变体计数经缓冲区批量写入，统计接口按计数计算点击率和显著性"""
+    service, experiment = running_experiment
+    control, treatment = experiment.variants
+    buffer = ClickBuffer(session_factory=session_factory, max_events=100000)
+
+    for _ in range(1000):
+        buffer.record_counter(ENTITY_EXPERIMENT_VARIANT, control.id, views=10)
+        buffer.record_counter(ENTITY_EXPERIMENT_VARIANT, treatment.id, views=10)
+    buffer.record_counter(ENTITY_EXPERIMENT_VARIANT, control.id, clicks=100)
+    buffer.record_counter(ENTITY_EXPERIMENT_VARIANT, treatment.id, clicks=150)
+    buffer.flush()
+
+    db.expire_all()
+    assert db.query(BannerExperimentVariant).get(treatment.id).impressions == 10000
+
+    stats = service.get_stats(db, experiment.id)
+    control_stats, treatment_stats = stats["variants"]
+    assert control_stats["is_control"] and control_stats["ctr"] == pytest.approx(0.01)
+    assert treatment_stats["lift"] == pytest.approx(0.5)
+    assert treatment_stats["significant"]
+
+@pytest.mark.service
+def test_create_experiment_validation(db, banners):
+    """测试变体Banner必须存在且属于同一展示位置"""
+    service = ExperimentService()
+    with pytest.raises(HTTPException) as exc_info:
+        service.create_experiment(db, BannerExperimentCreate(
+            name="bad",
+            position="elsewhere",
+            variants=[
+                {"banner_id": banners[0].id, "name": "a"},
+                {"banner_id": banners[1].id, "name": "b"},
+            ],
+        ))
+    assert exc_info.value.status_code == 400
+
+@pytest.mark.service
+def test_banner_in_one_running_experiment(db, banners, running_experiment):
+    """测试同一Banner不能同时属于两个进行中的实验"""
+    service, experiment = running_experiment
+    overlapping = service.create_experiment(db, BannerExperimentCreate(
+        name="overlapping",
+        position=POSITION,
+        variants=[
+            {"banner_id": banners[1].id, "name": "b"},
+            {"banner_id": banners[2].id, "name": "other"},
+        ],
+    ))
+
+    with pytest.raises(HTTPException) as exc_info:
+        service.update_status(db, overlapping.id, "running")
+    assert exc_info.value.status_code == 409
+
+    # 原实验停止后可以开始
+    service.update_status(db, experiment.id, "stopped")
+    assert service.update_status(db, overlapping.id, "running").status == "running"
@@ -0,0 +1,87 @@
+import json
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.models.banner import Banner
+from app.services.banner_schedule import banner_schedule
+from app.services.home_feed_cache import HomeFeedCache
+
+POSITION = "home_feed_test"
+
+
+def _banner(title, **kwargs):
+    return Banner(
+        title=title,
+        image=f"http://example.com/{title}.jpg",
+        link_type="url",
+        link_url="http://example.com",
+        is_active=True,
+        position=POSITION,
+        **kwargs
+    )
+
+@pytest.mark.service
+def test_home_feed_served_from_memory(db, query_counter):
+    """测试首页数据命中缓存时不访问数据库"""
+    db.add(_banner("always"))
+    db.commit()
+    cache = HomeFeedCache(ttl=60)
+
+    feed = cache.get(db, POSITION)
+    assert [banner["title"] for banner in json.loads(feed.body)["banners"]] == ["always"]
+    assert (feed.expires_at - feed.built_at).total_seconds() == 60
+
+    with query_counter() as counter:
+        assert cache.get(db, POSITION) is feed
+    assert counter.count == 0
+
+    # 同一内容的ETag稳定，支持条件请求
+    assert feed.matches(feed.etag)
+    assert feed.matches(f'W/{feed.etag}, "other"')
+    assert not feed.matches('"other"')
+
+@pytest.mark.service
+def test_home_feed_expires_at_next_banner_boundary(db):
+    """测试缓存在Banner上线/下线时间点提前过期"""
+    now = datetime.now()
+    starts_at = now + timedelta(seconds=20)
+    ends_at = now + timedelta(seconds=40)
+    db.add_all([
+        _banner("upcoming", start_time=starts_at),
+        _banner("ending", end_time=ends_at),
+    ])
+    db.commit()
+    cache = HomeFeedCache(ttl=60)
+
+    feed = cache.get(db, POSITION)
+    assert [banner["title"] for banner in json.loads(feed.body)["banners"]] == ["ending"]
+    assert feed.expires_at == starts_at
+
+    # 上线的Banner开始展示后，下一个边界是下线时间之后
+    db.query(Banner).filter(Banner.title == "upcoming").update({Banner.start_time: now})
+    db.commit()
+    banner_schedule.invalidate()
+    cache.invalidate()
+
+    feed = cache.get(db, POSITION)
+    assert len(json.loads(feed.body)["banners"]) == 2
+    assert feed.expires_at == ends_at + timedelta(microseconds=1)
+
+@pytest.mark.service
+def test_home_feed_invalidate(db):
+    """测试Banner修改后失效缓存"""
+    banner = _banner("before")
+    db.add(banner)
+    db.commit()
+    cache = HomeFeedCache(ttl=60)
+    old_feed = cache.get(db, POSITION)
+
+    banner.title = "after"
+    db.commit()
+    banner_schedule.invalidate()
+    cache.invalidate()
+
+    new_feed = cache.get(db, POSITION)
+    assert json.loads(new_feed.body)["banners"][0]["title"] == "after"
+    assert new_feed.etag != old_feed.etag
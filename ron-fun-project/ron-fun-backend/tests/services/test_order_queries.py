@@ -0,0 +1,71 @@
+import pytest
+
+from app.core.security import get_password_hash
+from app.models.product import Order, OrderItem
+from app.models.user import User
+from app.schemas.product import OrderResponse
+from app.services.order_service import order_service
+
+# 测试订单列表的SQL查询次数，防止N+1查询回归
+# 查询次数与订单数量无关：(计数) + 订单 + 订单项(IN查询)
+
+ORDER_COUNT = 100
+
+@pytest.fixture
+def create_test_orders(db, create_test_products):
+    user = User(
+        username="order_query_test",
+        email="order_query@example.com",
+        hashed_password=get_password_hash("password123"),
+        is_active=True,
+        is_superuser=False,
+    )
+    db.add(user)
+    db.flush()
+
+    for i in range(ORDER_COUNT):
+        order = Order(
+            order_no=f"ORDERTEST{i:04d}",
+            user_id=user.id,
+            total_points=300,
+            status=0,
+        )
+        db.add(order)
+        db.flush()
+        for product in create_test_products[:2]:
+            db.add(OrderItem(
+                order_id=order.id,
+                product_id=product.id,
+                product_name=product.product_name or "Product",
+                points_price=product.points_price,
+                quantity=1,
+                total_points=product.points_price,
+            ))
+    db.commit()
+    user_id = user.id
+
+    # 清空会话缓存，确保真实加载关联数据
+    db.expunge_all()
+    return user_id
+
+@pytest.mark.service
+def test_user_orders_query_count(db, create_test_orders, query_counter):
+    """测试用户订单列表（含序列化）的查询次数有上限"""
+    with query_counter() as counter:
+        orders = order_service.get_user_orders(db, create_test_orders, limit=ORDER_COUNT)
+        responses = [OrderResponse.from_orm(order) for order in orders]
+
+    assert len(responses) == ORDER_COUNT
+    assert all(len(response.items) == 2 for response in responses)
+    assert counter.count <= 2, counter.statements
+
+@pytest.mark.service
+def test_admin_orders_query_count(db, create_test_orders, query_counter):
+    """测试管理后台订单列表（含序列化）的查询次数有上限"""
+    with query_counter() as counter:
+        orders, total = order_service.get_orders(db, limit=ORDER_COUNT)
+        responses = [OrderResponse.from_orm(order) for order in orders]
+
+    assert total == ORDER_COUNT
+    assert all(len(response.items) == 2 for response in responses)
+    assert counter.count <= 3, counter.statements
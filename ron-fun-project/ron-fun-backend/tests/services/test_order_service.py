@@ -0,0 +1,139 @@
+import pytest
+from fastapi import HTTPException
+
+from app.models.user import User
+from app.models.product import Order, OrderItem, OrderEvent
+from app.models.point import PointLog
+from app.services.order_service import order_service
+from app.services.order_worker import OrderWorkerPool
+
+@pytest.fixture
+def pending_order(db, normal_token, create_test_products):
+    user = db.query(User).filter(User.username == "user_test").first()
+    product = create_test_products[0]
+
+    # 模拟下单：扣减积分和库存
+    user.points -= 200
+    user.used_points = 200
+    product.stock -= 2
+    product.sold_count = 2
+
+    order = Order(order_no="ORDERSTATE0001", user_id=user.id, total_points=200, status=0)
+    db.add(order)
+    db.flush()
+    db.add(OrderItem(
+        order_id=order.id,
+        product_id=product.id,
+        product_name="Product 1",
+        points_price=100,
+        quantity=2,
+        total_points=200,
+        stock_deducted=True,
+    ))
+    db.commit()
+    return order
+
+@pytest.fixture
+def worker_pool(session_factory):
+    return OrderWorkerPool(session_factory=session_factory, worker_count=1, batch_size=10)
+
+@pytest.mark.service
+def test_cancel_refunds_points_and_restores_stock(db, pending_order, worker_pool, create_test_products):
+    """测试取消订单由工作线程退还积分并恢复库存"""
+    event = order_service.enqueue_event(db, pending_order, "cancel", {"cancel_reason": "不想要了"})
+
+    # 请求中只写入事件
+    assert event.status == 0
+    assert db.query(Order).get(pending_order.id).status == 0
+
+    assert worker_pool.process_batch(0) == 1
+    db.expire_all()
+
+    order = db.query(Order).get(pending_order.id)
+    user = db.query(User).get(order.user_id)
+    product = create_test_products[0]
+    db.refresh(product)
+
+    assert order.status == -1
+    assert order.cancel_reason == "不想要了"
+    assert user.points == 1000
+    assert user.used_points == 0
+    assert product.stock == 100
+    assert product.sold_count == 0
+    assert db.query(PointLog).filter(PointLog.type == "refund", PointLog.related_id == order.id).count() == 1
+    assert db.query(OrderEvent).get(event.id).status == 2
+
+@pytest.mark.service
+def test_cancel_restores_last_unit(db, normal_token, worker_pool, create_test_products):
+    """测试兑换最后一件后取消订单：库存从0恢复为1，而不是当作不限量跳过"""
+    user = db.query(User).filter(User.username == "user_test").first()
+    limited, unlimited = create_test_products[0], create_test_products[1]
+    # 模拟下单：限量商品最后一件被兑换，库存扣减为0；不限量商品不扣减
+    limited.stock = 0
+    unlimited.stock = 0
+
+    order = Order(order_no="ORDERSTATE0002", user_id=user.id, total_points=200, status=0)
+    db.add(order)
+    db.flush()
+    db.add_all([
+        OrderItem(order_id=order.id, product_id=limited.id, product_name="Limited", points_price=100,
+                  quantity=1, total_points=100, stock_deducted=True),
+        OrderItem(order_id=order.id, product_id=unlimited.id, product_name="Unlimited", points_price=100,
+                  quantity=1, total_points=100, stock_deducted=False),
+    ])
+    db.commit()
+
+    order_service.enqueue_event(db, order, "cancel")
+    assert worker_pool.process_batch(0) == 1
+
+    db.refresh(limited)
+    db.refresh(unlimited)
+    assert limited.stock == 1
+    assert unlimited.stock == 0
+
+@pytest.mark.service
+def test_invalid_transition_fails_without_retry(db, pending_order, worker_pool):
+    """测试状态已不允许的事件直接标记失败，不重复重试"""
+    event = order_service.enqueue_event(db, pending_order, "confirm")
+    # 事件处理前订单已被其他途径完成
+    pending_order.status = 3
+    db.commit()
+
+    assert worker_pool.process_batch(0) == 1
+    db.expire_all()
+
+    event = db.query(OrderEvent).get(event.id)
+    assert event.status == -1
+    assert event.attempts == 1
+    assert "不允许" in event.last_error
+    assert worker_pool.process_batch(0) == 0
+
+@pytest.mark.service
+def test_order_transitions(db, pending_order, worker_pool):
+    """测试订单状态机流转"""
+    # 待处理订单不能直接发货
+    with pytest.raises(HTTPException) as exc_info:
+        order_service.enqueue_event(db, pending_order, "ship", {"express_company": "SF", "express_no": "1"})
+    assert exc_info.value.status_code == 400
+
+    order_service.enqueue_event(db, pending_order, "confirm")
+
+    # 有未处理完的事件时拒绝新事件
+    with pytest.raises(HTTPException) as exc_info:
+        order_service.enqueue_event(db, pending_order, "cancel")
+    assert exc_info.value.status_code == 409
+
+    worker_pool.process_batch(0)
+    db.refresh(pending_order)
+    assert pending_order.status == 1
+
+    order_service.enqueue_event(db, pending_order, "ship", {"express_company": "SF", "express_no": "SF001"})
+    worker_pool.process_batch(0)
+    db.refresh(pending_order)
+    assert pending_order.status == 2
+    assert pending_order.express_no == "SF001"
+    assert pending_order.express_time is not None
+
+    # 已发货订单不能取消
+    with pytest.raises(HTTPException):
+        order_service.enqueue_event(db, pending_order, "cancel")
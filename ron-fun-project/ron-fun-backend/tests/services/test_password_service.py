@@ -0,0 +1,86 @@
+import asyncio
+import time
+
+import pytest
+from fastapi import HTTPException
+from passlib.context import CryptContext
+
+from app.services.password_service import PasswordService
+
+
+def _context(rounds: int) -> CryptContext:
+    return CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=rounds)
+
+@pytest.mark.unit
+def test_rehash_when_rounds_change():
+    """测试bcrypt成本参数调整后，验证通过时返回新参数的哈希"""
+    old_hash = _context(4).hash("secret")
+    service = PasswordService(_context(5))
+
+    assert asyncio.run(service.verify_and_update("wrong", old_hash)) == (False, None)
+    valid, new_hash = asyncio.run(service.verify_and_update("secret", old_hash))
+    assert valid and new_hash.startswith("$2b$05$")
+    assert asyncio.run(service.verify_and_update("secret", new_hash)) == (True, None)
+    service.shutdown()
+
+@pytest.mark.unit
+def test_rejects_when_queue_full():
+    """测试排队任务数超过上限时返回503"""
+    context = _context(8)
+    hashed = context.hash("secret")
+    service = PasswordService(context, max_workers=1, max_pending=2)
+
+    async def burst():
+        return await asyncio.gather(
+            *(service.verify("secret", hashed) for _ in range(5)),
+            return_exceptions=True
+        )
+
+    results = asyncio.run(burst())
+    assert results.count(True) == 2
+    rejected = [result for result in results if isinstance(result, HTTPException)]
+    assert len(rejected) == 3 and rejected[0].status_code == 503
+    assert service.pending == 0
+    service.shutdown()
+
+@pytest.mark.performance
+def test_login_burst_does_not_block_event_loop():
+    """测试并发登录时其他请求的延迟：bcrypt在线程池中执行，事件循环不被阻塞"""
+    context = _context(10)
+    hashed = context.hash("secret")
+    service = PasswordService(context, max_workers=2, max_pending=64)
+    logins = 16
+    interval = 0.005
+
+    async def run(verify) -> float:
+        done = asyncio.Event()
+
+        async def other_requests() -> float:
+            # 模拟其他接口：记录每次让出事件循环后恢复执行的额外延迟
+            worst = 0.0
+            while not done.is_set():
+                start_time = time.perf_counter()
+                await asyncio.sleep(interval)
+                worst = max(worst, time.perf_counter() - start_time - interval)
+            return worst
+
+        probe = asyncio.create_task(other_requests())
+        await asyncio.sleep(0)
+        assert all(await asyncio.gather(*(verify() for _ in range(logins))))
+        done.set()
+        return await probe
+
+    async def blocking_verify() -> bool:
+        return context.verify("secret", hashed)
+
+    blocking_delay = asyncio.run(run(blocking_verify))
+    offloaded_delay = asyncio.run(run(lambda: service.verify("secret", hashed)))
+    service.shutdown()
+
+    print(
+        f"{logins}个并发登录期间其他请求的最大额外延迟: "
+        f"同步bcrypt {blocking_delay * 1000:.1f}毫秒，线程池 {offloaded_delay * 1000:.1f}毫秒"
+    )
+    # 同步bcrypt会让其他请求等完全部登录（约一秒），线程池时通常只有几毫秒；
+    # 只断言宽松的上限，具体数值以打印结果为准
+    assert offloaded_delay < 0.5, "并发登录期间事件循环被阻塞"
@@ -0,0 +1,84 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+from app.api.deps import get_current_active_superuser, get_current_principal, get_current_user, get_optional_principal
+from app.core.auth import create_access_token
+from app.core.security import get_password_hash
+from app.models.user import User
+from app.services.principal_cache import Principal, PrincipalCache, principal_cache
+
+
+@pytest.fixture
+def user(db):
+    user = User(
+        username="principal_test",
+        email="principal@example.com",
+        hashed_password=get_password_hash("password123"),
+        is_active=True,
+        is_superuser=False,
+        nickname="Principal",
+    )
+    db.add(user)
+    db.commit()
+    db.refresh(user)
+    return user
+
+@pytest.mark.service
+def test_principal_cached_until_invalidated(db, user, query_counter):
+    """测试用户快照命中缓存不查库，修改用户后显式失效"""
+    cache = PrincipalCache(ttl=30)
+
+    with query_counter() as counter:
+        assert cache.get(db, user.id) == Principal(user.id, True, False, 1)
+        assert cache.get(db, user.id) == Principal(user.id, True, False, 1)
+        assert cache.get(db, 9999) is None
+        assert cache.get(db, 9999) is None
+    assert counter.count == 2
+
+    user.is_active = False
+    db.commit()
+    assert cache.get(db, user.id).is_active
+
+    cache.invalidate(user.id)
+    assert not cache.get(db, user.id).is_active
+
+@pytest.mark.service
+def test_dependencies_use_principal(db, user):
+    """测试认证依赖：普通用户不能访问管理接口，禁用用户视为未登录"""
+    token = create_access_token(user.id)
+
+    principal = asyncio.run(get_current_principal(db=db, token=token))
+    assert principal.id == user.id
+    with pytest.raises(HTTPException) as exc_info:
+        asyncio.run(get_current_active_superuser(current_user=principal))
+    assert exc_info.value.status_code == 403
+
+    assert asyncio.run(get_optional_principal(db=db, token=token)) == principal
+    assert asyncio.run(get_optional_principal(db=db, token="invalid")) is None
+
+    user.is_active = False
+    db.commit()
+    principal_cache.invalidate(user.id)
+    assert asyncio.run(get_optional_principal(db=db, token=token)) is None
+
+@pytest.mark.performance
+def test_queries_per_authenticated_request(db, user, query_counter):
+    """测试每个认证请求的用户查询次数：缓存命中后只用到ID的接口不再查询用户表"""
+    token = create_access_token(user.id)
+    rounds = 100
+
+    with query_counter() as counter:
+        for _ in range(rounds):
+            principal = asyncio.run(get_current_principal(db=db, token=token))
+    principal_queries = counter.count
+
+    with query_counter() as counter:
+        for _ in range(rounds):
+            asyncio.run(get_current_user(db=db, principal=principal))
+    row_queries = counter.count
+
+    print(f"{rounds}次请求的用户查询次数: 快照 {principal_queries}，完整用户对象 {row_queries}")
+    assert principal_queries == 1
+    assert row_queries == rounds
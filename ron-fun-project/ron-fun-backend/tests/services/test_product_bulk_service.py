@@ -0,0 +1,81 @@
+import csv
+import io
+
+import pytest
+from fastapi import HTTPException
+
+from app.models.product import Product
+from app.services.product_bulk_service import product_bulk_service, EXPORT_COLUMNS
+
+
+def _csv_file(rows):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerows(rows)
+    return io.BytesIO(buffer.getvalue().encode("utf-8-sig"))
+
+@pytest.mark.service
+def test_import_products_csv(db, create_test_products):
+    """测试CSV导入：新增、按id更新、分类名称解析和错误行"""
+    existing, restocked = create_test_products[0], create_test_products[1]
+    file = _csv_file([
+        ["id", "product_name", "points_price", "stock", "category_name", "images", "is_hot"],
+        ["", "Imported 1", "500", "10", "Category 2", "a.jpg|b.jpg", "1"],
+        [str(existing.id), "Renamed", "150", "", "", "", "0"],
+        [str(restocked.id), "", "", "7", "", "", ""],
+        ["", "Bad price", "abc", "", "", "", ""],
+        ["", "Bad category", "100", "", "Unknown", "", ""],
+        ["99999", "Missing", "100", "", "", "", ""],
+    ])
+    restocked_name, restocked_price = restocked.product_name, restocked.points_price
+    stock, category_id = existing.stock, existing.category_id
+
+    result = product_bulk_service.import_products(db, file, "products.csv")
+
+    assert result["created"] == 1
+    assert result["updated"] == 2
+    assert result["failed"] == 3
+    assert [error["row"] for error in result["errors"]] == [5, 6, 7]
+
+    imported = db.query(Product).filter(Product.product_name == "Imported 1").one()
+    assert imported.points_price == 500
+    assert imported.images == ["a.jpg", "b.jpg"]
+    assert imported.category.name == "Category 2"
+    assert imported.is_hot is True
+
+    # 更新行的空单元格不修改原数据
+    db.refresh(existing)
+    assert existing.product_name == "Renamed"
+    assert existing.points_price == 150 and existing.product_price == 150
+    assert existing.stock == stock and existing.category_id == category_id
+    assert existing.is_hot is False
+
+    db.refresh(restocked)
+    assert restocked.stock == 7
+    assert restocked.product_name == restocked_name and restocked.points_price == restocked_price
+
+@pytest.mark.service
+def test_import_rejects_unknown_format(db):
+    """测试不支持的文件格式"""
+    with pytest.raises(HTTPException) as exc_info:
+        product_bulk_service.import_products(db, io.BytesIO(b""), "products.txt")
+    assert exc_info.value.status_code == 400
+
+@pytest.mark.service
+def test_export_products_csv_round_trip(db, create_test_products):
+    """测试流式导出的CSV可以重新导入"""
+    for product in create_test_products:
+        product.product_name = f"Product {product.id}"
+    db.commit()
+
+    content = "".join(product_bulk_service.export_csv(db))
+    rows = list(csv.reader(io.StringIO(content.lstrip("\ufeff"))))
+
+    assert rows[0] == EXPORT_COLUMNS
+    assert len(rows) == len(create_test_products) + 1
+
+    result = product_bulk_service.import_products(
+        db, io.BytesIO(content.encode("utf-8")), "products.csv"
+    )
+    assert result["updated"] == len(create_test_products)
+    assert result["failed"] == 0
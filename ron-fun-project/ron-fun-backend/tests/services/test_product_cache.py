@@ -0,0 +1,91 @@
+import pytest
+
+from app.services.product_cache import ProductListingCache, product_facets, product_listing_cache
+from app.services.product_service import product_service
+
+
+@pytest.mark.unit
+def test_product_facets():
+    """测试商品所属维度计算"""
+    facets = product_facets(2, True, False, True)
+
+    # 2个分类维度 × 推荐2种 × 热门1种 × 新品2种
+    assert len(facets) == 8
+    assert (None, None, None, None) in facets
+    assert (2, True, None, True) in facets
+    assert (2, None, True, None) not in facets
+
+    # 无分类的商品只属于不限分类的维度
+    assert all(facet[0] is None for facet in product_facets(None, False, False, False))
+
+@pytest.mark.unit
+def test_facet_key_not_cacheable():
+    """测试筛选False的查询不走缓存"""
+    assert ProductListingCache.facet_key(1, None, None, None) == (1, None, None, None)
+    assert ProductListingCache.facet_key(0, True, None, None) == (None, True, None, None)
+    assert ProductListingCache.facet_key(None, None, False, None) is None
+
+@pytest.mark.unit
+def test_invalidate_only_affected_facets():
+    """测试商品写入只失效受影响的维度"""
+    cache = ProductListingCache(ttl=60)
+    generation = cache.generation
+    cache.set_ids((None, None, None, None), [1, 2], generation)
+    cache.set_ids((None, None, True, None), [2], generation)
+    cache.set_ids((3, None, None, None), [5], generation)
+    cache.set_products({1: {"id": 1}, 2: {"id": 2}}, generation)
+
+    # 商品1（分类1，推荐）被修改
+    cache.invalidate(1, product_facets(1, True, False, False))
+
+    assert cache.get_ids((None, None, None, None)) is None
+    assert cache.get_ids((None, None, True, None)) == [2]
+    assert cache.get_ids((3, None, None, None)) == [5]
+    assert cache.get_products([1, 2]) == {2: {"id": 2}}
+
+@pytest.mark.unit
+def test_stale_load_discarded():
+    """测试加载期间发生失效时丢弃旧数据"""
+    cache = ProductListingCache(ttl=60)
+    generation = cache.generation
+    cache.invalidate(1, ())
+    cache.set_ids((None, None, None, None), [1], generation)
+
+    assert cache.get_ids((None, None, None, None)) is None
+
+@pytest.mark.service
+def test_get_products_uses_listing_cache(db, create_test_products):
+    """测试商品列表分页切片和写入失效"""
+    product_listing_cache.clear()
+
+    products = product_service.get_products(db, 0, 5)
+    assert len(products) == 5
+    # 按sort_order倒序
+    assert products[0]["sort_order"] == 9
+
+    page = product_service.get_products(db, 5, 5)
+    assert [p["sort_order"] for p in page] == [4, 3, 2, 1]
+
+    # 修改排序后失效对应维度，重新加载
+    product = create_test_products[0]
+    old_facets = product_listing_cache.facets_of(product)
+    product.sort_order = 100
+    db.commit()
+    product_listing_cache.invalidate(product.id, old_facets | product_listing_cache.facets_of(product))
+
+    products = product_service.get_products(db, 0, 1)
+    assert products[0]["id"] == product.id
+
+@pytest.mark.service
+def test_get_products_by_ids(db, create_test_products):
+    """测试批量获取商品保持请求顺序并标记缺失ID"""
+    product_listing_cache.clear()
+    first, second = create_test_products[0].id, create_test_products[1].id
+
+    items, missing_ids = product_service.get_products_by_ids(db, [second, 9999, first])
+
+    assert [item["id"] for item in items] == [second, first]
+    assert missing_ids == [9999]
+
+    # 再次获取时从商品详情缓存读取
+    assert set(product_listing_cache.get_products([first, second])) == {first, second}